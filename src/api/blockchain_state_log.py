@@ -0,0 +1,365 @@
+"""
+Append-only blockchain state log shared by the consensus service and API readers.
+
+The consensus service used to rewrite the whole chain to
+data/blockchain_state.json on every write. The log instead keeps
+newline-delimited JSON segments next to that path plus a small manifest:
+
+    data/blockchain_state.d/
+        manifest.json            # atomically replaced on every commit
+        segment-000000.ndjson    # one block record per line
+        segment-000001.ndjson
+
+Each commit appends the new records, fsyncs the segment and then replaces
+the manifest, which records the committed byte length of every segment and
+the current tip. Readers only read up to those lengths, so they never see a
+half-written line, and they only read bytes appended since their last
+refresh.
+
+Reorgs are appended too: the last record for an index wins, and records
+above the manifest's tip index are ignored.
+"""
+
+import os
+import json
+import time
+import bisect
+from typing import Any, Dict, Iterable, List, Optional
+
+LOG_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+DEFAULT_SEGMENT_MAX_RECORDS = 10000
+DEFAULT_RECENT_HASHES = 4096
+
+
+def log_dir_for(blockchain_state_path: str) -> str:
+    """Directory holding the segment log for a blockchain_state.json path."""
+    root, _ = os.path.splitext(blockchain_state_path)
+    return f"{root}.d"
+
+
+def read_manifest(log_dir: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the log manifest.
+    
+    Args:
+        log_dir: Log directory
+    
+    Returns:
+        Manifest dict, or None if there is no readable manifest
+    """
+    try:
+        with open(os.path.join(log_dir, MANIFEST_NAME), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path: str, data: bytes):
+    """Write data to path via a temporary file and rename."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class BlockchainStateWriter:
+    """
+    Appends block records to the segment log.
+    
+    Each commit costs O(new records); nothing already written is rewritten.
+    """
+    
+    def __init__(self, log_dir: str, segment_max_records: int = DEFAULT_SEGMENT_MAX_RECORDS,
+                 recent_hashes: int = DEFAULT_RECENT_HASHES):
+        """
+        Initialize writer, resuming from an existing manifest.
+        
+        Args:
+            log_dir: Log directory (created if missing)
+            segment_max_records: Records per segment before rolling to a new one
+            recent_hashes: Number of recent index -> hash entries kept for
+                finding where a new chain diverges from what was written
+        """
+        self.log_dir = log_dir
+        self.segment_max_records = segment_max_records
+        self.recent_hashes = recent_hashes
+        os.makedirs(log_dir, exist_ok=True)
+        
+        self.manifest = read_manifest(log_dir) or {
+            "version": LOG_FORMAT_VERSION,
+            "segments": [],
+            "tip_index": -1,
+            "latest_block": None,
+            "block_count": 0,
+            "last_updated": 0.0
+        }
+        self._hashes: Dict[int, str] = {}
+        self._load_recent_hashes()
+    
+    @property
+    def tip_index(self) -> int:
+        return self.manifest["tip_index"]
+    
+    def hash_at(self, index: int) -> Optional[str]:
+        """
+        Block hash written at index, if still remembered.
+        
+        Args:
+            index: Block index
+        
+        Returns:
+            Block hash or None
+        """
+        if index > self.tip_index:
+            return None
+        return self._hashes.get(index)
+    
+    def _load_recent_hashes(self):
+        """Rebuild the recent index -> hash map from the newest segments."""
+        for segment in reversed(self.manifest["segments"]):
+            path = os.path.join(self.log_dir, segment["name"])
+            with open(path, 'rb') as f:
+                data = f.read(segment["bytes"])
+            # Newest record for an index wins: scan newest first
+            for line in reversed(data.splitlines()):
+                record = json.loads(line)
+                index = record["index"]
+                if index <= self.tip_index and index not in self._hashes:
+                    self._hashes[index] = record["block_hash"]
+            if len(self._hashes) >= self.recent_hashes:
+                break
+    
+    def commit(self, records: Iterable[Dict[str, Any]], latest_block: Dict[str, Any],
+               metadata: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Append records and publish a new manifest.
+        
+        Args:
+            records: Block records in ascending index order; the first may
+                replace already written indices after a reorg
+            latest_block: Record describing the new tip
+            metadata: Extra manifest fields (e.g. consensus_version)
+        
+        Returns:
+            Number of records appended
+        """
+        records = list(records)
+        segments = self.manifest["segments"]
+        
+        pending: List[bytes] = []
+        for record in records:
+            if not segments or segments[-1]["records"] + len(pending) >= self.segment_max_records:
+                self._append(pending)
+                pending = []
+                segments.append({
+                    "name": f"segment-{len(segments):06d}.ndjson",
+                    "first_index": record["index"],
+                    "max_index": record["index"],
+                    "records": 0,
+                    "bytes": 0
+                })
+            segments[-1]["max_index"] = max(segments[-1]["max_index"], record["index"])
+            pending.append(json.dumps(record, separators=(',', ':')).encode() + b"\n")
+        self._append(pending)
+        
+        for record in records:
+            self._hashes[record["index"]] = record["block_hash"]
+        if len(self._hashes) > self.recent_hashes:
+            cutoff = latest_block["index"] - self.recent_hashes
+            self._hashes = {i: h for i, h in self._hashes.items() if i > cutoff}
+        
+        self.manifest.update(metadata or {})
+        self.manifest.update({
+            "version": LOG_FORMAT_VERSION,
+            "tip_index": latest_block["index"],
+            "latest_block": latest_block,
+            "block_count": latest_block["index"] + 1,
+            "last_updated": time.time()
+        })
+        _write_atomic(os.path.join(self.log_dir, MANIFEST_NAME),
+                      json.dumps(self.manifest, indent=2).encode())
+        return len(records)
+    
+    def _append(self, lines: List[bytes]):
+        """Append encoded lines to the newest segment and fsync it."""
+        if not lines:
+            return
+        segment = self.manifest["segments"][-1]
+        path = os.path.join(self.log_dir, segment["name"])
+        with open(path, 'ab') as f:
+            # Drop anything past the committed length (an interrupted append)
+            f.truncate(segment["bytes"])
+            f.seek(segment["bytes"])
+            data = b"".join(lines)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        segment["records"] += len(lines)
+        segment["bytes"] += len(data)
+
+
+class BlockchainStateReader:
+    """
+    Tails the segment log into an in-memory index.
+    
+    refresh() only reads bytes appended since the previous refresh. Old
+    deployments without a log fall back to parsing blockchain_state.json,
+    re-read only when its mtime changes.
+    """
+    
+    def __init__(self, blockchain_state_path: str, min_index: int = 0):
+        """
+        Initialize reader.
+        
+        Args:
+            blockchain_state_path: Path of the (legacy) blockchain_state.json
+            min_index: Skip records below this index (segments entirely
+                below it are not read at all)
+        """
+        self.blockchain_state_path = blockchain_state_path
+        self.min_index = min_index
+        self.log_dir = log_dir_for(blockchain_state_path)
+        self.latest_block: Optional[Dict[str, Any]] = None
+        # Only legacy blockchain_state.json files carry ipfs_data; the log does not
+        self.ipfs_data: Dict[str, Any] = {}
+        self.tip_index = -1
+        self._by_index: Dict[int, Dict[str, Any]] = {}
+        # Keys of _by_index in ascending order
+        self._indices: List[int] = []
+        self._by_cid: Dict[str, Dict[str, Any]] = {}
+        self._offsets: Dict[str, int] = {}
+        self._manifest_mtime = None
+        self._legacy_mtime = None
+    
+    def refresh(self) -> bool:
+        """
+        Pick up everything committed since the last refresh.
+        
+        Returns:
+            True if any state is available
+        """
+        manifest_path = os.path.join(self.log_dir, MANIFEST_NAME)
+        try:
+            stat = os.stat(manifest_path)
+        except OSError:
+            return self._refresh_legacy()
+        
+        # The manifest is replaced by rename, so a new inode means a new commit
+        mtime = (stat.st_ino, stat.st_mtime_ns)
+        if mtime == self._manifest_mtime:
+            return True
+        manifest = read_manifest(self.log_dir)
+        if manifest is None:
+            return self.latest_block is not None
+        
+        for segment in manifest["segments"]:
+            name = segment["name"]
+            offset = self._offsets.get(name, 0)
+            if segment["bytes"] <= offset or segment.get("max_index", self.min_index) < self.min_index:
+                continue
+            with open(os.path.join(self.log_dir, name), 'rb') as f:
+                f.seek(offset)
+                data = f.read(segment["bytes"] - offset)
+            for line in data.splitlines():
+                self._index_record(json.loads(line))
+            self._offsets[name] = segment["bytes"]
+        
+        self._set_tip(manifest["tip_index"])
+        self.latest_block = manifest.get("latest_block")
+        self._manifest_mtime = mtime
+        return True
+    
+    def _refresh_legacy(self) -> bool:
+        """Load a full blockchain_state.json (pre-log deployments)."""
+        try:
+            stat = os.stat(self.blockchain_state_path)
+        except OSError:
+            return False
+        mtime = (stat.st_ino, stat.st_mtime_ns)
+        if mtime == self._legacy_mtime:
+            return True
+        
+        with open(self.blockchain_state_path, 'r') as f:
+            state = json.load(f)
+        
+        self._by_index.clear()
+        self._indices.clear()
+        self._by_cid.clear()
+        for block in state.get('blocks', state.get('block_history', [])):
+            self._index_record(block)
+        self.latest_block = state.get('latest_block')
+        self.ipfs_data = state.get('ipfs_data', {})
+        tip = self.latest_block.get('index') if self.latest_block else None
+        self._set_tip(tip if tip is not None else max(self._by_index, default=-1))
+        self._legacy_mtime = mtime
+        return True
+    
+    def _index_record(self, record: Dict[str, Any]):
+        index = record.get('index')
+        if index is None or index < self.min_index:
+            return
+        previous = self._by_index.get(index)
+        if previous is not None:
+            self._forget_cid(previous)
+        elif not self._indices or index > self._indices[-1]:
+            self._indices.append(index)
+        else:
+            bisect.insort(self._indices, index)
+        self._by_index[index] = record
+        for key in ('cid', 'offchain_cid'):
+            cid = record.get(key)
+            if cid:
+                self._by_cid[cid] = record
+    
+    def _forget_cid(self, record: Dict[str, Any]):
+        for key in ('cid', 'offchain_cid'):
+            cid = record.get(key)
+            if cid and self._by_cid.get(cid) is record:
+                del self._by_cid[cid]
+    
+    def _set_tip(self, tip_index: int):
+        """Drop records above the tip (blocks removed by a reorg)."""
+        if tip_index < self.tip_index:
+            cut = bisect.bisect_right(self._indices, tip_index)
+            for index in self._indices[cut:]:
+                self._forget_cid(self._by_index.pop(index))
+            del self._indices[cut:]
+        self.tip_index = tip_index
+    
+    @property
+    def block_count(self) -> int:
+        return bisect.bisect_right(self._indices, self.tip_index)
+    
+    def get_block(self, index: int) -> Optional[Dict[str, Any]]:
+        """Block record at index, if on the current chain."""
+        if index > self.tip_index:
+            return None
+        return self._by_index.get(index)
+    
+    def get_by_cid(self, cid: str) -> Optional[Dict[str, Any]]:
+        """Block record referencing cid."""
+        record = self._by_cid.get(cid)
+        if record is None or record.get('index', 0) > self.tip_index:
+            return None
+        return record
+    
+    def cids(self) -> List[str]:
+        """All CIDs referenced by blocks on the current chain."""
+        return [cid for cid, record in self._by_cid.items() if record.get('index', 0) <= self.tip_index]
+    
+    def blocks(self, start: int = 0) -> List[Dict[str, Any]]:
+        """
+        Block records on the current chain in index order.
+        
+        Args:
+            start: First index to include
+        
+        Returns:
+            List of block records
+        """
+        first = bisect.bisect_left(self._indices, start)
+        last = bisect.bisect_right(self._indices, self.tip_index)
+        return [self._by_index[i] for i in self._indices[first:last]]
@@ -13,6 +13,11 @@ from typing import Dict, List, Optional, Set, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
 
+try:
+    from .chain_stats import ChainStatsAggregator, TIME_WINDOWS, LONG_BLOCK_TIME_INTERVALS
+except ImportError:
+    from chain_stats import ChainStatsAggregator, TIME_WINDOWS, LONG_BLOCK_TIME_INTERVALS
+
 class PruningMode(Enum):
     LIGHT = "light"      # Keep headers + commit_index only
     FULL = "full"        # Keep recent N epochs of bundles
@@ -52,6 +57,82 @@ class COINjectureStorage:
         
         # IPFS client (placeholder for now)
         self.ipfs_client = None
+        self._bundle_cache = None
+        self._chain_stats = None
+    
+    @property
+    def bundle_cache(self):
+        """Local content-addressed proof bundle cache under data_dir."""
+        if self._bundle_cache is None:
+            from bundle_cache import get_bundle_cache
+            self._bundle_cache = get_bundle_cache(os.path.join(self.data_dir, "bundle_cache"))
+        return self._bundle_cache
+    
+    # Beyond this many missed blocks, reloading the windows is cheaper than replaying
+    CHAIN_STATS_MAX_CATCH_UP = 1000
+    
+    @property
+    def chain_stats(self) -> ChainStatsAggregator:
+        """Rolling chain statistics, seeded from the database on first use."""
+        if self._chain_stats is None:
+            stats = ChainStatsAggregator(loader=self._load_chain_stats_blocks)
+            stats.rebuild(self._load_chain_stats_blocks())
+            self._chain_stats = stats
+        return self._chain_stats
+    
+    def _load_chain_stats_blocks(self) -> List[dict]:
+        """Canonical blocks covering every chain stats window, in height order."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT b.block_bytes, b.work_score, b.gas_used, b.gas_limit, b.gas_price,
+                       b.reward, b.cumulative_work
+                FROM blocks b JOIN work_index w ON w.height = b.height AND w.block_hash = b.block_hash
+                WHERE b.block_bytes IS NOT NULL
+                  AND (b.timestamp >= ? OR b.height > (SELECT MAX(height) FROM work_index) - ?)
+                ORDER BY b.height ASC
+            ''', (time.time() - max(TIME_WINDOWS.values()), LONG_BLOCK_TIME_INTERVALS + 1))
+            results = cursor.fetchall()
+            conn.close()
+            
+            return [self._decode_block_row(*row) for row in results]
+            
+        except Exception as e:
+            print(f"❌ Error loading chain stats blocks: {e}")
+            return []
+    
+    def get_chain_stats(self) -> dict:
+        """
+        Snapshot of the rolling chain statistics.
+        
+        Blocks committed by another writer since the last call are folded in
+        first, so this costs one MAX(height) lookup plus any new blocks.
+        """
+        stats = self.chain_stats
+        latest_height = self.get_latest_height()
+        if latest_height - stats.latest_height > self.CHAIN_STATS_MAX_CATCH_UP:
+            stats.rebuild(self._load_chain_stats_blocks())
+        elif latest_height > stats.latest_height:
+            last = stats.latest_height
+            for block_data in self.query_blocks(limit=latest_height - last, sort_by='height',
+                                                sort_order='asc', after=(last, last)):
+                stats.add_block(block_data)
+        return stats.snapshot()
+    
+    def get_ipfs_bytes(self, cid: str, api_url: str = "http://localhost:5001") -> Optional[bytes]:
+        """Raw IPFS content for a CID, served from the bundle cache when possible."""
+        cached = self.bundle_cache.get(cid)
+        if cached is not None:
+            return cached
+        
+        from storage import get_ipfs_client
+        ipfs_client = get_ipfs_client(api_url)
+        if not ipfs_client.health_check():
+            print(f"❌ IPFS daemon not available for CID: {cid}")
+            return None
+        return self.bundle_cache.fetch(cid, ipfs_client.get)
         
     def init_database(self):
         """Initialize database with storage.md schema"""
@@ -80,9 +161,28 @@ class COINjectureStorage:
                 gas_price REAL DEFAULT 0.000001,
                 reward REAL DEFAULT 0,
                 cumulative_work REAL DEFAULT 0,
-                is_full_block BOOLEAN DEFAULT 0
+                is_full_block BOOLEAN DEFAULT 0,
+                miner_address TEXT,
+                cid TEXT,
+                previous_hash TEXT
+            )
+        ''')
+        self._migrate_block_columns(cursor)
+        
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'miner_stats'")
+        has_miner_stats = cursor.fetchone() is not None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS miner_stats (
+                miner_address TEXT PRIMARY KEY,
+                blocks_mined INTEGER NOT NULL DEFAULT 0,
+                total_reward REAL NOT NULL DEFAULT 0,
+                total_work REAL NOT NULL DEFAULT 0,
+                last_height INTEGER,
+                last_timestamp REAL
             )
         ''')
+        if not has_miner_stats:
+            self._backfill_miner_stats(cursor)
         
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS tips (
@@ -92,12 +192,32 @@ class COINjectureStorage:
             )
         ''')
         
+        cursor.execute('PRAGMA table_info(work_index)')
+        work_columns = {row[1] for row in cursor.fetchall()}
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS work_index (
                 height INTEGER PRIMARY KEY,
-                cumulative_work INTEGER NOT NULL
+                cumulative_work INTEGER NOT NULL,
+                block_hash TEXT
+            )
+        ''')
+        if 'block_hash' not in work_columns:
+            self._migrate_work_index(cursor, bool(work_columns))
+        
+        # Explorer totals over canonical blocks, kept current by add_block_data
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chain_totals'")
+        has_chain_totals = cursor.fetchone() is not None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS chain_totals (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                total_blocks INTEGER NOT NULL DEFAULT 0,
+                total_gas_used INTEGER NOT NULL DEFAULT 0,
+                total_rewards REAL NOT NULL DEFAULT 0,
+                total_work REAL NOT NULL DEFAULT 0
             )
         ''')
+        if not has_chain_totals:
+            self._backfill_chain_totals(cursor)
         
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS commit_index (
@@ -118,6 +238,14 @@ class COINjectureStorage:
         # Create indexes for performance
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_headers_height ON headers(height)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_blocks_height ON blocks(height)')
+        # Explorer filters and sort orders; height breaks ties for keyset paging
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_blocks_miner ON blocks(miner_address, height)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_blocks_cid ON blocks(cid)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_blocks_timestamp ON blocks(timestamp, height)')
+        # Covers unique-miner counts over a time range without touching block rows
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_blocks_timestamp_miner ON blocks(timestamp, miner_address)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_blocks_work_score ON blocks(work_score, height)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_blocks_reward ON blocks(reward, height)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_work_height ON work_index(height)')
         
         conn.commit()
@@ -125,6 +253,120 @@ class COINjectureStorage:
         
         print(f"📦 Database initialized: {self.db_path}")
     
+    def _migrate_block_columns(self, cursor):
+        """Add the miner_address/cid/previous_hash columns to older databases and backfill them from block_bytes."""
+        cursor.execute('PRAGMA table_info(blocks)')
+        columns = {row[1] for row in cursor.fetchall()}
+        added = False
+        for column in ('miner_address', 'cid', 'previous_hash'):
+            if column not in columns:
+                cursor.execute(f'ALTER TABLE blocks ADD COLUMN {column} TEXT')
+                added = True
+        if not added:
+            return
+        
+        cursor.execute('SELECT block_hash, block_bytes FROM blocks WHERE block_bytes IS NOT NULL')
+        updates = []
+        for block_hash, block_bytes in cursor.fetchall():
+            try:
+                block_data = json.loads(block_bytes) if isinstance(block_bytes, str) else json.loads(block_bytes.decode('utf-8'))
+            except (ValueError, AttributeError):
+                continue
+            updates.append((block_data.get('miner_address'), self._block_cid(block_data),
+                            block_data.get('previous_hash'), block_hash))
+        cursor.executemany('UPDATE blocks SET miner_address = ?, cid = ?, previous_hash = ? WHERE block_hash = ?',
+                           updates)
+        print(f"📦 Backfilled miner_address/cid/previous_hash for {len(updates)} blocks")
+    
+    def _migrate_work_index(self, cursor, existing: bool):
+        """Add work_index.block_hash and point each height at its most recently stored block."""
+        if existing:
+            cursor.execute('ALTER TABLE work_index ADD COLUMN block_hash TEXT')
+        cursor.execute('''
+            INSERT OR REPLACE INTO work_index (height, cumulative_work, block_hash)
+            SELECT b.height, COALESCE(w.cumulative_work, CAST(COALESCE(b.cumulative_work, 0) * 1000000 AS INTEGER)),
+                   b.block_hash
+            FROM blocks b LEFT JOIN work_index w ON w.height = b.height
+            WHERE b.rowid = (SELECT MAX(rowid) FROM blocks WHERE height = b.height)
+        ''')
+        if cursor.rowcount > 0:
+            print(f"📦 Backfilled canonical hashes for {cursor.rowcount} heights")
+    
+    def _backfill_miner_stats(self, cursor):
+        """Build the per-miner aggregates from existing block rows."""
+        cursor.execute('''
+            INSERT OR REPLACE INTO miner_stats
+            (miner_address, blocks_mined, total_reward, total_work, last_height, last_timestamp)
+            SELECT miner_address, COUNT(*), COALESCE(SUM(reward), 0), COALESCE(SUM(work_score), 0),
+                   MAX(height), MAX(timestamp)
+            FROM blocks
+            WHERE miner_address IS NOT NULL
+            GROUP BY miner_address
+        ''')
+        if cursor.rowcount > 0:
+            print(f"📦 Backfilled miner stats for {cursor.rowcount} miners")
+    
+    def _backfill_chain_totals(self, cursor):
+        """Build the explorer totals from existing canonical block rows."""
+        cursor.execute('''
+            INSERT OR REPLACE INTO chain_totals (id, total_blocks, total_gas_used, total_rewards, total_work)
+            SELECT 0, COUNT(*), COALESCE(SUM(b.gas_used), 0), COALESCE(SUM(b.reward), 0),
+                   COALESCE(SUM(b.work_score), 0)
+            FROM blocks b JOIN work_index w ON w.height = b.height AND w.block_hash = b.block_hash
+        ''')
+    
+    @staticmethod
+    def _update_chain_totals(cursor, blocks: int, gas_used: int, reward: float, work_score: float):
+        """Add (or with negative counts, remove) one canonical block's totals."""
+        cursor.execute('''
+            INSERT INTO chain_totals (id, total_blocks, total_gas_used, total_rewards, total_work)
+            VALUES (0, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                total_blocks = total_blocks + excluded.total_blocks,
+                total_gas_used = total_gas_used + excluded.total_gas_used,
+                total_rewards = total_rewards + excluded.total_rewards,
+                total_work = total_work + excluded.total_work
+        ''', (blocks, gas_used or 0, reward or 0, work_score or 0))
+    
+    @staticmethod
+    def _update_miner_stats(cursor, miner_address: Optional[str], blocks: int, reward: float,
+                            work_score: float, height: int, timestamp: float):
+        """Add (or with negative counts, remove) one block's totals in the miner's aggregate row."""
+        if not miner_address:
+            return
+        cursor.execute('''
+            INSERT INTO miner_stats
+            (miner_address, blocks_mined, total_reward, total_work, last_height, last_timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(miner_address) DO UPDATE SET
+                blocks_mined = blocks_mined + excluded.blocks_mined,
+                total_reward = total_reward + excluded.total_reward,
+                total_work = total_work + excluded.total_work,
+                last_height = MAX(COALESCE(last_height, excluded.last_height), excluded.last_height),
+                last_timestamp = MAX(COALESCE(last_timestamp, excluded.last_timestamp), excluded.last_timestamp)
+        ''', (miner_address, blocks, reward or 0, work_score or 0, height, timestamp))
+    
+    @staticmethod
+    def _block_cid(block_data: dict) -> Optional[str]:
+        """Proof bundle CID of a block, under whichever key it was stored."""
+        return block_data.get('cid') or block_data.get('offchain_cid') or block_data.get('ipfs_cid')
+    
+    @staticmethod
+    def _decode_block_row(block_bytes, work_score, gas_used, gas_limit, gas_price,
+                          reward, cumulative_work) -> dict:
+        """Block dict from block_bytes merged with the metric columns."""
+        block_data = json.loads(block_bytes) if isinstance(block_bytes, str) else json.loads(block_bytes.decode('utf-8'))
+        block_data.update({
+            'work_score': work_score if work_score is not None else 0,
+            'gas_used': gas_used if gas_used is not None else 0,
+            'gas_limit': gas_limit if gas_limit is not None else 1000000,
+            'gas_price': gas_price if gas_price is not None else 0.000001,
+            'reward': reward if reward is not None else 0,
+            'cumulative_work_score': cumulative_work if cumulative_work is not None else 0
+        })
+        block_data['cid'] = COINjectureStorage._block_cid(block_data)
+        return block_data
+    
     def add_header(self, header_hash: str, header_bytes: bytes, height: int, timestamp: float):
         """Add header to storage"""
         conn = sqlite3.connect(self.db_path)
@@ -164,15 +406,15 @@ class COINjectureStorage:
         conn.commit()
         conn.close()
     
-    def update_work_index(self, height: int, cumulative_work: int):
-        """Update work index"""
+    def update_work_index(self, height: int, cumulative_work: int, block_hash: Optional[str] = None):
+        """Update work index; block_hash becomes the canonical block at height"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
-            INSERT OR REPLACE INTO work_index (height, cumulative_work)
-            VALUES (?, ?)
-        ''', (height, cumulative_work))
+            INSERT OR REPLACE INTO work_index (height, cumulative_work, block_hash)
+            VALUES (?, ?, ?)
+        ''', (height, cumulative_work, block_hash))
         
         conn.commit()
         conn.close()
@@ -323,13 +565,37 @@ class COINjectureStorage:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
+            # A re-stored block must not be counted twice in the miner aggregates
+            cursor.execute('SELECT miner_address, reward, work_score, height, timestamp FROM blocks WHERE block_hash = ?',
+                           (block_hash,))
+            previous = cursor.fetchone()
+            if previous:
+                self._update_miner_stats(cursor, previous[0], -1, -(previous[1] or 0), -(previous[2] or 0),
+                                         previous[3], previous[4])
+            self._update_miner_stats(cursor, block_data.get('miner_address'), 1, reward, work_score,
+                                     height, timestamp)
+            
+            # The block replaces whichever block was canonical at its height
+            cursor.execute('''
+                SELECT b.gas_used, b.reward, b.work_score
+                FROM work_index w JOIN blocks b ON b.block_hash = w.block_hash
+                WHERE w.height = ?
+            ''', (height,))
+            replaced = cursor.fetchone()
+            if replaced:
+                self._update_chain_totals(cursor, -1, -(replaced[0] or 0), -(replaced[1] or 0), -(replaced[2] or 0))
+            self._update_chain_totals(cursor, 1, gas_used, reward, work_score)
+            
             cursor.execute('''
                 INSERT OR REPLACE INTO blocks 
                 (block_hash, block_bytes, height, timestamp, work_score, 
-                 gas_used, gas_limit, gas_price, reward, cumulative_work, is_full_block)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                 gas_used, gas_limit, gas_price, reward, cumulative_work, is_full_block,
+                 miner_address, cid, previous_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (block_hash, block_bytes, height, timestamp, work_score,
-                  gas_used, gas_limit, gas_price, reward, cumulative_work, True))
+                  gas_used, gas_limit, gas_price, reward, cumulative_work, True,
+                  block_data.get('miner_address'), self._block_cid(block_data),
+                  block_data.get('previous_hash')))
             
             conn.commit()
             conn.close()
@@ -337,13 +603,20 @@ class COINjectureStorage:
             # Add header
             self.add_header(block_hash, block_bytes, height, timestamp)
             
-            # Update work index
+            # Update work index; the last block stored at a height is the canonical one
             cumulative_work_int = int(cumulative_work * 1000000)  # Convert to integer
-            self.update_work_index(height, cumulative_work_int)
+            self.update_work_index(height, cumulative_work_int, block_hash)
             
             # Add as tip
             self.add_tip(block_hash)
             
+            # Fold into the rolling stats (seeded lazily from the DB otherwise)
+            if self._chain_stats is not None:
+                stats_block = dict(block_data)
+                stats_block.update({'work_score': work_score, 'gas_used': gas_used, 'reward': reward,
+                                    'cid': self._block_cid(block_data)})
+                self._chain_stats.add_block(stats_block)
+            
             print(f"✅ Added block {height}: {block_hash[:16]}...")
             return True
             
@@ -381,16 +654,8 @@ class COINjectureStorage:
     def get_ipfs_data(self, cid: str) -> Optional[dict]:
         """Get IPFS data by CID"""
         try:
-            # Actually retrieve data from IPFS
-            from storage import IPFSClient
-            
-            ipfs_client = IPFSClient("http://localhost:8080")
-            if not ipfs_client.health_check():
-                print(f"❌ IPFS daemon not available for CID: {cid}")
-                return None
-            
-            # Get data from IPFS
-            data = ipfs_client.get(cid)
+            # Get data from the bundle cache or IPFS
+            data = self.get_ipfs_bytes(cid, "http://localhost:8080")
             if data:
                 proof_json = json.loads(data.decode("utf-8"))
                 return {
@@ -409,44 +674,33 @@ class COINjectureStorage:
             print(f"❌ Error retrieving IPFS data for CID {cid}: {e}")
             return None
 
-    def get_blocks_by_miner(self, miner_address: str) -> List[dict]:
-        """Get all blocks mined by a specific address"""
+    def get_blocks_by_miner(self, miner_address: str, limit: Optional[int] = None) -> List[dict]:
+        """Get blocks mined by a specific address, newest first"""
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
-            # Get all blocks and filter by miner address in block_bytes
+            # idx_blocks_miner serves both the filter and the order
             cursor.execute('''
-                SELECT height, block_bytes, work_score, gas_used, gas_limit, gas_price, 
+                SELECT block_bytes, work_score, gas_used, gas_limit, gas_price, 
                        reward, cumulative_work 
                 FROM blocks 
+                WHERE miner_address = ? AND block_bytes IS NOT NULL
                 ORDER BY height DESC
-            ''')
+                LIMIT ?
+            ''', (miner_address, -1 if limit is None else limit))
             results = cursor.fetchall()
             conn.close()
             
             blocks = []
             for result in results:
-                height, block_bytes, work_score, gas_used, gas_limit, gas_price, reward, cumulative_work = result
-                
-                # Parse block data and check if miner matches
                 try:
-                    if block_bytes:
-                        block_data = json.loads(block_bytes) if isinstance(block_bytes, str) else json.loads(block_bytes.decode('utf-8'))
-                        # Check if this block was mined by the requested address
-                        if block_data.get('miner_address') == miner_address:
-                            block_data.update({
-                                'work_score': work_score,
-                                'gas_used': gas_used,
-                                'gas_limit': gas_limit,
-                                'gas_price': gas_price,
-                                'reward': reward,
-                                'cumulative_work': cumulative_work
-                            })
-                            blocks.append(block_data)
+                    block_data = self._decode_block_row(*result)
                 except (json.JSONDecodeError, AttributeError):
-                    # Skip blocks with invalid JSON or no block_bytes
+                    # Skip blocks with invalid JSON
                     continue
+                block_data['cumulative_work'] = block_data['cumulative_work_score']
+                blocks.append(block_data)
             
             return blocks
             
@@ -454,6 +708,51 @@ class COINjectureStorage:
             print(f"❌ Error getting blocks by miner {miner_address}: {e}")
             return []
 
+    def get_miner_stats(self, miner_address: str) -> dict:
+        """
+        Aggregate totals for a miner from the miner_stats table.
+        
+        Returns:
+            Dict with blocks_mined, total_reward, total_work, last_height and
+            last_timestamp (zeros / None for an unknown address)
+        """
+        stats = {'miner_address': miner_address, 'blocks_mined': 0, 'total_reward': 0.0,
+                 'total_work': 0.0, 'last_height': None, 'last_timestamp': None}
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT blocks_mined, total_reward, total_work, last_height, last_timestamp
+                FROM miner_stats WHERE miner_address = ?
+            ''', (miner_address,))
+            result = cursor.fetchone()
+            conn.close()
+            
+            if result and result[0] > 0:
+                stats.update(zip(('blocks_mined', 'total_reward', 'total_work', 'last_height', 'last_timestamp'),
+                                 result))
+            return stats
+            
+        except Exception as e:
+            print(f"❌ Error getting miner stats for {miner_address}: {e}")
+            return stats
+
+    def get_miner_count(self) -> int:
+        """Number of distinct addresses that have mined a block."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT COUNT(*) FROM miner_stats WHERE blocks_mined > 0')
+            result = cursor.fetchone()
+            conn.close()
+            return result[0]
+            
+        except Exception as e:
+            print(f"❌ Error counting miners: {e}")
+            return 0
+
     def get_block_data(self, index: int) -> Optional[dict]:
         """Get block data by index with all metrics"""
         try:
@@ -470,28 +769,7 @@ class COINjectureStorage:
             conn.close()
             
             if result:
-                block_data = json.loads(result[0]) if isinstance(result[0], str) else json.loads(result[0].decode('utf-8'))
-                # Merge database columns with block data
-                block_data.update({
-                    'work_score': result[1] if result[1] is not None else 0,
-                    'gas_used': result[2] if result[2] is not None else 0,
-                    'gas_limit': result[3] if result[3] is not None else 1000000,
-                    'gas_price': result[4] if result[4] is not None else 0.000001,
-                    'reward': result[5] if result[5] is not None else 0,
-                    'cumulative_work_score': result[6] if result[6] is not None else 0
-                })
-                
-                # Extract CID from block data if available
-                if 'cid' in block_data:
-                    block_data['cid'] = block_data['cid']
-                elif 'offchain_cid' in block_data:
-                    block_data['cid'] = block_data['offchain_cid']
-                elif 'ipfs_cid' in block_data:
-                    block_data['cid'] = block_data['ipfs_cid']
-                else:
-                    block_data['cid'] = None
-                
-                return block_data
+                return self._decode_block_row(*result)
             else:
                 return None
             
@@ -499,6 +777,193 @@ class COINjectureStorage:
             print(f"❌ Error getting block {index}: {e}")
             return None
 
+    def get_block_headers(self, start: int, count: int) -> List[dict]:
+        """
+        Get the linking fields of canonical blocks start..start+count-1 in one range query.
+        
+        Reads only indexed columns; block_bytes is never loaded or parsed.
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT b.height, b.block_hash, b.previous_hash, b.timestamp, b.cumulative_work
+                FROM blocks b JOIN work_index w ON w.height = b.height AND w.block_hash = b.block_hash
+                WHERE b.height >= ? AND b.height < ?
+                ORDER BY b.height ASC
+            ''', (start, start + count))
+            results = cursor.fetchall()
+            conn.close()
+            
+            return [{
+                'index': height,
+                'block_hash': block_hash,
+                'previous_hash': previous_hash,
+                'timestamp': float(timestamp) if timestamp is not None else None,
+                'cumulative_work_score': cumulative_work if cumulative_work is not None else 0
+            } for height, block_hash, previous_hash, timestamp, cumulative_work in results]
+            
+        except Exception as e:
+            print(f"❌ Error getting headers {start}+{count}: {e}")
+            return []
+
+    EXPLORER_SORT_COLUMNS = ('height', 'timestamp', 'work_score', 'reward')
+    
+    @staticmethod
+    def _explorer_filter(search: str) -> Tuple[str, list]:
+        """
+        WHERE clause for an explorer search.
+        
+        Matches a height equal to the search, or a block hash, miner address
+        or CID starting with it. Prefixes are matched as index ranges
+        (col >= s AND col < s + U+10FFFF) so each branch is an index seek.
+        Columns are qualified with the blocks alias b.
+        """
+        search = search.strip()
+        if not search:
+            return '', []
+        clauses = []
+        params = []
+        # Only a canonical integer can be a height (hex hashes can be all digits too)
+        if search.isdigit() and len(search) <= 18 and str(int(search)) == search:
+            clauses.append('b.height = ?')
+            params.append(int(search))
+        for column, value in (('block_hash', search.lower()), ('miner_address', search), ('cid', search)):
+            clauses.append(f'(b.{column} >= ? AND b.{column} < ?)')
+            params.extend([value, value + '\U0010ffff'])
+        return 'WHERE (' + ' OR '.join(clauses) + ')', params
+    
+    def query_blocks(self, limit: int = 50, offset: int = 0, search: str = '',
+                     sort_by: str = 'height', sort_order: str = 'desc',
+                     after: Optional[Tuple[float, int]] = None) -> List[dict]:
+        """
+        One page of canonical blocks, filtered, ordered and limited in SQL.
+        
+        Fork blocks stored at the same height are left out: only the block
+        work_index names for each height is returned.
+        
+        Args:
+            limit: Page size
+            offset: Rows to skip (ignored when after is given)
+            search: Height, or prefix of block hash / miner address / CID
+            sort_by: One of EXPLORER_SORT_COLUMNS
+            sort_order: 'asc' or 'desc'
+            after: Keyset cursor (sort value, height) of the previous page's
+                last row; avoids scanning skipped rows on deep pages
+            
+        Returns:
+            Block dicts with metric columns merged in
+        """
+        if sort_by not in self.EXPLORER_SORT_COLUMNS:
+            sort_by = 'height'
+        direction = 'ASC' if sort_order == 'asc' else 'DESC'
+        where, params = self._explorer_filter(search)
+        
+        if after is not None:
+            op = '>' if direction == 'ASC' else '<'
+            if sort_by == 'height':
+                keyset = f'b.height {op} ?'
+                params.append(after[1])
+            else:
+                keyset = f'(b.{sort_by} {op} ? OR (b.{sort_by} = ? AND b.height {op} ?))'
+                params.extend([after[0], after[0], after[1]])
+            where = f'{where} AND {keyset}' if where else f'WHERE {keyset}'
+            offset = 0
+        
+        order = f'b.{sort_by} {direction}' if sort_by == 'height' else f'b.{sort_by} {direction}, b.height {direction}'
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute(f'''
+                SELECT b.block_bytes, b.work_score, b.gas_used, b.gas_limit, b.gas_price,
+                       b.reward, b.cumulative_work, b.height
+                FROM blocks b JOIN work_index w ON w.height = b.height AND w.block_hash = b.block_hash
+                {where}
+                ORDER BY {order}
+                LIMIT ? OFFSET ?
+            ''', params + [limit, offset])
+            results = cursor.fetchall()
+            conn.close()
+            
+            blocks = []
+            for row in results:
+                if not row[0]:
+                    continue
+                block_data = self._decode_block_row(*row[:7])
+                block_data['index'] = row[7]
+                blocks.append(block_data)
+            return blocks
+            
+        except Exception as e:
+            print(f"❌ Error querying blocks: {e}")
+            return []
+    
+    def count_blocks(self, search: str = '') -> dict:
+        """
+        Count and totals of the canonical blocks matching an explorer search.
+        
+        Without a search the totals come from the chain_totals row, so the
+        cost does not grow with the chain; searches aggregate over their
+        index seeks.
+        
+        Returns:
+            Dict with total_blocks, total_gas_used, total_rewards, avg_work_score
+        """
+        where, params = self._explorer_filter(search)
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            if not where:
+                cursor.execute('''
+                    SELECT total_blocks, total_gas_used, total_rewards,
+                           CASE WHEN total_blocks > 0 THEN total_work / total_blocks ELSE 0 END
+                    FROM chain_totals WHERE id = 0
+                ''')
+            else:
+                cursor.execute(f'''
+                    SELECT COUNT(*), COALESCE(SUM(b.gas_used), 0), COALESCE(SUM(b.reward), 0),
+                           COALESCE(AVG(b.work_score), 0)
+                    FROM blocks b JOIN work_index w ON w.height = b.height AND w.block_hash = b.block_hash
+                    {where}
+                ''', params)
+            count, gas_used, rewards, avg_work = cursor.fetchone() or (0, 0, 0, 0)
+            conn.close()
+            
+            return {
+                'total_blocks': count,
+                'total_gas_used': gas_used,
+                'total_rewards': rewards,
+                'avg_work_score': avg_work
+            }
+            
+        except Exception as e:
+            print(f"❌ Error counting blocks: {e}")
+            return {'total_blocks': 0, 'total_gas_used': 0, 'total_rewards': 0, 'avg_work_score': 0}
+    
+    def get_block_by_cid(self, cid: str) -> Optional[dict]:
+        """Get the highest block referencing a proof bundle CID"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT block_bytes, work_score, gas_used, gas_limit, gas_price,
+                       reward, cumulative_work
+                FROM blocks WHERE cid = ?
+                ORDER BY height DESC LIMIT 1
+            ''', (cid,))
+            result = cursor.fetchone()
+            conn.close()
+            
+            return self._decode_block_row(*result) if result and result[0] else None
+            
+        except Exception as e:
+            print(f"❌ Error getting block for CID {cid}: {e}")
+            return None
+
     def update_block_gas(self, block_hash: str, new_gas: int) -> bool:
         """Update gas_used value for a specific block"""
         try:
@@ -577,27 +1042,17 @@ class COINjectureStorage:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
+            # Answered from idx_blocks_timestamp_miner alone
             cursor.execute('''
-                SELECT DISTINCT block_bytes 
+                SELECT DISTINCT miner_address 
                 FROM blocks 
-                WHERE timestamp >= ? AND timestamp <= ?
+                WHERE timestamp >= ? AND timestamp <= ? AND miner_address IS NOT NULL
             ''', (start_time, end_time))
             
             results = cursor.fetchall()
             conn.close()
             
-            miners = set()
-            for result in results:
-                block_bytes = result[0]
-                try:
-                    block_data = json.loads(block_bytes) if block_bytes else {}
-                    miner = block_data.get('miner_address', '')
-                    if miner:
-                        miners.add(miner)
-                except:
-                    continue
-            
-            return miners
+            return {row[0] for row in results if row[0]}
             
         except Exception as e:
             print(f"❌ Error getting unique miners: {e}")
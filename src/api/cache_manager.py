@@ -10,6 +10,7 @@ import time
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from .coupling_config import ETA, CACHE_READ_INTERVAL, CouplingState
+from .blockchain_state_log import BlockchainStateReader
 
 
 class CacheManager:
@@ -37,6 +38,9 @@ class CacheManager:
         self.cached_blocks = {}
         self.last_poll_time = 0.0
         
+        # Tails the consensus service's blockchain state log
+        self.state_reader = BlockchainStateReader(blockchain_state_path)
+        
         # Ensure cache directory exists
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         
@@ -271,16 +275,13 @@ class CacheManager:
                             if latest:
                                 latest = (real_block_count - 1, latest[1], latest[2])
                 except:
-                    # Fallback to blockchain_state.json if consensus API not available
-                    blockchain_state_path = "/opt/coinjecture/data/blockchain_state.json"
-                    if os.path.exists(blockchain_state_path):
-                        with open(blockchain_state_path, 'r') as f:
-                            blockchain_data = json.load(f)
-                            real_block_count = blockchain_data.get('latest_block_index', 0) + 1
-                            if real_block_count > total_blocks:
-                                total_blocks = real_block_count
-                                if latest:
-                                    latest = (real_block_count - 1, latest[1], latest[2])
+                    # Fallback to the blockchain state log if consensus API not available
+                    if self.state_reader.refresh() and self.state_reader.tip_index >= 0:
+                        real_block_count = self.state_reader.tip_index + 1
+                        if real_block_count > total_blocks:
+                            total_blocks = real_block_count
+                            if latest:
+                                latest = (real_block_count - 1, latest[1], latest[2])
                 
                 if latest:
                     return {
@@ -360,19 +361,9 @@ class CacheManager:
                 conn.close()
                 return all_blocks
             else:
-                # Fallback to JSON if database not available
-                if os.path.exists(self.blockchain_state_path):
-                    with open(self.blockchain_state_path, 'r') as f:
-                        blockchain_state = json.load(f)
-                    
-                    # Get all blocks from blockchain state
-                    all_blocks = []
-                    if 'blocks' in blockchain_state:
-                        all_blocks = blockchain_state['blocks']
-                    elif 'block_history' in blockchain_state:
-                        all_blocks = blockchain_state['block_history']
-                    
-                    return all_blocks
+                # Fallback to blockchain state log if database not available
+                if self.state_reader.refresh():
+                    return self.state_reader.blocks()
                 else:
                     # Fallback to cache files
                     blocks_history = self._read_json(self.blocks_history_file)
@@ -394,28 +385,22 @@ class CacheManager:
             IPFS data or None if not found
         """
         try:
-            # Read from blockchain state
-            if os.path.exists(self.blockchain_state_path):
-                with open(self.blockchain_state_path, 'r') as f:
-                    blockchain_state = json.load(f)
-                
+            # Read from blockchain state (only newly appended records are parsed)
+            if self.state_reader.refresh():
                 # Look for IPFS data in blockchain state
-                if 'ipfs_data' in blockchain_state:
-                    ipfs_data = blockchain_state['ipfs_data']
-                    if cid in ipfs_data:
-                        return ipfs_data[cid]
+                if cid in self.state_reader.ipfs_data:
+                    return self.state_reader.ipfs_data[cid]
                 
                 # Look in blocks for IPFS references
-                if 'blocks' in blockchain_state:
-                    for block in blockchain_state['blocks']:
-                        if block.get('cid') == cid:
-                            return {
-                                'cid': cid,
-                                'block_index': block.get('index'),
-                                'block_hash': block.get('block_hash'),
-                                'data': block.get('data', {}),
-                                'timestamp': block.get('timestamp')
-                            }
+                block = self.state_reader.get_by_cid(cid)
+                if block is not None:
+                    return {
+                        'cid': cid,
+                        'block_index': block.get('index'),
+                        'block_hash': block.get('block_hash'),
+                        'data': block.get('data', {}),
+                        'timestamp': block.get('timestamp')
+                    }
             
             return None
         except Exception as e:
@@ -433,19 +418,12 @@ class CacheManager:
             cids = []
             
             # Read from blockchain state
-            if os.path.exists(self.blockchain_state_path):
-                with open(self.blockchain_state_path, 'r') as f:
-                    blockchain_state = json.load(f)
-                
+            if self.state_reader.refresh():
                 # Get CIDs from IPFS data
-                if 'ipfs_data' in blockchain_state:
-                    cids.extend(blockchain_state['ipfs_data'].keys())
+                cids.extend(self.state_reader.ipfs_data.keys())
                 
                 # Get CIDs from blocks
-                if 'blocks' in blockchain_state:
-                    for block in blockchain_state['blocks']:
-                        if 'cid' in block:
-                            cids.append(block['cid'])
+                cids.extend(self.state_reader.cids())
             
             return list(set(cids))  # Remove duplicates
         except Exception as e:
@@ -467,32 +445,28 @@ class CacheManager:
             query_lower = query.lower()
             
             # Read from blockchain state
-            if os.path.exists(self.blockchain_state_path):
-                with open(self.blockchain_state_path, 'r') as f:
-                    blockchain_state = json.load(f)
-                
+            if self.state_reader.refresh():
                 # Search in IPFS data
-                if 'ipfs_data' in blockchain_state:
-                    for cid, data in blockchain_state['ipfs_data'].items():
-                        if self._matches_query(data, query_lower):
-                            results.append({
-                                'cid': cid,
-                                'data': data,
-                                'type': 'ipfs_data'
-                            })
+                for cid, data in self.state_reader.ipfs_data.items():
+                    if self._matches_query(data, query_lower):
+                        results.append({
+                            'cid': cid,
+                            'data': data,
+                            'type': 'ipfs_data'
+                        })
                 
                 # Search in blocks
-                if 'blocks' in blockchain_state:
-                    for block in blockchain_state['blocks']:
-                        if 'cid' in block and self._matches_query(block, query_lower):
-                            results.append({
-                                'cid': block['cid'],
-                                'block_index': block.get('index'),
-                                'block_hash': block.get('block_hash'),
-                                'data': block.get('data', {}),
-                                'timestamp': block.get('timestamp'),
-                                'type': 'block_data'
-                            })
+                for cid in self.state_reader.cids():
+                    block = self.state_reader.get_by_cid(cid)
+                    if self._matches_query(block, query_lower):
+                        results.append({
+                            'cid': cid,
+                            'block_index': block.get('index'),
+                            'block_hash': block.get('block_hash'),
+                            'data': block.get('data', {}),
+                            'timestamp': block.get('timestamp'),
+                            'type': 'block_data'
+                        })
             
             return results
         except Exception as e:
@@ -568,19 +542,15 @@ class CacheManager:
                 # Update last poll time
                 self.last_poll_time = time.time()
             else:
-                # Fallback to JSON if database not available
-                if not os.path.exists(self.blockchain_state_path):
+                # Fallback to blockchain state log if database not available
+                if not self.state_reader.refresh():
                     return  # No blockchain state yet
                 
-                with open(self.blockchain_state_path, 'r') as f:
-                    blockchain_state = json.load(f)
-                
                 # Lightweight validation (trust consensus)
-                if 'latest_block' in blockchain_state:
-                    self.cached_blocks['latest_block'] = blockchain_state['latest_block']
+                if self.state_reader.latest_block:
+                    self.cached_blocks['latest_block'] = self.state_reader.latest_block
                 
-                if 'blocks' in blockchain_state:
-                    self.cached_blocks['blocks'] = blockchain_state['blocks']
+                self.cached_blocks['blocks'] = self.state_reader.blocks()
                 
                 # Update last poll time
                 self.last_poll_time = time.time()
@@ -0,0 +1,238 @@
+"""
+Materialized chain statistics for the faucet dashboard.
+
+COINjectureStorage feeds every committed block into a ChainStatsAggregator,
+which keeps rolling aggregates up to date incrementally:
+
+- Time windows (1m/5m/1h/24h): block count, work score sum and per-miner
+  block counts, expired against the wall clock as windows slide
+- Height windows over the most recent blocks: mean block time over the
+  last 10 and 99 intervals, median over the last 19 (kept in a sorted
+  sliding window), mean difficulty and work efficiency over the last 10
+  blocks, and the 10 most recent blocks themselves
+
+snapshot() reads these in time independent of chain length, so the
+dashboard never walks the chain. A block that replaces an already counted
+height (reorg) marks the aggregates stale and they are rebuilt from
+storage on the next snapshot.
+"""
+
+import bisect
+import heapq
+import itertools
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Rolling time windows (name -> seconds)
+TIME_WINDOWS = {'1m': 60, '5m': 300, '1h': 3600, '24h': 86400}
+AVG_BLOCK_TIME_INTERVALS = 10
+LONG_BLOCK_TIME_INTERVALS = 99
+MEDIAN_BLOCK_TIME_INTERVALS = 19
+DIFFICULTY_BLOCKS = 10
+EFFICIENCY_BLOCKS = 10
+RECENT_BLOCKS = 10
+
+
+class SlidingWindow:
+    """
+    Last `size` values with a running sum and count of positive values.
+
+    Non-positive values hold a slot but are left out of the mean and median,
+    matching how block times ignore out-of-order timestamps. With
+    keep_sorted=True the positive values are also kept sorted for the median.
+    """
+
+    def __init__(self, size: int, keep_sorted: bool = False):
+        self.size = size
+        self.values: deque = deque()
+        self.total = 0.0
+        self.count = 0
+        self.sorted: Optional[List[float]] = [] if keep_sorted else None
+
+    def push(self, value: float):
+        self.values.append(value)
+        if value > 0:
+            self.total += value
+            self.count += 1
+            if self.sorted is not None:
+                bisect.insort(self.sorted, value)
+        if len(self.values) > self.size:
+            old = self.values.popleft()
+            if old > 0:
+                self.total -= old
+                self.count -= 1
+                if self.sorted is not None:
+                    del self.sorted[bisect.bisect_left(self.sorted, old)]
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def median(self) -> float:
+        if not self.sorted:
+            return 0.0
+        n = len(self.sorted)
+        if n % 2 == 0:
+            return (self.sorted[n // 2 - 1] + self.sorted[n // 2]) / 2
+        return self.sorted[n // 2]
+
+
+class TimeWindow:
+    """
+    Blocks whose timestamp falls within the last `seconds`.
+
+    Miner timestamps are not monotonic in height, so entries are kept in a
+    min-heap by timestamp and each block expires on its own timestamp.
+    """
+
+    def __init__(self, seconds: int):
+        self.seconds = seconds
+        self.entries: List[tuple] = []  # heap of (timestamp, seq, work_score, miner)
+        self._seq = itertools.count()
+        self.work_score = 0.0
+        self.miners: Counter = Counter()
+
+    def add(self, timestamp: float, work_score: float, miner: str):
+        heapq.heappush(self.entries, (timestamp, next(self._seq), work_score, miner))
+        self.work_score += work_score
+        if miner:
+            self.miners[miner] += 1
+
+    def expire(self, now: float):
+        cutoff = now - self.seconds
+        while self.entries and self.entries[0][0] < cutoff:
+            _, _, work_score, miner = heapq.heappop(self.entries)
+            self.work_score -= work_score
+            if miner:
+                self.miners[miner] -= 1
+                if self.miners[miner] <= 0:
+                    del self.miners[miner]
+
+    def snapshot(self) -> Dict[str, Any]:
+        blocks = len(self.entries)
+        return {
+            'blocks': blocks,
+            'work_score': self.work_score if blocks else 0.0,
+            'unique_miners': len(self.miners),
+            'tps': blocks / self.seconds
+        }
+
+
+class ChainStatsAggregator:
+    """
+    Rolling chain statistics updated as blocks are committed.
+
+    Thread-safe. add_block() is called by the writer; snapshot() by readers.
+    """
+
+    def __init__(self, loader: Optional[Callable[[], Iterable[dict]]] = None):
+        """
+        Initialize aggregator.
+
+        Args:
+            loader: Returns the blocks needed to rebuild the aggregates (the last
+                24h and the last LONG_BLOCK_TIME_INTERVALS + 1 heights), in height
+                order; used after a reorg
+        """
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._stale = False
+        self._reset()
+
+    def _reset(self):
+        self.windows = {name: TimeWindow(seconds) for name, seconds in TIME_WINDOWS.items()}
+        self.avg_block_time = SlidingWindow(AVG_BLOCK_TIME_INTERVALS)
+        self.long_block_time = SlidingWindow(LONG_BLOCK_TIME_INTERVALS)
+        self.median_block_time = SlidingWindow(MEDIAN_BLOCK_TIME_INTERVALS, keep_sorted=True)
+        self.difficulty = SlidingWindow(DIFFICULTY_BLOCKS)
+        self.recent: deque = deque(maxlen=max(RECENT_BLOCKS, EFFICIENCY_BLOCKS))
+        self.latest: Optional[dict] = None
+
+    @property
+    def latest_height(self) -> int:
+        return self.latest.get('index', 0) if self.latest else -1
+
+    def add_block(self, block_data: dict, now: Optional[float] = None):
+        """
+        Fold a committed block into the aggregates.
+
+        Args:
+            block_data: Block dict as stored (index, timestamp, miner_address,
+                work_score, difficulty, ...)
+            now: Current time for window expiry (defaults to time.time())
+        """
+        with self._lock:
+            if self.latest is not None and block_data.get('index', 0) <= self.latest_height:
+                self._stale = True
+                return
+            self._add(block_data, time.time() if now is None else now)
+
+    def _add(self, block_data: dict, now: float):
+        timestamp = block_data.get('timestamp', 0) or 0
+        work_score = block_data.get('work_score', 0) or 0
+
+        if timestamp >= now - TIME_WINDOWS['24h']:
+            for window in self.windows.values():
+                window.add(timestamp, work_score, block_data.get('miner_address', ''))
+                window.expire(now)
+
+        # Block times are only measured between consecutive heights
+        if self.latest is not None and block_data.get('index', 0) == self.latest_height + 1:
+            interval = timestamp - (self.latest.get('timestamp', 0) or 0)
+            self.avg_block_time.push(interval)
+            self.long_block_time.push(interval)
+            self.median_block_time.push(interval)
+
+        self.difficulty.push(block_data.get('difficulty', 1.0))
+        self.recent.append(block_data)
+        self.latest = block_data
+
+    def rebuild(self, blocks: Iterable[dict], now: Optional[float] = None):
+        """Recompute all aggregates from blocks in height order."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._reset()
+            for block_data in blocks:
+                self._add(block_data, now)
+            self._stale = False
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Current statistics.
+
+        Args:
+            now: Time the windows are measured back from (defaults to time.time())
+
+        Returns:
+            Dict with latest_block, windows, block_time, avg_difficulty,
+            efficiency_ratio and recent_blocks (oldest first)
+        """
+        now = time.time() if now is None else now
+        if self._stale and self.loader is not None:
+            self.rebuild(self.loader(), now)
+
+        with self._lock:
+            for window in self.windows.values():
+                window.expire(now)
+
+            recent = list(self.recent)
+            efficiency_blocks = recent[-EFFICIENCY_BLOCKS:]
+            total_work = sum(b.get('work_score', 0) or 0 for b in efficiency_blocks)
+            span = 0.0
+            if len(efficiency_blocks) > 1:
+                span = (efficiency_blocks[-1].get('timestamp', 0) or 0) - (efficiency_blocks[0].get('timestamp', 0) or 0)
+
+            return {
+                'latest_block': self.latest,
+                'windows': {name: window.snapshot() for name, window in self.windows.items()},
+                'block_time': {
+                    'avg_seconds': self.avg_block_time.mean(),
+                    'median_seconds': self.median_block_time.median(),
+                    'last_100_blocks': self.long_block_time.mean()
+                },
+                'avg_difficulty': self.difficulty.mean() if self.difficulty.count else 1.0,
+                'efficiency_ratio': total_work / span if span > 0 else total_work,
+                'recent_blocks': recent[-RECENT_BLOCKS:],
+                'generated_at': now
+            }
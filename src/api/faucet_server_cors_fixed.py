@@ -4,7 +4,6 @@ import sys
 import json
 import time
 import logging
-import sqlite3
 from flask import Flask, request, jsonify
 from flask_cors import CORS, cross_origin
 
@@ -14,8 +13,9 @@ logger = logging.getLogger(__name__)
 
 from blockchain_storage import storage
 from metrics_engine import MetricsEngine, get_metrics_engine, SATOSHI_CONSTANT, NetworkState
-from storage import IPFSClient
+from storage import get_ipfs_client
 from pow import ProblemRegistry, ProblemType
+from tokenomics.wallet import Wallet
 
 metrics_engine = get_metrics_engine()
 
@@ -35,201 +35,16 @@ except Exception as e:
     logger.warning(f"⚠️  Could not start equilibrium service: {e}")
     equilibrium_service = None
 
-# Helper functions for dynamic metric calculations
-def calculate_tps(seconds: int) -> float:
-    """Calculate transactions per second over time window."""
-    try:
-        current_time = time.time()
-        start_time = current_time - seconds
-        
-        # Get blocks in timeframe
-        blocks = storage.get_blocks_in_timeframe(start_time, current_time)
-        return len(blocks) / seconds if seconds > 0 else 0.0
-    except Exception:
-        return 0.0
-
-def calculate_avg_block_time(num_blocks: int = None) -> float:
-    """Calculate average time between blocks."""
-    try:
-        latest_height = storage.get_latest_height()
-        if latest_height < 1:
-            return 0.0
-        
-        # Get recent blocks
-        if num_blocks:
-            start_height = max(0, latest_height - num_blocks + 1)
-        else:
-            start_height = max(0, latest_height - 10)  # Default to last 10 blocks
-        
-        total_time = 0.0
-        count = 0
-        
-        for i in range(start_height + 1, latest_height + 1):
-            current_block = storage.get_block_data(i)
-            previous_block = storage.get_block_data(i - 1)
-            
-            if current_block and previous_block:
-                time_diff = current_block.get('timestamp', 0) - previous_block.get('timestamp', 0)
-                if time_diff > 0:
-                    total_time += time_diff
-                    count += 1
-        
-        return total_time / count if count > 0 else 0.0
-    except Exception:
-        return 0.0
-
-def calculate_median_block_time() -> float:
-    """Calculate median block time."""
-    try:
-        latest_height = storage.get_latest_height()
-        if latest_height < 1:
-            return 0.0
-        
-        # Get last 20 blocks for median calculation
-        start_height = max(0, latest_height - 19)
-        times = []
-        
-        for i in range(start_height + 1, latest_height + 1):
-            current_block = storage.get_block_data(i)
-            previous_block = storage.get_block_data(i - 1)
-            
-            if current_block and previous_block:
-                time_diff = current_block.get('timestamp', 0) - previous_block.get('timestamp', 0)
-                if time_diff > 0:
-                    times.append(time_diff)
-        
-        if not times:
-            return 0.0
-        
-        times.sort()
-        n = len(times)
-        if n % 2 == 0:
-            return (times[n//2 - 1] + times[n//2]) / 2
-        else:
-            return times[n//2]
-    except Exception:
-        return 0.0
-
-def estimate_hash_rate(seconds: int) -> float:
+# Dashboard metrics are derived from storage.get_chain_stats(), which keeps
+# rolling windows up to date as blocks are committed
+def estimate_hash_rate(chain_stats: dict) -> float:
     """Estimate network hash rate based on difficulty and block time."""
-    try:
-        avg_block_time = calculate_avg_block_time()
-        if avg_block_time <= 0:
-            return 0.0
-        
-        # Estimate based on average difficulty and target block time
-        avg_difficulty = calculate_avg_difficulty()
-        target_block_time = 60.0  # 60 seconds target
-        
-        # Rough estimation: hash_rate ≈ difficulty / block_time
-        estimated_rate = (avg_difficulty * 1000) / avg_block_time
-        return estimated_rate
-    except Exception:
-        return 0.0
-
-def get_active_peers_count() -> int:
-    """Get count of active network peers."""
-    try:
-        # This would ideally come from network status
-        # For now, return a reasonable estimate based on recent activity
-        latest_height = storage.get_latest_height()
-        if latest_height < 1:
-            return 0
-        
-        # Count unique miners in last hour
-        return get_unique_miners_count(3600)
-    except Exception:
-        return 0
-
-def get_unique_miners_count(seconds: int) -> int:
-    """Count unique miners in time window."""
-    try:
-        current_time = time.time()
-        start_time = current_time - seconds
-        
-        miners = storage.get_unique_miners(start_time, current_time)
-        return len(miners)
-    except Exception:
-        return 0
-
-def calculate_avg_difficulty() -> float:
-    """Calculate average difficulty."""
-    try:
-        latest_height = storage.get_latest_height()
-        if latest_height < 0:
-            return 0.0
-        
-        # Get last 10 blocks for average
-        start_height = max(0, latest_height - 9)
-        total_difficulty = 0.0
-        count = 0
-        
-        for i in range(start_height, latest_height + 1):
-            block = storage.get_block_data(i)
-            if block:
-                difficulty = block.get('difficulty', 1.0)
-                total_difficulty += difficulty
-                count += 1
-        
-        return total_difficulty / count if count > 0 else 1.0
-    except Exception:
-        return 1.0
-
-def calculate_efficiency_ratio() -> float:
-    """Calculate work efficiency metric."""
-    try:
-        # Calculate based on recent work scores and time
-        latest_height = storage.get_latest_height()
-        if latest_height < 1:
-            return 0.0
-        
-        # Get last 10 blocks
-        start_height = max(0, latest_height - 9)
-        total_work = 0.0
-        total_time = 0.0
-        
-        for i in range(start_height, latest_height + 1):
-            block = storage.get_block_data(i)
-            if block:
-                work_score = block.get('work_score', 0)
-                total_work += work_score
-        
-        # Calculate time span
-        if start_height < latest_height:
-            first_block = storage.get_block_data(start_height)
-            last_block = storage.get_block_data(latest_height)
-            if first_block and last_block:
-                total_time = last_block.get('timestamp', 0) - first_block.get('timestamp', 0)
-        
-        if total_time > 0:
-            return total_work / total_time
-        else:
-            return total_work
-    except Exception:
-        return 0.0
-
-def count_blocks_in_timeframe(seconds: int) -> int:
-    """Count blocks in time window."""
-    try:
-        current_time = time.time()
-        start_time = current_time - seconds
-        
-        blocks = storage.get_blocks_in_timeframe(start_time, current_time)
-        return len(blocks)
-    except Exception:
-        return 0
-
-def sum_work_score_in_timeframe(seconds: int) -> float:
-    """Sum work scores in time window."""
-    try:
-        current_time = time.time()
-        start_time = current_time - seconds
-        
-        blocks = storage.get_blocks_in_timeframe(start_time, current_time)
-        total_work = sum(block.get('work_score', 0) for block in blocks)
-        return total_work
-    except Exception:
+    avg_block_time = chain_stats['block_time']['avg_seconds']
+    if avg_block_time <= 0:
         return 0.0
+    
+    # Rough estimation: hash_rate ≈ difficulty / block_time
+    return (chain_stats['avg_difficulty'] * 1000) / avg_block_time
 
 def _validate_solution(problem_data: dict, solution_data: list) -> bool:
     """
@@ -298,7 +113,10 @@ def health_check():
 def dashboard_metrics():
     try:
         network_metrics = metrics_engine.get_network_metrics()
-        latest_block = storage.get_latest_block_data()
+        chain_stats = storage.get_chain_stats()
+        latest_block = chain_stats['latest_block'] or storage.get_latest_block_data()
+        windows = chain_stats['windows']
+        hash_rate = estimate_hash_rate(chain_stats)
         
         satoshi_constant = network_metrics.get('satoshi_constant', SATOSHI_CONSTANT)
         damping_ratio = network_metrics.get('damping_ratio', SATOSHI_CONSTANT)
@@ -353,39 +171,35 @@ def dashboard_metrics():
                     }
                 },
                 'transactions': {
-                    'tps_current': calculate_tps(60),
-                    'tps_1min': calculate_tps(60),
-                    'tps_5min': calculate_tps(300),
-                    'tps_1hour': calculate_tps(3600),
-                    'tps_24hour': calculate_tps(86400),
+                    'tps_current': windows['1m']['tps'],
+                    'tps_1min': windows['1m']['tps'],
+                    'tps_5min': windows['5m']['tps'],
+                    'tps_1hour': windows['1h']['tps'],
+                    'tps_24hour': windows['24h']['tps'],
                     'trend': '→'
                 },
-                'block_time': {
-                    'avg_seconds': calculate_avg_block_time(),
-                    'median_seconds': calculate_median_block_time(),
-                    'last_100_blocks': calculate_avg_block_time(100)
-                },
+                'block_time': chain_stats['block_time'],
                 'hash_rate': {
-                    'current_hs': estimate_hash_rate(60),
-                    '5min_hs': estimate_hash_rate(300),
-                    '1hour_hs': estimate_hash_rate(3600),
+                    'current_hs': hash_rate,
+                    '5min_hs': hash_rate,
+                    '1hour_hs': hash_rate,
                     'trend': '→'
                 },
                 'network': {
-                    'active_peers': get_active_peers_count(),
-                    'active_miners': get_unique_miners_count(3600),
-                    'avg_difficulty': calculate_avg_difficulty()
+                    'active_peers': windows['1h']['unique_miners'],
+                    'active_miners': windows['1h']['unique_miners'],
+                    'avg_difficulty': chain_stats['avg_difficulty']
                 },
                 'rewards': {
                     'total_distributed': latest_block.get('index', 0) * 0.5,
                     'unit': 'BEANS'
                 },
                 'efficiency': {
-                    'efficiency_ratio': calculate_efficiency_ratio(),
-                    'problems_solved_1h': count_blocks_in_timeframe(3600),
-                    'total_work_score_1h': sum_work_score_in_timeframe(3600)
+                    'efficiency_ratio': chain_stats['efficiency_ratio'],
+                    'problems_solved_1h': windows['1h']['blocks'],
+                    'total_work_score_1h': windows['1h']['work_score']
                 },
-                'recent_transactions': _get_recent_transactions(),
+                'recent_transactions': _get_recent_transactions(chain_stats['recent_blocks']),
                 'last_updated': current_time
             }
         }
@@ -397,19 +211,18 @@ def dashboard_metrics():
         logger.error(f'Error generating dashboard metrics: {e}')
         return jsonify({'status': 'error', 'message': 'Failed to generate metrics'}), 500
 
-def _get_recent_transactions():
+def _get_recent_transactions(blocks):
     try:
         recent_blocks = []
-        latest_height = storage.get_latest_height()
         current_time = time.time()
         
-        for i in range(max(0, latest_height - 9), latest_height + 1):
-            block_data = storage.get_block_data(i)
+        for block_data in blocks:
             if block_data:
+                i = block_data.get('index', 0)
                 block_hash = block_data.get('block_hash', '')
                 miner = block_data.get('miner_address', 'Unknown')
                 previous_hash = block_data.get('previous_hash', '')
-                cid = block_data.get('cid', 'N/A')
+                cid = block_data.get('cid') or 'N/A'
                 timestamp = block_data.get('timestamp', 0)
                 gas_used = block_data.get('gas_used', 0)
                 
@@ -450,97 +263,91 @@ def _get_recent_transactions():
         logger.error(f'Error getting recent transactions: {e}')
         return []
 
+def _explorer_block_info(block_data, current_time):
+    """Explorer row for a block dict from storage."""
+    height = block_data.get('index', 0)
+    timestamp = block_data.get('timestamp', 0)
+    
+    # Calculate age display
+    age_seconds = current_time - timestamp
+    if age_seconds < 60:
+        age_display = f"{int(age_seconds)}s ago"
+    elif age_seconds < 3600:
+        age_display = f"{int(age_seconds/60)}m ago"
+    elif age_seconds < 86400:
+        age_display = f"{int(age_seconds/3600)}h ago"
+    else:
+        age_display = f"{int(age_seconds/86400)}d ago"
+    
+    # Format timestamp display
+    timestamp_display = time.strftime('%m/%d/%Y, %I:%M:%S %p', time.localtime(timestamp))
+    
+    cid = block_data.get('cid') or 'N/A'
+    return {
+        'height': height,
+        'block_index': height,
+        'hash': block_data.get('block_hash', ''),
+        'hash_short': block_data.get('block_hash', '')[:16] + '...',
+        'miner': block_data.get('miner_address', 'Unknown'),
+        'miner_short': block_data.get('miner_address', 'Unknown')[:16] + '...',
+        'work_score': block_data.get('work_score', 0),
+        'capacity': block_data.get('capacity', 'Unknown'),
+        'timestamp': timestamp,
+        'timestamp_display': timestamp_display,
+        'age_display': age_display,
+        'previous_hash': block_data.get('previous_hash', ''),
+        'previous_hash_short': block_data.get('previous_hash', '')[:16] + '...',
+        'cid': cid,
+        'cid_short': cid[:16] + '...',
+        'gas_used': block_data.get('gas_used', 0),
+        'gas_limit': block_data.get('gas_limit', 1000000),
+        'gas_price': block_data.get('gas_price', 0.000001),
+        'gas_used_formatted': f"{block_data.get('gas_used', 0):,}",
+        'reward': block_data.get('reward', 0),
+        'reward_formatted': f"{block_data.get('reward', 0):.6f} BEANS",
+        'cumulative_work': block_data.get('cumulative_work_score', 0),
+        'cumulative_work_formatted': f"{block_data.get('cumulative_work_score', 0):,.2f}",
+        'merkle_root': block_data.get('merkle_root', ''),
+        'nonce': block_data.get('nonce', 0),
+        'difficulty': block_data.get('difficulty', 1.0),
+        'size_bytes': block_data.get('size_bytes', 0),
+        'transaction_count': block_data.get('transaction_count', 0)
+    }
+
 @app.route('/v1/explorer/blocks', methods=['GET'])
 def block_explorer():
     try:
-        page = int(request.args.get('page', 1))
-        limit = int(request.args.get('limit', 50))
+        page = max(int(request.args.get('page', 1)), 1)
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
         search = request.args.get('search', '')
         sort_by = request.args.get('sort_by', 'height')
         sort_order = request.args.get('sort_order', 'desc')
+        # Keyset cursor "<sort value>:<height>" from the previous page's next_cursor
+        cursor = request.args.get('cursor')
+        if sort_by not in storage.EXPLORER_SORT_COLUMNS:
+            sort_by = 'height'
         
-        latest_height = storage.get_latest_height()
+        after = None
+        if cursor:
+            value, cursor_height = cursor.rsplit(':', 1)
+            after = (float(value), int(cursor_height))
         
-        # Get all blocks first
-        all_blocks = []
-        for height in range(0, latest_height + 1):
-            block_data = storage.get_block_data(height)
-            if block_data:
-                current_time = time.time()
-                timestamp = block_data.get('timestamp', 0)
-                
-                # Calculate age display
-                age_seconds = current_time - timestamp
-                if age_seconds < 60:
-                    age_display = f"{int(age_seconds)}s ago"
-                elif age_seconds < 3600:
-                    age_display = f"{int(age_seconds/60)}m ago"
-                elif age_seconds < 86400:
-                    age_display = f"{int(age_seconds/3600)}h ago"
-                else:
-                    age_display = f"{int(age_seconds/86400)}d ago"
-                
-                # Format timestamp display
-                timestamp_display = time.strftime('%m/%d/%Y, %I:%M:%S %p', time.localtime(timestamp))
-                
-                block_info = {
-                    'height': height,
-                    'block_index': height,
-                    'hash': block_data.get('block_hash', ''),
-                    'hash_short': block_data.get('block_hash', '')[:16] + '...',
-                    'miner': block_data.get('miner_address', 'Unknown'),
-                    'miner_short': block_data.get('miner_address', 'Unknown')[:16] + '...',
-                    'work_score': block_data.get('work_score', 0),
-                    'capacity': block_data.get('capacity', 'Unknown'),
-                    'timestamp': timestamp,
-                    'timestamp_display': timestamp_display,
-                    'age_display': age_display,
-                    'previous_hash': block_data.get('previous_hash', ''),
-                    'previous_hash_short': block_data.get('previous_hash', '')[:16] + '...',
-                    'cid': block_data.get('cid', 'N/A'),
-                    'cid_short': block_data.get('cid', 'N/A')[:16] + '...',
-                    'gas_used': block_data.get('gas_used', 0),
-                    'gas_limit': block_data.get('gas_limit', 1000000),
-                    'gas_price': block_data.get('gas_price', 0.000001),
-                    'gas_used_formatted': f"{block_data.get('gas_used', 0):,}",
-                    'reward': block_data.get('reward', 0),
-                    'reward_formatted': f"{block_data.get('reward', 0):.6f} BEANS",
-                    'cumulative_work': block_data.get('cumulative_work_score', 0),
-                    'cumulative_work_formatted': f"{block_data.get('cumulative_work_score', 0):,.2f}",
-                    'merkle_root': block_data.get('merkle_root', ''),
-                    'nonce': block_data.get('nonce', 0),
-                    'difficulty': block_data.get('difficulty', 1.0),
-                    'size_bytes': block_data.get('size_bytes', 0),
-                    'transaction_count': block_data.get('transaction_count', 0)
-                }
-                
-                # Apply search filter if provided
-                if search:
-                    search_lower = search.lower()
-                    if (search_lower in str(height) or 
-                        search_lower in block_info['hash'].lower() or 
-                        search_lower in block_info['miner'].lower() or 
-                        search_lower in block_info['cid'].lower()):
-                        all_blocks.append(block_info)
-                else:
-                    all_blocks.append(block_info)
-        
-        # Sort blocks
-        if sort_by == 'height':
-            all_blocks.sort(key=lambda x: x['height'], reverse=(sort_order == 'desc'))
-        elif sort_by == 'timestamp':
-            all_blocks.sort(key=lambda x: x['timestamp'], reverse=(sort_order == 'desc'))
-        elif sort_by == 'work_score':
-            all_blocks.sort(key=lambda x: x['work_score'], reverse=(sort_order == 'desc'))
-        elif sort_by == 'reward':
-            all_blocks.sort(key=lambda x: x['reward'], reverse=(sort_order == 'desc'))
-        
-        # Pagination
-        total_blocks = len(all_blocks)
+        # Filter, order and page in SQL; only this page is decoded
+        blocks = storage.query_blocks(limit=limit, offset=(page - 1) * limit, search=search,
+                                      sort_by=sort_by, sort_order=sort_order, after=after)
+        totals = storage.count_blocks(search)
+        
+        current_time = time.time()
+        paginated_blocks = [_explorer_block_info(block_data, current_time) for block_data in blocks]
+        
+        next_cursor = None
+        if len(blocks) == limit:
+            last = blocks[-1]
+            sort_key = 'index' if sort_by == 'height' else sort_by
+            next_cursor = f"{last.get(sort_key, 0)}:{last.get('index', 0)}"
+        
+        total_blocks = totals['total_blocks']
         total_pages = (total_blocks + limit - 1) // limit
-        start_idx = (page - 1) * limit
-        end_idx = start_idx + limit
-        paginated_blocks = all_blocks[start_idx:end_idx]
         
         return jsonify({
             'status': 'success',
@@ -552,7 +359,8 @@ def block_explorer():
                     'total_blocks': total_blocks,
                     'total_pages': total_pages,
                     'has_next': page < total_pages,
-                    'has_prev': page > 1
+                    'has_prev': page > 1,
+                    'next_cursor': next_cursor
                 },
                 'filters': {
                     'search': search,
@@ -561,9 +369,9 @@ def block_explorer():
                 },
                 'summary': {
                     'total_blocks': total_blocks,
-                    'total_gas_used': sum(block['gas_used'] for block in all_blocks),
-                    'total_rewards': sum(block['reward'] for block in all_blocks),
-                    'avg_work_score': sum(block['work_score'] for block in all_blocks) / max(len(all_blocks), 1),
+                    'total_gas_used': totals['total_gas_used'],
+                    'total_rewards': totals['total_rewards'],
+                    'avg_work_score': totals['avg_work_score'],
                     'avg_block_time': 7.5
                 }
             }
@@ -652,6 +460,22 @@ def get_block(block_index):
         logger.error(f'Error getting block {block_index}: {e}')
         return jsonify({'status': 'error', 'message': 'Failed to get block data'}), 500
 
+@app.route('/v1/data/headers', methods=['GET'])
+def get_headers():
+    """Header range for headers-first sync: ?start=<height>&count=<n> (max 2000)."""
+    try:
+        start = max(0, request.args.get('start', 0, type=int))
+        count = min(max(0, request.args.get('count', 2000, type=int)), 2000)
+        headers = storage.get_block_headers(start, count)
+        return jsonify({
+            'status': 'success',
+            'data': headers,
+            'tip_height': storage.get_latest_height()
+        })
+    except Exception as e:
+        logger.error(f'Error getting headers from {request.args.get("start")}: {e}')
+        return jsonify({'status': 'error', 'message': 'Failed to get headers'}), 500
+
 @app.route('/v1/data/block/latest', methods=['GET'])
 def get_latest_block():
     try:
@@ -668,16 +492,12 @@ def get_latest_block():
 def get_rewards(address):
     """Get rewards for a specific address"""
     try:
-        # Get all blocks mined by this address
-        blocks = storage.get_blocks_by_miner(address)
-        
-        total_rewards = 0.0
-        total_work_score = 0.0
-        total_blocks = len(blocks)
+        # Per-miner totals are maintained as blocks are stored
+        miner_stats = storage.get_miner_stats(address)
         
-        for block in blocks:
-            total_rewards += block.get('reward', 0.0)
-            total_work_score += block.get('work_score', 0.0)
+        total_rewards = miner_stats['total_reward']
+        total_work_score = miner_stats['total_work']
+        total_blocks = miner_stats['blocks_mined']
         
         avg_reward = total_rewards / total_blocks if total_blocks > 0 else 0.0
         avg_work_score = total_work_score / total_blocks if total_blocks > 0 else 0.0
@@ -704,13 +524,12 @@ def get_rewards(address):
 def create_and_upload_proof_data(block_hash, block_index, miner_address, work_score, problem_data, solution_data):
     """Create and upload proof data to IPFS for incoming blocks."""
     try:
-        from storage import IPFSClient
         import json
         import time
         import random
         
         # Initialize IPFS client
-        ipfs_client = IPFSClient("http://localhost:5001")
+        ipfs_client = get_ipfs_client("http://localhost:5001")
         if not ipfs_client.health_check():
             logger.error("❌ IPFS daemon not available for proof data upload")
             return None
@@ -827,6 +646,14 @@ def ingest_block():
         if not block_hash or not miner_address:
             return jsonify({'status': 'error', 'message': 'Missing required fields'}), 400
         
+        # Signed submissions must carry a valid signature over the other fields
+        signature = data.get('signature')
+        if signature:
+            signed_data = {key: value for key, value in data.items() if key not in ('signature', 'public_key')}
+            if not Wallet.verify_block_signature(data.get('public_key', ''), signed_data, signature):
+                logger.warning(f"❌ Invalid signature rejected for block {block_hash[:16]}...")
+                return jsonify({'status': 'error', 'message': 'Invalid block signature'}), 400
+        
         # CRITICAL: Validate solution before accepting block
         if not _validate_solution(problem_data, solution_data):
             logger.warning(f"❌ Invalid solution rejected for block {block_hash[:16]}...")
@@ -978,21 +805,20 @@ def ingest_block():
 def get_ipfs_data(cid):
     """Get IPFS proof bundle data by CID"""
     try:
-        # Get block data by CID
-        conn = sqlite3.connect(storage.db_path)
-        cursor = conn.cursor()
+        # Get block data by CID (indexed column)
+        block_data = storage.get_block_by_cid(cid)
         
-        cursor.execute('''
-            SELECT block_bytes FROM blocks 
-            WHERE block_bytes LIKE ? 
-            ORDER BY height DESC LIMIT 1
-        ''', (f'%{cid}%',))
-        
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result and result[0]:
-            block_data = json.loads(result[0].decode('utf-8'))
+        if block_data:
+            
+            # Fill problem/solution from a locally cached bundle (never waits on IPFS)
+            cached = storage.bundle_cache.get(cid)
+            if cached is not None:
+                try:
+                    bundle = json.loads(cached.decode('utf-8'))
+                    block_data.setdefault('problem_data', bundle.get('problem', {}))
+                    block_data.setdefault('solution_data', bundle.get('solution', {}))
+                except ValueError:
+                    pass
             
             # Create proof bundle JSON
             proof_bundle = {
@@ -1030,11 +856,10 @@ def get_ipfs_data(cid):
 def get_proof_data_by_cid(cid):
     """Get proof bundle data directly from IPFS by CID"""
     try:
-        # Initialize IPFS client
-        ipfs_client = IPFSClient("http://localhost:5001")
-        
-        # Get data from IPFS
-        data = ipfs_client.get(cid)
+        # Get data from the bundle cache or IPFS
+        data = storage.get_ipfs_bytes(cid)
+        if data is None:
+            raise Exception("IPFS daemon not available")
         proof_json = json.loads(data.decode("utf-8"))
         
         return jsonify({
@@ -1069,9 +894,10 @@ def get_proof_data_by_block(block_index):
                 'message': 'No CID found for block'
             }), 404
         
-        # Get proof data from IPFS
-        ipfs_client = IPFSClient("http://localhost:5001")
-        data = ipfs_client.get(cid)
+        # Get proof data from the bundle cache or IPFS
+        data = storage.get_ipfs_bytes(cid)
+        if data is None:
+            raise Exception("IPFS daemon not available")
         proof_json = json.loads(data.decode("utf-8"))
         
         return jsonify({
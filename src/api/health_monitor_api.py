@@ -13,6 +13,11 @@ from flask import Flask, jsonify, request
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
+try:
+    from .blockchain_state_log import read_manifest, log_dir_for
+except ImportError:
+    from blockchain_state_log import read_manifest, log_dir_for
+
 app = Flask(__name__)
 limiter = Limiter(
     app,
@@ -74,8 +79,11 @@ class HealthMonitorAPI:
         return False
     
     def get_blockchain_state(self):
-        """Get current blockchain state."""
+        """Get current blockchain state (log manifest, or legacy full JSON)."""
         try:
+            manifest = read_manifest(log_dir_for(self.blockchain_state_path))
+            if manifest is not None:
+                return manifest
             if os.path.exists(self.blockchain_state_path):
                 with open(self.blockchain_state_path, 'r') as f:
                     return json.load(f)
@@ -83,6 +91,15 @@ class HealthMonitorAPI:
         except Exception:
             return None
     
+    @staticmethod
+    def _block_count(blockchain_state):
+        """Block count from a log manifest or a legacy state dict."""
+        if not blockchain_state:
+            return 0
+        if "block_count" in blockchain_state:
+            return blockchain_state["block_count"]
+        return len(blockchain_state.get("blocks", []))
+    
     def get_cache_state(self):
         """Get current API cache state."""
         try:
@@ -99,7 +116,7 @@ class HealthMonitorAPI:
         desync_detected = self.detect_consensus_desync()
         
         blockchain_state = self.get_blockchain_state()
-        total_blocks = len(blockchain_state.get("blocks", [])) if blockchain_state else 0
+        total_blocks = self._block_count(blockchain_state)
         latest_block = blockchain_state.get("latest_block", {}) if blockchain_state else {}
         latest_index = latest_block.get("index", 0)
         
@@ -132,7 +149,7 @@ class HealthMonitorAPI:
                 "message": "Blockchain state not found"
             }
         
-        total_blocks = len(blockchain_state.get("blocks", []))
+        total_blocks = self._block_count(blockchain_state)
         latest_block = blockchain_state.get("latest_block", {})
         
         # Check if cache is in sync
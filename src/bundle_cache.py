@@ -0,0 +1,326 @@
+"""
+Module: bundle_cache
+Specification: docs/blockchain/storage.md
+
+Local content-addressed cache for proof bundles fetched from IPFS.
+
+CIDs are immutable, so a bundle fetched once never has to be fetched again.
+The cache has two tiers:
+
+- Hot tier: recent bundles kept in memory (bounded by count and bytes)
+- Disk tier: one file per CID in a sharded directory
+  (<cache_dir>/<last two CID chars>/<CID>), evicted least recently used once
+  the total size exceeds max_bytes
+
+Content is verified against its CID before it is cached. Proof bundles are
+added with CIDv0 (see IPFSClient.add), i.e. the sha2-256 multihash of a
+dag-pb node wrapping a UnixFS file. Bundles up to one chunk (256 KiB) are a
+single such node, so the CID can be recomputed from the bytes; larger or
+non-CIDv0 content cannot be checked locally and is served uncached.
+"""
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_HOT_ITEMS = 1024
+DEFAULT_HOT_MAX_BYTES = 64 * 1024 * 1024
+# Default ipfs add chunk size; larger files become multi-block DAGs
+UNIXFS_CHUNK_SIZE = 256 * 1024
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_BASE58_INDEX = {char: i for i, char in enumerate(BASE58_ALPHABET)}
+# sha2-256 multihash prefix: function code 0x12, digest length 32
+_SHA256_MULTIHASH = b"\x12\x20"
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _base58_encode(data: bytes) -> str:
+    value = int.from_bytes(data, "big")
+    encoded = ""
+    while value:
+        value, remainder = divmod(value, 58)
+        encoded = BASE58_ALPHABET[remainder] + encoded
+    return "1" * (len(data) - len(data.lstrip(b"\0"))) + encoded
+
+
+def _base58_decode(text: str) -> Optional[bytes]:
+    value = 0
+    for char in text:
+        digit = _BASE58_INDEX.get(char)
+        if digit is None:
+            return None
+        value = value * 58 + digit
+    body = value.to_bytes((value.bit_length() + 7) // 8, "big")
+    return b"\0" * (len(text) - len(text.lstrip("1"))) + body
+
+
+def _unixfs_file_node(data: bytes) -> bytes:
+    """dag-pb node wrapping data as a single-chunk UnixFS file."""
+    unixfs = b"\x08\x02"  # Type = File
+    if data:
+        unixfs += b"\x12" + _varint(len(data)) + data
+    unixfs += b"\x18" + _varint(len(data))  # filesize
+    return b"\x0a" + _varint(len(unixfs)) + unixfs
+
+
+def compute_cid_v0(data: bytes) -> Optional[str]:
+    """
+    CIDv0 that `ipfs add` gives data, if it fits in one chunk.
+
+    Args:
+        data: File content
+
+    Returns:
+        CID string, or None if data spans several chunks
+    """
+    if len(data) > UNIXFS_CHUNK_SIZE:
+        return None
+    digest = hashlib.sha256(_unixfs_file_node(data)).digest()
+    return _base58_encode(_SHA256_MULTIHASH + digest)
+
+
+def verify_cid(cid: str, data: bytes) -> Optional[bool]:
+    """
+    Check content against its CID.
+
+    Args:
+        cid: CID the content was requested by
+        data: Content
+
+    Returns:
+        True if it matches, False if it does not, None if the CID cannot be
+        recomputed locally (not CIDv0, or multi-chunk content)
+    """
+    if len(cid) != 46 or not cid.startswith("Qm"):
+        return None
+    multihash = _base58_decode(cid)
+    if multihash is None or multihash[:2] != _SHA256_MULTIHASH:
+        return False
+    computed = compute_cid_v0(data)
+    if computed is None:
+        return None
+    return computed == cid
+
+
+class ProofBundleCache:
+    """
+    Two-tier (memory + disk) LRU cache of immutable IPFS content keyed by CID.
+
+    Thread-safe.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+                 hot_items: int = DEFAULT_HOT_ITEMS, hot_max_bytes: int = DEFAULT_HOT_MAX_BYTES):
+        """
+        Initialize cache, indexing bundles already on disk.
+
+        Args:
+            cache_dir: Directory for cached bundles (created if missing)
+            max_bytes: Disk tier size bound
+            hot_items: Max bundles in the memory tier
+            hot_max_bytes: Memory tier size bound
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hot_items = hot_items
+        self.hot_max_bytes = hot_max_bytes
+        self._lock = threading.Lock()
+        self._hot: "OrderedDict[str, bytes]" = OrderedDict()
+        self._hot_bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()  # cid -> size, LRU first
+        self._disk_bytes = 0
+        self.stats = {"hot_hits": 0, "disk_hits": 0, "misses": 0, "rejected": 0, "evicted": 0}
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _path(self, cid: str) -> str:
+        return os.path.join(self.cache_dir, cid[-2:], cid)
+
+    def _load_index(self):
+        """Rebuild the disk LRU from file access times."""
+        entries = []
+        for shard in os.listdir(self.cache_dir):
+            shard_dir = os.path.join(self.cache_dir, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if name.endswith(".tmp"):
+                    os.remove(os.path.join(shard_dir, name))
+                    continue
+                stat = os.stat(os.path.join(shard_dir, name))
+                entries.append((stat.st_atime, name, stat.st_size))
+        for _, cid, size in sorted(entries):
+            self._disk[cid] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def __contains__(self, cid: str) -> bool:
+        with self._lock:
+            return cid in self._hot or cid in self._disk
+
+    def get(self, cid: str) -> Optional[bytes]:
+        """
+        Cached content for a CID.
+
+        Args:
+            cid: IPFS CID
+
+        Returns:
+            Content or None on a miss
+        """
+        with self._lock:
+            data = self._hot.get(cid)
+            if data is not None:
+                self._hot.move_to_end(cid)
+                self.stats["hot_hits"] += 1
+                return data
+            if cid not in self._disk:
+                self.stats["misses"] += 1
+                return None
+            self._disk.move_to_end(cid)
+
+        try:
+            with open(self._path(cid), "rb") as f:
+                data = f.read()
+        except OSError:
+            with self._lock:
+                self._forget_disk(cid)
+                self.stats["misses"] += 1
+            return None
+
+        with self._lock:
+            self.stats["disk_hits"] += 1
+            self._put_hot(cid, data)
+        return data
+
+    def put(self, cid: str, data: bytes) -> bool:
+        """
+        Cache content after checking it against its CID.
+
+        Args:
+            cid: IPFS CID
+            data: Content
+
+        Returns:
+            True if cached; False if it failed verification or cannot be
+            verified locally
+        """
+        if verify_cid(cid, data) is not True:
+            with self._lock:
+                self.stats["rejected"] += 1
+            return False
+
+        with self._lock:
+            if cid in self._disk:
+                self._put_hot(cid, data)
+                return True
+
+        path = self._path(cid)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if cid not in self._disk:
+                self._disk[cid] = len(data)
+                self._disk_bytes += len(data)
+            self._put_hot(cid, data)
+            self._evict_disk()
+        return True
+
+    def fetch(self, cid: str, loader: Callable[[str], Optional[bytes]]) -> Optional[bytes]:
+        """
+        Cached content, or load it and fill the cache.
+
+        Content that fails verification is dropped and None returned; content
+        that cannot be verified locally is returned without being cached.
+
+        Args:
+            cid: IPFS CID
+            loader: Fetches content for a CID on a miss (e.g. IPFSClient.get)
+
+        Returns:
+            Content or None
+        """
+        data = self.get(cid)
+        if data is not None:
+            return data
+        data = loader(cid)
+        if data is None:
+            return None
+        if verify_cid(cid, data) is False:
+            with self._lock:
+                self.stats["rejected"] += 1
+            print(f"❌ Content for {cid} does not match its CID")
+            return None
+        self.put(cid, data)
+        return data
+
+    def _put_hot(self, cid: str, data: bytes):
+        if len(data) > self.hot_max_bytes:
+            return
+        previous = self._hot.pop(cid, None)
+        if previous is not None:
+            self._hot_bytes -= len(previous)
+        self._hot[cid] = data
+        self._hot_bytes += len(data)
+        while len(self._hot) > self.hot_items or self._hot_bytes > self.hot_max_bytes:
+            _, evicted = self._hot.popitem(last=False)
+            self._hot_bytes -= len(evicted)
+
+    def _forget_disk(self, cid: str):
+        size = self._disk.pop(cid, None)
+        if size is not None:
+            self._disk_bytes -= size
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.max_bytes and self._disk:
+            cid, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.stats["evicted"] += 1
+            try:
+                os.remove(self._path(cid))
+            except OSError:
+                pass
+
+    @property
+    def disk_bytes(self) -> int:
+        return self._disk_bytes
+
+
+_caches: Dict[str, ProofBundleCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_bundle_cache(cache_dir: str, **kwargs) -> ProofBundleCache:
+    """
+    Shared cache for a directory, so every user in the process sees one index.
+
+    Args:
+        cache_dir: Cache directory
+        **kwargs: ProofBundleCache settings, applied only when the cache is created
+
+    Returns:
+        ProofBundleCache instance
+    """
+    key = os.path.abspath(cache_dir)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = ProofBundleCache(cache_dir, **kwargs)
+            _caches[key] = cache
+        return cache
@@ -139,6 +139,9 @@ Examples:
   coinjectured init --role miner --data-dir ./data
   coinjectured run --config ./config.json
   coinjectured mine --config ./config.json --problem-type subset_sum --tier desktop
+  coinjectured mine --config ./config.json --workers 0
+  coinjectured migrate-storage --data-dir ./data
+  coinjectured train-dictionary --samples ./captures/messages.ndjson --output ./config/wire.dict
   coinjectured get-block --hash 0xabc123...
   coinjectured get-proof --cid QmXyZ...
   coinjectured add-peer --multiaddr /ip4/127.0.0.1/tcp/8080
@@ -161,6 +164,8 @@ Examples:
         self._add_init_command(subparsers)
         self._add_run_command(subparsers)
         self._add_mine_command(subparsers)
+        self._add_migrate_storage_command(subparsers)
+        self._add_train_dictionary_command(subparsers)
         
         # Blockchain interaction commands
         self._add_get_block_command(subparsers)
@@ -294,6 +299,62 @@ Examples:
             type=int,
             help='Mining duration in seconds (default: unlimited)'
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Solver worker processes; 0 uses every core (default: 1)'
+        )
+    
+    def _add_migrate_storage_command(self, subparsers):
+        """Add migrate-storage command parser."""
+        parser = subparsers.add_parser(
+            'migrate-storage',
+            help='Rewrite stored headers/blocks in the binary row format'
+        )
+        parser.add_argument(
+            '--data-dir',
+            type=str,
+            default='./data',
+            help='Data directory containing blockchain.db (default: ./data)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows rewritten per transaction (default: 500)'
+        )
+        parser.add_argument(
+            '--vacuum',
+            action='store_true',
+            help='Compact the database file after migrating'
+        )
+    
+    def _add_train_dictionary_command(self, subparsers):
+        """Add train-dictionary command parser."""
+        parser = subparsers.add_parser(
+            'train-dictionary',
+            help='Train a zstd dictionary for network message compression'
+        )
+        parser.add_argument(
+            '--samples',
+            type=str,
+            nargs='+',
+            required=True,
+            help='Captured messages: NDJSON capture files (hex per line) or directories of raw message files'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            required=True,
+            help='Path to write the dictionary'
+        )
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=16 * 1024,
+            help='Dictionary size in bytes (default: 16384)'
+        )
     
     def _add_get_block_command(self, subparsers):
         """Add get-block command parser."""
@@ -816,12 +877,14 @@ Examples:
             except ImportError:
                 from storage import StorageManager, StorageConfig, NodeRole, PruningMode
             try:
-                from .core.blockchain import Block, ProblemTier, ProblemType, Transaction, mine_block, generate_subset_sum_problem, solve_subset_sum
+                from .core.blockchain import Block, ProblemTier, ProblemType, Transaction, mine_block, generate_subset_sum_problem
                 from .core.blockchain import EnergyMetrics, ComputationalComplexity, subset_sum_complexity
+                from .core.parallel_miner import get_parallel_miner
                 from .pow import ProblemRegistry
             except ImportError:
-                from core.blockchain import Block, ProblemTier, ProblemType, Transaction, mine_block, generate_subset_sum_problem, solve_subset_sum
+                from core.blockchain import Block, ProblemTier, ProblemType, Transaction, mine_block, generate_subset_sum_problem
                 from core.blockchain import EnergyMetrics, ComputationalComplexity, subset_sum_complexity
+                from core.parallel_miner import get_parallel_miner
                 from pow import ProblemRegistry
             import hashlib
             import json
@@ -867,8 +930,11 @@ Examples:
             print(f"🧩 Generated problem: target={problem['target']}, size={problem['size']}")
             
             # Solve the problem
+            miner = get_parallel_miner(getattr(args, 'workers', 1))
+            if miner.workers > 1:
+                print(f"⚙️  Solving with {miner.workers} worker processes")
             start_time = time.time()
-            solution = solve_subset_sum(problem)
+            solution = miner.solve(problem)
             solve_time = time.time() - start_time
             
             if not solution:
@@ -1117,6 +1183,98 @@ Examples:
         
         return hashlib.sha256("".join(tx_hashes).encode()).hexdigest()
     
+    def _handle_migrate_storage(self, args) -> int:
+        """Handle migrate-storage command."""
+        try:
+            try:
+                from .storage import StorageManager, StorageConfig, NodeRole, PruningMode
+            except ImportError:
+                from storage import StorageManager, StorageConfig, NodeRole, PruningMode
+            
+            if not os.path.exists(os.path.join(args.data_dir, 'blockchain.db')):
+                print(f"Error: no blockchain.db in {args.data_dir}", file=sys.stderr)
+                return 1
+            
+            storage_manager = StorageManager(StorageConfig(
+                data_dir=args.data_dir,
+                role=NodeRole.FULL,
+                pruning_mode=PruningMode.ARCHIVE
+            ))
+            try:
+                print(f"Migrating storage in {args.data_dir}...")
+                stats = storage_manager.migrate_storage_format(
+                    batch_size=args.batch_size,
+                    vacuum=args.vacuum
+                )
+            finally:
+                storage_manager.close()
+            
+            print(f"✅ Storage migration complete")
+            print(f"   Headers converted: {stats['headers']}")
+            print(f"   Blocks converted: {stats['blocks']}")
+            if stats['failed']:
+                print(f"   ⚠️  Rows left unconverted: {stats['failed']}")
+            
+            return 0 if not stats['failed'] else 1
+            
+        except Exception as e:
+            print(f"Error migrating storage: {e}", file=sys.stderr)
+            return 1
+    
+    def _handle_train_dictionary(self, args) -> int:
+        """Handle train-dictionary command."""
+        try:
+            try:
+                from .network import NetworkProtocol, MessageCompressor, train_compression_dictionary
+            except ImportError:
+                from network import NetworkProtocol, MessageCompressor, train_compression_dictionary
+            
+            # Collect raw captured messages
+            captured = []
+            for path in args.samples:
+                if os.path.isdir(path):
+                    for name in sorted(os.listdir(path)):
+                        file_path = os.path.join(path, name)
+                        if os.path.isfile(file_path):
+                            with open(file_path, 'rb') as f:
+                                captured.append(f.read())
+                else:
+                    with open(path, 'r') as f:
+                        captured.extend(bytes.fromhex(json.loads(line)) for line in f if line.strip())
+            
+            # Normalize every capture to the payload binary frames compress
+            protocol = NetworkProtocol(None, None, None)
+            samples = []
+            for data in captured:
+                try:
+                    samples.append(protocol.training_sample(data))
+                except Exception:
+                    continue
+            if not samples:
+                print("Error: no decodable messages in samples", file=sys.stderr)
+                return 1
+            
+            print(f"Training {args.size}-byte dictionary from {len(samples)} messages...")
+            dictionary = train_compression_dictionary(samples, args.size)
+            with open(args.output, 'wb') as f:
+                f.write(dictionary)
+            
+            plain = MessageCompressor(threshold=0)
+            trained = MessageCompressor(dictionary=dictionary, dictionary_threshold=0)
+            plain_bytes = sum(len(plain.compress(sample)[0]) for sample in samples)
+            trained_bytes = sum(len(trained.compress(sample, use_dictionary=True)[0]) for sample in samples)
+            raw_bytes = sum(len(sample) for sample in samples)
+            
+            print(f"✅ Dictionary written to {args.output} (id {trained.dict_id})")
+            print(f"   Skipped undecodable captures: {len(captured) - len(samples)}")
+            print(f"   Ratio without dictionary: {raw_bytes / max(plain_bytes, 1):.2f}x")
+            print(f"   Ratio with dictionary: {raw_bytes / max(trained_bytes, 1):.2f}x")
+            return 0
+            
+        except Exception as e:
+            print(f"Error training dictionary: {e}", file=sys.stderr)
+            return 1
+    
     def _handle_get_block(self, args) -> int:
         """Handle get-block command."""
         try:
@@ -1164,14 +1322,14 @@ Examples:
             if self.ipfs_available:
                 try:
                     # Lazy import to avoid hard dependency if packaging without IPFS
-                    from .storage import IPFSClient  # type: ignore
+                    from .storage import get_ipfs_client  # type: ignore
                 except Exception:
                     try:
-                        from storage import IPFSClient  # type: ignore
+                        from storage import get_ipfs_client  # type: ignore
                     except Exception:
-                        IPFSClient = None  # type: ignore
-                if IPFSClient is not None:
-                    client = IPFSClient(api_url=self.ipfs_api_url)
+                        get_ipfs_client = None  # type: ignore
+                if get_ipfs_client is not None:
+                    client = get_ipfs_client(self.ipfs_api_url)
                     data_bytes = client.get(args.cid)
             # Fallback to public gateway
             if data_bytes is None:
@@ -2426,14 +2584,14 @@ Examples:
             print(f"   Address: {wallet.address}")
             print(f"   Current Balance: {balance:.6f} COIN")
             
-            # Get transaction history for this address
-            transactions = []
-            for tx in blockchain_state.transaction_history.get(wallet.address, []):
-                if tx.recipient == wallet.address:  # Incoming transactions (rewards)
-                    transactions.append(tx)
-            
-            # Sort by timestamp (newest first)
-            transactions.sort(key=lambda x: x.timestamp, reverse=True)
+            # Get transaction history for this address (newest first)
+            transactions, cursor = [], None
+            while len(transactions) < args.limit:
+                page, cursor = blockchain_state.get_transaction_history_page(wallet.address, 100, cursor)
+                # Incoming transactions (rewards)
+                transactions.extend(tx for tx in page if tx.recipient == wallet.address)
+                if cursor is None:
+                    break
             
             print(f"\n📊 Recent Mining Rewards (last {min(args.limit, len(transactions))}):")
             if transactions:
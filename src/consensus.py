@@ -6,11 +6,14 @@ Consensus engine for COINjecture blockchain with header validation,
 reveal validation, fork choice, and genesis block management.
 """
 
+import os
+import json
+import mmap
 import time
 import hashlib
 import math
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple, Set
+from typing import Any, Callable, Dict, List, Optional, Tuple, Set, Union
 from enum import Enum
 from collections import deque
 
@@ -21,6 +24,14 @@ try:
 except ImportError:
     HAS_NUMPY = False
 
+# Optional msgspec import for compact snapshots
+try:
+    import msgspec  # type: ignore
+    HAS_MSGSPEC = True
+except ImportError:
+    msgspec = None
+    HAS_MSGSPEC = False
+
 # Import from existing modules
 try:
     from .core.blockchain import Block, ProblemTier, ComputationalComplexity, calculate_computational_work_score
@@ -48,6 +59,13 @@ MAX_HEADERS_PER_SECOND = 100
 MAX_PROOF_SIZE_BYTES = 10 * 1024 * 1024  # 10 MB
 DEFAULT_NETWORK_ID = "coinjecture-testnet-v1"  # Keep original for genesis compatibility
 
+# Snapshot file: magic, version byte, codec byte, payload
+SNAPSHOT_MAGIC = b"CJSNAP"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_CODEC_MSGPACK = 1
+SNAPSHOT_CODEC_JSON = 2
+_SNAPSHOT_HEADER_SIZE = len(SNAPSHOT_MAGIC) + 2
+
 
 class ValidationError(Exception):
     """Base class for validation errors."""
@@ -70,6 +88,8 @@ class BlockNode:
     Node in the block tree for fork choice.
     
     Represents a block in the chain with its cumulative work score.
+    skip[k] is the hash of the 2**k-th ancestor (binary lifting), so any
+    ancestor is reachable in O(log n) hops.
     """
     block: Block
     parent_hash: str
@@ -77,11 +97,46 @@ class BlockNode:
     height: int
     receipt_time: float
     children: List[str] = field(default_factory=list)
+    skip: List[str] = field(default_factory=list)
+    
+    @property
+    def block_hash(self) -> str:
+        return self.block.block_hash
     
     def __hash__(self):
         return hash(self.block.block_hash)
 
 
+@dataclass(slots=True)
+class CompactNode:
+    """
+    Finalized block tree entry without the block body.
+    
+    Keeps only what fork choice and ancestor queries need; the block
+    itself is loaded from storage on demand.
+    """
+    block_hash: str
+    parent_hash: str
+    cumulative_work: float
+    height: int
+    receipt_time: float
+    skip: List[str]
+    
+    @classmethod
+    def from_node(cls, node: BlockNode) -> 'CompactNode':
+        return cls(
+            block_hash=node.block.block_hash,
+            parent_hash=node.parent_hash,
+            cumulative_work=node.cumulative_work,
+            height=node.height,
+            receipt_time=node.receipt_time,
+            skip=node.skip
+        )
+
+
+TreeNode = Union[BlockNode, CompactNode]
+
+
 @dataclass
 class ConsensusConfig:
     """Configuration for consensus engine."""
@@ -92,6 +147,7 @@ class ConsensusConfig:
     max_proof_size_bytes: int = MAX_PROOF_SIZE_BYTES
     genesis_timestamp: float = 1609459200.0  # 2021-01-01 00:00:00 UTC
     genesis_seed: str = "coinjecture_genesis_seed"
+    prune_block_tree: bool = True  # Demote nodes more than max_reorg_depth below the tip
 
 
 @dataclass
@@ -199,12 +255,20 @@ class ConsensusEngine:
         # Initialize metrics engine for gas/reward calculation
         self.metrics_engine = metrics_engine or get_metrics_engine()
         
-        # Block tree for fork choice
-        self.block_tree: Dict[str, BlockNode] = {}
+        # Block tree for fork choice: full BlockNodes near the tip,
+        # CompactNodes for the finalized chain below it
+        self.block_tree: Dict[str, TreeNode] = {}
+        
+        # Heights of full nodes still awaiting demotion
+        self._full_heights: Dict[int, List[str]] = {}
+        self._pruned_height = -1
         
         # Current best tip
         self.best_tip: Optional[BlockNode] = None
         
+        # Called with (block_hash, height) whenever the best tip changes
+        self.tip_handlers: List[Callable] = []
+        
         # Genesis block
         self.genesis_block: Optional[Block] = None
         
@@ -614,8 +678,9 @@ class ConsensusEngine:
                 return False
             
             # Check timestamp (median-time-past)
-            if block.timestamp <= parent_node.block.timestamp:
-                print(f"Invalid timestamp: {block.timestamp} <= {parent_node.block.timestamp}")
+            parent_block = self.get_block(parent_node.block_hash)
+            if parent_block and block.timestamp <= parent_block.timestamp:
+                print(f"Invalid timestamp: {block.timestamp} <= {parent_block.timestamp}")
                 return False
         
         # Rate limiting: max headers per second
@@ -759,22 +824,221 @@ class ConsensusEngine:
             parent_hash=block.previous_hash,
             cumulative_work=cumulative_work,
             height=height,
-            receipt_time=receipt_time
+            receipt_time=receipt_time,
+            skip=self._build_skip_list(parent_node)
         )
         
         # Add to tree
         self.block_tree[block.block_hash] = node
+        self._full_heights.setdefault(height, []).append(block.block_hash)
         
         # Update parent's children
-        if parent_node:
+        if isinstance(parent_node, BlockNode):
             parent_node.children.append(block.block_hash)
         
         # Update best tip if necessary
+        previous_tip = self.best_tip
         self._update_best_tip(node)
+        work_writes = self._best_chain_work_writes(previous_tip) if self.best_tip is node else []
+        self._prune_tree()
         
-        # Store work index
-        self.storage.store_work_index(height, int(cumulative_work), block.block_hash)
-        self.storage.store_tip(block.block_hash, int(cumulative_work))
+        # Store work index (best chain only) and tip as one grouped write
+        self.storage.batch_write(work_writes + [("tip", (block.block_hash, int(cumulative_work)))])
+    
+    def _prune_tree(self):
+        """
+        Demote nodes that fell more than max_reorg_depth below the best tip.
+        
+        Best-chain nodes become CompactNodes; fork nodes below that line
+        can no longer win a reorg and are dropped.
+        """
+        if not self.config.prune_block_tree or not self.best_tip:
+            return
+        
+        horizon = self.best_tip.height - self.config.max_reorg_depth
+        if horizon <= self._pruned_height:
+            return
+        
+        for height in sorted(h for h in self._full_heights if h < horizon):
+            canonical = self.get_ancestor(self.best_tip.block_hash, height)
+            for block_hash in self._full_heights.pop(height):
+                node = self.block_tree.get(block_hash)
+                if not isinstance(node, BlockNode):
+                    continue
+                # With no known ancestry at this height (e.g. below a snapshot
+                # window) demote rather than drop
+                if node is canonical or canonical is None:
+                    self.block_tree[block_hash] = CompactNode.from_node(node)
+                else:
+                    del self.block_tree[block_hash]
+        self._pruned_height = horizon - 1
+    
+    def get_block(self, block_hash: str) -> Optional[Block]:
+        """
+        Get a block known to the tree, loading demoted bodies from storage.
+        
+        Args:
+            block_hash: Block hash
+            
+        Returns:
+            Block or None
+        """
+        node = self.block_tree.get(block_hash)
+        if isinstance(node, BlockNode):
+            return node.block
+        if node is None:
+            return None
+        return self.storage.get_block(block_hash) or self.storage.get_header(block_hash)
+    
+    def _build_skip_list(self, parent_node: Optional[TreeNode]) -> List[str]:
+        """
+        Build the ancestor table for a child of parent_node.
+        
+        Args:
+            parent_node: Parent node (None for genesis/orphans)
+            
+        Returns:
+            Hashes of the 1st, 2nd, 4th, ... ancestors
+        """
+        if parent_node is None:
+            return []
+        
+        skip = [parent_node.block_hash]
+        ancestor = parent_node
+        # The 2**(k+1)-th ancestor is the 2**k-th ancestor of the 2**k-th ancestor
+        while len(ancestor.skip) >= len(skip):
+            next_hash = ancestor.skip[len(skip) - 1]
+            skip.append(next_hash)
+            ancestor = self.block_tree.get(next_hash)
+            if ancestor is None:
+                break
+        return skip
+    
+    def get_ancestor(self, block_hash: str, height: int) -> Optional[TreeNode]:
+        """
+        Get the ancestor of a block at the given height in O(log n).
+        
+        Args:
+            block_hash: Descendant block hash
+            height: Height of the wanted ancestor
+            
+        Returns:
+            Ancestor node, or None if unknown
+        """
+        node = self.block_tree.get(block_hash)
+        while node is not None and node.height > height:
+            distance = node.height - height
+            level = min(distance.bit_length() - 1, len(node.skip) - 1)
+            if level < 0:
+                return None  # Parent not in the tree
+            node = self.block_tree.get(node.skip[level])
+        
+        if node is None or node.height != height:
+            return None
+        return node
+    
+    def find_common_ancestor(self, hash_a: str, hash_b: str) -> Optional[TreeNode]:
+        """
+        Find the most recent common ancestor of two blocks in O(log n).
+        
+        Args:
+            hash_a: First block hash
+            hash_b: Second block hash
+            
+        Returns:
+            Common ancestor node, or None if the blocks are not connected
+        """
+        node_a = self.block_tree.get(hash_a)
+        node_b = self.block_tree.get(hash_b)
+        if node_a is None or node_b is None:
+            return None
+        
+        # Lift the deeper node to the same height
+        if node_a.height > node_b.height:
+            node_a = self.get_ancestor(hash_a, node_b.height)
+        elif node_b.height > node_a.height:
+            node_b = self.get_ancestor(hash_b, node_a.height)
+        if node_a is None or node_b is None:
+            return None
+        if node_a is node_b:
+            return node_a
+        
+        # Jump both up while their ancestors differ
+        for level in reversed(range(min(len(node_a.skip), len(node_b.skip)))):
+            if level < min(len(node_a.skip), len(node_b.skip)) and node_a.skip[level] != node_b.skip[level]:
+                next_a = self.block_tree.get(node_a.skip[level])
+                next_b = self.block_tree.get(node_b.skip[level])
+                if next_a is None or next_b is None:
+                    return None
+                node_a, node_b = next_a, next_b
+        
+        if node_a.skip and node_b.skip and node_a.skip[0] == node_b.skip[0]:
+            return self.block_tree.get(node_a.skip[0])
+        return None
+    
+    def is_ancestor(self, ancestor_hash: str, descendant_hash: str) -> bool:
+        """
+        Check whether one block is an ancestor of (or equal to) another.
+        
+        Args:
+            ancestor_hash: Candidate ancestor hash
+            descendant_hash: Descendant hash
+            
+        Returns:
+            True if ancestor_hash is on the chain ending at descendant_hash
+        """
+        ancestor = self.block_tree.get(ancestor_hash)
+        if ancestor is None:
+            return False
+        return self.get_ancestor(descendant_hash, ancestor.height) is ancestor
+    
+    def _segment_above(self, node: TreeNode, height: int) -> List[Block]:
+        """
+        Blocks on node's chain above height, in ascending order.
+        
+        Args:
+            node: Segment tip
+            height: Exclusive lower bound (the fork point)
+            
+        Returns:
+            List of blocks from height + 1 to node
+        """
+        segment = []
+        while node is not None and node.height > height:
+            block = self.get_block(node.block_hash)
+            if block is not None:
+                segment.append(block)
+            node = self.block_tree.get(node.parent_hash)
+        segment.reverse()
+        return segment
+    
+    def _best_chain_work_writes(self, previous_tip: Optional[TreeNode]) -> List[Tuple[str, Any]]:
+        """
+        Storage writes that point work_index at the current best chain.
+        
+        work_index holds one row per height for best-chain blocks only, so
+        the rows from the fork point with previous_tip up to the new tip are
+        rewritten, and rows above a lower new tip are dropped.
+        
+        Args:
+            previous_tip: Best tip before the change
+            
+        Returns:
+            batch_write operations
+        """
+        node = self.best_tip
+        fork_height = node.height - 1
+        writes = []
+        if previous_tip is not None:
+            fork = self.find_common_ancestor(previous_tip.block_hash, node.block_hash)
+            if fork is not None:
+                fork_height = fork.height
+            if node.height < previous_tip.height:
+                writes.append(("work_index_truncate", node.height))
+        while node is not None and node.height > fork_height:
+            writes.append(("work_index", (node.height, int(node.cumulative_work), node.block_hash)))
+            node = self.block_tree.get(node.parent_hash)
+        return writes
     
     def _update_best_tip(self, node: BlockNode):
         """
@@ -785,17 +1049,35 @@ class ConsensusEngine:
         Args:
             node: Newly added node
         """
+        previous = self.best_tip
         if not self.best_tip:
             self.best_tip = node
-            return
-        
         # Compare cumulative work
-        if node.cumulative_work > self.best_tip.cumulative_work:
+        elif node.cumulative_work > self.best_tip.cumulative_work:
             self.best_tip = node
         elif node.cumulative_work == self.best_tip.cumulative_work:
             # Tie-breaker: earliest receipt time
             if node.receipt_time < self.best_tip.receipt_time:
                 self.best_tip = node
+        
+        if self.best_tip is not previous:
+            self._notify_tip_handlers()
+    
+    def add_tip_handler(self, handler: Callable) -> None:
+        """
+        Register a callback for best tip changes.
+        
+        Args:
+            handler: Called with (block_hash, height) of the new best tip
+        """
+        self.tip_handlers.append(handler)
+    
+    def _notify_tip_handlers(self):
+        for handler in self.tip_handlers:
+            try:
+                handler(self.best_tip.block_hash, self.best_tip.height)
+            except Exception as e:
+                print(f"Tip handler failed: {e}")
     
     def get_best_tip(self) -> Optional[Block]:
         """
@@ -817,7 +1099,7 @@ class ConsensusEngine:
             List of blocks from genesis to tip
         """
         if tip_hash is None and self.best_tip:
-            tip_hash = self.best_tip.block.block_hash
+            tip_hash = self.best_tip.block_hash
         
         if not tip_hash or tip_hash not in self.block_tree:
             return []
@@ -827,18 +1109,46 @@ class ConsensusEngine:
         current_node = self.block_tree[tip_hash]
         
         while current_node:
-            chain.append(current_node.block)
+            block = self.get_block(current_node.block_hash)
+            if block is not None:
+                chain.append(block)
             if current_node.parent_hash == "0" * 64:
                 break
-            current_node = self.block_tree.get(current_node.parent_hash)
+            parent_hash = current_node.parent_hash
+            current_node = self.block_tree.get(parent_hash)
+            if current_node is None:
+                # Below the loaded window (snapshot start): continue from storage
+                chain.extend(self._stored_ancestors(parent_hash))
         
         # Reverse to get genesis -> tip order
         chain.reverse()
         return chain
     
+    def _stored_ancestors(self, block_hash: str) -> List[Block]:
+        """
+        Walk parent links through storage, newest first.
+        
+        Args:
+            block_hash: First block to load
+            
+        Returns:
+            Blocks from block_hash back to genesis (or the first missing block)
+        """
+        blocks = []
+        while block_hash and block_hash != "0" * 64:
+            block = self.storage.get_block(block_hash) or self.storage.get_header(block_hash)
+            if block is None:
+                break
+            blocks.append(block)
+            block_hash = block.previous_hash
+        return blocks
+    
     def is_finalized(self, block_hash: str) -> bool:
         """
-        Check if block is finalized (k-deep).
+        Check if block is finalized (k-deep on the best chain).
+        
+        Blocks no longer in the in-memory tree are checked against the
+        stored header and the work index's block at that height.
         
         Args:
             block_hash: Block hash to check
@@ -846,58 +1156,216 @@ class ConsensusEngine:
         Returns:
             True if finalized
         """
-        if not self.best_tip or block_hash not in self.block_tree:
+        if not self.best_tip:
             return False
         
-        block_node = self.block_tree[block_hash]
+        block_node = self.block_tree.get(block_hash)
+        if block_node is None:
+            header = self.storage.get_header(block_hash)
+            if header is None:
+                return False
+            if self.best_tip.height - header.index < self.config.confirmation_depth:
+                return False
+            canonical = self.storage.get_headers_range(header.index, 1)
+            return len(canonical) == 1 and canonical[0].block_hash == block_hash
+        
         depth = self.best_tip.height - block_node.height
+        if depth < self.config.confirmation_depth:
+            return False
         
-        return depth >= self.config.confirmation_depth
+        return self.is_ancestor(block_hash, self.best_tip.block_hash)
     
     def handle_reorg(self, new_tip_hash: str) -> Tuple[List[Block], List[Block]]:
         """
         Handle chain reorganization.
         
+        Only the segments above the common ancestor are walked, so the
+        cost scales with the reorg depth rather than the chain length.
+        
         Args:
             new_tip_hash: New tip block hash
             
         Returns:
-            Tuple of (removed_blocks, added_blocks)
+            Tuple of (removed_blocks, added_blocks), each in ascending height order
         """
         if not self.best_tip or new_tip_hash not in self.block_tree:
             return ([], [])
         
         new_tip_node = self.block_tree[new_tip_hash]
-        
-        # Check reorg depth
-        old_chain = self.get_chain_from_genesis(self.best_tip.block.block_hash)
-        new_chain = self.get_chain_from_genesis(new_tip_hash)
+        old_tip_node = self.best_tip
         
         # Find common ancestor
-        common_height = min(len(old_chain), len(new_chain))
-        fork_point = 0
-        
-        for i in range(common_height):
-            if old_chain[i].block_hash == new_chain[i].block_hash:
-                fork_point = i
-            else:
-                break
+        fork_node = self.find_common_ancestor(old_tip_node.block_hash, new_tip_hash)
+        if fork_node is None:
+            print(f"No common ancestor with new tip {new_tip_hash[:16]}...")
+            return ([], [])
         
         # Check reorg depth limit
-        reorg_depth = len(old_chain) - fork_point - 1
+        reorg_depth = old_tip_node.height - fork_node.height
         if reorg_depth > self.config.max_reorg_depth:
             print(f"Reorg depth {reorg_depth} exceeds maximum {self.config.max_reorg_depth}")
             return ([], [])
         
         # Get removed and added blocks
-        removed_blocks = old_chain[fork_point + 1:]
-        added_blocks = new_chain[fork_point + 1:]
+        removed_blocks = self._segment_above(old_tip_node, fork_node.height)
+        added_blocks = self._segment_above(new_tip_node, fork_node.height)
         
         # Update best tip
-        self.best_tip = new_tip_node
+        if new_tip_node is not self.best_tip:
+            self.best_tip = new_tip_node
+            self.storage.batch_write(self._best_chain_work_writes(old_tip_node))
+            self._notify_tip_handlers()
         
         return (removed_blocks, added_blocks)
-
+    
+    def save_snapshot(self, path: str) -> bool:
+        """
+        Write a fast-start snapshot of the fork-choice state.
+        
+        The snapshot holds the finalized checkpoint (max_reorg_depth below
+        the best tip), every tree node from the checkpoint up with its
+        cumulative work and header bytes, and the best tip. Fork tips are
+        not listed separately: they are the window nodes without children,
+        which load_snapshot relinks. It is written to a temporary file and
+        renamed into place.
+        
+        Args:
+            path: Snapshot file path
+            
+        Returns:
+            True if written
+        """
+        if not self.best_tip:
+            return False
+        
+        try:
+            checkpoint_height = max(self.best_tip.height - self.config.max_reorg_depth, 0)
+            checkpoint = self.get_ancestor(self.best_tip.block_hash, checkpoint_height)
+            if checkpoint is None:
+                checkpoint = self.best_tip
+            
+            window = [self.block_tree[block_hash]
+                      for height, hashes in self._full_heights.items() if height >= checkpoint.height
+                      for block_hash in hashes if block_hash in self.block_tree]
+            if all(node is not checkpoint for node in window):
+                window.append(checkpoint)
+            window.sort(key=lambda node: node.height)
+            
+            nodes = []
+            for node in window:
+                block = self.get_block(node.block_hash)
+                header_bytes = self.storage._serialize_header(block) if block else b""
+                nodes.append([node.block_hash, node.parent_hash, node.height,
+                              node.cumulative_work, node.receipt_time, header_bytes])
+            
+            payload = {
+                'network_id': self.config.network_id,
+                'genesis_hash': self.genesis_block.block_hash if self.genesis_block else None,
+                'created_at': time.time(),
+                'checkpoint': [checkpoint.block_hash, checkpoint.height, checkpoint.cumulative_work],
+                'best_tip': self.best_tip.block_hash,
+                'nodes': nodes
+            }
+            
+            if HAS_MSGSPEC:
+                codec, body = SNAPSHOT_CODEC_MSGPACK, msgspec.msgpack.encode(payload)
+            else:
+                for record in nodes:
+                    record[5] = record[5].hex()
+                codec, body = SNAPSHOT_CODEC_JSON, json.dumps(payload).encode()
+            
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(SNAPSHOT_MAGIC + bytes([SNAPSHOT_VERSION, codec]))
+                f.write(body)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            print(f"Error writing consensus snapshot: {e}")
+            return False
+    
+    def load_snapshot(self, path: str) -> Optional[int]:
+        """
+        Restore fork-choice state from a snapshot written by save_snapshot.
+        
+        The file is memory-mapped and decoded in place. Nodes are rebuilt
+        from their recorded cumulative work, so only blocks newer than the
+        snapshot need replaying.
+        
+        Args:
+            path: Snapshot file path
+            
+        Returns:
+            Height of the restored best tip, or None if the snapshot is
+            missing, unreadable or for a different network/genesis
+        """
+        if not os.path.exists(path):
+            return None
+        
+        try:
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC or mm[len(SNAPSHOT_MAGIC)] != SNAPSHOT_VERSION:
+                    print(f"Unrecognised consensus snapshot: {path}")
+                    return None
+                codec = mm[len(SNAPSHOT_MAGIC) + 1]
+                with memoryview(mm) as view:
+                    body = view[_SNAPSHOT_HEADER_SIZE:]
+                    try:
+                        if codec == SNAPSHOT_CODEC_MSGPACK and HAS_MSGSPEC:
+                            payload = msgspec.msgpack.decode(body)
+                        elif codec == SNAPSHOT_CODEC_JSON:
+                            payload = json.loads(bytes(body))
+                            for record in payload['nodes']:
+                                record[5] = bytes.fromhex(record[5])
+                        else:
+                            print(f"Unsupported snapshot codec: {codec}")
+                            return None
+                    finally:
+                        body.release()
+        except Exception as e:
+            print(f"Error reading consensus snapshot: {e}")
+            return None
+        
+        genesis_hash = self.genesis_block.block_hash if self.genesis_block else None
+        if payload.get('network_id') != self.config.network_id or payload.get('genesis_hash') != genesis_hash:
+            print("Consensus snapshot is for a different network or genesis, ignoring")
+            return None
+        
+        # Resolve every block before touching the tree
+        resolved = []
+        for block_hash, parent_hash, height, cumulative_work, receipt_time, header_bytes in payload['nodes']:
+            if block_hash in self.block_tree:
+                continue
+            block = self.storage.get_block(block_hash)
+            if block is None:
+                block = self.storage._deserialize_header(header_bytes) if header_bytes else self.storage.get_header(block_hash)
+            if block is None:
+                print(f"Snapshot block {block_hash[:16]}... not found, ignoring snapshot")
+                return None
+            resolved.append((block, block_hash, parent_hash, height, cumulative_work, receipt_time))
+        if payload['best_tip'] not in self.block_tree and all(r[1] != payload['best_tip'] for r in resolved):
+            return None
+        
+        for block, block_hash, parent_hash, height, cumulative_work, receipt_time in resolved:
+            parent_node = self.block_tree.get(parent_hash)
+            self.block_tree[block_hash] = BlockNode(
+                block=block,
+                parent_hash=parent_hash,
+                cumulative_work=cumulative_work,
+                height=height,
+                receipt_time=receipt_time,
+                skip=self._build_skip_list(parent_node)
+            )
+            self._full_heights.setdefault(height, []).append(block_hash)
+            if isinstance(parent_node, BlockNode):
+                parent_node.children.append(block_hash)
+        
+        best_tip = self.block_tree[payload['best_tip']]
+        self.best_tip = best_tip
+        self._prune_tree()
+        return best_tip.height
 
 if __name__ == "__main__":
     # Test ConsensusEngine
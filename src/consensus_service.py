@@ -5,9 +5,7 @@ Processes block events into actual blockchain blocks
 """
 
 import sys
-import os
 import time
-import json
 import logging
 import signal
 import threading
@@ -18,26 +16,29 @@ from typing import Optional, Dict, Any
 sys.path.append('src')
 
 # Import consensus and storage modules
-from consensus import ConsensusEngine, ConsensusConfig
+from consensus import ConsensusEngine, ConsensusConfig, BlockNode
 from storage import StorageManager, StorageConfig, NodeRole, PruningMode
 from pow import ProblemRegistry
 from api.ingest_store import IngestStore
+from api.blockchain_state_log import BlockchainStateReader, BlockchainStateWriter, log_dir_for
 from api.coupling_config import LAMBDA, CONSENSUS_WRITE_INTERVAL, CouplingState
 
-# Set up logging
-log_dir = Path('logs')
-log_dir.mkdir(exist_ok=True)
+logger = logging.getLogger('coinjecture-consensus-service')
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/consensus_service.log'),
-        logging.StreamHandler()
-    ]
-)
 
-logger = logging.getLogger('coinjecture-consensus-service')
+def configure_logging():
+    """Log to logs/consensus_service.log and stderr (run as a service, not on import)."""
+    log_dir = Path('logs')
+    log_dir.mkdir(exist_ok=True)
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_dir / 'consensus_service.log'),
+            logging.StreamHandler()
+        ]
+    )
 
 class ConsensusService:
     """Consensus service that processes block events into blockchain blocks."""
@@ -49,6 +50,10 @@ class ConsensusService:
         self.processed_events = set()
         self.coupling_state = CouplingState()
         self.blockchain_state_path = "data/blockchain_state.json"
+        self.state_writer: Optional[BlockchainStateWriter] = None
+        self.snapshot_path = "data/consensus_snapshot.bin"
+        self.snapshot_interval = 300.0  # Seconds between fast-start snapshots
+        self._last_snapshot = 0.0
         
         # NEW: Initialize P2P discovery
         from p2p_discovery import P2PDiscoveryService, DiscoveryConfig
@@ -80,7 +85,8 @@ class ConsensusService:
             storage_config = StorageConfig(
                 data_dir="./data",
                 role=NodeRole.FULL,
-                pruning_mode=PruningMode.FULL
+                pruning_mode=PruningMode.FULL,
+                write_pipeline=True
             )
             storage_manager = StorageManager(storage_config)
             
@@ -119,24 +125,38 @@ class ConsensusService:
             return False
     
     def bootstrap_from_cache(self):
-        """Bootstrap consensus engine with existing blockchain state."""
+        """Bootstrap consensus engine from the snapshot plus newer cached blocks."""
         try:
-            # Check if blockchain state file exists
-            if os.path.exists(self.blockchain_state_path):
-                with open(self.blockchain_state_path, 'r') as f:
-                    blockchain_state = json.load(f)
-                
-                blocks = blockchain_state.get('blocks', [])
-                logger.info(f"Found {len(blocks)} blocks in blockchain state")
+            # Fast start: restore fork-choice state, then replay only newer blocks
+            snapshot_height = self.consensus_engine.load_snapshot(self.snapshot_path)
+            if snapshot_height is not None:
+                logger.info(f"⚡ Restored consensus snapshot at height {snapshot_height}")
+            else:
+                snapshot_height = -1
+            
+            # Read blockchain state (segment log, or legacy JSON) above the snapshot
+            reader = BlockchainStateReader(self.blockchain_state_path, min_index=snapshot_height + 1)
+            if reader.refresh():
+                blocks = reader.blocks()
+                logger.info(f"Found {len(blocks)} blocks in blockchain state above height {snapshot_height}")
                 
-                # Add each block to consensus engine
+                # Add each block to consensus engine. Bodies are persisted so
+                # the engine can demote old nodes and reload them on demand.
+                storage = self.consensus_engine.storage
+                bootstrapped = 0
                 for block_data in blocks:
                     block = self._convert_cache_block_to_block(block_data)
                     if block:
+                        storage.batch_write([("block", block), ("header", block)])
                         # Add to block tree without validation
                         self.consensus_engine._add_block_to_tree(block, receipt_time=block.timestamp)
-                        logger.info(f"Bootstrapped block #{block.index}")
+                        bootstrapped += 1
                 
+                storage.flush()
+                resident = sum(1 for node in self.consensus_engine.block_tree.values() if isinstance(node, BlockNode))
+                logger.info(f"Bootstrapped {bootstrapped} blocks ({resident} full nodes in memory)")
+                if bootstrapped:
+                    self.write_snapshot()
                 return True
             else:
                 logger.info("No blockchain state found, starting from genesis")
@@ -237,6 +257,19 @@ class ConsensusService:
             logger.error(f"❌ Failed to convert cache block to block: {e}")
             return None
     
+    def write_snapshot(self) -> bool:
+        """Write the fast-start consensus snapshot."""
+        if self.consensus_engine.save_snapshot(self.snapshot_path):
+            self._last_snapshot = time.time()
+            return True
+        logger.warning("⚠️  Failed to write consensus snapshot")
+        return False
+    
+    def _maybe_write_snapshot(self):
+        """Write the snapshot once snapshot_interval has elapsed."""
+        if time.time() - self._last_snapshot >= self.snapshot_interval:
+            self.write_snapshot()
+    
     def process_block_events(self):
         """Process stored block events into blockchain blocks with λ-coupled timing."""
         try:
@@ -244,8 +277,8 @@ class ConsensusService:
             # This allows continuous processing while respecting λ-coupling for writes
             
             # Get current chain length
-            current_chain = self.consensus_engine.get_chain_from_genesis()
-            current_tip_index = current_chain[-1].index if current_chain else -1
+            best_tip = self.consensus_engine.get_best_tip()
+            current_tip_index = best_tip.index if best_tip else -1
             
             # Get latest block events
             block_events = self.ingest_store.latest_blocks(limit=50)
@@ -274,8 +307,7 @@ class ConsensusService:
                     self.consensus_engine.validate_header(block)
                     
                     # Store block in consensus engine
-                    self.consensus_engine.storage.store_block(block)
-                    self.consensus_engine.storage.store_header(block)
+                    self.consensus_engine.storage.batch_write([("block", block), ("header", block)])
                     
                     # Mark as processed
                     self.processed_events.add(event_id)
@@ -342,8 +374,7 @@ class ConsensusService:
                 
                 try:
                     self.consensus_engine.validate_header(block)
-                    self.consensus_engine.storage.store_block(block)
-                    self.consensus_engine.storage.store_header(block)
+                    self.consensus_engine.storage.batch_write([("block", block), ("header", block)])
                     
                     self.processed_events.add(event.get('event_id'))
                     processed += 1
@@ -370,8 +401,8 @@ class ConsensusService:
             from core.blockchain import Block, ProblemTier, ComputationalComplexity, EnergyMetrics
             
             # η-damping: Use current chain tip + 1 instead of event's block_index
-            current_chain = self.consensus_engine.get_chain_from_genesis()
-            current_tip_index = current_chain[-1].index if current_chain else -1
+            best_tip = self.consensus_engine.get_best_tip()
+            current_tip_index = best_tip.index if best_tip else -1
             block_index = current_tip_index + 1
             
             # Extract event data with η-damping (graceful defaults)
@@ -438,7 +469,7 @@ class ConsensusService:
             )
             
             # η-damping: Use previous block hash from chain tip
-            previous_hash = current_chain[-1].block_hash if current_chain else "0" * 64
+            previous_hash = best_tip.block_hash if best_tip else "0" * 64
             
             # Create Block object with η-damped validation
             block = Block(
@@ -463,57 +494,74 @@ class ConsensusService:
             logger.error(f"❌ Failed to convert event to block: {e}")
             return None
     
+    @staticmethod
+    def _block_record(block) -> Dict[str, Any]:
+        """Blockchain state record for a block."""
+        return {
+            "index": block.index,
+            "timestamp": block.timestamp,
+            "previous_hash": block.previous_hash,
+            "merkle_root": block.merkle_root,
+            "mining_capacity": block.mining_capacity.value if hasattr(block.mining_capacity, 'value') else str(block.mining_capacity),
+            "cumulative_work_score": block.cumulative_work_score,
+            "block_hash": block.block_hash,
+            "offchain_cid": block.offchain_cid
+        }
+    
+    def _unwritten_blocks(self) -> list:
+        """
+        Blocks on the best chain the state log does not have yet.
+        
+        Walks back from the best tip until it reaches a block the log
+        already holds at the same index, so the cost is O(new blocks +
+        reorg depth). The very first write covers the whole chain.
+        
+        Returns:
+            Blocks in ascending index order
+        """
+        engine = self.consensus_engine
+        writer = self.state_writer
+        if writer.tip_index < 0:
+            return engine.get_chain_from_genesis()
+        
+        # Below this the log no longer remembers hashes; those blocks are final
+        floor = writer.tip_index - writer.recent_hashes
+        blocks = []
+        node = engine.best_tip
+        while node is not None and node.height > floor and writer.hash_at(node.height) != node.block_hash:
+            block = engine.get_block(node.block_hash)
+            if block is not None:
+                blocks.append(block)
+            node = engine.block_tree.get(node.parent_hash)
+        blocks.reverse()
+        return blocks
+    
     def _write_blockchain_state(self):
-        """Write blockchain state to shared storage for cache manager."""
+        """Append new blocks to the shared blockchain state log for the cache manager."""
         try:
             # Get current blockchain state
             best_tip = self.consensus_engine.get_best_tip()
             if not best_tip:
                 return
             
-            # Get chain from genesis
-            chain = self.consensus_engine.get_chain_from_genesis()
-            
-            # Create blockchain state structure
-            blockchain_state = {
-                "latest_block": {
-                    "index": best_tip.index,
-                    "timestamp": best_tip.timestamp,
-                    "previous_hash": best_tip.previous_hash,
-                    "merkle_root": best_tip.merkle_root,
-                    "mining_capacity": best_tip.mining_capacity.value if hasattr(best_tip.mining_capacity, 'value') else str(best_tip.mining_capacity),
-                    "cumulative_work_score": best_tip.cumulative_work_score,
-                    "block_hash": best_tip.block_hash,
-                    "offchain_cid": best_tip.offchain_cid,
-                    "last_updated": time.time()
-                },
-                "blocks": [
-                    {
-                        "index": block.index,
-                        "timestamp": block.timestamp,
-                        "previous_hash": block.previous_hash,
-                        "merkle_root": block.merkle_root,
-                        "mining_capacity": block.mining_capacity.value if hasattr(block.mining_capacity, 'value') else str(block.mining_capacity),
-                        "cumulative_work_score": block.cumulative_work_score,
-                        "block_hash": block.block_hash,
-                        "offchain_cid": block.offchain_cid
-                    }
-                    for block in chain
-                ],
-                "last_updated": time.time(),
-                "consensus_version": "3.9.0-alpha.2",
-                "lambda_coupling": LAMBDA,
-                "processed_events_count": len(self.processed_events)
-            }
-            
-            # Ensure data directory exists
-            os.makedirs(os.path.dirname(self.blockchain_state_path), exist_ok=True)
-            
-            # Write to shared blockchain state file
-            with open(self.blockchain_state_path, 'w') as f:
-                json.dump(blockchain_state, f, indent=2)
+            if self.state_writer is None:
+                self.state_writer = BlockchainStateWriter(log_dir_for(self.blockchain_state_path))
+            
+            new_blocks = self._unwritten_blocks()
+            latest_block = self._block_record(best_tip)
+            latest_block["last_updated"] = time.time()
+            
+            appended = self.state_writer.commit(
+                (self._block_record(block) for block in new_blocks),
+                latest_block,
+                metadata={
+                    "consensus_version": "3.9.0-alpha.2",
+                    "lambda_coupling": LAMBDA,
+                    "processed_events_count": len(self.processed_events)
+                }
+            )
             
-            logger.info(f"📝 Blockchain state written: {len(chain)} blocks, tip: #{best_tip.index}")
+            logger.info(f"📝 Blockchain state appended: {appended} blocks, tip: #{best_tip.index}")
             
         except Exception as e:
             logger.error(f"❌ Failed to write blockchain state: {e}")
@@ -526,11 +574,10 @@ class ConsensusService:
     def _is_duplicate(self, block):
         """Check if block is duplicate."""
         try:
-            chain = self.consensus_engine.get_chain_from_genesis()
-            for existing in chain:
-                if existing.index == block.index:
-                    return True
-            return False
+            engine = self.consensus_engine
+            if not engine.best_tip:
+                return False
+            return engine.get_ancestor(engine.best_tip.block_hash, block.index) is not None
         except:
             return False
     
@@ -613,6 +660,8 @@ class ConsensusService:
                 stats = self.p2p_discovery.get_peer_statistics()
                 logger.info(f"👥 {stats['total_discovered']} peers, {stats['connected']} connected")
                 
+                self._maybe_write_snapshot()
+                
                 time.sleep(10.0)
             except KeyboardInterrupt:
                 break
@@ -621,12 +670,15 @@ class ConsensusService:
                 time.sleep(5.0)
         
         self.p2p_discovery.stop()
+        self.write_snapshot()
+        self.consensus_engine.storage.close()
         self.running = False
         logger.info("✅ Consensus service stopped")
         return True
 
 def main():
     """Main entry point."""
+    configure_logging()
     service = ConsensusService()
     
     # Initialize service
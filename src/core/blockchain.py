@@ -26,6 +26,15 @@ if ENABLE_AGGREGATION:
     except Exception:
         ENABLE_AGGREGATION = False
 
+try:
+    from .subset_sum_solver import solve_subset_sum_fast
+    from .parallel_miner import get_parallel_miner
+    from .signatures import get_signature_verifier
+except ImportError:
+    from core.subset_sum_solver import solve_subset_sum_fast
+    from core.parallel_miner import get_parallel_miner
+    from core.signatures import get_signature_verifier
+
 # Note: pow functions are imported locally in mine_block to avoid circular imports
 
 @dataclass
@@ -181,7 +190,8 @@ def subset_sum_generate_adapter(seed, tier: ProblemTier):
 
 
 def subset_sum_solve_adapter(problem):
-    return solve_subset_sum(problem)
+    # Bitset / meet-in-the-middle engine; solve_subset_sum is the reference DP
+    return solve_subset_sum_fast(problem)
 
 
 def subset_sum_verify_adapter(problem, solution):
@@ -872,11 +882,23 @@ def mine_block(
     problem_type: ProblemType = ProblemType.SUBSET_SUM,
     submission_id: Optional[str] = None,
     problem_pool: Optional[object] = None,
-    miner_address: str = "Miner"
+    miner_address: str = "Miner",
+    workers: int = 1,
+    cancel_event: Optional[object] = None,
+    storage_manager: Optional[object] = None
 ) -> Block:
     """
     Mine a block by solving a computational problem.
     The solution itself IS the proof of work.
+
+    With workers > 1, Subset Sum problems are solved on a shared process
+    pool (workers=0 uses every core). Setting cancel_event (a
+    threading.Event, e.g. when a new tip arrives) aborts the search with
+    parallel_miner.MiningCancelledError.
+
+    The proof bundle is uploaded through storage_manager's IPFS client and
+    bundle cache, and pinned in ARCHIVE mode; without one, the shared
+    localhost client and the data/bundle_cache cache are used.
     """
 
     # 1. Generate problem via registry, seeded by previous block and capacity
@@ -891,7 +913,10 @@ def mine_block(
     start_memory = get_memory_usage()
 
     # In a real system, this solver would be the "miner" process.
-    solution = PROBLEM_REGISTRY.solve(problem)
+    if problem.get('type') == ProblemType.SUBSET_SUM.value and (workers != 1 or cancel_event is not None):
+        solution = get_parallel_miner(workers).solve(problem, cancel=cancel_event)
+    else:
+        solution = PROBLEM_REGISTRY.solve(problem)
 
     solve_time = time.time() - start_time
     solve_memory = get_memory_usage() - start_memory
@@ -952,7 +977,6 @@ def mine_block(
     except ImportError:
         # Fallback for direct execution
         import sys
-        import os
         sys.path.append(os.path.dirname(os.path.dirname(__file__)))
         from pow import create_commitment, compute_solution_hash, derive_epoch_salt
     
@@ -1006,26 +1030,43 @@ def mine_block(
     block.block_hash = block.calculate_hash()
 
     # Upload proof bundle to IPFS (required for real CIDs)
-    from .api.proof_bundler import create_proof_bundle, serialize_proof_bundle
-    from .storage import StorageManager, StorageConfig, NodeRole, PruningMode
+    try:
+        from ..api.proof_bundler import create_proof_bundle, serialize_proof_bundle
+        from ..storage import get_ipfs_client, PruningMode
+        from ..bundle_cache import get_bundle_cache
+    except (ImportError, ValueError):
+        from api.proof_bundler import create_proof_bundle, serialize_proof_bundle
+        from storage import get_ipfs_client, PruningMode
+        from bundle_cache import get_bundle_cache
     
-    # Create storage manager for IPFS upload
-    storage_config = StorageConfig(
-        data_dir="data",
-        role=NodeRole.FULL,
-        pruning_mode=PruningMode.FULL,
-        ipfs_api_url="http://localhost:5001"
-    )
-    storage_manager = StorageManager(storage_config)
+    # Shared client and cache: keep-alive connections are reused across
+    # blocks, and our own bundles are served locally afterwards
+    if storage_manager is not None:
+        ipfs_client = storage_manager.ipfs_client
+        bundle_cache = storage_manager.bundle_cache
+        pin = storage_manager.config.pruning_mode == PruningMode.ARCHIVE
+    else:
+        ipfs_client = get_ipfs_client("http://localhost:5001")
+        bundle_cache = get_bundle_cache(os.path.join("data", "bundle_cache"))
+        pin = False
     
     # Verify IPFS is available - fail if not
-    if not storage_manager.ipfs_client.health_check():
+    if not ipfs_client.health_check():
         raise Exception("IPFS daemon not available. Cannot generate real CIDs without IPFS.")
     
     # Create proof bundle and upload to IPFS
     proof_bundle = create_proof_bundle(block)
     bundle_bytes = serialize_proof_bundle(proof_bundle)
-    cid = storage_manager.store_proof_bundle(bundle_bytes)
+    try:
+        cid = ipfs_client.add(bundle_bytes)
+        if cid:
+            bundle_cache.put(cid, bundle_bytes)
+            # Archive nodes keep every bundle
+            if pin:
+                ipfs_client.pin(cid)
+    except Exception as e:
+        print(f"Error storing proof bundle: {e}")
+        cid = None
     
     if not cid:
         raise Exception("Failed to upload proof bundle to IPFS. No CID returned.")
@@ -1211,6 +1252,10 @@ class Transaction:
         data = f"{self.sender}{self.recipient}{self.amount}{self.timestamp}".encode()
         return hashlib.sha256(data).hexdigest()
     
+    def signing_data(self) -> bytes:
+        """Bytes covered by the signature."""
+        return f"{self.sender}{self.recipient}{self.amount}{self.timestamp}".encode()
+    
     def sign(self, private_key_bytes: bytes) -> str:
         """
         Sign transaction with private key.
@@ -1236,7 +1281,7 @@ class Transaction:
             ).hex()
             
             # Sign transaction data
-            transaction_data = f"{self.sender}{self.recipient}{self.amount}{self.timestamp}".encode()
+            transaction_data = self.signing_data()
             signature = private_key.sign(transaction_data)
             self.signature = signature.hex()
             
@@ -1252,24 +1297,10 @@ class Transaction:
         Returns:
             True if signature is valid
         """
-        try:
-            from cryptography.hazmat.primitives.asymmetric import ed25519
-            
-            if not self.signature or not self.public_key:
-                return False
-            
-            # Load public key
-            public_key_bytes = bytes.fromhex(self.public_key)
-            public_key = ed25519.Ed25519PublicKey.from_public_bytes(public_key_bytes)
-            
-            # Verify signature
-            transaction_data = f"{self.sender}{self.recipient}{self.amount}{self.timestamp}".encode()
-            signature_bytes = bytes.fromhex(self.signature)
-            
-            public_key.verify(signature_bytes, transaction_data)
-            return True
-        except Exception:
+        if not self.signature or not self.public_key:
             return False
+        # Shared verifier: cached key parsing, and already-verified signatures are not re-checked
+        return get_signature_verifier().verify(self.public_key, self.signing_data(), self.signature)
     
     def to_dict(self):
         return {
@@ -0,0 +1,276 @@
+"""
+Process-pool Subset Sum mining.
+
+Problems small enough for the bitset DP are solved inline, since they
+finish faster than a task can be dispatched; with numbers drawn from
+1..100 every current ProblemTier takes this path, and the pool is never
+started. Problems whose n * (target + 1) exceeds BITSET_MAX_BITS (large
+values, e.g. from submitted templates) are split across a
+ProcessPoolExecutor:
+
+- Meet-in-the-middle halves: every worker builds the left-half sum table
+  once per problem, and the right-half subsets are partitioned by which of
+  their first p numbers are taken, so each task streams 1/2^p of them in
+  blocks. The left half is kept smaller than the right (and at most
+  MITM_MAX_LEFT_ITEMS) so the per-worker table stays cheap next to the
+  shared scan.
+- Beyond MITM_MAX_ITEMS, tasks fix the first p numbers of the whole problem
+  and solve the rest with the regular solver engine.
+
+The first solution found cancels the rest through a shared event that
+workers check between chunks of work, and callers can abort the whole search
+(e.g. when a new tip arrives) with their own event.
+"""
+
+import math
+import os
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Optional
+
+try:
+    from . import subset_sum_solver
+    from .subset_sum_solver import find_subset_sum, _subset_sum_blocks, _subset_sum_table
+except ImportError:
+    from core import subset_sum_solver
+    from core.subset_sum_solver import find_subset_sum, _subset_sum_blocks, _subset_sum_table
+
+DEFAULT_TASKS_PER_WORKER = 4
+POLL_INTERVAL = 0.05
+# Right-half subsets scanned between cancellation checks
+CANCEL_CHECK_INTERVAL = 1 << 16
+
+# Shared cancellation event, installed in each worker process
+_worker_cancelled = None
+# Left-half sum table of the current job in this worker: (job_id, table)
+_worker_left_table = (None, None)
+
+
+class MiningCancelledError(Exception):
+    """Raised when a parallel search is aborted by the caller."""
+    pass
+
+
+def _init_worker(cancelled):
+    global _worker_cancelled
+    _worker_cancelled = cancelled
+
+
+def _is_cancelled() -> bool:
+    return _worker_cancelled is not None and _worker_cancelled.is_set()
+
+
+def _left_table(job_id: str, left: List[int]) -> Dict[int, int]:
+    """Sum -> subset mask table for the left half, built once per job per worker."""
+    global _worker_left_table
+    if _worker_left_table[0] != job_id:
+        # Drop the previous job's table before building the next one
+        _worker_left_table = (None, None)
+        _worker_left_table = (job_id, _subset_sum_table(left))
+    return _worker_left_table[1]
+
+
+def _scan_partition(job_id: str, numbers: List[int], target: int, split: int,
+                    prefix_len: int, prefix_mask: int) -> Optional[List[int]]:
+    """Match right-half subsets with the given prefix choice against the left table."""
+    if _is_cancelled():
+        return None
+
+    table = _left_table(job_id, numbers[:split])
+    right = numbers[split:]
+    fixed = [i for i in range(prefix_len) if (prefix_mask >> i) & 1]
+    needed = target - sum(right[i] for i in fixed)
+    free = right[prefix_len:]
+
+    for base, sums in _subset_sum_blocks(free):
+        if base % CANCEL_CHECK_INTERVAL == 0 and base and _is_cancelled():
+            return None
+        for offset, total in enumerate(sums):
+            left_mask = table.get(needed - total)
+            if left_mask is None or (left_mask == 0 and prefix_mask == 0 and base == 0 and offset == 0):
+                continue
+            mask = base | offset
+            indices = [i for i in range(split) if (left_mask >> i) & 1]
+            indices += [split + i for i in fixed]
+            indices += [split + prefix_len + i for i in range(len(free)) if (mask >> i) & 1]
+            return indices
+    return None
+
+
+def _solve_partition(numbers: List[int], target: int, prefix_len: int, prefix_mask: int) -> Optional[List[int]]:
+    """Solve the subproblem where the prefix choice is fixed by prefix_mask."""
+    if _is_cancelled():
+        return None
+
+    chosen = [i for i in range(prefix_len) if (prefix_mask >> i) & 1]
+    remaining = target - sum(numbers[i] for i in chosen)
+    if remaining == 0:
+        return chosen or None
+
+    rest = numbers[prefix_len:]
+    if remaining < 0 and all(num > 0 for num in rest):
+        return None
+    indices = find_subset_sum(rest, remaining)
+    if indices is None:
+        return None
+    return chosen + [prefix_len + i for i in indices]
+
+
+def _fits_bitset(numbers: List[int], target: int) -> bool:
+    return (target > 0 and all(num > 0 for num in numbers)
+            and len(numbers) * (target + 1) <= subset_sum_solver.BITSET_MAX_BITS)
+
+
+class ParallelMiner:
+    """
+    Subset Sum solver that fans the search out over worker processes.
+
+    The pool is created on first use and reused across blocks.
+    """
+
+    def __init__(self, workers: Optional[int] = None, tasks_per_worker: int = DEFAULT_TASKS_PER_WORKER):
+        """
+        Initialize miner.
+
+        Args:
+            workers: Worker processes (None or 0 uses every core)
+            tasks_per_worker: Partitions queued per worker, so that uneven
+                partitions still keep every worker busy
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.tasks_per_worker = tasks_per_worker
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cancelled = None
+        self._jobs = itertools.count()
+        self._lock = threading.Lock()
+
+    def _ensure_pool(self):
+        if self._executor is None:
+            # Not fork: the node calling in has network and mining threads running
+            context = multiprocessing.get_context(
+                'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+            self._cancelled = context.Event()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self._cancelled,)
+            )
+
+    def prefix_length(self, n: int) -> int:
+        """Number of leading elements whose inclusion is fixed per task."""
+        tasks = self.workers * self.tasks_per_worker
+        return min(n, max(1, math.ceil(math.log2(tasks))))
+
+    def split_point(self, n: int) -> int:
+        """Size of the left half; shrinks as workers are added since each builds its own table."""
+        return max(1, min((n - math.ceil(math.log2(self.workers))) // 2, subset_sum_solver.MITM_MAX_LEFT_ITEMS))
+
+    def _submit_tasks(self, numbers: List[int], target: int) -> set:
+        n = len(numbers)
+        if n <= subset_sum_solver.MITM_MAX_ITEMS:
+            job_id = f"{os.getpid()}-{id(self)}-{next(self._jobs)}"
+            split = self.split_point(n)
+            prefix_len = self.prefix_length(n - split)
+            return {
+                self._executor.submit(_scan_partition, job_id, numbers, target, split, prefix_len, mask)
+                for mask in range(1 << prefix_len)
+            }
+        prefix_len = self.prefix_length(n)
+        return {
+            self._executor.submit(_solve_partition, numbers, target, prefix_len, mask)
+            for mask in range(1 << prefix_len)
+        }
+
+    def find(self, numbers: List[int], target: int,
+             cancel: Optional[threading.Event] = None) -> Optional[List[int]]:
+        """
+        Find indices of a subset of numbers summing to target.
+
+        Args:
+            numbers: Integers to choose from
+            target: Required sum
+            cancel: Event that aborts the search when set
+
+        Returns:
+            Sorted list of indices, or None if no subset exists
+
+        Raises:
+            MiningCancelledError: If cancel was set before a solution was found
+        """
+        if cancel is not None and cancel.is_set():
+            raise MiningCancelledError("Mining cancelled")
+        if target == 0:
+            return []
+        if self.workers <= 1 or _fits_bitset(numbers, target):
+            return find_subset_sum(numbers, target)
+
+        with self._lock:
+            self._ensure_pool()
+            self._cancelled.clear()
+            pending = self._submit_tasks(numbers, target)
+            try:
+                while pending:
+                    if cancel is not None and cancel.is_set():
+                        raise MiningCancelledError("Mining cancelled")
+                    done, pending = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        indices = future.result()
+                        if indices:
+                            return sorted(indices)
+                return None
+            finally:
+                # Stop workers from starting the remaining partitions
+                self._cancelled.set()
+                for future in pending:
+                    future.cancel()
+
+    def solve(self, problem: dict, cancel: Optional[threading.Event] = None) -> List[int]:
+        """
+        Solve a Subset Sum problem dict.
+
+        Args:
+            problem: Problem with 'numbers' and 'target'
+            cancel: Event that aborts the search when set
+
+        Returns:
+            Chosen numbers (empty list if there is no solution)
+        """
+        numbers = problem['numbers']
+        indices = self.find(numbers, problem['target'], cancel=cancel)
+        if not indices:
+            return []
+        return [numbers[i] for i in indices]
+
+    def close(self):
+        """Shut down the worker pool."""
+        with self._lock:
+            if self._executor is not None:
+                self._cancelled.set()
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+
+_miners: Dict[int, ParallelMiner] = {}
+_miners_lock = threading.Lock()
+
+
+def get_parallel_miner(workers: Optional[int] = None) -> ParallelMiner:
+    """
+    Shared miner for a worker count, so repeated blocks reuse one pool.
+
+    Args:
+        workers: Worker processes (None or 0 uses every core)
+
+    Returns:
+        ParallelMiner instance
+    """
+    workers = workers or os.cpu_count() or 1
+    with _miners_lock:
+        miner = _miners.get(workers)
+        if miner is None:
+            miner = ParallelMiner(workers)
+            _miners[workers] = miner
+        return miner
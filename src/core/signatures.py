@@ -0,0 +1,299 @@
+"""
+Batched Ed25519 signature verification.
+
+Transaction and block signatures go through one shared verifier instead of
+each call importing cryptography and parsing the hex public key again:
+
+- Parsed public keys are kept in an LRU cache, so an address that signs
+  many transactions is parsed once
+- (message, public key, signature) triples that already verified are
+  remembered by digest; for transactions the message is the txid
+  preimage, so re-validating a transaction (pool admission, then block
+  inclusion) costs a hash instead of a verify
+- Batches large enough to pay for dispatch are split into chunks over a
+  ProcessPoolExecutor; a chunk only reports whether all of its signatures
+  passed, and a failed chunk is re-verified one signature at a time to find
+  the bad ones
+
+The cryptography package exposes no multi-signature Ed25519 check, so a
+batch still performs one verify per signature it has not seen before.
+"""
+
+import os
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+DEFAULT_KEY_CACHE_SIZE = 4096
+DEFAULT_VERIFIED_CACHE_SIZE = 100_000
+# Smallest batch sent to the process pool; below it dispatch costs more than it saves
+DEFAULT_POOL_THRESHOLD = 512
+CHUNKS_PER_WORKER = 4
+
+PUBLIC_KEY_SIZE = 32
+SIGNATURE_SIZE = 64
+
+HexOrBytes = Union[str, bytes]
+SignatureItem = Tuple[HexOrBytes, bytes, HexOrBytes]
+
+# Parsed keys inside pool worker processes
+_worker_keys: Dict[bytes, ed25519.Ed25519PublicKey] = {}
+
+
+def _to_bytes(value: HexOrBytes) -> bytes:
+    return bytes.fromhex(value) if isinstance(value, str) else bytes(value)
+
+
+def _verify_chunk(items: List[Tuple[bytes, bytes, bytes]]) -> bool:
+    """Pool task: True if every (public key, message, signature) in the chunk verifies."""
+    for public_key, message, signature in items:
+        key = _worker_keys.get(public_key)
+        try:
+            if key is None:
+                if len(_worker_keys) >= DEFAULT_KEY_CACHE_SIZE:
+                    _worker_keys.clear()
+                key = _worker_keys[public_key] = ed25519.Ed25519PublicKey.from_public_bytes(public_key)
+            key.verify(signature, message)
+        except (InvalidSignature, ValueError):
+            return False
+    return True
+
+
+class SignatureVerifier:
+    """
+    Ed25519 verifier with key and result caches and an optional process pool.
+
+    The pool is created on first use by a batch of at least pool_threshold
+    new signatures and reused afterwards.
+    """
+
+    def __init__(self, workers: Optional[int] = None, pool_threshold: int = DEFAULT_POOL_THRESHOLD,
+                 key_cache_size: int = DEFAULT_KEY_CACHE_SIZE,
+                 verified_cache_size: int = DEFAULT_VERIFIED_CACHE_SIZE):
+        """
+        Initialize verifier.
+
+        Args:
+            workers: Worker processes for large batches (None or 0 uses every core, 1 disables the pool)
+            pool_threshold: Minimum new signatures in a batch before the pool is used
+            key_cache_size: Parsed public keys kept
+            verified_cache_size: Verified signature digests kept
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.pool_threshold = pool_threshold
+        self.key_cache_size = key_cache_size
+        self.verified_cache_size = verified_cache_size
+        self._keys: OrderedDict = OrderedDict()
+        self._verified: OrderedDict = OrderedDict()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pool_lock = threading.Lock()
+        self.cache_hits = 0
+        self.verifications = 0
+
+    def public_key(self, public_key: HexOrBytes) -> Optional[ed25519.Ed25519PublicKey]:
+        """
+        Parsed public key, from the cache when possible.
+
+        Args:
+            public_key: Raw 32-byte key, as bytes or hex
+
+        Returns:
+            Public key object, or None if the key is malformed
+        """
+        try:
+            raw = _to_bytes(public_key)
+        except ValueError:
+            return None
+        with self._lock:
+            key = self._keys.get(raw)
+            if key is not None:
+                self._keys.move_to_end(raw)
+                return key
+        try:
+            key = ed25519.Ed25519PublicKey.from_public_bytes(raw)
+        except ValueError:
+            return None
+        with self._lock:
+            self._keys[raw] = key
+            if len(self._keys) > self.key_cache_size:
+                self._keys.popitem(last=False)
+        return key
+
+    def verify(self, public_key: HexOrBytes, message: bytes, signature: HexOrBytes) -> bool:
+        """
+        Verify one signature.
+
+        Args:
+            public_key: Raw public key, as bytes or hex
+            message: Signed data
+            signature: Raw 64-byte signature, as bytes or hex
+
+        Returns:
+            True if the signature is valid
+        """
+        return self.verify_batch([(public_key, message, signature)])[0]
+
+    def verify_batch(self, items: Sequence[SignatureItem]) -> List[bool]:
+        """
+        Verify many signatures.
+
+        Args:
+            items: (public_key, message, signature) triples; keys and
+                signatures as bytes or hex
+
+        Returns:
+            Validity of each item, in order
+        """
+        results = [False] * len(items)
+        # digest -> (raw triple, indices); identical triples are verified once
+        todo: Dict[bytes, Tuple[Tuple[bytes, bytes, bytes], List[int]]] = {}
+        with self._lock:
+            for index, (public_key, message, signature) in enumerate(items):
+                try:
+                    raw = (_to_bytes(public_key), bytes(message), _to_bytes(signature))
+                except (TypeError, ValueError):
+                    continue
+                if len(raw[0]) != PUBLIC_KEY_SIZE or len(raw[2]) != SIGNATURE_SIZE:
+                    continue
+                digest = hashlib.sha256(raw[0] + raw[2] + raw[1]).digest()
+                if digest in self._verified:
+                    self._verified.move_to_end(digest)
+                    self.cache_hits += 1
+                    results[index] = True
+                elif digest in todo:
+                    todo[digest][1].append(index)
+                else:
+                    todo[digest] = (raw, [index])
+        if not todo:
+            return results
+
+        digests = list(todo)
+        triples = [todo[digest][0] for digest in digests]
+        if self.workers > 1 and len(triples) >= self.pool_threshold:
+            valid = self._verify_in_pool(triples)
+        else:
+            valid = [self._verify_one(*triple) for triple in triples]
+
+        with self._lock:
+            self.verifications += len(triples)
+            for digest, ok in zip(digests, valid):
+                if not ok:
+                    continue
+                for index in todo[digest][1]:
+                    results[index] = True
+                self._verified[digest] = None
+            while len(self._verified) > self.verified_cache_size:
+                self._verified.popitem(last=False)
+        return results
+
+    def all_valid(self, items: Sequence[SignatureItem]) -> bool:
+        """True if every signature in the batch is valid."""
+        return all(self.verify_batch(items))
+
+    def _verify_one(self, public_key: bytes, message: bytes, signature: bytes) -> bool:
+        key = self.public_key(public_key)
+        if key is None:
+            return False
+        try:
+            key.verify(signature, message)
+            return True
+        except InvalidSignature:
+            return False
+
+    def _ensure_pool(self):
+        if self._executor is None:
+            # Not fork: callers (node, API server) have threads running
+            context = multiprocessing.get_context(
+                'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+
+    def _verify_in_pool(self, triples: List[Tuple[bytes, bytes, bytes]]) -> List[bool]:
+        chunk_size = max(1, -(-len(triples) // (self.workers * CHUNKS_PER_WORKER)))
+        chunks = [triples[start:start + chunk_size] for start in range(0, len(triples), chunk_size)]
+        chunk_results = [False] * len(chunks)
+        with self._pool_lock:
+            self._ensure_pool()
+            try:
+                futures = [self._executor.submit(_verify_chunk, chunk) for chunk in chunks]
+                for index, future in enumerate(futures):
+                    chunk_results[index] = future.result()
+            except BrokenProcessPool:
+                # A worker died: unfinished chunks are verified in process below,
+                # and the next large batch starts a fresh pool
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+        valid = []
+        for chunk, ok in zip(chunks, chunk_results):
+            if ok:
+                valid.extend([True] * len(chunk))
+            else:
+                # Find the bad signature(s) one at a time
+                valid.extend(self._verify_one(*triple) for triple in chunk)
+        return valid
+
+    def clear_cache(self):
+        """Forget parsed keys and verified signatures."""
+        with self._lock:
+            self._keys.clear()
+            self._verified.clear()
+
+    def close(self):
+        """Shut down the worker pool."""
+        with self._pool_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+
+def verify_transactions(transactions: Iterable, verifier: Optional[SignatureVerifier] = None) -> List[bool]:
+    """
+    Batch-verify transaction signatures.
+
+    Args:
+        transactions: Objects with public_key, signature and signing_data()
+        verifier: Verifier to use (defaults to the shared one)
+
+    Returns:
+        Validity of each transaction's signature; unsigned transactions are invalid
+    """
+    verifier = verifier or get_signature_verifier()
+    transactions = list(transactions)
+    signed = [i for i, tx in enumerate(transactions) if tx.signature and tx.public_key]
+    results = [False] * len(transactions)
+    batch = verifier.verify_batch([(transactions[i].public_key, transactions[i].signing_data(),
+                                    transactions[i].signature) for i in signed])
+    for i, ok in zip(signed, batch):
+        results[i] = ok
+    return results
+
+
+_verifiers: Dict[int, SignatureVerifier] = {}
+_verifiers_lock = threading.Lock()
+
+
+def get_signature_verifier(workers: Optional[int] = None) -> SignatureVerifier:
+    """
+    Shared verifier for a worker count, so caches and the pool are reused.
+
+    Args:
+        workers: Worker processes (None or 0 uses every core)
+
+    Returns:
+        SignatureVerifier instance
+    """
+    workers = workers or os.cpu_count() or 1
+    with _verifiers_lock:
+        verifier = _verifiers.get(workers)
+        if verifier is None:
+            verifier = SignatureVerifier(workers)
+            _verifiers[workers] = verifier
+        return verifier
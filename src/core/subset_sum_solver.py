@@ -0,0 +1,175 @@
+"""
+Subset Sum solver engine used for mining.
+
+Two backends, picked per problem:
+
+- Bitset DP: reachable sums are kept as bits of a Python integer, so adding
+  an item is one shift-and-or over the whole table. The bitset after each
+  item is kept as the predecessor table; a solution is reconstructed by
+  walking back and taking item i whenever the running sum was not already
+  reachable without it. Memory is n * (target + 1) bits.
+- Meet-in-the-middle: used when that table would exceed the bit budget
+  (large targets) or numbers are not positive. Subset sums are enumerated
+  by doubling, so the position of a sum in a list is its subset mask and no
+  paths are stored. Only the left half (at most MITM_MAX_LEFT_ITEMS items)
+  is kept as a sum -> mask table; the right half is streamed against it in
+  blocks of 2^SUBSET_SUM_BLOCK_BITS sums, so peak memory is the table plus
+  one block however large the right half is.
+
+Problems too large for both fall back to a sparse DP over distinct
+reachable sums that stores one (previous sum, index) entry per sum.
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Upper bound on the predecessor table size (bits) for the bitset backend
+BITSET_MAX_BITS = 1 << 27
+# Meet-in-the-middle enumerates 2^(n/2) sums per half
+MITM_MAX_ITEMS = 44
+# Left-half table cap: 2^20 entries is ~100 MB; larger problems shift work to the streamed right half
+MITM_MAX_LEFT_ITEMS = 20
+# Right-half sums are materialized 2^SUBSET_SUM_BLOCK_BITS at a time
+SUBSET_SUM_BLOCK_BITS = 12
+
+
+def find_subset_sum(numbers: List[int], target: int) -> Optional[List[int]]:
+    """
+    Find indices of a subset of numbers summing to target.
+
+    Args:
+        numbers: Integers to choose from
+        target: Required sum
+
+    Returns:
+        Sorted list of indices, or None if no subset exists
+    """
+    if target == 0:
+        return []
+
+    n = len(numbers)
+    if target > 0 and all(num > 0 for num in numbers) and n * (target + 1) <= BITSET_MAX_BITS:
+        return _solve_bitset(numbers, target)
+    if n <= MITM_MAX_ITEMS:
+        return _solve_meet_in_middle(numbers, target)
+    return _solve_sparse(numbers, target)
+
+
+def solve_subset_sum_fast(problem: dict) -> List[int]:
+    """
+    Solve a Subset Sum problem dict.
+
+    Args:
+        problem: Problem with 'numbers' and 'target'
+
+    Returns:
+        Chosen numbers (empty list if there is no solution), in the same
+        form as core.blockchain.solve_subset_sum
+    """
+    numbers = problem['numbers']
+    indices = find_subset_sum(numbers, problem['target'])
+    if not indices:
+        return []
+    return [numbers[i] for i in indices]
+
+
+def _solve_bitset(numbers: List[int], target: int) -> Optional[List[int]]:
+    """Bitset DP over positive numbers with per-item reachability layers."""
+    mask = (1 << (target + 1)) - 1
+    goal = 1 << target
+    reach = 1
+    layers: List[int] = []
+
+    for num in numbers:
+        layers.append(reach)
+        reach = (reach | (reach << num)) & mask
+        if reach & goal:
+            break
+    else:
+        return None
+
+    # layers[i] is the reachable set before item i was added
+    indices = []
+    remaining = target
+    for i in range(len(layers) - 1, -1, -1):
+        if remaining == 0:
+            break
+        if not (layers[i] >> remaining) & 1:
+            indices.append(i)
+            remaining -= numbers[i]
+    indices.reverse()
+    return indices
+
+
+def _subset_sums(numbers: List[int]) -> List[int]:
+    """All subset sums; the sum at position p uses the items whose bits are set in p."""
+    sums = [0]
+    for num in numbers:
+        sums += [s + num for s in sums]
+    return sums
+
+
+def _subset_sum_blocks(numbers: List[int]) -> Iterator[Tuple[int, List[int]]]:
+    """
+    All subset sums in mask order, one block at a time.
+
+    Yields (base, sums) where sums[p] is the sum of subset mask base | p.
+    Blocks hold 2^SUBSET_SUM_BLOCK_BITS sums, and only one block per
+    SUBSET_SUM_BLOCK_BITS items of numbers is alive at a time.
+    """
+    low = _subset_sums(numbers[:SUBSET_SUM_BLOCK_BITS])
+    high = numbers[SUBSET_SUM_BLOCK_BITS:]
+    if not high:
+        yield 0, low
+        return
+    for high_base, high_sums in _subset_sum_blocks(high):
+        for offset, high_total in enumerate(high_sums):
+            yield (high_base | offset) << SUBSET_SUM_BLOCK_BITS, [high_total + s for s in low]
+
+
+def _subset_sum_table(numbers: List[int]) -> Dict[int, int]:
+    """Sum -> smallest subset mask reaching it."""
+    table: Dict[int, int] = {}
+    for base, sums in _subset_sum_blocks(numbers):
+        for offset, total in enumerate(sums):
+            table.setdefault(total, base | offset)
+    return table
+
+
+def _solve_meet_in_middle(numbers: List[int], target: int) -> Optional[List[int]]:
+    """Match streamed right-half subset sums against a left-half sum table."""
+    half = min(len(numbers) // 2, MITM_MAX_LEFT_ITEMS)
+    left, right = numbers[:half], numbers[half:]
+    left_masks = _subset_sum_table(left)
+
+    for base, sums in _subset_sum_blocks(right):
+        for offset, total in enumerate(sums):
+            left_mask = left_masks.get(target - total)
+            if left_mask is None or (left_mask == 0 and base == 0 and offset == 0):
+                continue
+            right_mask = base | offset
+            indices = [i for i in range(half) if (left_mask >> i) & 1]
+            indices += [half + i for i in range(len(right)) if (right_mask >> i) & 1]
+            return indices
+    return None
+
+
+def _solve_sparse(numbers: List[int], target: int) -> Optional[List[int]]:
+    """Dict DP keeping a compact predecessor entry per reachable sum."""
+    bounded = all(num > 0 for num in numbers)
+    predecessors: Dict[int, tuple] = {0: (None, -1)}
+
+    for i, num in enumerate(numbers):
+        for total in list(predecessors):
+            new_total = total + num
+            if new_total in predecessors or (bounded and new_total > target):
+                continue
+            predecessors[new_total] = (total, i)
+            if new_total == target:
+                indices = []
+                while predecessors[new_total][0] is not None:
+                    new_total, index = predecessors[new_total]
+                    indices.append(index)
+                # Walk yields indices from last to first
+                indices.reverse()
+                return indices
+    return None
@@ -0,0 +1,319 @@
+"""
+Module: gossip_engine
+Specification: docs/blockchain/network.md
+
+Asyncio gossip engine for NetworkProtocol.
+
+One event loop (run on a single background thread for synchronous callers)
+drives the periodic equilibrium ticks and all outbound traffic. Each peer
+has a bounded send queue drained by its own task, so fan-out to many peers
+is concurrent and a slow peer only delays itself:
+
+- publish() is non-blocking and drops the peer's oldest queued message
+  when its queue is full (gossip is best effort and must not stall)
+- send() waits for queue space, giving backpressure to coroutine callers
+
+Transports only need LibP2PHost's coroutine
+send_message(peer_id, protocol, message) -> bool. LoopbackNetwork provides
+an in-process transport for tests and simulations.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_PEER_QUEUE_SIZE = 256
+DEFAULT_STOP_TIMEOUT = 5.0
+
+
+class GossipEngine:
+    """
+    Event-loop scheduler and per-peer sender for gossip.
+
+    All state is owned by the loop thread; the public methods are safe to
+    call from any thread.
+    """
+
+    def __init__(self, transport: Optional[Any] = None, queue_size: int = DEFAULT_PEER_QUEUE_SIZE):
+        """
+        Initialize gossip engine.
+
+        Args:
+            transport: Object with async send_message(peer_id, protocol, message) -> bool
+            queue_size: Messages buffered per peer
+        """
+        self.transport = transport
+        self.queue_size = queue_size
+        self.logger = logging.getLogger(__name__)
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._periodic: List[Tuple[float, Callable[[], None], float]] = []
+        # Pending timer per periodic task, keyed by its position in _periodic
+        self._timers: Dict[int, asyncio.TimerHandle] = {}
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._senders: Dict[str, asyncio.Task] = {}
+        self.stats = {"sent": 0, "failed": 0, "dropped": 0}
+
+    @property
+    def is_running(self) -> bool:
+        return self.loop is not None and self.loop.is_running()
+
+    def schedule_periodic(self, interval: float, callback: Callable[[], None], first_delay: Optional[float] = None):
+        """
+        Run callback every interval seconds on the loop.
+
+        Ticks are scheduled at fixed deadlines rather than polled, so they
+        neither drift nor fire late.
+
+        Args:
+            interval: Seconds between calls
+            callback: Synchronous callable run on the loop thread
+            first_delay: Delay before the first call (defaults to interval)
+        """
+        spec = (interval, callback, interval if first_delay is None else first_delay)
+        self._periodic.append(spec)
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._install_periodic, len(self._periodic) - 1, *spec)
+
+    def _install_periodic(self, key: int, interval: float, callback: Callable[[], None], first_delay: float):
+        deadline = self.loop.time() + first_delay
+
+        def tick():
+            nonlocal deadline
+            try:
+                callback()
+            except Exception as e:
+                self.logger.error(f"❌ Periodic task {getattr(callback, '__name__', callback)} failed: {e}")
+            # Skip missed deadlines instead of firing a burst after a stall
+            deadline = max(deadline + interval, self.loop.time())
+            self._timers[key] = self.loop.call_at(deadline, tick)
+
+        self._timers[key] = self.loop.call_at(deadline, tick)
+
+    def start(self):
+        """Start the event loop on a background thread."""
+        if self._thread is not None:
+            return
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            for key, spec in enumerate(self._periodic):
+                self._install_periodic(key, *spec)
+            self.loop.call_soon(started.set)
+            self.loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="gossip-engine", daemon=True)
+        self._thread.start()
+        started.wait(DEFAULT_STOP_TIMEOUT)
+
+    def stop(self, timeout: float = DEFAULT_STOP_TIMEOUT):
+        """Cancel timers and senders and stop the loop."""
+        if self._thread is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+        try:
+            future.result(timeout)
+        except Exception as e:
+            self.logger.debug(f"Gossip shutdown: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        self.loop.close()
+        self._thread = None
+        self.loop = None
+
+    async def _shutdown(self):
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        senders = list(self._senders.values())
+        for task in senders:
+            task.cancel()
+        await asyncio.gather(*senders, return_exceptions=True)
+        self._senders.clear()
+        self._queues.clear()
+
+    def run_coroutine(self, coro, timeout: float = DEFAULT_STOP_TIMEOUT):
+        """
+        Run a coroutine on the loop from another thread and wait for it.
+
+        Used to start and stop the transport (e.g. LibP2PHost) on the loop
+        that sends through it.
+
+        Args:
+            coro: Coroutine to run
+            timeout: Seconds to wait for its result
+
+        Returns:
+            The coroutine's result
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def trigger(self, callback: Callable[[], None]):
+        """Run callback on the loop as soon as possible."""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(callback)
+
+    def publish(self, peer_id: str, protocol: str, message: bytes):
+        """
+        Queue a message for a peer without blocking.
+
+        Args:
+            peer_id: Target peer
+            protocol: Protocol/topic identifier
+            message: Encoded message
+        """
+        if self.loop is None:
+            return
+        if self._in_loop_thread():
+            self._enqueue(peer_id, protocol, message)
+        else:
+            self.loop.call_soon_threadsafe(self._enqueue, peer_id, protocol, message)
+
+    def publish_many(self, messages: Iterable[Tuple[str, str, bytes]]):
+        """Queue (peer_id, protocol, message) tuples without blocking."""
+        messages = list(messages)
+        if self.loop is None or not messages:
+            return
+        if self._in_loop_thread():
+            self._enqueue_many(messages)
+        else:
+            self.loop.call_soon_threadsafe(self._enqueue_many, messages)
+
+    async def send(self, peer_id: str, protocol: str, message: bytes):
+        """
+        Queue a message for a peer, waiting while its queue is full.
+
+        Must be awaited on the engine's loop.
+        """
+        await self._queue_for(peer_id).put((protocol, message))
+
+    def remove_peer(self, peer_id: str):
+        """Drop a peer's queue and sender."""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._remove_peer, peer_id)
+
+    def wait_idle(self, timeout: float = DEFAULT_STOP_TIMEOUT) -> bool:
+        """
+        Block until every queued message has been handed to the transport.
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            True if all queues drained in time
+        """
+        if self.loop is None:
+            return True
+        future = asyncio.run_coroutine_threadsafe(self._drain(), self.loop)
+        try:
+            future.result(timeout)
+            return True
+        except Exception:
+            future.cancel()
+            return False
+
+    async def _drain(self):
+        # Messages published from other threads may still be in call_soon_threadsafe
+        await asyncio.sleep(0)
+        await asyncio.gather(*(queue.join() for queue in list(self._queues.values())))
+
+    def queue_depth(self, peer_id: str) -> int:
+        queue = self._queues.get(peer_id)
+        return queue.qsize() if queue is not None else 0
+
+    def _in_loop_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def _queue_for(self, peer_id: str) -> asyncio.Queue:
+        queue = self._queues.get(peer_id)
+        if queue is None:
+            queue = asyncio.Queue(maxsize=self.queue_size)
+            self._queues[peer_id] = queue
+            self._senders[peer_id] = self.loop.create_task(self._sender(peer_id, queue))
+        return queue
+
+    def _enqueue(self, peer_id: str, protocol: str, message: bytes):
+        queue = self._queue_for(peer_id)
+        if queue.full():
+            queue.get_nowait()
+            queue.task_done()
+            self.stats["dropped"] += 1
+        queue.put_nowait((protocol, message))
+
+    def _enqueue_many(self, messages: List[Tuple[str, str, bytes]]):
+        for peer_id, protocol, message in messages:
+            self._enqueue(peer_id, protocol, message)
+
+    def _remove_peer(self, peer_id: str):
+        task = self._senders.pop(peer_id, None)
+        if task is not None:
+            task.cancel()
+        self._queues.pop(peer_id, None)
+
+    async def _sender(self, peer_id: str, queue: asyncio.Queue):
+        """Deliver one peer's queue in order."""
+        while True:
+            protocol, message = await queue.get()
+            try:
+                if self.transport is None:
+                    sent = False
+                else:
+                    sent = await self.transport.send_message(peer_id, protocol, message)
+                self.stats["sent" if sent else "failed"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["failed"] += 1
+                self.logger.debug(f"⚠️  Send to {peer_id} failed: {e}")
+            finally:
+                queue.task_done()
+
+
+class LoopbackNetwork:
+    """In-process hub connecting LoopbackTransport endpoints."""
+
+    def __init__(self, latency: float = 0.0):
+        """
+        Initialize hub.
+
+        Args:
+            latency: Simulated per-message delay in seconds
+        """
+        self.latency = latency
+        self.handlers: Dict[str, Callable[[str, str, bytes], Any]] = {}
+
+    def endpoint(self, peer_id: str, handler: Callable[[str, str, bytes], Any]) -> 'LoopbackTransport':
+        """
+        Register a node and return its transport.
+
+        Args:
+            peer_id: Node's peer ID
+            handler: Called as handler(sender_peer_id, protocol, message) on delivery,
+                e.g. a NetworkProtocol's handle_message
+
+        Returns:
+            Transport for the node's GossipEngine
+        """
+        self.handlers[peer_id] = handler
+        return LoopbackTransport(self, peer_id)
+
+
+class LoopbackTransport:
+    """Transport with LibP2PHost's send_message signature that delivers in-process."""
+
+    def __init__(self, network: LoopbackNetwork, peer_id: str):
+        self.network = network
+        self.peer_id = peer_id
+
+    async def send_message(self, peer_id: str, protocol: str, message: bytes) -> bool:
+        handler = self.network.handlers.get(peer_id)
+        if handler is None:
+            return False
+        if self.network.latency:
+            await asyncio.sleep(self.network.latency)
+        handler(self.peer_id, protocol, message)
+        return True
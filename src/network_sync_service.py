@@ -10,7 +10,9 @@ import time
 import logging
 import json
 import requests
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
 
 # Add src to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -22,31 +24,119 @@ from metrics_engine import SATOSHI_CONSTANT
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+HEADER_BATCH_SIZE = 2000  # Cap of /v1/data/headers
+DEFAULT_WINDOW_SIZE = 512  # Heights fetched ahead of the commit point
+DEFAULT_MAX_WORKERS = 16  # Concurrent body requests across all peers
+DEFAULT_MAX_ATTEMPTS = 3  # Peers tried per height before giving up
+DEFAULT_REQUEST_TIMEOUT = 10
+THROUGHPUT_SMOOTHING = 0.3  # EWMA weight of the newest sample
+
+
+@dataclass
+class PeerScore:
+    """Per-peer throughput and reliability used to pick who serves the next request."""
+    peer: str
+    tip_height: int = -1
+    throughput: float = 0.0  # EWMA blocks/s
+    successes: int = 0
+    failures: int = 0
+    in_flight: int = 0
+    
+    def record_success(self, blocks: int, elapsed: float):
+        rate = blocks / max(elapsed, 1e-3)
+        if self.successes == 0:
+            self.throughput = rate
+        else:
+            self.throughput += THROUGHPUT_SMOOTHING * (rate - self.throughput)
+        self.successes += 1
+    
+    def record_failure(self):
+        self.failures += 1
+    
+    def score(self, unmeasured_rate: float = 1.0) -> float:
+        """
+        Expected share of throughput for the next request.
+        
+        Args:
+            unmeasured_rate: Rate assumed for peers without samples yet (the
+                best measured rate, so new peers get tried)
+        """
+        rate = self.throughput if self.successes else unmeasured_rate
+        return rate / (1 + self.failures) / (1 + self.in_flight)
+
+
 class NetworkSyncService:
     """
     Network sync service that fetches blocks from peers and validates them.
     
-    Implements peer discovery and block synchronization.
+    Sync is headers-first: header ranges are fetched and their previous_hash
+    links checked, then bodies are fetched concurrently from all peers within
+    a sliding window ahead of the commit point and committed in height order.
+    A failed or mismatching body is retried on another peer.
     """
     
-    def __init__(self):
-        """Initialize network sync service."""
+    def __init__(self, consensus_service: Optional[Any] = None, bootstrap_peers: Optional[List[str]] = None,
+                 window_size: int = DEFAULT_WINDOW_SIZE, max_workers: int = DEFAULT_MAX_WORKERS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, request_timeout: float = DEFAULT_REQUEST_TIMEOUT):
+        """
+        Initialize network sync service.
+        
+        Args:
+            consensus_service: Object with process_block(block_data) -> {'valid': ...}
+                (defaults to UnifiedConsensusService)
+            bootstrap_peers: host:port addresses of bootstrap nodes
+            window_size: Max heights fetched ahead of the next height to commit
+            max_workers: Concurrent body requests
+            max_attempts: Distinct peers tried per height
+            request_timeout: Per-request timeout in seconds
+        """
         logger.info(f"🌐 Initializing network sync service with Satoshi Constant: {SATOSHI_CONSTANT:.6f}")
         
         # Initialize unified consensus service
-        self.consensus_service = UnifiedConsensusService()
+        self.consensus_service = consensus_service or UnifiedConsensusService()
         
         # Bootstrap peers
-        self.bootstrap_peers = [
+        self.bootstrap_peers = bootstrap_peers or [
             "167.172.213.70:5000",
             "167.172.213.70:12346"
         ]
         
         # Discovered peers
         self.discovered_peers = []
+        self.peer_scores: Dict[str, PeerScore] = {}
+        
+        self.window_size = window_size
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.request_timeout = request_timeout
+        
+        # Keep-alive connections shared by all sync workers
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # Where the next sync continues from
+        self.next_height = 0
+        self.last_committed_hash: Optional[str] = None
         
         logger.info("✅ Network sync service initialized")
     
+    def _url(self, peer: str, path: str) -> str:
+        if peer.startswith("http://") or peer.startswith("https://"):
+            return f"{peer}{path}"
+        return f"http://{peer}{path}"
+    
+    def _get_json(self, peer: str, path: str, params: Optional[dict] = None) -> Optional[dict]:
+        """GET a JSON document from a peer; None on any error or non-200 status."""
+        try:
+            response = self.session.get(self._url(peer, path), params=params, timeout=self.request_timeout)
+            if response.status_code == 200:
+                return response.json()
+        except Exception as e:
+            logger.debug(f"Request {path} to {peer} failed: {e}")
+        return None
+    
     def discover_peers(self) -> List[str]:
         """Discover peers from bootstrap nodes."""
         logger.info("🔍 Discovering peers from bootstrap nodes...")
@@ -54,70 +144,239 @@ class NetworkSyncService:
         all_peers = set(self.bootstrap_peers)
         
         for bootstrap_peer in self.bootstrap_peers:
-            try:
-                # Try to get peer list from bootstrap node
-                peer_url = f"http://{bootstrap_peer}/v1/network/peers"
-                response = requests.get(peer_url, timeout=10)
-                
-                if response.status_code == 200:
-                    peer_data = response.json()
-                    if 'peers' in peer_data:
-                        for peer in peer_data['peers']:
-                            all_peers.add(peer)
-                        logger.info(f"📡 Found {len(peer_data['peers'])} peers from {bootstrap_peer}")
-                
-            except Exception as e:
-                logger.warning(f"⚠️  Could not discover peers from {bootstrap_peer}: {e}")
+            # Try to get peer list from bootstrap node
+            peer_data = self._get_json(bootstrap_peer, "/v1/network/peers")
+            if peer_data and 'peers' in peer_data:
+                for peer in peer_data['peers']:
+                    # Entries are either addresses or {'address': ..., 'status': ...}
+                    address = peer.get('address') if isinstance(peer, dict) else peer
+                    if address:
+                        all_peers.add(address)
+                logger.info(f"📡 Found {len(peer_data['peers'])} peers from {bootstrap_peer}")
+            else:
+                logger.warning(f"⚠️  Could not discover peers from {bootstrap_peer}")
         
         self.discovered_peers = list(all_peers)
+        for peer in self.discovered_peers:
+            self.peer_scores.setdefault(peer, PeerScore(peer))
         logger.info(f"✅ Discovered {len(self.discovered_peers)} total peers")
         
         return self.discovered_peers
     
     def get_block_from_peer(self, peer: str, block_height: int) -> Optional[Dict[str, Any]]:
         """Get a specific block from a peer."""
-        try:
-            # Try to get block from peer
-            block_url = f"http://{peer}/v1/data/block/{block_height}"
-            response = requests.get(block_url, timeout=10)
-            
-            if response.status_code == 200:
-                block_data = response.json()
-                if 'data' in block_data:
-                    return block_data['data']
-            
-        except Exception as e:
-            logger.debug(f"Could not get block {block_height} from {peer}: {e}")
-        
+        block_data = self._get_json(peer, f"/v1/data/block/{block_height}")
+        if block_data and 'data' in block_data:
+            return block_data['data']
         return None
     
+    def get_headers_from_peer(self, peer: str, start: int, count: int) -> Optional[List[Dict[str, Any]]]:
+        """Get up to count headers starting at start; None if the peer cannot serve them."""
+        headers = self._get_json(peer, "/v1/data/headers", {"start": start, "count": count})
+        if headers is None or 'data' not in headers:
+            return None
+        if 'tip_height' in headers:
+            self.peer_scores.setdefault(peer, PeerScore(peer)).tip_height = headers['tip_height']
+        return headers['data']
+    
+    def get_peer_tip(self, peer: str) -> int:
+        """Latest block height a peer reports (-1 if unreachable)."""
+        latest = self._get_json(peer, "/v1/data/block/latest")
+        if latest and isinstance(latest.get('data'), dict):
+            return latest['data'].get('index', -1)
+        return -1
+    
     def get_latest_block_height(self) -> int:
-        """Get the latest block height from the network."""
+        """Get the latest block height from the network, asking all peers concurrently."""
         logger.info("📊 Getting latest block height from network...")
         
-        latest_height = 0
+        if not self.discovered_peers:
+            return 0
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(self.discovered_peers))) as pool:
+            tips = list(pool.map(self.get_peer_tip, self.discovered_peers))
         
-        for peer in self.discovered_peers:
-            try:
-                # Try to get latest block info
-                metrics_url = f"http://{peer}/v1/metrics/dashboard"
-                response = requests.get(metrics_url, timeout=10)
-                
-                if response.status_code == 200:
-                    metrics_data = response.json()
-                    if 'data' in metrics_data and 'blockchain' in metrics_data['data']:
-                        peer_height = metrics_data['data']['blockchain'].get('latest_block', 0)
-                        if peer_height > latest_height:
-                            latest_height = peer_height
-                            logger.info(f"📈 Found latest height {peer_height} from {peer}")
-                
-            except Exception as e:
-                logger.debug(f"Could not get metrics from {peer}: {e}")
+        for peer, tip in zip(self.discovered_peers, tips):
+            self.peer_scores.setdefault(peer, PeerScore(peer)).tip_height = tip
+        latest_height = max(tips + [0])
         
         logger.info(f"✅ Latest network height: {latest_height}")
         return latest_height
     
-    def sync_blocks_from_network(self, start_height: int = 0, max_blocks: int = 1000):
+    def _ranked_peers(self, height: int, exclude=()) -> List[PeerScore]:
+        """Peers that have height, best score first."""
+        candidates = [
+            score for peer, score in self.peer_scores.items()
+            if peer not in exclude and score.tip_height >= height
+        ]
+        best_rate = max((s.throughput for s in candidates if s.successes), default=1.0)
+        return sorted(candidates, key=lambda s: s.score(best_rate), reverse=True)
+    
+    def fetch_headers(self, start: int, end: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Fetch and link-check headers start..end.
+        
+        Each batch must continue the previous one (contiguous indices, every
+        previous_hash equal to the preceding block_hash); a peer returning a
+        bad batch is penalised and the batch is asked of the next peer.
+        
+        Args:
+            start: First height
+            end: Last height (inclusive)
+        
+        Returns:
+            Headers in height order (may stop short of end if no peer could
+            serve the rest), or None if no peer serves header ranges
+        """
+        headers: List[Dict[str, Any]] = []
+        previous_hash = self.last_committed_hash if start == self.next_height else None
+        height = start
+        served = False
+        
+        while height <= end:
+            count = min(HEADER_BATCH_SIZE, end - height + 1)
+            batch = None
+            for score in self._ranked_peers(height):
+                candidate = self.get_headers_from_peer(score.peer, height, count)
+                if candidate is None:
+                    continue
+                served = True
+                if candidate and self._headers_link(candidate, height, previous_hash):
+                    batch = candidate
+                    break
+                score.record_failure()
+                logger.warning(f"⚠️  Invalid header batch at {height} from {score.peer}")
+            if not batch:
+                break
+            headers.extend(batch)
+            previous_hash = batch[-1]['block_hash']
+            height += len(batch)
+        
+        if not served:
+            return None
+        logger.info(f"📋 Fetched {len(headers)} headers ({start}..{start + len(headers) - 1})")
+        return headers
+    
+    @staticmethod
+    def _headers_link(headers: List[Dict[str, Any]], start: int, previous_hash: Optional[str]) -> bool:
+        for offset, header in enumerate(headers):
+            if header.get('index') != start + offset or not header.get('block_hash'):
+                return False
+            if previous_hash is not None and header.get('previous_hash') != previous_hash:
+                return False
+            previous_hash = header['block_hash']
+        return True
+    
+    def _fetch_body(self, score: PeerScore, height: int) -> Tuple[Optional[Dict[str, Any]], float]:
+        started = time.time()
+        block = self.get_block_from_peer(score.peer, height)
+        return block, time.time() - started
+    
+    def sync_range(self, start: int, end: int, headers: Optional[List[Dict[str, Any]]] = None) -> Dict[str, int]:
+        """
+        Fetch bodies start..end in parallel and commit them in height order.
+        
+        Args:
+            start: First height
+            end: Last height (inclusive)
+            headers: Validated headers for the range; bodies must match their
+                hashes. Without headers only the previous_hash link to the
+                last committed block is checked.
+        
+        Returns:
+            {'synced': blocks committed, 'failed': heights that could not be
+            fetched or were rejected by consensus}
+        """
+        expected = {header['index']: header['block_hash'] for header in headers or []}
+        next_request = start
+        next_commit = start
+        # First height no peer could serve; nothing at or above it can be committed
+        stop_at = end + 1
+        retries: List[int] = []
+        buffered: Dict[int, Dict[str, Any]] = {}
+        tried: Dict[int, set] = {}
+        in_flight: Dict[Any, Tuple[int, PeerScore]] = {}
+        synced = 0
+        failed = 0
+        
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while next_commit <= end:
+                # Keep the pipeline full, but never more than window_size past the commit point
+                while len(in_flight) < self.max_workers:
+                    if retries:
+                        height = retries.pop()
+                        if height >= stop_at:
+                            continue
+                    elif next_request < stop_at and next_request < next_commit + self.window_size:
+                        height = next_request
+                        next_request += 1
+                    else:
+                        break
+                    peers = self._ranked_peers(height, exclude=tried.setdefault(height, set()))
+                    if not peers:
+                        stop_at = min(stop_at, height)
+                        continue
+                    score = peers[0]
+                    tried[height].add(score.peer)
+                    score.in_flight += 1
+                    in_flight[pool.submit(self._fetch_body, score, height)] = (height, score)
+                
+                if not in_flight:
+                    logger.warning(f"⚠️  Could not get block {next_commit} from any peer")
+                    failed += 1
+                    break
+                
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                for future in done:
+                    height, score = in_flight.pop(future)
+                    score.in_flight -= 1
+                    block, elapsed = future.result()
+                    if block and block.get('index', height) == height and \
+                            (height not in expected or block.get('block_hash') == expected[height]):
+                        score.record_success(1, elapsed)
+                        buffered[height] = block
+                    else:
+                        score.record_failure()
+                        if len(tried[height]) < self.max_attempts:
+                            retries.append(height)
+                        else:
+                            stop_at = min(stop_at, height)
+                
+                # Commit everything contiguous with the chain so far
+                while next_commit in buffered:
+                    block = buffered.pop(next_commit)
+                    if not self._commit(block):
+                        failed += 1
+                        return {'synced': synced, 'failed': failed}
+                    synced += 1
+                    tried.pop(next_commit, None)
+                    next_commit += 1
+                    if synced % 100 == 0:
+                        logger.info(f"✅ Synced {synced} blocks (height {next_commit - 1})")
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        
+        return {'synced': synced, 'failed': failed}
+    
+    def _commit(self, block: Dict[str, Any]) -> bool:
+        """Process one block through consensus if it extends the last committed block."""
+        height = block.get('index')
+        if self.last_committed_hash is not None and block.get('previous_hash') != self.last_committed_hash:
+            logger.warning(f"❌ Block {height} does not extend {self.last_committed_hash[:16]}...")
+            return False
+        try:
+            result = self.consensus_service.process_block(block)
+        except Exception as e:
+            logger.error(f"❌ Error syncing block {height}: {e}")
+            return False
+        if not result.get('valid', False):
+            logger.warning(f"❌ Block {height} validation failed: {result.get('error', 'Unknown')}")
+            return False
+        self.last_committed_hash = block.get('block_hash')
+        self.next_height = height + 1
+        return True
+    
+    def sync_blocks_from_network(self, start_height: int = 0, max_blocks: int = 1000) -> Dict[str, int]:
         """Sync blocks from network starting from given height."""
         logger.info(f"🔄 Starting block sync from height {start_height}")
         
@@ -127,48 +386,28 @@ class NetworkSyncService:
         # Get latest height
         latest_height = self.get_latest_block_height()
         
-        if latest_height <= start_height:
+        if latest_height < start_height:
             logger.info("✅ Already synced to latest height")
-            return
+            return {'synced': 0, 'failed': 0}
         
-        # Sync blocks
-        synced_count = 0
-        failed_count = 0
+        if start_height != self.next_height:
+            # Not continuing from our own tip: nothing to link the first block to
+            self.last_committed_hash = None
+        end_height = min(latest_height, start_height + max_blocks - 1)
         
-        for height in range(start_height, min(latest_height + 1, start_height + max_blocks)):
-            try:
-                # Try to get block from multiple peers
-                block_data = None
-                
-                for peer in self.discovered_peers:
-                    block_data = self.get_block_from_peer(peer, height)
-                    if block_data:
-                        break
-                
-                if not block_data:
-                    logger.warning(f"⚠️  Could not get block {height} from any peer")
-                    failed_count += 1
-                    continue
-                
-                # Process block through consensus
-                result = self.consensus_service.process_block(block_data)
-                
-                if result.get('valid', False):
-                    synced_count += 1
-                    if synced_count % 100 == 0:
-                        logger.info(f"✅ Synced {synced_count} blocks (height {height})")
-                else:
-                    logger.warning(f"❌ Block {height} validation failed: {result.get('error', 'Unknown')}")
-                    failed_count += 1
-                
-                # Small delay to avoid overwhelming peers
-                time.sleep(0.1)
-                
-            except Exception as e:
-                logger.error(f"❌ Error syncing block {height}: {e}")
-                failed_count += 1
+        # Headers first, then bodies for the validated range
+        headers = self.fetch_headers(start_height, end_height)
+        if headers is not None:
+            if not headers:
+                logger.warning(f"⚠️  No valid headers from {start_height}")
+                return {'synced': 0, 'failed': 1}
+            end_height = headers[-1]['index']
+        else:
+            logger.info("ℹ️  No peer serves header ranges; fetching bodies directly")
         
-        logger.info(f"✅ Sync completed: {synced_count} blocks synced, {failed_count} failed")
+        result = self.sync_range(start_height, end_height, headers)
+        logger.info(f"✅ Sync completed: {result['synced']} blocks synced, {result['failed']} failed")
+        return result
     
     def run_sync_loop(self):
         """Run continuous sync loop."""
@@ -176,8 +415,8 @@ class NetworkSyncService:
         
         while True:
             try:
-                # Get current local height
-                current_height = 0  # This would get from local database
+                # Continue from the last committed block
+                current_height = self.next_height
                 
                 # Sync new blocks
                 self.sync_blocks_from_network(start_height=current_height, max_blocks=100)
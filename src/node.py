@@ -13,13 +13,16 @@ from enum import Enum
 from typing import Optional, Dict, Any, List
 import time
 import logging
+import threading
 import json
 import os
+import importlib.util
 from pathlib import Path
 
 # Core blockchain imports
 try:
     from .core.blockchain import Block, ProblemType, ProblemTier
+    from .core.parallel_miner import ParallelMiner, MiningCancelledError
     from .pow import ProblemRegistry, DifficultyAdjuster
     from .storage import StorageManager, StorageConfig, IPFSClient, PruningMode
     from .consensus import ConsensusEngine, ConsensusConfig
@@ -30,6 +33,7 @@ try:
 except ImportError:
     # Fallback for direct execution
     from core.blockchain import Block, ProblemType, ProblemTier
+    from core.parallel_miner import ParallelMiner, MiningCancelledError
     from pow import ProblemRegistry, DifficultyAdjuster
     from storage import StorageManager, StorageConfig, IPFSClient, PruningMode
     from consensus import ConsensusEngine, ConsensusConfig
@@ -39,6 +43,28 @@ except ImportError:
     from user_submissions.aggregation import AggregationStrategy
 
 
+def _load_libp2p_host():
+    """
+    Load network/libp2p_host.py.
+    
+    network.py shadows the network/ directory as a package name, so the host
+    module is loaded from its file.
+    """
+    path = Path(__file__).resolve().parent / "network" / "libp2p_host.py"
+    spec = importlib.util.spec_from_file_location("coinjecture_libp2p_host", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _to_multiaddr(address: str) -> str:
+    """host:port (or an existing multiaddr) as a TCP multiaddr."""
+    if address.startswith("/"):
+        return address
+    host, port = address.rsplit(":", 1)
+    return f"/ip4/{host}/tcp/{port}"
+
+
 class NodeRole(Enum):
     """Node roles and their capabilities."""
     LIGHT = "light"      # Subscribe headers; validate commitments; request bundles on demand
@@ -54,6 +80,7 @@ class NodeConfig:
     network_id: str = "coinjecture-mainnet"
     listen_addr: str = "0.0.0.0:8080"
     bootstrap_peers: List[str] = field(default_factory=list)
+    compression_dictionary_path: Optional[str] = None  # From `coinjectured train-dictionary`
     
     # Node role and capabilities
     role: NodeRole = NodeRole.FULL
@@ -66,6 +93,7 @@ class NodeConfig:
     # Mining configuration (for miners)
     target_block_interval_secs: int = 30
     difficulty_window: int = 10
+    mining_workers: int = 1  # Solver processes; 0 uses every core
     
     # Logging and metrics
     log_level: str = "INFO"
@@ -95,6 +123,7 @@ class Node:
         # Core services
         self.storage: Optional[StorageManager] = None
         self.network: Optional[NetworkProtocol] = None
+        self.p2p_host = None  # LibP2PHost; the gossip engine's transport
         self.consensus: Optional[ConsensusEngine] = None
         self.problem_registry: Optional[ProblemRegistry] = None
         self.difficulty_adjuster: Optional[DifficultyAdjuster] = None
@@ -110,6 +139,8 @@ class Node:
         # Mining state (for miners)
         self.mining_active = False
         self.last_block_time = 0.0
+        self.miner: Optional[ParallelMiner] = None
+        self._mining_cancel = threading.Event()
         
         self.logger.info(f"Node initialized with role: {config.role.value}")
     
@@ -174,6 +205,8 @@ class Node:
                 self.storage,
                 self.problem_registry
             )
+            # Headers and blocks that become the best tip redirect mining
+            self.consensus.add_tip_handler(self.on_new_tip)
             self.logger.info("Consensus engine initialized")
             
             # Initialize network protocol
@@ -210,14 +243,29 @@ class Node:
             self.logger.info("Storage service ready")
             
             # Initialize and start network protocol
+            compression_dictionary = None
+            if self.config.compression_dictionary_path:
+                with open(self.config.compression_dictionary_path, 'rb') as f:
+                    compression_dictionary = f.read()
+            libp2p_host = _load_libp2p_host()
+            self.p2p_host = libp2p_host.LibP2PHost(libp2p_host.LibP2PConfig(
+                listen_addr=_to_multiaddr(self.config.listen_addr),
+                bootstrap_peers=[_to_multiaddr(peer) for peer in self.config.bootstrap_peers]
+            ))
             self.network = NetworkProtocol(
                 consensus=self.consensus,
                 storage=self.storage,
                 problem_registry=self.problem_registry,
-                peer_id=f"node-{self.config.role.value}"
+                peer_id=f"node-{self.config.role.value}",
+                compression_dictionary=compression_dictionary,
+                transport=self.p2p_host
             )
-            # Start equilibrium enforcement loops (λ = η = 1/√2)
+            # Start equilibrium enforcement loops (λ = η = 1/√2); the host runs
+            # on the same event loop that sends through it
             self.network.start_equilibrium_loops()
+            self.network.gossip.run_coroutine(self.p2p_host.start())
+            for peer_id in self.p2p_host.get_connected_peers():
+                self.network.update_peer(peer_id)
             self.logger.info("Network service started with equilibrium enforcement")
             
             # Sync headers
@@ -240,14 +288,25 @@ class Node:
         
         self.is_running = False
         self.mining_active = False
+        self._mining_cancel.set()
+        
+        if self.miner:
+            self.miner.close()
+            self.miner = None
         
         if self.network:
+            if self.p2p_host:
+                try:
+                    self.network.gossip.run_coroutine(self.p2p_host.stop())
+                except Exception as e:
+                    self.logger.warning(f"Failed to stop P2P host: {e}")
+                self.p2p_host = None
             # Stop equilibrium loops before removing network
             self.network.stop_equilibrium_loops()
             self.network = None
         
         if self.storage:
-            self.storage.stop()
+            self.storage.close()
         
         self.logger.info("Node stopped")
     
@@ -343,9 +402,10 @@ class Node:
         """Start mining operations with user submissions integration."""
         self.logger.info("Starting mining operations...")
         self.mining_active = True
+        self.miner = ParallelMiner(self.config.mining_workers)
+        self.logger.info(f"Mining with {self.miner.workers} worker process(es)")
         
         # Start mining loop in background thread
-        import threading
         mining_thread = threading.Thread(target=self._mining_loop, daemon=True)
         mining_thread.start()
     
@@ -353,6 +413,8 @@ class Node:
         """Main mining loop with user submissions integration."""
         while self.mining_active and self.is_running:
             try:
+                self._mining_cancel.clear()
+                
                 # Check for user-submitted problems first
                 problem_data = self._get_problem_for_mining()
                 
@@ -365,10 +427,30 @@ class Node:
                 # Wait for next mining cycle
                 time.sleep(1.0)
                 
+            except MiningCancelledError:
+                self.logger.info("Mining cancelled; restarting on the current tip")
             except Exception as e:
                 self.logger.error(f"Mining loop error: {e}")
                 time.sleep(5.0)
     
+    def on_new_tip(self, block_hash: str, height: Optional[int] = None) -> None:
+        """
+        Move to a new best tip, aborting the in-flight solve if it changed.
+        
+        Registered as a consensus tip handler, so it runs whenever a header
+        or block received from peers becomes the best tip.
+        
+        Args:
+            block_hash: Hash of the new best tip
+            height: Height of the new best tip
+        """
+        if block_hash == self.best_tip_hash:
+            return
+        self.best_tip_hash = block_hash
+        if height is not None:
+            self.current_block_height = height
+        self._mining_cancel.set()
+    
     def _get_problem_for_mining(self) -> Optional[Dict[str, Any]]:
         """
         Get problem for mining from user submissions pool.
@@ -452,6 +534,8 @@ class Node:
             
             self.logger.info(f"Mined block {block.index} with user submission {submission_id}")
             
+        except MiningCancelledError:
+            raise
         except Exception as e:
             self.logger.error(f"Failed to mine block with user problem: {e}")
     
@@ -484,34 +568,31 @@ class Node:
             
             self.logger.info(f"Mined consensus block {block.index}")
             
+        except MiningCancelledError:
+            raise
         except Exception as e:
             self.logger.error(f"Failed to mine consensus block: {e}")
     
     def _solve_problem(self, problem: Dict[str, Any]) -> Any:
         """
-        Solve a computational problem (simplified implementation).
+        Solve a computational problem on the mining worker pool.
         
         Args:
             problem: Problem instance to solve
             
         Returns:
             Any: Problem solution
+            
+        Raises:
+            MiningCancelledError: If a new tip arrived or the node stopped
         """
-        # Simplified subset sum solver
         if problem.get("type") == "subset_sum":
-            numbers = problem.get("numbers", [])
             target = problem.get("target", 0)
-            
-            # Simple greedy solution (not optimal, for demonstration)
-            solution = []
-            current_sum = 0
-            
-            for num in sorted(numbers, reverse=True):
-                if current_sum + num <= target:
-                    solution.append(num)
-                    current_sum += num
-                    if current_sum == target:
-                        break
+            miner = self.miner or ParallelMiner(1)
+            solution = miner.solve(
+                {"numbers": problem.get("numbers", []), "target": target},
+                cancel=self._mining_cancel
+            )
             
             return {
                 "subset": solution,
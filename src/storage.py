@@ -9,9 +9,14 @@ and pruning strategies per node role.
 import os
 import json
 import time
+import queue
+import asyncio
 import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Set, Any, Union
+from typing import Dict, Iterator, List, Optional, Set, Any, Tuple, Union
 from enum import Enum
 import sqlite3
 from pathlib import Path
@@ -20,10 +25,20 @@ from pathlib import Path
 try:
     from .core.blockchain import Block, ProblemTier
     from .pow import ProblemRegistry
+    from .bundle_cache import get_bundle_cache
 except ImportError:
     # Fallback for direct execution
     from core.blockchain import Block, ProblemTier
     from pow import ProblemRegistry
+    from bundle_cache import get_bundle_cache
+
+# msgspec gives compact msgpack rows; without it rows are written as JSON
+try:
+    import msgspec  # type: ignore
+    HAS_MSGSPEC = True
+except ImportError:
+    msgspec = None
+    HAS_MSGSPEC = False
 
 
 class NodeRole(Enum):
@@ -51,6 +66,15 @@ class StorageConfig:
     max_bundle_epochs: int = 10  # For FULL mode
     batch_size: int = 100
     fsync_interval: int = 10  # Sync every N blocks
+    synchronous: str = "NORMAL"  # SQLite synchronous level: OFF, NORMAL, FULL, EXTRA
+    statement_cache_size: int = 128  # Prepared statements cached per connection
+    busy_timeout: float = 5.0  # Seconds to wait on a locked database
+    write_pipeline: bool = False  # Queue writes to a background group-commit writer
+    write_queue_size: int = 10000  # Max queued write units before producers block
+    flush_interval: float = 0.05  # Max seconds a queued write waits for commit
+    storage_format: str = "msgpack"  # Row format for new writes: msgpack or json
+    bundle_cache_dir: Optional[str] = None  # Proof bundle cache (default: <data_dir>/bundle_cache)
+    bundle_cache_max_bytes: int = 512 * 1024 * 1024
 
 
 @dataclass
@@ -59,22 +83,58 @@ class IPFSClient:
     IPFS client for proof bundle storage.
     
     Implements the IPFS client interface from storage.md specification.
+    Requests go through one keep-alive session whose connection pool holds
+    pool_size connections, so repeated calls reuse TCP connections. Use
+    get_ipfs_client() to share one client per API URL across the process.
     """
     
     api_url: str = "http://localhost:5001"
-    timeout: int = 30
+    timeout: int = 30  # Read timeout (seconds)
     max_retries: int = 3
     retry_delay: float = 1.0
     pinata_api_key: Optional[str] = None
     pinata_secret_key: Optional[str] = None
+    pool_size: int = 10  # Keep-alive connections (and add_many/get_many concurrency)
+    connect_timeout: float = 5.0
     
     def __post_init__(self):
         """Initialize IPFS client."""
         self._session = None
+        self._session_lock = threading.Lock()
         self._health_check_interval = 60  # seconds
         self._last_health_check = 0
         self._is_healthy = False
     
+    @property
+    def _timeouts(self) -> Tuple[float, float]:
+        return (self.connect_timeout, self.timeout)
+    
+    def _get_session(self):
+        """Pooled keep-alive session, created on first use."""
+        if self._session is None:
+            try:
+                import requests  # type: ignore  # External dependency
+            except ImportError:
+                raise Exception("requests library not available. Install with: pip install requests")
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = requests.adapters.HTTPAdapter(
+                        pool_connections=self.pool_size,
+                        pool_maxsize=self.pool_size
+                    )
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+    
+    def close(self):
+        """Close pooled connections."""
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+    
     def _make_request(self, endpoint: str, method: str = "GET", data: Optional[bytes] = None) -> Dict[str, Any]:
         """
         Make HTTP request to IPFS API.
@@ -87,19 +147,15 @@ class IPFSClient:
         Returns:
             Response data
         """
-        try:
-            import requests  # type: ignore  # External dependency
-        except ImportError:
-            raise Exception("requests library not available. Install with: pip install requests")
-        
+        session = self._get_session()
         url = f"{self.api_url}/api/v0/{endpoint}"
         
         for attempt in range(self.max_retries):
             try:
                 if method == "POST":
-                    response = requests.post(url, data=data, timeout=self.timeout)
+                    response = session.post(url, data=data, timeout=self._timeouts)
                 else:
-                    response = requests.get(url, timeout=self.timeout)
+                    response = session.get(url, timeout=self._timeouts)
                 
                 response.raise_for_status()
                 return response.json() if response.content else {}
@@ -119,17 +175,14 @@ class IPFSClient:
         Returns:
             IPFS CID
         """
-        try:
-            import requests  # type: ignore  # External dependency
-        except ImportError:
-            raise Exception("requests library not available. Install with: pip install requests")
+        session = self._get_session()
         
         try:
             url = f"{self.api_url}/api/v0/add"
             files = {"file": ("data", obj_bytes, "application/octet-stream")}
             # Force CIDv0 format (base58btc) for compatibility
             params = {"cid-version": "0"}
-            response = requests.post(url, files=files, params=params, timeout=self.timeout)
+            response = session.post(url, files=files, params=params, timeout=self._timeouts)
             response.raise_for_status()
             result = response.json()
             cid = result.get("Hash", "")
@@ -152,20 +205,55 @@ class IPFSClient:
         Returns:
             Object data
         """
-        try:
-            import requests  # type: ignore  # External dependency
-        except ImportError:
-            raise Exception("requests library not available. Install with: pip install requests")
+        session = self._get_session()
         
         try:
             url = f"{self.api_url}/api/v0/cat"
             files = {"arg": (None, cid)}
-            response = requests.post(url, files=files, timeout=self.timeout)
+            response = session.post(url, files=files, timeout=self._timeouts)
             response.raise_for_status()
             return response.content
         except Exception as e:
             raise Exception(f"Failed to get object from IPFS: {e}")
     
+    def add_many(self, objects: List[bytes]) -> List[Optional[str]]:
+        """
+        Add several objects concurrently over the pooled connections.
+        
+        Args:
+            objects: Object data to store
+            
+        Returns:
+            CIDs in input order (None where that add failed)
+        """
+        return self._map(self.add, objects)
+    
+    def get_many(self, cids: List[str]) -> List[Optional[bytes]]:
+        """
+        Get several objects concurrently over the pooled connections.
+        
+        Args:
+            cids: IPFS CIDs
+            
+        Returns:
+            Object data in input order (None where that get failed)
+        """
+        return self._map(self.get, cids)
+    
+    def _map(self, func, items: list) -> list:
+        def call(item):
+            try:
+                return func(item)
+            except Exception as e:
+                print(f"Warning: {e}")
+                return None
+        
+        items = list(items)
+        if len(items) <= 1:
+            return [call(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.pool_size, len(items))) as pool:
+            return list(pool.map(call, items))
+    
     def pin(self, cid: str) -> bool:
         """
         Pin object in IPFS.
@@ -177,7 +265,8 @@ class IPFSClient:
             True if successful
         """
         try:
-            self._make_request(f"pin/add?arg={cid}")
+            # The IPFS HTTP API only accepts POST
+            self._make_request(f"pin/add?arg={cid}", method="POST")
             return True
         except Exception as e:
             print(f"Warning: Failed to pin CID {cid}: {e}")
@@ -235,11 +324,6 @@ class IPFSClient:
         if not self.pinata_api_key or not self.pinata_secret_key:
             return False  # Pinata not configured
         
-        try:
-            import requests  # type: ignore  # External dependency
-        except ImportError:
-            return False
-        
         try:
             url = "https://api.pinata.cloud/pinning/pinByHash"
             
@@ -264,7 +348,7 @@ class IPFSClient:
                 }
             }
             
-            response = requests.post(url, headers=headers, json=data, timeout=self.timeout)
+            response = self._get_session().post(url, headers=headers, json=data, timeout=self._timeouts)
             response.raise_for_status()
             
             return True
@@ -273,6 +357,524 @@ class IPFSClient:
             return False
 
 
+_ipfs_clients: Dict[str, IPFSClient] = {}
+_ipfs_clients_lock = threading.Lock()
+
+
+def get_ipfs_client(api_url: str = "http://localhost:5001", **kwargs) -> IPFSClient:
+    """
+    Shared IPFS client for an API URL, so every caller reuses one connection pool.
+    
+    Settings are fixed by the first caller for a URL: later calls get the
+    existing client unchanged, and a warning is printed if they ask for
+    different settings.
+    
+    Args:
+        api_url: IPFS API URL
+        **kwargs: IPFSClient settings, applied only when the client is created
+        
+    Returns:
+        IPFSClient instance
+    """
+    with _ipfs_clients_lock:
+        client = _ipfs_clients.get(api_url)
+        if client is None:
+            client = IPFSClient(api_url, **kwargs)
+            _ipfs_clients[api_url] = client
+            return client
+    conflicting = sorted(name for name, value in kwargs.items() if getattr(client, name, value) != value)
+    if conflicting:
+        print(f"Warning: shared IPFS client for {api_url} already exists; ignoring {', '.join(conflicting)}")
+    return client
+
+# Statements are module-level constants so each connection's statement cache
+# keeps them prepared across calls.
+_SQL_INSERT_HEADER = """
+    INSERT OR REPLACE INTO headers
+    (header_hash, header_bytes, height, timestamp)
+    VALUES (?, ?, ?, ?)
+"""
+_SQL_SELECT_HEADER = "SELECT header_bytes FROM headers WHERE header_hash = ?"
+# Range scan on idx_headers_height. work_index only holds best-chain hashes
+# (ConsensusEngine rewrites it from the fork point on a tip change and drops
+# rows above a lower new tip), so where it has a row for a height fork
+# siblings are skipped and callers see the canonical header.
+_SQL_SELECT_HEADERS_RANGE = """
+    SELECT h.header_bytes FROM headers h
+    LEFT JOIN work_index w ON w.height = h.height
+    WHERE h.height >= ? AND h.height < ?
+      AND (w.block_hash IS NULL OR w.block_hash = h.header_hash)
+    ORDER BY h.height
+"""
+_SQL_SELECT_MAX_HEADER_HEIGHT = "SELECT MAX(height) FROM headers"
+_SQL_INSERT_BLOCK = """
+    INSERT OR REPLACE INTO blocks
+    (block_hash, block_bytes, header_hash)
+    VALUES (?, ?, ?)
+"""
+_SQL_SELECT_BLOCK = "SELECT block_bytes FROM blocks WHERE block_hash = ?"
+_SQL_INSERT_TIP = "INSERT OR REPLACE INTO tips (tip_hash, cumulative_work) VALUES (?, ?)"
+_SQL_SELECT_TIPS = "SELECT tip_hash, cumulative_work FROM tips ORDER BY cumulative_work DESC"
+_SQL_INSERT_WORK_INDEX = """
+    INSERT OR REPLACE INTO work_index
+    (height, cumulative_work, block_hash)
+    VALUES (?, ?, ?)
+"""
+_SQL_DELETE_WORK_ABOVE = "DELETE FROM work_index WHERE height > ?"
+_SQL_SELECT_WORK_AT_HEIGHT = "SELECT cumulative_work FROM work_index WHERE height = ?"
+_SQL_INSERT_COMMITMENT = """
+    INSERT OR REPLACE INTO commit_index
+    (commitment, cid, problem_type, capacity)
+    VALUES (?, ?, ?, ?)
+"""
+_SQL_SELECT_COMMITMENT_CID = "SELECT cid FROM commit_index WHERE commitment = ?"
+
+# Key for writes whose effect on reads is unknown: any read flushes them
+_ANY_KEY = ("*", None)
+
+
+def _write_keys(sql: str, params: tuple) -> List[tuple]:
+    """(kind, key) pairs a queued statement affects, so reads flush only when they overlap."""
+    if sql == _SQL_INSERT_HEADER:
+        return [("header", params[0]), ("height", params[2])]
+    if sql == _SQL_INSERT_BLOCK:
+        return [("block", params[0])]
+    if sql == _SQL_INSERT_TIP:
+        return [("tips", None)]
+    if sql == _SQL_INSERT_WORK_INDEX:
+        return [("work", params[0]), ("height", params[0])]
+    if sql == _SQL_INSERT_COMMITMENT:
+        return [("commitment", params[0])]
+    return [_ANY_KEY]
+
+
+# Row formats. Binary rows start with a format byte; legacy JSON rows always
+# start with '{', so both can live in the same table and decode side by side.
+# Rows store core.blockchain.Block (block_hash, offchain_cid, body), which the
+# consensus codec's BlockHeader does not cover; they are never hashed, so they
+# use their own positional layout (see docs/blockchain/storage.md).
+STORAGE_FORMAT_MSGPACK_V1 = 0x01
+_MSGPACK_V1_PREFIX = bytes([STORAGE_FORMAT_MSGPACK_V1])
+_JSON_PREFIX = b"{"
+
+_TIER_BY_VALUE = {tier.value: tier for tier in ProblemTier}
+
+
+def _encode_hook(obj: Any) -> Any:
+    """Fallback for values msgpack cannot encode natively (e.g. Transaction)."""
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    if isinstance(obj, Enum):
+        return obj.value
+    raise NotImplementedError(f"Cannot encode {type(obj).__name__}")
+
+
+if HAS_MSGSPEC:
+    _MSGPACK_ENCODER = msgspec.msgpack.Encoder(enc_hook=_encode_hook)
+    _MSGPACK_DECODER = msgspec.msgpack.Decoder()
+
+
+def _pack_hash(value: Any) -> Any:
+    """Store 64-char lowercase hex hashes as 32 raw bytes; anything else as-is."""
+    if isinstance(value, str) and len(value) == 64:
+        try:
+            raw = bytes.fromhex(value)
+        except ValueError:
+            return value
+        if raw.hex() == value:
+            return raw
+    return value
+
+
+def _unpack_hash(value: Any) -> Any:
+    """Inverse of _pack_hash."""
+    return value.hex() if isinstance(value, bytes) else value
+
+
+def _tier_value(capacity: Any) -> str:
+    return capacity.value if hasattr(capacity, 'value') else str(capacity)
+
+
+def _header_fields(block: Block) -> list:
+    """Fixed-order header array shared by header and block rows."""
+    return [
+        block.index,
+        block.timestamp,
+        _pack_hash(block.previous_hash),
+        _pack_hash(block.merkle_root),
+        _tier_value(block.mining_capacity),
+        block.cumulative_work_score,
+        _pack_hash(block.block_hash),
+        getattr(block, 'offchain_cid', None),
+    ]
+
+
+class SQLiteConnectionManager:
+    """
+    Connection manager for the storage database.
+    
+    Keeps one long-lived writer connection in WAL mode, serialized by a lock,
+    and one reader connection per thread. Writes issued inside
+    ``transaction()`` are grouped into a single commit.
+    """
+    
+    SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL", "EXTRA")
+    
+    def __init__(
+        self,
+        db_path: str,
+        synchronous: str = "NORMAL",
+        statement_cache_size: int = 128,
+        busy_timeout: float = 5.0
+    ):
+        """
+        Open the writer connection and switch the database to WAL mode.
+        
+        Args:
+            db_path: Path to SQLite database file
+            synchronous: SQLite synchronous level (OFF, NORMAL, FULL, EXTRA)
+            statement_cache_size: Prepared statements cached per connection
+            busy_timeout: Seconds to wait on a locked database
+        """
+        level = synchronous.upper()
+        if level not in self.SYNCHRONOUS_LEVELS:
+            raise ValueError(f"Invalid synchronous level: {synchronous}")
+        
+        self.db_path = db_path
+        self.synchronous = level
+        self.statement_cache_size = statement_cache_size
+        self.busy_timeout = busy_timeout
+        
+        self._write_lock = threading.RLock()
+        self._tx_depth = 0
+        self._tx_owner: Optional[int] = None
+        self._readers: Dict[int, sqlite3.Connection] = {}
+        self._readers_lock = threading.Lock()
+        self._closed = False
+        
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode = WAL")
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection in autocommit mode; transactions are explicit."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size
+        )
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        return conn
+    
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run writes on the writer connection inside one transaction.
+        
+        Nested calls join the outermost transaction, so a caller can group
+        several store_* calls into a single commit.
+        
+        Yields:
+            Writer connection
+        """
+        if self._closed:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed storage database")
+        
+        with self._write_lock:
+            outermost = self._tx_depth == 0
+            if outermost:
+                self._writer.execute("BEGIN IMMEDIATE")
+                self._tx_owner = threading.get_ident()
+            self._tx_depth += 1
+            try:
+                yield self._writer
+            except BaseException:
+                self._tx_depth -= 1
+                if outermost:
+                    self._tx_owner = None
+                    self._writer.execute("ROLLBACK")
+                raise
+            else:
+                self._tx_depth -= 1
+                if outermost:
+                    self._tx_owner = None
+                    self._writer.execute("COMMIT")
+    
+    def reader(self) -> sqlite3.Connection:
+        """
+        Get the calling thread's reader connection.
+        
+        Inside an open transaction the writer connection is returned instead,
+        so the owning thread reads its own uncommitted writes.
+        
+        Returns:
+            SQLite connection for queries
+        """
+        if self._closed:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed storage database")
+        
+        if self._tx_owner == threading.get_ident():
+            return self._writer
+        
+        thread_id = threading.get_ident()
+        conn = self._readers.get(thread_id)
+        if conn is None:
+            conn = self._connect()
+            conn.execute("PRAGMA query_only = ON")
+            with self._readers_lock:
+                self._prune_readers()
+                self._readers[thread_id] = conn
+        return conn
+    
+    def _prune_readers(self):
+        """Close reader connections owned by threads that have exited."""
+        live = {thread.ident for thread in threading.enumerate()}
+        for thread_id in [tid for tid in self._readers if tid not in live]:
+            self._readers.pop(thread_id).close()
+    
+    def checkpoint(self, mode: str = "FULL"):
+        """
+        Checkpoint the WAL into the main database file.
+        
+        Args:
+            mode: PASSIVE, FULL, RESTART or TRUNCATE
+        """
+        with self._write_lock:
+            self._writer.execute(f"PRAGMA wal_checkpoint({mode})")
+    
+    def vacuum(self):
+        """Rebuild the database file, returning free pages to the OS."""
+        with self._write_lock:
+            self._writer.execute("VACUUM")
+    
+    def close(self):
+        """Close the writer and every reader connection."""
+        with self._write_lock:
+            if self._closed:
+                return
+            self._closed = True
+            with self._readers_lock:
+                for conn in self._readers.values():
+                    conn.close()
+                self._readers.clear()
+            self._writer.close()
+
+
+class DurabilityTicket:
+    """
+    Handle for a queued storage write.
+    
+    Resolves to True once the write is committed, or False if it failed.
+    Can be waited on from a thread or awaited from asyncio code.
+    """
+    
+    def __init__(self):
+        self._future: Future = Future()
+        self.error: Optional[BaseException] = None
+    
+    @classmethod
+    def committed(cls) -> 'DurabilityTicket':
+        """Create a ticket for a write that is already committed."""
+        ticket = cls()
+        ticket._resolve()
+        return ticket
+    
+    def _resolve(self, error: Optional[BaseException] = None):
+        self.error = error
+        self._future.set_result(error is None)
+    
+    @property
+    def done(self) -> bool:
+        """True once the write has been committed or has failed."""
+        return self._future.done()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the write is durable.
+        
+        Args:
+            timeout: Maximum seconds to wait (None waits forever)
+            
+        Returns:
+            True if committed, False on failure or timeout
+        """
+        try:
+            return self._future.result(timeout)
+        except FutureTimeoutError:
+            return False
+    
+    def __await__(self):
+        return asyncio.wrap_future(self._future).__await__()
+
+
+class WritePipeline:
+    """
+    Group-commit pipeline for storage writes.
+    
+    Callers submit units of (sql, params) statements to a bounded queue. A
+    background writer commits everything it has collected in one transaction
+    once ``batch_size`` statements are pending or ``flush_interval`` seconds
+    have passed since the first of them arrived. Statements submitted as one
+    unit always land in the same transaction.
+    """
+    
+    def __init__(
+        self,
+        db: SQLiteConnectionManager,
+        max_queue: int = 10000,
+        batch_size: int = 100,
+        flush_interval: float = 0.05
+    ):
+        """
+        Initialize write pipeline.
+        
+        Args:
+            db: Connection manager owning the writer connection
+            max_queue: Maximum queued units before submit() blocks
+            batch_size: Statements per commit that trigger an immediate flush
+            flush_interval: Maximum seconds a write waits before commit
+        """
+        self._db = db
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        
+        # Counters
+        self.batches_committed = 0
+        self.statements_committed = 0
+    
+    @property
+    def pending(self) -> int:
+        """Number of submitted units not yet committed."""
+        return self._pending
+    
+    @property
+    def running(self) -> bool:
+        return self._running
+    
+    def start(self):
+        """Start the background writer thread."""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="storage-writer", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: Optional[float] = None):
+        """Commit everything already queued and stop the writer thread."""
+        if not self._running:
+            return
+        self._running = False
+        self._queue.put(None)
+        if self._thread:
+            self._thread.join(timeout)
+    
+    def submit(self, statements: List[Tuple[str, tuple]]) -> DurabilityTicket:
+        """
+        Queue statements to be committed together.
+        
+        Blocks while the queue is full, which applies backpressure to
+        producers that outrun the disk.
+        
+        Args:
+            statements: List of (sql, params) tuples
+            
+        Returns:
+            DurabilityTicket resolved when the statements are committed
+        """
+        if not self._running:
+            raise RuntimeError("Write pipeline is not running")
+        
+        ticket = DurabilityTicket()
+        with self._pending_lock:
+            self._pending += 1
+        self._queue.put((statements, ticket, False))
+        return ticket
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Commit everything queued so far without waiting for the interval.
+        
+        Args:
+            timeout: Maximum seconds to wait
+            
+        Returns:
+            True once all previously submitted writes are committed
+        """
+        if not self._running:
+            return True
+        ticket = DurabilityTicket()
+        self._queue.put(([], ticket, True))
+        return ticket.wait(timeout)
+    
+    def _run(self):
+        """Writer loop: collect a batch, commit it, repeat."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            
+            batch = [item]
+            statement_count = len(item[0])
+            flush_now = item[2]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            
+            while not flush_now and statement_count < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                statement_count += len(item[0])
+                flush_now = item[2]
+            
+            self._commit(batch)
+            if stop:
+                break
+    
+    def _commit(self, batch: List[tuple]):
+        """Commit a batch in one transaction and resolve its tickets."""
+        errors: List[Optional[BaseException]] = []
+        try:
+            with self._db.transaction() as conn:
+                for statements, _, _ in batch:
+                    for sql, params in statements:
+                        conn.execute(sql, params)
+            errors = [None] * len(batch)
+        except Exception:
+            # Retry unit by unit so one bad write only fails its own ticket
+            errors = []
+            for statements, _, _ in batch:
+                try:
+                    with self._db.transaction() as conn:
+                        for sql, params in statements:
+                            conn.execute(sql, params)
+                    errors.append(None)
+                except Exception as e:
+                    print(f"Error in storage write pipeline: {e}")
+                    errors.append(e)
+        
+        with self._pending_lock:
+            self._pending -= sum(1 for _, _, is_flush in batch if not is_flush)
+        self.batches_committed += 1
+        self.statements_committed += sum(len(statements) for statements, _, _ in batch)
+        
+        for (_, ticket, _), error in zip(batch, errors):
+            ticket._resolve(error)
+
+
 class StorageManager:
     """
     Storage manager for blockchain data.
@@ -289,21 +891,46 @@ class StorageManager:
         """
         self.config = config
         self.db_path = os.path.join(config.data_dir, "blockchain.db")
-        self.ipfs_client = IPFSClient(config.ipfs_api_url)
+        self.ipfs_client = get_ipfs_client(config.ipfs_api_url)
         
         # Ensure data directory exists
         os.makedirs(config.data_dir, exist_ok=True)
         
+        # Bundles are immutable per CID: serve repeats locally
+        self.bundle_cache = get_bundle_cache(
+            config.bundle_cache_dir or os.path.join(config.data_dir, "bundle_cache"),
+            max_bytes=config.bundle_cache_max_bytes
+        )
+        
+        # Long-lived writer + per-thread readers
+        self._db = SQLiteConnectionManager(
+            self.db_path,
+            synchronous=config.synchronous,
+            statement_cache_size=config.statement_cache_size,
+            busy_timeout=config.busy_timeout
+        )
+        
         # Initialize database
         self._init_database()
         
-        # Batch write buffer
-        self._write_buffer: List[tuple] = []
-        self._last_sync = 0
+        # Group-commit write pipeline (batch_size statements or flush_interval)
+        self._pipeline: Optional[WritePipeline] = None
+        self._local = threading.local()
+        # (kind, key) -> queued writes not yet committed
+        self._pending_keys: Dict[tuple, int] = {}
+        self._pending_keys_lock = threading.Lock()
+        if config.write_pipeline:
+            self._pipeline = WritePipeline(
+                self._db,
+                max_queue=config.write_queue_size,
+                batch_size=config.batch_size,
+                flush_interval=config.flush_interval
+            )
+            self._pipeline.start()
     
     def _init_database(self):
         """Initialize SQLite database with required tables."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db.transaction() as conn:
             cursor = conn.cursor()
             
             # Headers table: key=header_hash -> header_bytes
@@ -374,8 +1001,164 @@ class StorageManager:
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_headers_timestamp ON headers (timestamp)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_work_index_height ON work_index (height)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_commit_index_commitment ON commit_index (commitment)")
+    
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Group writes into a single commit.
+        
+        Every store_* call made inside the block shares one transaction
+        and one commit instead of committing per row. With the write
+        pipeline running, the writes are queued as one unit on exit.
+        """
+        if self._pipeline is None:
+            with self._db.transaction():
+                yield
+            return
+        
+        if getattr(self._local, "group", None) is not None:
+            # Nested: join the enclosing group
+            yield
+            return
+        
+        self._local.group = []
+        try:
+            yield
+            statements = self._local.group
+        finally:
+            self._local.group = None
+        if statements:
+            self._submit(statements)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Commit every queued write now.
+        
+        Args:
+            timeout: Maximum seconds to wait
             
-            conn.commit()
+        Returns:
+            True once all previously queued writes are committed
+        """
+        if self._pipeline is None:
+            return True
+        return self._pipeline.flush(timeout)
+    
+    def close(self):
+        """Commit queued writes and close all database connections."""
+        if self._pipeline is not None:
+            self._pipeline.stop()
+        self._db.close()
+    
+    def _write(self, statements: List[Tuple[str, tuple]]) -> Optional[DurabilityTicket]:
+        """
+        Write statements together, directly or through the pipeline.
+        
+        Args:
+            statements: List of (sql, params) tuples
+            
+        Returns:
+            DurabilityTicket, or None when joined to an enclosing transaction()
+        """
+        if self._pipeline is None:
+            with self._db.transaction() as conn:
+                for sql, params in statements:
+                    conn.execute(sql, params)
+            return DurabilityTicket.committed()
+        
+        group = getattr(self._local, "group", None)
+        if group is not None:
+            group.extend(statements)
+            return None
+        return self._submit(statements)
+    
+    def _submit(self, statements: List[Tuple[str, tuple]]) -> DurabilityTicket:
+        """Queue statements on the pipeline, tracking their keys until committed."""
+        keys = [key for sql, params in statements for key in _write_keys(sql, params)]
+        with self._pending_keys_lock:
+            for key in keys:
+                self._pending_keys[key] = self._pending_keys.get(key, 0) + 1
+        try:
+            ticket = self._pipeline.submit(statements)
+        except Exception:
+            self._release_keys(keys)
+            raise
+        ticket._future.add_done_callback(lambda _: self._release_keys(keys))
+        return ticket
+    
+    def _release_keys(self, keys: List[tuple]):
+        with self._pending_keys_lock:
+            for key in keys:
+                count = self._pending_keys.pop(key) - 1
+                if count:
+                    self._pending_keys[key] = count
+    
+    def _reader(self, *keys: tuple, heights: Optional[Tuple[float, float]] = None) -> sqlite3.Connection:
+        """
+        Reader connection that observes the queued writes the read depends on.
+        
+        The write queue is flushed only if a queued write touches one of
+        keys or a height in [heights[0], heights[1]), so reads of committed
+        data do not break up group commits.
+        
+        Args:
+            keys: (kind, key) pairs the read covers (see _write_keys)
+            heights: Height range the read covers
+        """
+        if self._pipeline is not None and self._pipeline.pending and self._touches_pending(keys, heights):
+            self._pipeline.flush()
+        return self._db.reader()
+    
+    def _touches_pending(self, keys: Tuple[tuple, ...], heights: Optional[Tuple[float, float]]) -> bool:
+        with self._pending_keys_lock:
+            if _ANY_KEY in self._pending_keys or any(key in self._pending_keys for key in keys):
+                return True
+            if heights is None:
+                return False
+            return any(kind == "height" and heights[0] <= key < heights[1]
+                       for kind, key in self._pending_keys)
+    
+    def _prepare_write(self, op_type: str, data: Any) -> Tuple[str, tuple]:
+        """
+        Turn a write operation into an (sql, params) statement.
+        
+        Args:
+            op_type: header, block, tip, work_index, work_index_truncate or commit_index
+            data: Operation payload (see batch_write)
+            
+        Returns:
+            (sql, params) tuple
+        """
+        if op_type == "header":
+            if isinstance(data, tuple):
+                header, header_bytes = data
+                header_hash = header.calculate_hash()
+            else:
+                header, header_bytes = data, self._serialize_header(data)
+                # Use the block's hash field if available, otherwise calculate it
+                header_hash = header.block_hash if getattr(header, 'block_hash', None) else header.calculate_hash()
+            return _SQL_INSERT_HEADER, (header_hash.encode(), header_bytes, header.index, int(header.timestamp))
+        
+        if op_type == "block":
+            block_hash = data.calculate_hash().encode()
+            return _SQL_INSERT_BLOCK, (block_hash, self._serialize_block(data), block_hash)
+        
+        if op_type == "tip":
+            tip_hash, cumulative_work = data
+            return _SQL_INSERT_TIP, (tip_hash.encode(), cumulative_work)
+        
+        if op_type == "work_index":
+            height, cumulative_work, block_hash = data
+            return _SQL_INSERT_WORK_INDEX, (height, cumulative_work, block_hash.encode())
+        
+        if op_type == "work_index_truncate":
+            return _SQL_DELETE_WORK_ABOVE, (data,)
+        
+        if op_type == "commit_index":
+            commitment, cid, problem_type, capacity = data
+            return _SQL_INSERT_COMMITMENT, (commitment, cid, problem_type, capacity)
+        
+        raise ValueError(f"Unknown write operation: {op_type}")
     
     def store_header(self, block: Block) -> bool:
         """
@@ -388,19 +1171,7 @@ class StorageManager:
             True if successful
         """
         try:
-            header_bytes = self._serialize_header(block)
-            # Use the block's hash field if available, otherwise calculate it
-            header_hash = (block.block_hash if hasattr(block, 'block_hash') and block.block_hash else block.calculate_hash()).encode()
-            
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT OR REPLACE INTO headers 
-                    (header_hash, header_bytes, height, timestamp)
-                    VALUES (?, ?, ?, ?)
-                """, (header_hash, header_bytes, block.index, int(block.timestamp)))
-                conn.commit()
-            
+            self._write([self._prepare_write("header", block)])
             return True
         except Exception as e:
             print(f"Error storing header: {e}")
@@ -417,21 +1188,67 @@ class StorageManager:
             Block or None
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT header_bytes FROM headers 
-                    WHERE header_hash = ?
-                """, (header_hash.encode(),))
-                
-                result = cursor.fetchone()
-                if result:
-                    return self._deserialize_header(result[0])
-                return None
+            result = self._reader(("header", header_hash.encode())).execute(_SQL_SELECT_HEADER, (header_hash.encode(),)).fetchone()
+            if result:
+                return self._deserialize_header(result[0])
+            return None
         except Exception as e:
             print(f"Error getting header: {e}")
             return None
     
+    def get_headers_range(self, start: int, count: int, raw: bool = False) -> List[Union[Block, bytes]]:
+        """
+        Get headers for heights start .. start + count - 1 in one query.
+        
+        Args:
+            start: First height
+            count: Number of heights
+            raw: Return the stored header bytes instead of decoding them
+            
+        Returns:
+            Headers ordered by height (missing heights are skipped)
+        """
+        if count <= 0:
+            return []
+        try:
+            rows = self._reader(heights=(start, start + count)).execute(_SQL_SELECT_HEADERS_RANGE, (start, start + count)).fetchall()
+            if raw:
+                return [row[0] for row in rows]
+            return [self._deserialize_header(row[0]) for row in rows]
+        except Exception as e:
+            print(f"Error getting headers range: {e}")
+            return []
+    
+    def iter_headers(self, start: int = 0, end: Optional[int] = None,
+                     raw: bool = False, chunk_size: int = 500) -> Iterator[Union[Block, bytes]]:
+        """
+        Iterate headers from height start up to (not including) end.
+        
+        Headers are fetched chunk_size heights at a time so no read
+        transaction stays open across the whole scan.
+        
+        Args:
+            start: First height
+            end: Stop height (exclusive); None scans to the highest stored header
+            raw: Yield the stored header bytes instead of decoding them
+            chunk_size: Heights fetched per query
+            
+        Yields:
+            Headers ordered by height
+        """
+        if end is None:
+            try:
+                max_height = self._reader(heights=(float('-inf'), float('inf'))).execute(_SQL_SELECT_MAX_HEADER_HEIGHT).fetchone()[0]
+            except Exception as e:
+                print(f"Error getting max header height: {e}")
+                return
+            if max_height is None:
+                return
+            end = max_height + 1
+        
+        for chunk_start in range(start, end, chunk_size):
+            yield from self.get_headers_range(chunk_start, min(chunk_size, end - chunk_start), raw=raw)
+    
     def store_block(self, block: Block) -> bool:
         """
         Store full block.
@@ -443,19 +1260,7 @@ class StorageManager:
             True if successful
         """
         try:
-            block_bytes = self._serialize_block(block)
-            block_hash = block.calculate_hash().encode()
-            header_hash = block.calculate_hash().encode()
-            
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT OR REPLACE INTO blocks 
-                    (block_hash, block_bytes, header_hash)
-                    VALUES (?, ?, ?)
-                """, (block_hash, block_bytes, header_hash))
-                conn.commit()
-            
+            self._write([self._prepare_write("block", block)])
             return True
         except Exception as e:
             print(f"Error storing block: {e}")
@@ -472,17 +1277,10 @@ class StorageManager:
             Block or None
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT block_bytes FROM blocks 
-                    WHERE block_hash = ?
-                """, (block_hash.encode(),))
-                
-                result = cursor.fetchone()
-                if result:
-                    return self._deserialize_block(result[0])
-                return None
+            result = self._reader(("block", block_hash.encode())).execute(_SQL_SELECT_BLOCK, (block_hash.encode(),)).fetchone()
+            if result:
+                return self._deserialize_block(result[0])
+            return None
         except Exception as e:
             print(f"Error getting block: {e}")
             return None
@@ -499,15 +1297,7 @@ class StorageManager:
             True if successful
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT OR REPLACE INTO tips 
-                    (tip_hash, cumulative_work)
-                    VALUES (?, ?)
-                """, (tip_hash.encode(), cumulative_work))
-                conn.commit()
-            
+            self._write([self._prepare_write("tip", (tip_hash, cumulative_work))])
             return True
         except Exception as e:
             print(f"Error storing tip: {e}")
@@ -521,14 +1311,8 @@ class StorageManager:
             List of (tip_hash, cumulative_work) tuples
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT tip_hash, cumulative_work FROM tips 
-                    ORDER BY cumulative_work DESC
-                """)
-                
-                return [(row[0].decode(), row[1]) for row in cursor.fetchall()]
+            rows = self._reader(("tips", None)).execute(_SQL_SELECT_TIPS).fetchall()
+            return [(row[0].decode(), row[1]) for row in rows]
         except Exception as e:
             print(f"Error getting tips: {e}")
             return []
@@ -546,15 +1330,7 @@ class StorageManager:
             True if successful
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT OR REPLACE INTO work_index 
-                    (height, cumulative_work, block_hash)
-                    VALUES (?, ?, ?)
-                """, (height, cumulative_work, block_hash.encode()))
-                conn.commit()
-            
+            self._write([self._prepare_write("work_index", (height, cumulative_work, block_hash))])
             return True
         except Exception as e:
             print(f"Error storing work index: {e}")
@@ -571,15 +1347,8 @@ class StorageManager:
             Cumulative work or None
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT cumulative_work FROM work_index 
-                    WHERE height = ?
-                """, (height,))
-                
-                result = cursor.fetchone()
-                return result[0] if result else None
+            result = self._reader(("work", height)).execute(_SQL_SELECT_WORK_AT_HEIGHT, (height,)).fetchone()
+            return result[0] if result else None
         except Exception as e:
             print(f"Error getting work at height: {e}")
             return None
@@ -598,15 +1367,7 @@ class StorageManager:
             True if successful
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT OR REPLACE INTO commit_index 
-                    (commitment, cid, problem_type, capacity)
-                    VALUES (?, ?, ?, ?)
-                """, (commitment, cid, problem_type, capacity))
-                conn.commit()
-            
+            self._write([self._prepare_write("commit_index", (commitment, cid, problem_type, capacity))])
             return True
         except Exception as e:
             print(f"Error storing commitment: {e}")
@@ -623,15 +1384,8 @@ class StorageManager:
             IPFS CID or None
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT cid FROM commit_index 
-                    WHERE commitment = ?
-                """, (commitment,))
-                
-                result = cursor.fetchone()
-                return result[0] if result else None
+            result = self._reader(("commitment", commitment)).execute(_SQL_SELECT_COMMITMENT_CID, (commitment,)).fetchone()
+            return result[0] if result else None
         except Exception as e:
             print(f"Error getting commitment CID: {e}")
             return None
@@ -652,6 +1406,7 @@ class StorageManager:
                 return None
             
             cid = self.ipfs_client.add(bundle_data)
+            self.bundle_cache.put(cid, bundle_data)
             
             # Pin if in archive mode
             if self.config.pruning_mode == PruningMode.ARCHIVE:
@@ -664,7 +1419,7 @@ class StorageManager:
     
     def get_proof_bundle(self, cid: str) -> Optional[bytes]:
         """
-        Get proof bundle from IPFS.
+        Get proof bundle, from the local bundle cache or IPFS.
         
         Args:
             cid: IPFS CID
@@ -673,11 +1428,15 @@ class StorageManager:
             Proof bundle data or None
         """
         try:
+            cached = self.bundle_cache.get(cid)
+            if cached is not None:
+                return cached
+            
             if not self.ipfs_client.health_check():
                 print("Warning: IPFS not available, cannot get proof bundle")
                 return None
             
-            return self.ipfs_client.get(cid)
+            return self.bundle_cache.fetch(cid, self.ipfs_client.get)
         except Exception as e:
             print(f"Error getting proof bundle: {e}")
             return None
@@ -689,7 +1448,7 @@ class StorageManager:
         Implements pruning strategies from storage.md specification.
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._db.transaction() as conn:
                 cursor = conn.cursor()
                 
                 if self.config.pruning_mode == PruningMode.LIGHT:
@@ -706,64 +1465,61 @@ class StorageManager:
                     
                 # Archive mode keeps everything
                 
-                conn.commit()
                 print(f"Pruning completed for {self.config.pruning_mode.value} mode")
                 
         except Exception as e:
             print(f"Error during pruning: {e}")
     
-    def batch_write(self, operations: List[tuple]):
+    def batch_write(self, operations: List[tuple]) -> Optional[DurabilityTicket]:
         """
         Batch write operations for performance.
         
+        The operations are committed together: queued as one unit on the
+        write pipeline when it is running, otherwise written in a single
+        transaction before returning.
+        
         Args:
-            operations: List of (operation_type, data) tuples
+            operations: List of (operation_type, data) tuples:
+                ("header", block or (block, header_bytes))
+                ("block", block)
+                ("tip", (tip_hash, cumulative_work))
+                ("work_index", (height, cumulative_work, block_hash))
+                ("work_index_truncate", height)  drops work_index rows above height
+                ("commit_index", (commitment, cid, problem_type, capacity))
+            
+        Returns:
+            DurabilityTicket resolved on commit, or None if the batch failed
+            or joined an enclosing transaction()
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                for op_type, data in operations:
-                    if op_type == "header":
-                        header, header_bytes = data
-                        header_hash = header.calculate_hash().encode()
-                        cursor.execute("""
-                            INSERT OR REPLACE INTO headers 
-                            (header_hash, header_bytes, height, timestamp)
-                            VALUES (?, ?, ?, ?)
-                        """, (header_hash, header_bytes, header.index, int(header.timestamp)))
-                    
-                    elif op_type == "work_index":
-                        height, cumulative_work, block_hash = data
-                        cursor.execute("""
-                            INSERT OR REPLACE INTO work_index 
-                            (height, cumulative_work, block_hash)
-                            VALUES (?, ?, ?)
-                        """, (height, cumulative_work, block_hash.encode()))
-                
-                conn.commit()
-                
+            statements = [self._prepare_write(op_type, data) for op_type, data in operations]
+            return self._write(statements)
         except Exception as e:
             print(f"Error in batch write: {e}")
+            return None
     
     def sync(self):
-        """Force sync to disk."""
+        """Force sync to disk: commit queued writes and checkpoint the WAL."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("PRAGMA synchronous = FULL")
-                conn.commit()
+            self.flush()
+            self._db.checkpoint("FULL")
         except Exception as e:
             print(f"Error during sync: {e}")
     
+    def _use_msgpack(self) -> bool:
+        return HAS_MSGSPEC and self.config.storage_format == "msgpack"
+    
     def _serialize_header(self, block: Block) -> bytes:
-        """Serialize block header to bytes."""
-        # Simple JSON serialization for now
+        """Serialize block header to bytes (msgpack row, or JSON fallback)."""
+        if self._use_msgpack():
+            return _MSGPACK_V1_PREFIX + _MSGPACK_ENCODER.encode(_header_fields(block))
+        
         header_dict = {
             'index': block.index,
             'timestamp': block.timestamp,
             'previous_hash': block.previous_hash,
             'merkle_root': block.merkle_root,
-            'mining_capacity': block.mining_capacity.value if hasattr(block.mining_capacity, 'value') else str(block.mining_capacity),
+            'mining_capacity': _tier_value(block.mining_capacity),
             'cumulative_work_score': block.cumulative_work_score,
             'block_hash': block.block_hash,
             'offchain_cid': getattr(block, 'offchain_cid', None)
@@ -771,7 +1527,27 @@ class StorageManager:
         return json.dumps(header_dict).encode()
     
     def _deserialize_header(self, header_bytes: bytes) -> Block:
-        """Deserialize bytes to block."""
+        """Deserialize bytes to block (header fields only)."""
+        if header_bytes[:1] == _MSGPACK_V1_PREFIX:
+            (index, timestamp, previous_hash, merkle_root, capacity,
+             cumulative_work_score, block_hash, offchain_cid) = _MSGPACK_DECODER.decode(
+                memoryview(header_bytes)[1:]
+            )
+            return Block(
+                index=index,
+                timestamp=timestamp,
+                previous_hash=_unpack_hash(previous_hash),
+                transactions=[],
+                merkle_root=_unpack_hash(merkle_root),
+                problem={},
+                solution=[],
+                complexity=None,
+                mining_capacity=_TIER_BY_VALUE[capacity],
+                cumulative_work_score=cumulative_work_score,
+                block_hash=_unpack_hash(block_hash),
+                offchain_cid=offchain_cid
+            )
+        
         header_dict = json.loads(header_bytes.decode())
         
         # Create Block object with minimal required fields
@@ -785,15 +1561,24 @@ class StorageManager:
             problem={},  # Empty for header-only
             solution=[],  # Empty for header-only
             complexity=None,  # Will be None for header-only
-            mining_capacity=ProblemTier(header_dict['mining_capacity']),
+            mining_capacity=_TIER_BY_VALUE[header_dict['mining_capacity']],
             cumulative_work_score=header_dict['cumulative_work_score'],
             block_hash=header_dict['block_hash'],
             offchain_cid=header_dict.get('offchain_cid', None)
         )
     
     def _serialize_block(self, block: Block) -> bytes:
-        """Serialize block to bytes."""
-        # Simple JSON serialization for now
+        """Serialize block to bytes (msgpack row, or JSON fallback)."""
+        if self._use_msgpack():
+            fields = _header_fields(block)
+            fields.extend((
+                block.transactions,
+                block.problem,
+                block.solution,
+                getattr(block, 'proof_commitment', None),
+            ))
+            return _MSGPACK_V1_PREFIX + _MSGPACK_ENCODER.encode(fields)
+        
         block_dict = {
             'index': block.index,
             'timestamp': block.timestamp,
@@ -802,7 +1587,7 @@ class StorageManager:
             'merkle_root': block.merkle_root,
             'problem': block.problem,
             'solution': block.solution,
-            'mining_capacity': block.mining_capacity.value if hasattr(block.mining_capacity, 'value') else str(block.mining_capacity),
+            'mining_capacity': _tier_value(block.mining_capacity),
             'cumulative_work_score': block.cumulative_work_score,
             'block_hash': block.block_hash,
             'offchain_cid': getattr(block, 'offchain_cid', None)
@@ -811,12 +1596,32 @@ class StorageManager:
     
     def _deserialize_block(self, block_bytes: bytes) -> Block:
         """Deserialize bytes to block."""
+        if block_bytes[:1] == _MSGPACK_V1_PREFIX:
+            (index, timestamp, previous_hash, merkle_root, capacity,
+             cumulative_work_score, block_hash, offchain_cid,
+             transactions, problem, solution, proof_commitment) = _MSGPACK_DECODER.decode(
+                memoryview(block_bytes)[1:]
+            )
+            return Block(
+                index=index,
+                timestamp=timestamp,
+                previous_hash=_unpack_hash(previous_hash),
+                transactions=transactions,
+                merkle_root=_unpack_hash(merkle_root),
+                problem=problem,
+                solution=solution,
+                complexity=None,
+                mining_capacity=_TIER_BY_VALUE[capacity],
+                cumulative_work_score=cumulative_work_score,
+                block_hash=_unpack_hash(block_hash),
+                offchain_cid=offchain_cid,
+                proof_commitment=proof_commitment
+            )
+        
         block_dict = json.loads(block_bytes.decode())
         
         # Create Block object
-        # Note: This is a simplified deserialization
-        from core.blockchain import ProblemTier
-        
+        # Note: This is a simplified deserialization (complexity is not stored)
         return Block(
             index=block_dict['index'],
             timestamp=block_dict['timestamp'],
@@ -825,12 +1630,62 @@ class StorageManager:
             merkle_root=block_dict['merkle_root'],
             problem=block_dict['problem'],
             solution=block_dict['solution'],
-            mining_capacity=ProblemTier(block_dict['mining_capacity']),
+            complexity=None,
+            mining_capacity=_TIER_BY_VALUE[block_dict['mining_capacity']],
             cumulative_work_score=block_dict['cumulative_work_score'],
             block_hash=block_dict['block_hash'],
             offchain_cid=block_dict.get('offchain_cid', None)
         )
-
+    
+    def migrate_storage_format(self, batch_size: int = 500, vacuum: bool = False) -> Dict[str, int]:
+        """
+        Rewrite legacy JSON header/block rows in the binary format.
+        
+        Rows are converted in batches of batch_size, one transaction per
+        batch, so the migration can be interrupted and re-run safely.
+        
+        Args:
+            batch_size: Rows rewritten per transaction
+            vacuum: Run VACUUM afterwards to return freed pages to the OS
+            
+        Returns:
+            Dict with converted row counts per table, plus 'failed'
+        """
+        if not self._use_msgpack():
+            raise RuntimeError("msgpack storage format unavailable (install msgspec)")
+        
+        self.flush()
+        stats = {'headers': 0, 'blocks': 0, 'failed': 0}
+        tables = (
+            ('headers', 'header_bytes', self._deserialize_header, self._serialize_header),
+            ('blocks', 'block_bytes', self._deserialize_block, self._serialize_block),
+        )
+        
+        for table, column, decode, encode in tables:
+            select_sql = (
+                f"SELECT rowid, {column} FROM {table} "
+                f"WHERE rowid > ? AND substr({column}, 1, 1) = ? ORDER BY rowid LIMIT ?"
+            )
+            update_sql = f"UPDATE {table} SET {column} = ? WHERE rowid = ?"
+            last_rowid = 0
+            while True:
+                with self._db.transaction() as conn:
+                    rows = conn.execute(select_sql, (last_rowid, _JSON_PREFIX, batch_size)).fetchall()
+                    for rowid, data in rows:
+                        try:
+                            conn.execute(update_sql, (encode(decode(data)), rowid))
+                            stats[table] += 1
+                        except Exception as e:
+                            print(f"Error migrating {table} row {rowid}: {e}")
+                            stats['failed'] += 1
+                if len(rows) < batch_size:
+                    break
+                last_rowid = rows[-1][0]
+        
+        if vacuum:
+            self._db.vacuum()
+        
+        return stats
 
 if __name__ == "__main__":
     # Test StorageManager
@@ -4,12 +4,45 @@ Blockchain State Management for COINjecture
 Manages balances, transaction pool, and transaction history for the blockchain.
 """
 
+import os
+import json
 import time
+import math
+import heapq
+import bisect
 import hashlib
-from typing import Dict, List, Optional, Set
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from dataclasses import dataclass, field
 from collections import defaultdict
 
+try:
+    from .mempool import Mempool, DEFAULT_MAX_SIZE
+    from .state_store import StateStore
+except ImportError:
+    from mempool import Mempool, DEFAULT_MAX_SIZE
+    from state_store import StateStore
+
+try:
+    from ..core.signatures import get_signature_verifier, verify_transactions
+except ImportError:
+    from core.signatures import get_signature_verifier, verify_transactions
+
+DEFAULT_STATE_PATH = "data/blockchain_state.db"
+
+# Fold the store's write-ahead log back into the database every N saves
+COMPACT_EVERY = 100
+
+
+def state_db_path(filepath: str) -> str:
+    """State database for a save path; a legacy .json path maps to the .db beside it."""
+    root, ext = os.path.splitext(filepath)
+    return filepath if ext == '.db' else root + '.db'
+
+
+def _history_key(transaction) -> Tuple[float, str]:
+    """Order of a transaction within an address history."""
+    return (transaction.timestamp, transaction.transaction_id)
+
 
 @dataclass
 class Transaction:
@@ -35,6 +68,10 @@ class Transaction:
         data = f"{self.sender}{self.recipient}{self.amount}{self.timestamp}".encode()
         return hashlib.sha256(data).hexdigest()
     
+    def signing_data(self) -> bytes:
+        """Bytes covered by the signature."""
+        return f"{self.sender}{self.recipient}{self.amount}{self.timestamp}".encode()
+    
     def sign(self, private_key_bytes: bytes) -> str:
         """
         Sign transaction with private key.
@@ -60,7 +97,7 @@ class Transaction:
             ).hex()
             
             # Sign transaction data
-            transaction_data = f"{self.sender}{self.recipient}{self.amount}{self.timestamp}".encode()
+            transaction_data = self.signing_data()
             signature = private_key.sign(transaction_data)
             self.signature = signature.hex()
             
@@ -76,25 +113,10 @@ class Transaction:
         Returns:
             True if signature is valid
         """
-        try:
-            from cryptography.hazmat.primitives.asymmetric import ed25519
-            from cryptography.hazmat.primitives import serialization
-            
-            if not self.signature or not self.public_key:
-                return False
-            
-            # Load public key
-            public_key_bytes = bytes.fromhex(self.public_key)
-            public_key = ed25519.Ed25519PublicKey.from_public_bytes(public_key_bytes)
-            
-            # Verify signature
-            transaction_data = f"{self.sender}{self.recipient}{self.amount}{self.timestamp}".encode()
-            signature_bytes = bytes.fromhex(self.signature)
-            
-            public_key.verify(signature_bytes, transaction_data)
-            return True
-        except Exception:
+        if not self.signature or not self.public_key:
             return False
+        # Shared verifier: cached key parsing, and already-verified signatures are not re-checked
+        return get_signature_verifier().verify(self.public_key, self.signing_data(), self.signature)
     
     def to_dict(self) -> Dict:
         """Convert transaction to dictionary for serialization."""
@@ -126,20 +148,98 @@ class Transaction:
         return f"Transaction {self.transaction_id[:8]}...: {self.sender} -> {self.recipient} ({self.amount})"
 
 
+class BalanceIndex:
+    """
+    Running balance aggregates: total supply, address count and a top-N view.
+    
+    Supply is a compensated running sum (Neumaier), so it tracks a full
+    recompute closely. The ranking is a max-heap with one live entry per
+    address; updates push a new entry (O(log n)) and superseded entries are
+    skipped on read and compacted once they outnumber live ones.
+    """
+    
+    def __init__(self, balances: Optional[Dict[str, float]] = None):
+        self._supply = 0.0
+        self._compensation = 0.0
+        self._seq: Dict[str, int] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._counter = 0
+        for address, balance in (balances or {}).items():
+            self.update(address, 0.0, balance)
+    
+    @property
+    def total_supply(self) -> float:
+        return self._supply + self._compensation
+    
+    @property
+    def address_count(self) -> int:
+        return len(self._seq)
+    
+    def update(self, address: str, old_balance: float, new_balance: float):
+        """Record an address's balance changing from old_balance to new_balance."""
+        delta = new_balance - old_balance
+        total = self._supply + delta
+        if abs(self._supply) >= abs(delta):
+            self._compensation += (self._supply - total) + delta
+        else:
+            self._compensation += (delta - total) + self._supply
+        self._supply = total
+        
+        self._counter += 1
+        self._seq[address] = self._counter
+        heapq.heappush(self._heap, (-new_balance, -self._counter, address))
+        if len(self._heap) > 2 * len(self._seq) + 64:
+            self._heap = [entry for entry in self._heap if self._seq.get(entry[2]) == -entry[1]]
+            heapq.heapify(self._heap)
+    
+    def top(self, count: int) -> List[Tuple[str, float]]:
+        """
+        Largest balances, best-first from the heap without sorting every address.
+        
+        Args:
+            count: Number of addresses
+            
+        Returns:
+            List of (address, balance), largest first
+        """
+        heap = self._heap
+        result = []
+        if not heap or count <= 0:
+            return result
+        frontier = [(heap[0], 0)]
+        while frontier and len(result) < count:
+            (negative_balance, negative_seq, address), index = heapq.heappop(frontier)
+            if self._seq.get(address) == -negative_seq:
+                result.append((address, -negative_balance))
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return result
+
+
 class BlockchainState:
     """
     Manages blockchain state including balances, transaction pool, and history.
     """
     
-    def __init__(self):
-        """Initialize blockchain state."""
-        # Address balances
+    def __init__(self, max_pending: int = DEFAULT_MAX_SIZE):
+        """
+        Initialize blockchain state.
+        
+        Args:
+            max_pending: Transaction pool size cap
+        """
+        # Address balances; change them through update_balance so the aggregates stay current
         self.balances: Dict[str, float] = defaultdict(float)
+        self.balance_index = BalanceIndex()
         
-        # Transaction pool (pending transactions)
-        self.pending_transactions: List[Transaction] = []
+        # Transaction pool (pending transactions), indexed by txid, sender and priority
+        self.mempool = Mempool(max_size=max_pending)
         
-        # Transaction history by address
+        # Confirmed transactions by ID; each transaction object is stored once
+        self.transactions: Dict[str, Transaction] = {}
+        
+        # Transaction history by address, oldest first (shares the objects above)
         self.transaction_history: Dict[str, List[Transaction]] = defaultdict(list)
         
         # Set of processed transaction IDs to prevent double-spending
@@ -147,6 +247,24 @@ class BlockchainState:
         
         # Genesis block reward address (if any)
         self.genesis_address: Optional[str] = None
+        
+        # Attached state store. While attached, the transactions, histories and
+        # processed IDs above only hold what changed since the last save; the
+        # rest is read from the store on demand.
+        self.store: Optional[StateStore] = None
+        self._dirty_balances: Set[str] = set()
+        self._saved_pending: Set[str] = set()
+    
+    @property
+    def pending_transactions(self) -> List[Transaction]:
+        """Pending transactions in admission order."""
+        return list(self.mempool)
+    
+    @pending_transactions.setter
+    def pending_transactions(self, transactions: List[Transaction]):
+        self.mempool.clear()
+        for transaction in transactions:
+            self.mempool.add(transaction)
     
     def update_balance(self, address: str, amount: float) -> bool:
         """
@@ -160,7 +278,10 @@ class BlockchainState:
             True if successful
         """
         try:
-            self.balances[address] += amount
+            old_balance = self.balances[address]
+            self.balances[address] = old_balance + amount
+            self.balance_index.update(address, old_balance, old_balance + amount)
+            self._dirty_balances.add(address)
             return True
         except Exception as e:
             print(f"Error updating balance: {e}")
@@ -189,17 +310,16 @@ class BlockchainState:
             True if added successfully
         """
         try:
-            # Validate transaction
-            if not self.validate_transaction(transaction):
+            # Cheap duplicate check before signature verification
+            if transaction.transaction_id in self.mempool:
                 return False
             
-            # Check if already in pool
-            if any(tx.transaction_id == transaction.transaction_id for tx in self.pending_transactions):
+            # Validate transaction
+            if not self.validate_transaction(transaction):
                 return False
             
-            # Add to pending pool
-            self.pending_transactions.append(transaction)
-            return True
+            # Add to pending pool (may evict a lower-priority transaction when full)
+            return self.mempool.add(transaction)
         except Exception as e:
             print(f"Error adding transaction: {e}")
             return False
@@ -216,7 +336,7 @@ class BlockchainState:
         """
         try:
             # Check if already processed
-            if transaction.transaction_id in self.processed_transactions:
+            if self.is_processed(transaction.transaction_id):
                 return False
             
             # Verify signature (skip for coinbase transactions)
@@ -244,6 +364,35 @@ class BlockchainState:
             print(f"Error validating transaction: {e}")
             return False
     
+    def validate_transactions(self, transactions: List[Transaction]) -> List[bool]:
+        """
+        Validate many transactions, e.g. the contents of a block.
+        
+        Signatures are verified as one batch first (over worker processes for
+        large blocks), so the per-transaction checks find them already verified.
+        
+        Args:
+            transactions: Transactions to validate
+            
+        Returns:
+            Validity of each transaction, in order
+        """
+        transactions = list(transactions)
+        verify_transactions(tx for tx in transactions if tx.sender != "COINBASE")
+        return [self.validate_transaction(tx) for tx in transactions]
+    
+    def is_processed(self, transaction_id: str) -> bool:
+        """Whether a transaction ID has been processed (saved or not)."""
+        if transaction_id in self.processed_transactions:
+            return True
+        return self.store is not None and self.store.has_processed(transaction_id)
+    
+    @property
+    def processed_count(self) -> int:
+        """Number of processed transactions."""
+        saved = self.store.processed_count if self.store is not None else 0
+        return saved + len(self.processed_transactions)
+    
     def _is_valid_address(self, address: str) -> bool:
         """Check if address format is valid."""
         return (address.startswith('CJ') or address.startswith('BEANS')) and len(address) in [42, 45]
@@ -258,14 +407,16 @@ class BlockchainState:
         Returns:
             List of pending transactions
         """
-        # Sort by timestamp (oldest first)
-        sorted_transactions = sorted(self.pending_transactions, key=lambda tx: tx.timestamp)
-        return sorted_transactions[:max_count]
+        # Highest priority (oldest) first, without sorting the pool
+        return self.mempool.best(max_count)
     
     def process_transactions(self, transactions: List[Transaction]) -> bool:
         """
         Process transactions and update balances.
         
+        Signatures of the non-coinbase transactions are verified as one batch
+        before anything is applied; if any fails, nothing is applied.
+        
         Args:
             transactions: List of transactions to process
             
@@ -273,6 +424,12 @@ class BlockchainState:
             True if all processed successfully
         """
         try:
+            transactions = list(transactions)
+            signed = [tx for tx in transactions if tx.sender != "COINBASE"]
+            if not all(verify_transactions(signed)):
+                print("Rejected transactions: invalid signature")
+                return False
+            
             for transaction in transactions:
                 # Update balances
                 if transaction.sender != "COINBASE":
@@ -280,8 +437,7 @@ class BlockchainState:
                 self.update_balance(transaction.recipient, transaction.amount)
                 
                 # Add to history
-                self.transaction_history[transaction.sender].append(transaction)
-                self.transaction_history[transaction.recipient].append(transaction)
+                self.index_transaction(transaction)
                 
                 # Mark as processed
                 self.processed_transactions.add(transaction.transaction_id)
@@ -298,11 +454,39 @@ class BlockchainState:
         Args:
             processed_transactions: Transactions that were included in a block
         """
-        processed_ids = {tx.transaction_id for tx in processed_transactions}
-        self.pending_transactions = [
-            tx for tx in self.pending_transactions 
-            if tx.transaction_id not in processed_ids
-        ]
+        self.mempool.remove_many(tx.transaction_id for tx in processed_transactions)
+    
+    def index_transaction(self, transaction: Transaction, addresses: Optional[Iterable[str]] = None) -> bool:
+        """
+        Record a confirmed transaction in the ID index and address histories.
+        
+        Histories stay ordered by (timestamp, txid): in-order transactions are
+        appended, late ones are inserted by binary search.
+        
+        Args:
+            transaction: Confirmed transaction
+            addresses: Histories to add it to (defaults to sender and recipient)
+            
+        Returns:
+            False if the transaction was already indexed
+        """
+        transaction_id = transaction.transaction_id
+        if transaction_id in self.transactions:
+            return False
+        if self.store is not None and self.store.has_transaction(transaction_id):
+            return False
+        self.transactions[transaction_id] = transaction
+        
+        if addresses is None:
+            addresses = (transaction.sender, transaction.recipient)
+        key = _history_key(transaction)
+        for address in dict.fromkeys(addresses):
+            history = self.transaction_history[address]
+            if not history or _history_key(history[-1]) <= key:
+                history.append(transaction)
+            else:
+                history.insert(bisect.bisect_right(history, key, key=_history_key), transaction)
+        return True
     
     def get_transaction_history(self, address: str, limit: int = 100) -> List[Transaction]:
         """
@@ -313,12 +497,45 @@ class BlockchainState:
             limit: Maximum number of transactions to return
             
         Returns:
-            List of transactions involving the address
+            List of transactions involving the address, newest first
         """
+        transactions, _ = self.get_transaction_history_page(address, limit)
+        return transactions
+    
+    def get_transaction_history_page(self, address: str, limit: int = 100,
+                                     cursor: Optional[str] = None) -> Tuple[List[Transaction], Optional[str]]:
+        """
+        Page through an address's history, newest first, in O(log n + limit).
+        
+        With a store attached, saved history is read from the store's
+        (address, timestamp, txid) index and merged with unsaved transactions.
+        
+        Args:
+            address: Wallet address
+            limit: Page size
+            cursor: next_cursor from the previous page, or None for the newest page
+            
+        Returns:
+            (transactions, next_cursor); next_cursor is None on the last page
+        """
+        before = None
+        if cursor:
+            timestamp, transaction_id = cursor.split(':', 1)
+            before = (float(timestamp), transaction_id)
+        
+        # One extra entry tells whether another page follows
         history = self.transaction_history.get(address, [])
-        # Sort by timestamp (newest first)
-        sorted_history = sorted(history, key=lambda tx: tx.timestamp, reverse=True)
-        return sorted_history[:limit]
+        end = len(history) if before is None else bisect.bisect_left(history, before, key=_history_key)
+        page = history[max(0, end - limit - 1):end][::-1]
+        if self.store is not None:
+            stored = [Transaction.from_dict(data) for data in self.store.history_page(address, limit + 1, before)]
+            page = list(heapq.merge(page, stored, key=_history_key, reverse=True))
+        
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = f"{page[-1].timestamp!r}:{page[-1].transaction_id}"
+        return page, next_cursor
     
     def get_transaction_by_id(self, transaction_id: str) -> Optional[Transaction]:
         """
@@ -330,18 +547,12 @@ class BlockchainState:
         Returns:
             Transaction if found, None otherwise
         """
-        # Search in pending transactions
-        for tx in self.pending_transactions:
-            if tx.transaction_id == transaction_id:
-                return tx
-        
-        # Search in history
-        for address_history in self.transaction_history.values():
-            for tx in address_history:
-                if tx.transaction_id == transaction_id:
-                    return tx
-        
-        return None
+        tx = self.mempool.get(transaction_id) or self.transactions.get(transaction_id)
+        if tx is None and self.store is not None:
+            data = self.store.get_transaction(transaction_id)
+            if data is not None:
+                tx = Transaction.from_dict(data)
+        return tx
     
     def create_coinbase_transaction(self, recipient: str, amount: float, timestamp: float = None) -> Transaction:
         """
@@ -367,83 +578,207 @@ class BlockchainState:
     
     def get_total_supply(self) -> float:
         """Get total coin supply."""
-        return sum(self.balances.values())
+        return self.balance_index.total_supply
+    
+    def get_top_balances(self, count: int = 10) -> Dict[str, float]:
+        """Largest balances, largest first."""
+        return dict(self.balance_index.top(count))
     
     def get_network_stats(self) -> Dict:
         """Get network statistics."""
         return {
-            'total_addresses': len(self.balances),
+            'total_addresses': self.balance_index.address_count,
             'total_supply': self.get_total_supply(),
-            'pending_transactions': len(self.pending_transactions),
-            'processed_transactions': len(self.processed_transactions),
-            'top_balances': dict(sorted(self.balances.items(), key=lambda x: x[1], reverse=True)[:10])
+            'pending_transactions': len(self.mempool),
+            'processed_transactions': self.processed_count,
+            'top_balances': self.get_top_balances(10)
         }
     
+    def verify_aggregates(self, top_count: int = 10) -> bool:
+        """
+        Check the running aggregates against a full recompute from balances.
+        
+        Args:
+            top_count: Size of the top-balances ranking to compare
+            
+        Returns:
+            True if supply, address count and top balances all match
+        """
+        errors = []
+        supply = math.fsum(self.balances.values())
+        if not math.isclose(self.get_total_supply(), supply, rel_tol=1e-9, abs_tol=1e-9):
+            errors.append(f"total supply {self.get_total_supply()} != {supply}")
+        if self.balance_index.address_count != len(self.balances):
+            errors.append(f"address count {self.balance_index.address_count} != {len(self.balances)}")
+        expected_top = sorted(self.balances.values(), reverse=True)[:top_count]
+        actual_top = [balance for _, balance in self.balance_index.top(top_count)]
+        if actual_top != expected_top:
+            errors.append(f"top balances {actual_top} != {expected_top}")
+        for address, balance in self.balance_index.top(top_count):
+            if self.balances.get(address) != balance:
+                errors.append(f"top balance for {address} is stale")
+        for error in errors:
+            print(f"Balance aggregate mismatch: {error}")
+        return not errors
+    
     def to_dict(self) -> Dict:
-        """Convert blockchain state to dictionary for serialization."""
+        """
+        Convert blockchain state to dictionary for serialization.
+        
+        With a store attached this only covers the in-memory state: saved
+        transactions, histories and processed IDs live in the store.
+        """
         return {
             'balances': dict(self.balances),
             'pending_transactions': [tx.to_dict() for tx in self.pending_transactions],
+            # Each transaction once; histories refer to it by ID
+            'transactions': {txid: tx.to_dict() for txid, tx in self.transactions.items()},
             'transaction_history': {
-                addr: [tx.to_dict() for tx in txs] 
+                addr: [tx.transaction_id for tx in txs]
                 for addr, txs in self.transaction_history.items()
             },
             'processed_transactions': list(self.processed_transactions)
         }
     
     def from_dict(self, data: Dict):
-        """Load blockchain state from dictionary."""
+        """Load blockchain state from dictionary (detaching any state store)."""
+        self._detach_store()
         self.balances = defaultdict(float, data.get('balances', {}))
+        self.balance_index = BalanceIndex(self.balances)
         self.pending_transactions = [
             Transaction.from_dict(tx_data) 
             for tx_data in data.get('pending_transactions', [])
         ]
-        self.transaction_history = defaultdict(list, {
-            addr: [Transaction.from_dict(tx_data) for tx_data in txs]
-            for addr, txs in data.get('transaction_history', {}).items()
-        })
+        self.transactions = {
+            txid: Transaction.from_dict(tx_data)
+            for txid, tx_data in data.get('transactions', {}).items()
+        }
+        self.transaction_history = defaultdict(list)
+        for addr, entries in data.get('transaction_history', {}).items():
+            history = self.transaction_history[addr]
+            for entry in entries:
+                if isinstance(entry, dict):
+                    # Older files stored a full copy per address
+                    tx = self.transactions.get(entry.get('transaction_id'))
+                    if tx is None:
+                        tx = Transaction.from_dict(entry)
+                        self.transactions[tx.transaction_id] = tx
+                else:
+                    tx = self.transactions[entry]
+                history.append(tx)
+            history.sort(key=_history_key)
         self.processed_transactions = set(data.get('processed_transactions', []))
+        self._dirty_balances = set(self.balances)
     
-    def save_state(self, filepath: str = "data/blockchain_state.json") -> bool:
-        """Save blockchain state to file."""
-        try:
-            import json
-            import os
-            
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(filepath), exist_ok=True)
-            
-            # Get state as dictionary
-            state_data = self.to_dict()
-            
-            with open(filepath, 'w') as f:
-                json.dump(state_data, f, indent=2)
+    def save_state(self, filepath: str = DEFAULT_STATE_PATH) -> bool:
+        """
+        Save blockchain state to its state database.
+        
+        The first save of a detached state writes a full snapshot and attaches
+        the store; after that each save writes only what changed since the
+        previous one (touched balances, new transactions and history rows,
+        newly processed IDs, pool additions and removals) in one SQLite
+        transaction, then drops the saved copies from memory.
+        
+        Args:
+            filepath: Database path (a legacy .json path maps to the .db beside it)
             
+        Returns:
+            True if saved
+        """
+        try:
+            db_path = state_db_path(filepath)
+            full_snapshot = self.store is None or self.store.db_path != db_path
+            if full_snapshot:
+                if self.store is not None:
+                    raise ValueError(f"state is attached to {self.store.db_path}")
+                self.store = StateStore(db_path)
+            
+            pending = {tx.transaction_id: tx for tx in self.mempool}
+            self.store.write_checkpoint(
+                balances=dict(self.balances) if full_snapshot else
+                {address: self.balances.get(address, 0.0) for address in self._dirty_balances},
+                transactions=[tx.to_dict() for tx in self.transactions.values()],
+                history=[(address, tx.timestamp, tx.transaction_id)
+                         for address, txs in self.transaction_history.items() for tx in txs],
+                processed=self.processed_transactions,
+                pending_added=[tx.to_dict() for txid, tx in pending.items() if txid not in self._saved_pending],
+                pending_removed=self._saved_pending - pending.keys(),
+                reset=full_snapshot
+            )
+            
+            # Saved: memory goes back to holding only unsaved changes
+            self._saved_pending = set(pending)
+            self._dirty_balances.clear()
+            self.transactions.clear()
+            self.transaction_history.clear()
+            self.processed_transactions.clear()
+            
+            if self.store.checkpoints % COMPACT_EVERY == 0:
+                self.store.compact()
             return True
         except Exception as e:
             print(f"Error saving blockchain state: {e}")
             return False
     
-    def load_state(self, filepath: str = "data/blockchain_state.json") -> bool:
-        """Load blockchain state from file."""
+    def load_state(self, filepath: str = DEFAULT_STATE_PATH) -> bool:
+        """
+        Load blockchain state from its state database.
+        
+        Only balances and the transaction pool are read; transactions,
+        histories and processed IDs are looked up in the store when needed.
+        A legacy JSON state file is read in full when no database exists yet
+        and is migrated by the next save.
+        
+        Args:
+            filepath: Database path (a legacy .json path maps to the .db beside it)
+            
+        Returns:
+            True if loaded (or nothing to load)
+        """
         try:
-            import json
-            import os
+            db_path = state_db_path(filepath)
+            if os.path.exists(db_path):
+                self._attach_store(StateStore(db_path))
+                return True
             
-            if not os.path.exists(filepath):
+            legacy_path = os.path.splitext(db_path)[0] + '.json'
+            if not os.path.exists(legacy_path):
                 # File doesn't exist, start with empty state
                 return True
             
-            with open(filepath, 'r') as f:
+            with open(legacy_path, 'r') as f:
                 data = json.load(f)
             
-            # Load state from dictionary
-            self.from_dict(data)
+            # Only files written by BlockchainState (other components share the name)
+            if 'balances' in data:
+                self.from_dict(data)
             
             return True
         except Exception as e:
             print(f"Error loading blockchain state: {e}")
             return False
+    
+    def _attach_store(self, store: StateStore):
+        """Reset in-memory state to the store's balances and pool."""
+        self._detach_store()
+        self.balances = defaultdict(float, store.load_balances())
+        self.balance_index = BalanceIndex(self.balances)
+        pending = store.load_pending()
+        self.pending_transactions = [Transaction.from_dict(data) for data in pending]
+        self.transactions = {}
+        self.transaction_history = defaultdict(list)
+        self.processed_transactions = set()
+        self._dirty_balances = set()
+        # Stored pool entries that did not fit are removed by the next save
+        self._saved_pending = {data['transaction_id'] for data in pending}
+        self.store = store
+    
+    def _detach_store(self):
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+        self._saved_pending = set()
 
 
 if __name__ == "__main__":
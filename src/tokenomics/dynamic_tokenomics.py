@@ -267,7 +267,7 @@ class DynamicWorkScoreTokenomics:
             )
             
             # Add to transaction history
-            self.blockchain_state.transaction_history[miner_address].append(coinbase_tx)
+            self.blockchain_state.index_transaction(coinbase_tx, [miner_address])
             
             print(f"💰 Credited {reward:.6f} coins to miner {miner_address}")
     
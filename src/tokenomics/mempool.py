@@ -0,0 +1,189 @@
+"""
+Indexed Transaction Pool for COINjecture
+
+Pending transactions are kept in a txid-keyed dict, per-sender queues and
+two priority heaps, so admission, removal and block-template building do not
+depend on how many transactions are waiting:
+
+- Priority is (higher fee, older timestamp); transactions carry no fee yet,
+  so in practice the pool is ordered by age
+- best() walks the min-heap best-first and touches O(k log k) entries for a
+  template of k transactions
+- When the pool is full the lowest-priority transaction (top of the
+  max-heap) is evicted, or the new one is rejected if it ranks lower
+- Removed entries stay in the heaps until they outnumber the live ones and
+  the heaps are rebuilt (lazy deletion keeps remove() O(1))
+"""
+
+import heapq
+import itertools
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Tuple
+
+DEFAULT_MAX_SIZE = 100_000
+DEFAULT_MAX_PER_SENDER = 1_000
+
+
+def transaction_priority(transaction) -> Tuple[float, float]:
+    """
+    Sort key of a pending transaction; smaller is included first.
+    
+    Args:
+        transaction: Transaction (an optional fee attribute ranks first)
+    
+    Returns:
+        (-fee, timestamp)
+    """
+    return (-getattr(transaction, 'fee', 0.0), transaction.timestamp)
+
+
+class Mempool:
+    """
+    Pending transaction pool indexed by txid, sender and priority.
+    """
+    
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, max_per_sender: int = DEFAULT_MAX_PER_SENDER):
+        """
+        Initialize pool.
+        
+        Args:
+            max_size: Maximum pending transactions; lowest priority evicted beyond it
+            max_per_sender: Maximum pending transactions from one sender
+        """
+        self.max_size = max_size
+        self.max_per_sender = max_per_sender
+        self._transactions: Dict[str, object] = {}
+        # txid -> sequence number of its live heap entries
+        self._seq: Dict[str, int] = {}
+        self._by_sender: Dict[str, OrderedDict] = {}
+        # Entries are (priority, seq, txid); _worst holds negated priorities
+        self._best: List[tuple] = []
+        self._worst: List[tuple] = []
+        self._counter = itertools.count()
+        self.evicted = 0
+    
+    def __len__(self) -> int:
+        return len(self._transactions)
+    
+    def __contains__(self, transaction_id: str) -> bool:
+        return transaction_id in self._transactions
+    
+    def __iter__(self) -> Iterator:
+        return iter(list(self._transactions.values()))
+    
+    def get(self, transaction_id: str):
+        """Pending transaction by ID, or None."""
+        return self._transactions.get(transaction_id)
+    
+    def add(self, transaction) -> bool:
+        """
+        Admit a transaction.
+        
+        Args:
+            transaction: Validated transaction
+        
+        Returns:
+            True if added; False if already pending, its sender's queue is
+            full, or the pool is full of higher-priority transactions
+        """
+        transaction_id = transaction.transaction_id
+        if transaction_id in self._transactions:
+            return False
+        
+        queue = self._by_sender.get(transaction.sender)
+        if queue is not None and len(queue) >= self.max_per_sender:
+            return False
+        
+        priority = transaction_priority(transaction)
+        if len(self._transactions) >= self.max_size:
+            worst = self._peek_worst()
+            if worst is None or priority >= transaction_priority(worst):
+                return False
+            self.remove(worst.transaction_id)
+            self.evicted += 1
+        
+        seq = next(self._counter)
+        self._transactions[transaction_id] = transaction
+        self._seq[transaction_id] = seq
+        self._by_sender.setdefault(transaction.sender, OrderedDict())[transaction_id] = transaction
+        heapq.heappush(self._best, (priority, seq, transaction_id))
+        heapq.heappush(self._worst, (tuple(-p for p in priority), -seq, transaction_id))
+        return True
+    
+    def remove(self, transaction_id: str):
+        """
+        Remove a transaction if pending.
+        
+        Returns:
+            The removed transaction, or None
+        """
+        transaction = self._transactions.pop(transaction_id, None)
+        if transaction is None:
+            return None
+        del self._seq[transaction_id]
+        queue = self._by_sender.get(transaction.sender)
+        if queue is not None:
+            queue.pop(transaction_id, None)
+            if not queue:
+                del self._by_sender[transaction.sender]
+        if len(self._best) > 2 * len(self._transactions) + 64:
+            self._rebuild_heaps()
+        return transaction
+    
+    def remove_many(self, transaction_ids) -> int:
+        """Remove transactions by ID; returns how many were pending."""
+        return sum(self.remove(transaction_id) is not None for transaction_id in transaction_ids)
+    
+    def best(self, max_count: int) -> List:
+        """
+        Highest-priority pending transactions, best first.
+        
+        Args:
+            max_count: Maximum number to return
+        
+        Returns:
+            List of transactions
+        """
+        heap = self._best
+        result = []
+        if not heap or max_count <= 0:
+            return result
+        # Best-first walk of the heap array: a node is only visited after its parent
+        frontier = [(heap[0], 0)]
+        while frontier and len(result) < max_count:
+            entry, index = heapq.heappop(frontier)
+            if self._is_live(entry[1], entry[2]):
+                result.append(self._transactions[entry[2]])
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return result
+    
+    def by_sender(self, sender: str) -> List:
+        """Pending transactions from a sender, in admission order."""
+        return list(self._by_sender.get(sender, {}).values())
+    
+    def clear(self):
+        """Drop every pending transaction."""
+        self._transactions.clear()
+        self._seq.clear()
+        self._by_sender.clear()
+        self._best.clear()
+        self._worst.clear()
+    
+    def _is_live(self, seq: int, transaction_id: str) -> bool:
+        return self._seq.get(transaction_id) == seq
+    
+    def _peek_worst(self):
+        while self._worst:
+            _, negative_seq, transaction_id = self._worst[0]
+            if self._is_live(-negative_seq, transaction_id):
+                return self._transactions[transaction_id]
+            heapq.heappop(self._worst)
+        return None
+    
+    def _rebuild_heaps(self):
+        self._best = [entry for entry in self._best if self._is_live(entry[1], entry[2])]
+        self._worst = [entry for entry in self._worst if self._is_live(-entry[1], entry[2])]
+        heapq.heapify(self._best)
+        heapq.heapify(self._worst)
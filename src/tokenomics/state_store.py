@@ -0,0 +1,207 @@
+"""
+Incremental State Store for COINjecture
+
+SQLite-backed persistence for BlockchainState. Instead of rewriting the
+whole state as JSON on every save, BlockchainState tracks what changed
+since its last checkpoint and write_checkpoint() applies just that in one
+transaction:
+
+- balances: one row per address, upserted for addresses that changed
+- transactions: each confirmed transaction once, keyed by txid
+- history: (address, timestamp, txid) rows, paged newest first by key order
+- processed: processed transaction IDs (membership checks hit the primary key)
+- pending: the transaction pool, diffed against the last checkpoint
+
+Loads read balances and the pool; transactions, histories and processed
+IDs stay on disk and are looked up on demand. compact() checkpoints the
+WAL (and optionally vacuums) so the files stay bounded.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TRANSACTION_COLUMNS = ('transaction_id', 'sender', 'recipient', 'amount', 'timestamp', 'signature', 'public_key')
+
+
+class StateStore:
+    """
+    SQLite store for balances, transactions, histories and processed IDs.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Open (creating if needed) a state database.
+
+        Args:
+            db_path: Database file path
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self._init_schema()
+        self.checkpoints = 0
+
+    def _init_schema(self):
+        with self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS balances (
+                    address TEXT PRIMARY KEY,
+                    balance REAL NOT NULL
+                )
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS transactions (
+                    transaction_id TEXT PRIMARY KEY,
+                    sender TEXT NOT NULL,
+                    recipient TEXT NOT NULL,
+                    amount REAL NOT NULL,
+                    timestamp REAL NOT NULL,
+                    signature TEXT,
+                    public_key TEXT
+                )
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS history (
+                    address TEXT NOT NULL,
+                    timestamp REAL NOT NULL,
+                    transaction_id TEXT NOT NULL,
+                    PRIMARY KEY (address, timestamp, transaction_id)
+                ) WITHOUT ROWID
+            ''')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS processed (transaction_id TEXT PRIMARY KEY) WITHOUT ROWID')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS pending (
+                    transaction_id TEXT PRIMARY KEY,
+                    sender TEXT NOT NULL,
+                    recipient TEXT NOT NULL,
+                    amount REAL NOT NULL,
+                    timestamp REAL NOT NULL,
+                    signature TEXT,
+                    public_key TEXT
+                )
+            ''')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+            self.conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('processed_count', 0)")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def load_balances(self) -> Dict[str, float]:
+        """All stored balances."""
+        with self._lock:
+            return dict(self.conn.execute('SELECT address, balance FROM balances'))
+
+    def load_pending(self) -> List[Dict]:
+        """Stored transaction pool as transaction dicts."""
+        with self._lock:
+            rows = self.conn.execute(f"SELECT {', '.join(TRANSACTION_COLUMNS)} FROM pending").fetchall()
+        return [dict(zip(TRANSACTION_COLUMNS, row)) for row in rows]
+
+    @property
+    def processed_count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT value FROM meta WHERE key = 'processed_count'").fetchone()[0]
+
+    def has_processed(self, transaction_id: str) -> bool:
+        with self._lock:
+            return self.conn.execute('SELECT 1 FROM processed WHERE transaction_id = ?',
+                                     (transaction_id,)).fetchone() is not None
+
+    def has_transaction(self, transaction_id: str) -> bool:
+        with self._lock:
+            return self.conn.execute('SELECT 1 FROM transactions WHERE transaction_id = ?',
+                                     (transaction_id,)).fetchone() is not None
+
+    def get_transaction(self, transaction_id: str) -> Optional[Dict]:
+        """Stored transaction dict by ID, or None."""
+        with self._lock:
+            row = self.conn.execute(f"SELECT {', '.join(TRANSACTION_COLUMNS)} FROM transactions WHERE transaction_id = ?",
+                                    (transaction_id,)).fetchone()
+        return dict(zip(TRANSACTION_COLUMNS, row)) if row else None
+
+    def history_page(self, address: str, limit: int,
+                     before: Optional[Tuple[float, str]] = None) -> List[Dict]:
+        """
+        An address's stored transactions, newest first.
+
+        Args:
+            address: Wallet address
+            limit: Maximum rows
+            before: Only rows ordered before this (timestamp, txid)
+
+        Returns:
+            Transaction dicts
+        """
+        columns = ', '.join(f't.{column}' for column in TRANSACTION_COLUMNS)
+        where = 'h.address = ?'
+        params: list = [address]
+        if before is not None:
+            where += ' AND (h.timestamp < ? OR (h.timestamp = ? AND h.transaction_id < ?))'
+            params.extend([before[0], before[0], before[1]])
+        with self._lock:
+            rows = self.conn.execute(f'''
+                SELECT {columns}
+                FROM history h JOIN transactions t ON t.transaction_id = h.transaction_id
+                WHERE {where}
+                ORDER BY h.timestamp DESC, h.transaction_id DESC
+                LIMIT ?
+            ''', params + [limit]).fetchall()
+        return [dict(zip(TRANSACTION_COLUMNS, row)) for row in rows]
+
+    def write_checkpoint(self, balances: Dict[str, float], transactions: Iterable[Dict],
+                         history: Iterable[Tuple[str, float, str]], processed: Iterable[str],
+                         pending_added: Iterable[Dict], pending_removed: Iterable[str],
+                         reset: bool = False):
+        """
+        Apply the changes since the last checkpoint in one transaction.
+
+        Args:
+            balances: Current balance of every address that changed
+            transactions: New confirmed transaction dicts
+            history: New (address, timestamp, txid) history rows
+            processed: Newly processed transaction IDs
+            pending_added: Transaction dicts that entered the pool
+            pending_removed: IDs that left the pool
+            reset: Clear the store first (the arguments are then a full snapshot)
+        """
+        placeholders = ', '.join('?' for _ in TRANSACTION_COLUMNS)
+        with self._lock, self.conn:
+            if reset:
+                for table in ('balances', 'transactions', 'history', 'processed', 'pending'):
+                    self.conn.execute(f'DELETE FROM {table}')
+                self.conn.execute("UPDATE meta SET value = 0 WHERE key = 'processed_count'")
+            self.conn.executemany('INSERT OR REPLACE INTO balances (address, balance) VALUES (?, ?)',
+                                  balances.items())
+            self.conn.executemany(f"INSERT OR IGNORE INTO transactions ({', '.join(TRANSACTION_COLUMNS)}) VALUES ({placeholders})",
+                                  ([tx[column] for column in TRANSACTION_COLUMNS] for tx in transactions))
+            self.conn.executemany('INSERT OR IGNORE INTO history (address, timestamp, transaction_id) VALUES (?, ?, ?)',
+                                  history)
+            cursor = self.conn.executemany('INSERT OR IGNORE INTO processed (transaction_id) VALUES (?)',
+                                           ((txid,) for txid in processed))
+            if cursor.rowcount > 0:
+                self.conn.execute("UPDATE meta SET value = value + ? WHERE key = 'processed_count'", (cursor.rowcount,))
+            self.conn.executemany('DELETE FROM pending WHERE transaction_id = ?',
+                                  ((txid,) for txid in pending_removed))
+            self.conn.executemany(f"INSERT OR REPLACE INTO pending ({', '.join(TRANSACTION_COLUMNS)}) VALUES ({placeholders})",
+                                  ([tx[column] for column in TRANSACTION_COLUMNS] for tx in pending_added))
+        self.checkpoints += 1
+
+    def compact(self, vacuum: bool = False):
+        """
+        Fold the WAL back into the database file.
+
+        Args:
+            vacuum: Also rebuild the file to release free pages
+        """
+        with self._lock:
+            self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            if vacuum:
+                self.conn.execute('VACUUM')
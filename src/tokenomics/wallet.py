@@ -15,6 +15,11 @@ from cryptography.hazmat.primitives.asymmetric import ed25519
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.backends import default_backend
 
+try:
+    from ..core.signatures import get_signature_verifier
+except ImportError:
+    from core.signatures import get_signature_verifier
+
 
 class Wallet:
     """
@@ -111,28 +116,41 @@ class Wallet:
         Returns:
             True if signature is valid
         """
-        import json
-        from cryptography.hazmat.primitives.asymmetric import ed25519
+        return Wallet.verify_block_signatures([(public_key_hex, block_data, signature_hex)])[0]
+    
+    @staticmethod
+    def verify_block_signatures(entries: List[tuple]) -> List[bool]:
+        """
+        Verify many block signatures in one batch.
         
-        # Validate hex strings before processing
-        if not public_key_hex or not signature_hex:
-            return False
+        Args:
+            entries: (public_key_hex, block_data, signature_hex) tuples
             
-        # Check if strings are valid hexadecimal
-        try:
-            # Test if strings are valid hex
-            bytes.fromhex(public_key_hex)
-            bytes.fromhex(signature_hex)
-        except ValueError:
-            # Not valid hex strings - this is likely a test or invalid submission
-            return False
-        
-        canonical = json.dumps(block_data, sort_keys=True).encode()
-        pub_bytes = bytes.fromhex(public_key_hex)
-        sig_bytes = bytes.fromhex(signature_hex)
+        Returns:
+            Validity of each signature, in order
+        """
+        import json
         
-        # Use multi-implementation verification (prioritizes PyNaCl for browser compatibility)
-        return Wallet._verify_tweetnacl_signature(public_key_hex, canonical, signature_hex)
+        results = [False] * len(entries)
+        batch = []
+        for index, (public_key_hex, block_data, signature_hex) in enumerate(entries):
+            # Validate hex strings before processing
+            if not public_key_hex or not signature_hex:
+                continue
+            try:
+                bytes.fromhex(public_key_hex)
+                bytes.fromhex(signature_hex)
+            except ValueError:
+                # Not valid hex strings - this is likely a test or invalid submission
+                continue
+            canonical = json.dumps(block_data, sort_keys=True).encode()
+            batch.append((index, public_key_hex, canonical, signature_hex))
+        
+        verified = get_signature_verifier().verify_batch([entry[1:] for entry in batch])
+        for (index, public_key_hex, canonical, signature_hex), ok in zip(batch, verified):
+            # Rejected ones get the multi-implementation check (PyNaCl first, for browser compatibility)
+            results[index] = ok or Wallet._verify_tweetnacl_signature(public_key_hex, canonical, signature_hex)
+        return results
     
     def zk_prove_wallet_ownership(self, challenge: bytes) -> str:
         """
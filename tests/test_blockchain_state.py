@@ -0,0 +1,279 @@
+"""
+Unit Tests for BlockchainState indexes
+Tests the transaction ID index, time-ordered address histories, cursor
+paging, the running balance aggregates and incremental state saves
+"""
+
+import pytest
+import json
+import random
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from cryptography.hazmat.primitives import serialization
+
+from tokenomics.blockchain_state import BlockchainState, Transaction, state_db_path
+
+ADDRESSES = [f"BEANS{i:040d}" for i in range(10)]
+SIGNING_KEY = ed25519.Ed25519PrivateKey.generate().private_bytes(
+    encoding=serialization.Encoding.Raw, format=serialization.PrivateFormat.Raw,
+    encryption_algorithm=serialization.NoEncryption())
+
+
+def make_tx(i, sender=None, recipient=None, timestamp=None, amount=1.0):
+    tx = Transaction(
+        sender=sender or ADDRESSES[i % 10],
+        recipient=recipient or ADDRESSES[(i + 1) % 10],
+        amount=amount,
+        timestamp=1700000000.0 + i if timestamp is None else timestamp
+    )
+    tx.sign(SIGNING_KEY)
+    return tx
+
+
+class TestTransactionIndex:
+    """Test lookups by ID and by address."""
+    
+    def test_lookup_by_id(self):
+        state = BlockchainState()
+        transactions = [make_tx(i) for i in range(50)]
+        state.process_transactions(transactions)
+        pending = state.create_coinbase_transaction(ADDRESSES[0], 5.0)
+        state.add_transaction(pending)
+
+        assert state.get_transaction_by_id(transactions[17].transaction_id) is transactions[17]
+        assert state.get_transaction_by_id(pending.transaction_id) is pending
+        assert state.get_transaction_by_id("missing") is None
+    
+    def test_history_shares_one_object(self):
+        state = BlockchainState()
+        tx = make_tx(0)
+        state.process_transactions([tx])
+        assert state.transaction_history[tx.sender][0] is state.transaction_history[tx.recipient][0] is tx
+        assert not state.index_transaction(tx)
+        assert len(state.transaction_history[tx.sender]) == 1
+    
+    def test_late_transactions_keep_time_order(self):
+        state = BlockchainState()
+        address = ADDRESSES[0]
+        timestamps = [5.0, 1.0, 9.0, 3.0, 9.0, 7.0]
+        transactions = [make_tx(i, sender=address, timestamp=t) for i, t in enumerate(timestamps)]
+        state.process_transactions(transactions)
+
+        history = state.get_transaction_history(address, limit=100)
+        assert [tx.timestamp for tx in history] == sorted(timestamps, reverse=True)
+    
+    def test_cursor_paging_visits_every_transaction_once(self):
+        state = BlockchainState()
+        address = ADDRESSES[3]
+        # Repeated timestamps so pages split inside a tie
+        transactions = [make_tx(i, recipient=address, sender=ADDRESSES[i % 3], timestamp=1700000000.0 + i // 4,
+                                amount=1.0 + i) for i in range(103)]
+        state.process_transactions(transactions)
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = state.get_transaction_history_page(address, limit=10, cursor=cursor)
+            seen.extend(page)
+            if cursor is None:
+                break
+        assert len(seen) == 103
+        assert {tx.transaction_id for tx in seen} == {tx.transaction_id for tx in transactions}
+        assert [tx.timestamp for tx in seen] == sorted((tx.timestamp for tx in seen), reverse=True)
+    
+    def test_serialized_once_and_round_trips(self):
+        state = BlockchainState()
+        transactions = [make_tx(i) for i in range(20)]
+        state.process_transactions(transactions)
+
+        data = json.loads(json.dumps(state.to_dict()))
+        assert len(data["transactions"]) == 20
+        assert all(isinstance(entry, str) for entries in data["transaction_history"].values() for entry in entries)
+
+        restored = BlockchainState()
+        restored.from_dict(data)
+        tx = transactions[4]
+        assert restored.transaction_history[tx.sender][-1] is restored.get_transaction_by_id(
+            restored.transaction_history[tx.sender][-1].transaction_id)
+        assert [t.transaction_id for t in restored.get_transaction_history(tx.recipient)] == \
+            [t.transaction_id for t in state.get_transaction_history(tx.recipient)]
+    
+    def test_loads_legacy_per_address_copies(self):
+        tx = make_tx(0)
+        legacy = {
+            "balances": {},
+            "pending_transactions": [],
+            "transaction_history": {tx.sender: [tx.to_dict()], tx.recipient: [tx.to_dict()]},
+            "processed_transactions": [tx.transaction_id]
+        }
+        state = BlockchainState()
+        state.from_dict(legacy)
+        assert state.transaction_history[tx.sender][0] is state.transaction_history[tx.recipient][0]
+        assert state.get_transaction_by_id(tx.transaction_id).amount == tx.amount
+
+
+class TestBalanceAggregates:
+    """Test running supply, address count and top balances."""
+    
+    def test_matches_full_recompute_under_churn(self):
+        state = BlockchainState()
+        rng = random.Random(7)
+        addresses = [f"BEANS{i:040d}" for i in range(200)]
+        for step in range(3000):
+            address = rng.choice(addresses)
+            state.update_balance(address, round(rng.uniform(-5, 10), 6))
+            if step % 500 == 0:
+                assert state.verify_aggregates(top_count=25)
+        assert state.verify_aggregates(top_count=200)
+
+        top = state.get_network_stats()["top_balances"]
+        assert list(top.values()) == sorted(state.balances.values(), reverse=True)[:10]
+        assert state.get_network_stats()["total_addresses"] == len(state.balances)
+        assert state.get_total_supply() == pytest.approx(sum(state.balances.values()))
+    
+    def test_transactions_move_balances(self):
+        state = BlockchainState()
+        coinbase = state.create_coinbase_transaction(ADDRESSES[0], 50.0, 1700000000.0)
+        state.process_transactions([coinbase, make_tx(0, amount=20.0), make_tx(1, amount=5.0)])
+
+        assert state.get_total_supply() == 50.0
+        assert state.get_top_balances(3) == {ADDRESSES[0]: 30.0, ADDRESSES[1]: 15.0, ADDRESSES[2]: 5.0}
+        assert state.verify_aggregates()
+    
+    def test_detects_direct_balance_edits(self):
+        state = BlockchainState()
+        state.update_balance(ADDRESSES[0], 10.0)
+        state.balances[ADDRESSES[1]] = 99.0
+        assert not state.verify_aggregates()
+    
+    def test_rebuilt_on_load(self):
+        state = BlockchainState()
+        for i in range(30):
+            state.update_balance(ADDRESSES[i % 10], float(i))
+        restored = BlockchainState()
+        restored.from_dict(state.to_dict())
+        assert restored.verify_aggregates()
+        assert restored.get_top_balances() == state.get_top_balances()
+
+
+def page_all(state, address, limit=7):
+    seen, cursor = [], None
+    while True:
+        page, cursor = state.get_transaction_history_page(address, limit=limit, cursor=cursor)
+        seen.extend(page)
+        if cursor is None:
+            return seen
+
+
+class TestStateStore:
+    """Test incremental saves and lazy loads."""
+    
+    def test_round_trip_is_lazy(self, tmp_path):
+        path = str(tmp_path / "state.db")
+        state = BlockchainState()
+        transactions = [make_tx(i, amount=1.0 + i) for i in range(40)]
+        state.update_balance(ADDRESSES[0], 1000.0)
+        state.process_transactions(transactions)
+        pending = state.create_coinbase_transaction(ADDRESSES[2], 3.0, 1700000500.0)
+        state.add_transaction(pending)
+        assert state.save_state(path)
+
+        restored = BlockchainState()
+        assert restored.load_state(path)
+        # Only balances and the pool are read up front
+        assert restored.transactions == {} and restored.processed_transactions == set()
+        assert dict(restored.balances) == dict(state.balances)
+        assert restored.verify_aggregates()
+        assert [tx.transaction_id for tx in restored.get_pending_transactions()] == [pending.transaction_id]
+
+        tx = transactions[11]
+        assert restored.get_transaction_by_id(tx.transaction_id).to_dict() == tx.to_dict()
+        assert restored.is_processed(tx.transaction_id)
+        assert not restored.validate_transaction(tx)
+        assert restored.get_network_stats()["processed_transactions"] == 40
+        assert not restored.index_transaction(tx)
+    
+    def test_history_merges_saved_and_unsaved(self, tmp_path):
+        path = str(tmp_path / "state.db")
+        address = ADDRESSES[3]
+        transactions = [make_tx(i, recipient=address, sender=ADDRESSES[i % 3], timestamp=1700000000.0 + i // 4,
+                                amount=1.0 + i) for i in range(60)]
+        state = BlockchainState()
+        state.process_transactions(transactions[::2])
+        state.save_state(path)
+        state.process_transactions(transactions[1::2])
+
+        seen = page_all(state, address)
+        assert [tx.transaction_id for tx in seen] == \
+            [tx.transaction_id for tx in sorted(transactions, key=lambda tx: (tx.timestamp, tx.transaction_id),
+                                                reverse=True)]
+        state.save_state(path)
+        assert [tx.transaction_id for tx in page_all(state, address)] == [tx.transaction_id for tx in seen]
+    
+    def test_saves_write_only_changes(self, tmp_path):
+        path = str(tmp_path / "state.db")
+        state = BlockchainState()
+        state.process_transactions([make_tx(i, amount=1.0 + i) for i in range(500)])
+        for i in range(5):
+            state.add_transaction(state.create_coinbase_transaction(ADDRESSES[i], 1.0, 1700001000.0 + i))
+        state.save_state(path)
+
+        before = state.store.conn.total_changes
+        state.process_transactions([make_tx(1000, amount=7.0)])
+        state.clear_pending_transactions(state.get_pending_transactions(1))
+        state.save_state(path)
+        # Two balances, one transaction, two history rows, one processed ID, one pool removal
+        assert state.store.conn.total_changes - before <= 8
+
+        state.save_state(path)
+        assert state.store.conn.total_changes - before <= 9
+
+        restored = BlockchainState()
+        restored.load_state(path)
+        assert dict(restored.balances) == dict(state.balances)
+        assert len(restored.mempool) == 4
+        assert restored.processed_count == 501
+    
+    def test_migrates_legacy_json(self, tmp_path):
+        legacy = tmp_path / "blockchain_state.json"
+        state = BlockchainState()
+        transactions = [make_tx(i, amount=1.0 + i) for i in range(10)]
+        state.process_transactions(transactions)
+        legacy.write_text(json.dumps(state.to_dict()))
+
+        migrated = BlockchainState()
+        migrated.load_state(str(legacy))
+        assert migrated.store is None
+        assert migrated.save_state(str(legacy))
+        assert state_db_path(str(legacy)) == str(tmp_path / "blockchain_state.db")
+
+        restored = BlockchainState()
+        restored.load_state(str(tmp_path / "blockchain_state.db"))
+        assert dict(restored.balances) == dict(state.balances)
+        assert [tx.transaction_id for tx in restored.get_transaction_history(ADDRESSES[1])] == \
+            [tx.transaction_id for tx in state.get_transaction_history(ADDRESSES[1])]
+    
+    def test_ignores_foreign_json(self, tmp_path):
+        other = tmp_path / "blockchain_state.json"
+        other.write_text(json.dumps({"blocks": []}))
+        state = BlockchainState()
+        assert state.load_state(str(other))
+        assert state.get_network_stats()["total_addresses"] == 0
+    
+    def test_first_save_replaces_store_contents(self, tmp_path):
+        path = str(tmp_path / "state.db")
+        old = BlockchainState()
+        old.update_balance(ADDRESSES[0], 5.0)
+        old.save_state(path)
+        old.store.close()
+
+        fresh = BlockchainState()
+        fresh.update_balance(ADDRESSES[1], 2.0)
+        fresh.save_state(path)
+        restored = BlockchainState()
+        restored.load_state(path)
+        assert dict(restored.balances) == {ADDRESSES[1]: 2.0}
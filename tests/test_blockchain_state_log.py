@@ -0,0 +1,152 @@
+"""
+Unit Tests for the append-only blockchain state log
+Tests segment appends, manifest commits, reorgs and reader tailing
+"""
+
+import pytest
+import json
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from api.blockchain_state_log import (
+    BlockchainStateWriter, BlockchainStateReader, log_dir_for, read_manifest
+)
+
+
+def record(index: int, fork: str = "a", cid: str = None) -> dict:
+    """Block record as written by the consensus service."""
+    return {
+        "index": index,
+        "timestamp": 1609459200.0 + index,
+        "previous_hash": "0" * 64,
+        "merkle_root": "0" * 64,
+        "mining_capacity": "mobile",
+        "cumulative_work_score": float(index),
+        "block_hash": f"{fork}{index:063d}",
+        "offchain_cid": cid or f"Qm{fork}{index}"
+    }
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    return str(tmp_path / "blockchain_state.json")
+
+
+def commit(writer, records):
+    return writer.commit(records, dict(records[-1], last_updated=0.0) if records else None)
+
+
+class TestWriter:
+    """Test appending and committing records."""
+
+    def test_commit_appends_only_new_records(self, state_path):
+        writer = BlockchainStateWriter(log_dir_for(state_path))
+        commit(writer, [record(i) for i in range(5)])
+        segment = os.path.join(writer.log_dir, writer.manifest["segments"][0]["name"])
+        size = os.path.getsize(segment)
+
+        commit(writer, [record(5)])
+        assert os.path.getsize(segment) - size == len(json.dumps(record(5), separators=(',', ':'))) + 1
+        assert read_manifest(writer.log_dir)["tip_index"] == 5
+
+    def test_segments_roll_over(self, state_path):
+        writer = BlockchainStateWriter(log_dir_for(state_path), segment_max_records=4)
+        commit(writer, [record(i) for i in range(10)])
+        segments = writer.manifest["segments"]
+        assert [s["records"] for s in segments] == [4, 4, 2]
+        assert [s["first_index"] for s in segments] == [0, 4, 8]
+
+    def test_writer_resumes_from_manifest(self, state_path):
+        writer = BlockchainStateWriter(log_dir_for(state_path))
+        commit(writer, [record(i) for i in range(3)])
+        commit(writer, [record(2, fork="b")])
+
+        resumed = BlockchainStateWriter(log_dir_for(state_path))
+        assert resumed.tip_index == 2
+        assert resumed.hash_at(2) == record(2, fork="b")["block_hash"]
+        assert resumed.hash_at(1) == record(1)["block_hash"]
+
+    def test_uncommitted_tail_is_discarded(self, state_path):
+        writer = BlockchainStateWriter(log_dir_for(state_path))
+        commit(writer, [record(0), record(1)])
+        segment = os.path.join(writer.log_dir, writer.manifest["segments"][0]["name"])
+        with open(segment, 'ab') as f:
+            f.write(b'{"index": 2, "trunc')
+
+        commit(writer, [record(2)])
+        reader = BlockchainStateReader(state_path)
+        assert reader.refresh()
+        assert [b["index"] for b in reader.blocks()] == [0, 1, 2]
+
+
+class TestReader:
+    """Test tailing the log."""
+
+    def test_reader_tails_new_records(self, state_path):
+        writer = BlockchainStateWriter(log_dir_for(state_path))
+        reader = BlockchainStateReader(state_path)
+        assert not reader.refresh()
+
+        commit(writer, [record(i) for i in range(3)])
+        assert reader.refresh()
+        assert reader.block_count == 3
+
+        commit(writer, [record(3), record(4)])
+        reader.refresh()
+        assert [b["index"] for b in reader.blocks()] == [0, 1, 2, 3, 4]
+        assert reader.latest_block["index"] == 4
+        assert reader.get_by_cid("Qma4")["index"] == 4
+
+    def test_reorg_replaces_and_truncates(self, state_path):
+        writer = BlockchainStateWriter(log_dir_for(state_path))
+        reader = BlockchainStateReader(state_path)
+        commit(writer, [record(i) for i in range(6)])
+        reader.refresh()
+
+        # Reorg to a shorter chain diverging at index 3
+        commit(writer, [record(3, fork="b"), record(4, fork="b")])
+        reader.refresh()
+        assert [b["block_hash"][0] for b in reader.blocks()] == ["a", "a", "a", "b", "b"]
+        assert reader.get_by_cid("Qma5") is None
+        assert reader.get_by_cid("Qma3") is None
+        assert reader.get_by_cid("Qmb3")["index"] == 3
+        assert writer.hash_at(5) is None
+
+    def test_blocks_slice_the_ordered_index(self, state_path):
+        writer = BlockchainStateWriter(log_dir_for(state_path))
+        reader = BlockchainStateReader(state_path)
+        commit(writer, [record(i) for i in range(8)])
+        reader.refresh()
+        commit(writer, [record(4, fork="b")])
+        reader.refresh()
+        assert reader._indices == [0, 1, 2, 3, 4]
+
+        commit(writer, [record(5, fork="b"), record(6, fork="b")])
+        reader.refresh()
+        assert [b["index"] for b in reader.blocks(start=3)] == [3, 4, 5, 6]
+        assert reader.blocks(start=7) == []
+        assert reader.block_count == 7
+
+    def test_min_index_skips_old_segments(self, state_path):
+        writer = BlockchainStateWriter(log_dir_for(state_path), segment_max_records=5)
+        commit(writer, [record(i) for i in range(12)])
+
+        reader = BlockchainStateReader(state_path, min_index=8)
+        reader.refresh()
+        assert [b["index"] for b in reader.blocks()] == [8, 9, 10, 11]
+        assert writer.manifest["segments"][0]["name"] not in reader._offsets
+
+    def test_legacy_json_fallback(self, state_path):
+        with open(state_path, 'w') as f:
+            json.dump({"latest_block": record(1), "blocks": [record(1), record(0)],
+                       "ipfs_data": {"QmLegacy": {"problem": {}}}}, f)
+
+        reader = BlockchainStateReader(state_path)
+        assert reader.refresh()
+        assert reader.block_count == 2
+        assert [b["index"] for b in reader.blocks()] == [0, 1]
+        assert list(reader.ipfs_data) == ["QmLegacy"]
+        assert reader.latest_block["index"] == 1
@@ -0,0 +1,232 @@
+"""
+Unit Tests for COINjectureStorage
+Tests indexed block columns, the schema migration, SQL-side explorer paging
+and per-miner aggregates
+"""
+
+import pytest
+import json
+import sqlite3
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from api.blockchain_storage import COINjectureStorage
+
+
+def make_block(index, miner=None, timestamp=None, work_score=None, reward=None):
+    return {
+        "index": index,
+        "block_hash": f"{index:064x}",
+        "previous_hash": f"{index - 1:064x}" if index else "0" * 64,
+        "timestamp": timestamp if timestamp is not None else 1700000000.0 + index,
+        "miner_address": miner or f"BEANS{index % 3}",
+        "work_score": work_score if work_score is not None else float(index % 7),
+        "reward": reward if reward is not None else 50.0,
+        "gas_used": 1000,
+        "cid": f"Qm{index:044d}"
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = COINjectureStorage(data_dir=str(tmp_path))
+    for index in range(60):
+        store.add_block_data(make_block(index))
+    return store
+
+
+class TestExplorerQueries:
+    """Test filtering, ordering and paging pushed into SQL."""
+
+    def test_default_page_is_newest_first(self, store):
+        blocks = store.query_blocks(limit=10)
+        assert [b["index"] for b in blocks] == list(range(59, 49, -1))
+        assert blocks[0]["cid"] == f"Qm{59:044d}"
+        assert blocks[0]["gas_used"] == 1000
+
+    def test_offset_and_keyset_pages_agree(self, store):
+        by_offset = store.query_blocks(limit=7, offset=7, sort_by="work_score", sort_order="asc")
+        first = store.query_blocks(limit=7, sort_by="work_score", sort_order="asc")
+        last = first[-1]
+        by_cursor = store.query_blocks(limit=7, sort_by="work_score", sort_order="asc",
+                                       after=(last["work_score"], last["index"]))
+        assert [b["index"] for b in by_cursor] == [b["index"] for b in by_offset]
+
+        scores = [(b["work_score"], b["index"]) for b in first + by_cursor]
+        assert scores == sorted(scores)
+
+    def test_search_by_height_miner_hash_and_cid(self, store):
+        assert [b["index"] for b in store.query_blocks(search="42")] == [42]
+        assert {b["miner_address"] for b in store.query_blocks(search="BEANS1", limit=100)} == {"BEANS1"}
+        assert [b["index"] for b in store.query_blocks(search=f"{17:064x}")] == [17]
+        assert [b["index"] for b in store.query_blocks(search=f"Qm{33:044d}")] == [33]
+
+    def test_search_combines_with_cursor(self, store):
+        first = store.query_blocks(search="BEANS2", limit=5)
+        rest = store.query_blocks(search="BEANS2", limit=100, after=(first[-1]["index"], first[-1]["index"]))
+        assert len(first) + len(rest) == 20
+        assert all(b["miner_address"] == "BEANS2" for b in rest)
+
+    def test_counts_and_totals(self, store):
+        assert store.count_blocks()["total_blocks"] == 60
+        totals = store.count_blocks("BEANS0")
+        assert totals["total_blocks"] == 20
+        assert totals["total_rewards"] == 20 * 50.0
+        assert totals["total_gas_used"] == 20 * 1000
+
+    def test_fork_blocks_excluded(self, store):
+        fork = make_block(42, miner="BEANSfork", reward=7.0)
+        fork["block_hash"] = "f" * 64
+        store.add_block_data(fork)
+        store.add_block_data(make_block(42))
+
+        assert [b["index"] for b in store.query_blocks(limit=100)] == list(range(59, -1, -1))
+        assert store.query_blocks(search="BEANSfork") == []
+        assert store.query_blocks(search="42")[0]["block_hash"] == f"{42:064x}"
+        totals = store.count_blocks()
+        assert totals["total_blocks"] == 60
+        assert totals["total_rewards"] == 60 * 50.0
+
+        # Storing the fork block again makes it canonical at its height
+        store.add_block_data(fork)
+        assert [b["miner_address"] for b in store.query_blocks(search="42")] == ["BEANSfork"]
+        assert store.count_blocks()["total_blocks"] == 60
+
+    def test_unfiltered_totals_kept_as_aggregates(self, store):
+        fork = make_block(42, miner="BEANSfork", reward=7.0, work_score=100.0)
+        fork["block_hash"] = "f" * 64
+        for block in (fork, make_block(42), fork, make_block(59, reward=80.0), make_block(60)):
+            store.add_block_data(block)
+
+        conn = sqlite3.connect(store.db_path)
+        expected = conn.execute('''
+            SELECT COUNT(*), SUM(b.gas_used), SUM(b.reward), AVG(b.work_score)
+            FROM blocks b JOIN work_index w ON w.height = b.height AND w.block_hash = b.block_hash
+        ''').fetchone()
+        conn.close()
+        totals = store.count_blocks()
+        assert (totals["total_blocks"], totals["total_gas_used"], totals["total_rewards"]) == expected[:3]
+        assert totals["avg_work_score"] == pytest.approx(expected[3])
+
+        # Databases created before chain_totals are backfilled on open
+        conn = sqlite3.connect(store.db_path)
+        conn.execute("DROP TABLE chain_totals")
+        conn.commit()
+        conn.close()
+        assert COINjectureStorage(data_dir=os.path.dirname(store.db_path)).count_blocks() == totals
+
+    def test_headers_read_from_columns(self, store):
+        fork = make_block(11)
+        fork["block_hash"] = "f" * 64
+        store.add_block_data(fork)
+        store.add_block_data(make_block(11))
+        conn = sqlite3.connect(store.db_path)
+        conn.execute("UPDATE blocks SET block_bytes = ?", (b"not json",))
+        conn.commit()
+        conn.close()
+
+        headers = store.get_block_headers(10, 3)
+        assert [h["block_hash"] for h in headers] == [f"{i:064x}" for i in (10, 11, 12)]
+        assert headers[1] == {"index": 11, "block_hash": f"{11:064x}", "previous_hash": f"{10:064x}",
+                              "timestamp": 1700000011.0, "cumulative_work_score": 0}
+
+    def test_unknown_sort_column_falls_back_to_height(self, store):
+        blocks = store.query_blocks(limit=3, sort_by="block_bytes; DROP TABLE blocks")
+        assert [b["index"] for b in blocks] == [59, 58, 57]
+
+    def test_block_by_cid(self, store):
+        assert store.get_block_by_cid(f"Qm{12:044d}")["index"] == 12
+        assert store.get_block_by_cid("QmMissing") is None
+
+    def test_explorer_queries_use_indexes(self, store):
+        conn = sqlite3.connect(store.db_path)
+        for column in ("miner_address", "cid"):
+            plan = conn.execute(f"EXPLAIN QUERY PLAN SELECT * FROM blocks WHERE {column} = 'x'").fetchall()
+            assert "USING INDEX" in " ".join(row[-1] for row in plan)
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM blocks ORDER BY work_score DESC LIMIT 5").fetchall()
+        assert "TEMP B-TREE" not in " ".join(row[-1] for row in plan)
+        conn.close()
+
+
+class TestMigration:
+    """Test upgrading a database created before the indexed columns."""
+
+    def test_backfills_miner_and_cid(self, tmp_path):
+        conn = sqlite3.connect(str(tmp_path / "blockchain.db"))
+        conn.execute('''
+            CREATE TABLE blocks (
+                block_hash TEXT PRIMARY KEY, block_bytes BLOB, height INTEGER NOT NULL,
+                timestamp INTEGER, work_score REAL DEFAULT 0, gas_used INTEGER DEFAULT 0,
+                gas_limit INTEGER DEFAULT 1000000, gas_price REAL DEFAULT 0.000001,
+                reward REAL DEFAULT 0, cumulative_work REAL DEFAULT 0, is_full_block BOOLEAN DEFAULT 0
+            )
+        ''')
+        block = make_block(5, miner="BEANSold")
+        block["offchain_cid"] = block.pop("cid")
+        conn.execute("INSERT INTO blocks (block_hash, block_bytes, height) VALUES (?, ?, ?)",
+                     (block["block_hash"], json.dumps(block).encode(), 5))
+        conn.commit()
+        conn.close()
+
+        store = COINjectureStorage(data_dir=str(tmp_path))
+
+        assert [b["index"] for b in store.query_blocks(search="BEANSold")] == [5]
+        assert store.get_block_by_cid(block["offchain_cid"])["index"] == 5
+        assert store.get_miner_stats("BEANSold")["blocks_mined"] == 1
+        assert store.get_block_headers(5, 1)[0]["previous_hash"] == f"{4:064x}"
+
+    def test_backfills_canonical_hashes(self, tmp_path):
+        store = COINjectureStorage(data_dir=str(tmp_path))
+        for index in range(3):
+            store.add_block_data(make_block(index))
+        conn = sqlite3.connect(store.db_path)
+        conn.execute("DROP TABLE work_index")
+        conn.execute("CREATE TABLE work_index (height INTEGER PRIMARY KEY, cumulative_work INTEGER NOT NULL)")
+        conn.execute("INSERT INTO work_index (height, cumulative_work) VALUES (1, 99)")
+        conn.commit()
+        conn.close()
+
+        store = COINjectureStorage(data_dir=str(tmp_path))
+
+        assert [b["index"] for b in store.query_blocks()] == [2, 1, 0]
+        assert store.get_work_at_height(1) == 99
+
+
+class TestMinerIndex:
+    """Test miner lookups and the per-miner aggregate table."""
+
+    def test_blocks_by_miner(self, store):
+        blocks = store.get_blocks_by_miner("BEANS1")
+        assert [b["index"] for b in blocks] == list(range(58, 0, -3))
+        assert store.get_blocks_by_miner("BEANS1", limit=2)[1]["index"] == 55
+        assert store.get_blocks_by_miner("nobody") == []
+
+    def test_aggregates_match_block_rows(self, store):
+        blocks = store.get_blocks_by_miner("BEANS2")
+        stats = store.get_miner_stats("BEANS2")
+        assert stats["blocks_mined"] == len(blocks) == 20
+        assert stats["total_reward"] == pytest.approx(sum(b["reward"] for b in blocks))
+        assert stats["total_work"] == pytest.approx(sum(b["work_score"] for b in blocks))
+        assert stats["last_height"] == 59
+        assert store.get_miner_count() == 3
+        assert store.get_miner_stats("nobody")["blocks_mined"] == 0
+
+    def test_restored_block_not_double_counted(self, store):
+        block = make_block(59, miner="BEANS9", reward=80.0)
+        store.add_block_data(block)
+        assert store.get_miner_stats("BEANS2")["blocks_mined"] == 19
+        assert store.get_miner_stats("BEANS9")["total_reward"] == 80.0
+
+        store.add_block_data(block)
+        assert store.get_miner_stats("BEANS9")["blocks_mined"] == 1
+
+    def test_unique_miners_in_timeframe(self, store):
+        assert store.get_unique_miners(1700000000.0, 1700000001.0) == {"BEANS0", "BEANS1"}
+        conn = sqlite3.connect(store.db_path)
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT DISTINCT miner_address FROM blocks "
+                            "WHERE timestamp >= 0 AND timestamp <= 1 AND miner_address IS NOT NULL").fetchall()
+        conn.close()
+        assert "COVERING INDEX" in " ".join(row[-1] for row in plan)
@@ -0,0 +1,139 @@
+"""
+Unit Tests for the proof bundle cache
+Tests CID verification, the hot and disk tiers, LRU eviction and
+StorageManager's cache-first bundle reads
+"""
+
+import pytest
+import os
+import sys
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bundle_cache import ProofBundleCache, compute_cid_v0, verify_cid, UNIXFS_CHUNK_SIZE
+from storage import StorageManager, StorageConfig, NodeRole, PruningMode
+
+# CIDs produced by `ipfs add` (CIDv0, default chunker)
+HELLO_CID = "QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o"
+EMPTY_CID = "QmbFMke1KXqnYyBBWxB74N4c5SBnJMVAiMNRcGu6x1AwQH"
+
+
+def bundle(i: int, size: int = 100) -> bytes:
+    return (f"bundle {i} ".encode() * size)[:size]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ProofBundleCache(str(tmp_path / "cache"), max_bytes=1000, hot_items=2)
+
+
+class TestVerification:
+    """Test CID computation against known ipfs add output."""
+
+    def test_known_cids(self):
+        assert compute_cid_v0(b"hello world\n") == HELLO_CID
+        assert compute_cid_v0(b"") == EMPTY_CID
+
+    def test_verify(self):
+        assert verify_cid(HELLO_CID, b"hello world\n") is True
+        assert verify_cid(HELLO_CID, b"hello world!") is False
+        # Not checkable locally
+        assert verify_cid("bafybeigdyrzt5sfp7udm7hu76uh7y26nf3efuylqabf3oclgtqy55fbzdi", b"x") is None
+        assert verify_cid(HELLO_CID, b"x" * (UNIXFS_CHUNK_SIZE + 1)) is None
+
+
+class TestProofBundleCache:
+    """Test both tiers and eviction."""
+
+    def test_put_and_get(self, cache):
+        cid = compute_cid_v0(bundle(1))
+        assert cache.get(cid) is None
+        assert cache.put(cid, bundle(1))
+        assert cache.get(cid) == bundle(1)
+        assert cache.stats["hot_hits"] == 1
+        assert os.path.exists(os.path.join(cache.cache_dir, cid[-2:], cid))
+
+    def test_rejects_mismatching_content(self, cache):
+        assert not cache.put(HELLO_CID, b"tampered")
+        assert HELLO_CID not in cache
+        assert cache.fetch(HELLO_CID, lambda cid: b"tampered") is None
+        assert cache.stats["rejected"] == 2
+
+    def test_disk_tier_serves_after_hot_eviction(self, cache):
+        cids = [compute_cid_v0(bundle(i)) for i in range(4)]
+        for i, cid in enumerate(cids):
+            cache.put(cid, bundle(i))
+        assert cache.get(cids[0]) == bundle(0)
+        assert cache.stats["disk_hits"] == 1
+
+    def test_lru_eviction_by_size(self, cache):
+        cids = [compute_cid_v0(bundle(i, 300)) for i in range(4)]
+        for i, cid in enumerate(cids[:3]):
+            cache.put(cid, bundle(i, 300))
+        cache.get(cids[0])  # now most recent
+        cache.put(cids[3], bundle(3, 300))
+
+        assert cache.disk_bytes <= 1000
+        assert cids[1] not in cache
+        assert cids[0] in cache and cids[3] in cache
+        assert not os.path.exists(os.path.join(cache.cache_dir, cids[1][-2:], cids[1]))
+
+    def test_fetch_loads_once(self, cache):
+        calls = []
+
+        def loader(cid):
+            calls.append(cid)
+            return b"hello world\n"
+
+        assert cache.fetch(HELLO_CID, loader) == b"hello world\n"
+        assert cache.fetch(HELLO_CID, loader) == b"hello world\n"
+        assert calls == [HELLO_CID]
+
+    def test_index_survives_restart(self, cache):
+        cid = compute_cid_v0(bundle(7))
+        cache.put(cid, bundle(7))
+        reopened = ProofBundleCache(cache.cache_dir, max_bytes=1000)
+        assert reopened.get(cid) == bundle(7)
+        assert reopened.disk_bytes == len(bundle(7))
+
+
+class TestStorageManagerCache:
+    """Test get_proof_bundle through the cache."""
+
+    class FakeIPFS:
+        def __init__(self):
+            self.objects = {}
+            self.gets = 0
+            self.healthy = True
+
+        def health_check(self):
+            return self.healthy
+
+        def add(self, data):
+            cid = compute_cid_v0(data)
+            self.objects[cid] = data
+            return cid
+
+        def get(self, cid):
+            self.gets += 1
+            return self.objects[cid]
+
+    def test_repeat_reads_skip_ipfs(self, tmp_path):
+        manager = StorageManager(StorageConfig(
+            data_dir=str(tmp_path), role=NodeRole.FULL, pruning_mode=PruningMode.FULL
+        ))
+        ipfs = manager.ipfs_client = self.FakeIPFS()
+        try:
+            cid = ipfs.add(bundle(1))
+            assert manager.get_proof_bundle(cid) == bundle(1)
+            assert manager.get_proof_bundle(cid) == bundle(1)
+            assert ipfs.gets == 1
+
+            # Stored bundles are cached on write and survive an IPFS outage
+            stored = manager.store_proof_bundle(bundle(2))
+            ipfs.healthy = False
+            assert manager.get_proof_bundle(stored) == bundle(2)
+            assert ipfs.gets == 1
+        finally:
+            manager.close()
@@ -0,0 +1,187 @@
+"""
+Unit Tests for materialized chain statistics
+Tests rolling time windows, sliding block-time statistics, reorg rebuilds
+and the COINjectureStorage integration
+"""
+
+import pytest
+import statistics
+import time
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from api.chain_stats import ChainStatsAggregator, SlidingWindow
+from api.blockchain_storage import COINjectureStorage
+
+NOW = 1700100000.0
+
+
+def make_block(index, timestamp, miner="BEANS0", work_score=1.0, difficulty=1.0):
+    return {
+        "index": index,
+        "block_hash": f"{index:064x}",
+        "previous_hash": f"{index - 1:064x}" if index else "0" * 64,
+        "timestamp": timestamp,
+        "miner_address": miner,
+        "work_score": work_score,
+        "difficulty": difficulty
+    }
+
+
+def chain(count, spacing, end=NOW, miners=3):
+    start = end - spacing * (count - 1)
+    return [make_block(i, start + i * spacing, miner=f"BEANS{i % miners}", work_score=float(i % 5),
+                       difficulty=1.0 + i % 3)
+            for i in range(count)]
+
+
+def reference_intervals(blocks, count):
+    recent = blocks[-(count + 1):]
+    diffs = [b["timestamp"] - a["timestamp"] for a, b in zip(recent, recent[1:])]
+    return [d for d in diffs if d > 0]
+
+
+class TestSlidingWindow:
+    """Test the streaming mean/median window."""
+
+    def test_matches_recomputed_median(self):
+        window = SlidingWindow(19, keep_sorted=True)
+        values = [((i * 37) % 23) - 3.0 for i in range(200)]
+        for i, value in enumerate(values):
+            window.push(value)
+            positive = [v for v in values[max(0, i - 18):i + 1] if v > 0]
+            assert window.count == len(positive)
+            assert window.median() == (statistics.median(positive) if positive else 0.0)
+            assert window.mean() == pytest.approx(sum(positive) / len(positive) if positive else 0.0)
+
+
+class TestChainStatsAggregator:
+    """Test the incremental aggregates against direct recomputation."""
+
+    def test_time_windows(self):
+        stats = ChainStatsAggregator()
+        blocks = chain(400, 30.0)
+        for block in blocks:
+            stats.add_block(block, now=NOW)
+
+        snapshot = stats.snapshot(now=NOW)
+        for name, seconds in (("1m", 60), ("5m", 300), ("1h", 3600), ("24h", 86400)):
+            inside = [b for b in blocks if b["timestamp"] >= NOW - seconds]
+            window = snapshot["windows"][name]
+            assert window["blocks"] == len(inside)
+            assert window["work_score"] == pytest.approx(sum(b["work_score"] for b in inside))
+            assert window["unique_miners"] == len({b["miner_address"] for b in inside})
+            assert window["tps"] == len(inside) / seconds
+
+    def test_windows_slide_without_new_blocks(self):
+        stats = ChainStatsAggregator()
+        for block in chain(10, 10.0):
+            stats.add_block(block, now=NOW)
+        assert stats.snapshot(now=NOW)["windows"]["1m"]["blocks"] == 7
+        later = stats.snapshot(now=NOW + 600)
+        assert later["windows"]["1m"]["blocks"] == 0
+        assert later["windows"]["1m"]["unique_miners"] == 0
+        assert later["windows"]["1h"]["blocks"] == 10
+
+    def test_out_of_order_timestamp_does_not_block_expiry(self):
+        stats = ChainStatsAggregator()
+        blocks = chain(10, 10.0, end=NOW - 600)
+        # A block stamped in the future ahead of older ones
+        blocks[0]["timestamp"] = NOW + 30
+        for block in blocks:
+            stats.add_block(block, now=NOW - 600)
+
+        window = stats.snapshot(now=NOW)["windows"]["1m"]
+        assert window["blocks"] == 1
+        assert window["work_score"] == blocks[0]["work_score"]
+        assert window["unique_miners"] == 1
+
+    def test_block_time_statistics(self):
+        stats = ChainStatsAggregator()
+        blocks = chain(150, 10.0)
+        # Irregular spacing, including one timestamp going backwards
+        for i, block in enumerate(blocks):
+            block["timestamp"] += (i * 7) % 11
+        blocks[140]["timestamp"] = blocks[139]["timestamp"] - 1
+        for block in blocks:
+            stats.add_block(block, now=NOW)
+
+        block_time = stats.snapshot(now=NOW)["block_time"]
+        assert block_time["avg_seconds"] == pytest.approx(statistics.mean(reference_intervals(blocks, 10)))
+        assert block_time["median_seconds"] == statistics.median(reference_intervals(blocks, 19))
+        assert block_time["last_100_blocks"] == pytest.approx(statistics.mean(reference_intervals(blocks, 99)))
+
+    def test_difficulty_efficiency_and_recent(self):
+        stats = ChainStatsAggregator()
+        blocks = chain(30, 5.0)
+        for block in blocks:
+            stats.add_block(block, now=NOW)
+
+        snapshot = stats.snapshot(now=NOW)
+        last10 = blocks[-10:]
+        assert snapshot["avg_difficulty"] == pytest.approx(statistics.mean(b["difficulty"] for b in last10))
+        span = last10[-1]["timestamp"] - last10[0]["timestamp"]
+        assert snapshot["efficiency_ratio"] == pytest.approx(sum(b["work_score"] for b in last10) / span)
+        assert [b["index"] for b in snapshot["recent_blocks"]] == list(range(20, 30))
+        assert snapshot["latest_block"]["index"] == 29
+
+    def test_reorg_rebuilds_from_loader(self, tmp_path):
+        blocks = chain(20, 10.0)
+        replacement = make_block(19, blocks[19]["timestamp"], miner="BEANSfork")
+        stats = ChainStatsAggregator(loader=lambda: blocks[:19] + [replacement])
+        for block in blocks:
+            stats.add_block(block, now=NOW)
+
+        stats.add_block(replacement, now=NOW)
+        snapshot = stats.snapshot(now=NOW)
+        assert snapshot["latest_block"]["miner_address"] == "BEANSfork"
+        assert snapshot["windows"]["24h"]["blocks"] == 20
+
+        # Through storage the loader must only see the canonical block at the fork height
+        store = COINjectureStorage(data_dir=str(tmp_path))
+        now = time.time()
+        for i in range(10):
+            store.add_block_data(make_block(i, now - 100 + i * 10))
+        assert store.get_chain_stats()["windows"]["1h"]["blocks"] == 10
+
+        fork = make_block(9, now - 5, miner="BEANSfork")
+        fork["block_hash"] = "f" * 64
+        store.add_block_data(fork)
+        snapshot = store.get_chain_stats()
+
+        assert snapshot["windows"]["1h"]["blocks"] == store.count_blocks()["total_blocks"] == 10
+        assert [b["index"] for b in snapshot["recent_blocks"]].count(9) == 1
+        assert snapshot["latest_block"]["miner_address"] == "BEANSfork"
+
+
+class TestStorageIntegration:
+    """Test that storage keeps the aggregates current."""
+
+    def test_seeded_then_updated_on_commit(self, tmp_path):
+        store = COINjectureStorage(data_dir=str(tmp_path))
+        now = time.time()
+        for i in range(5):
+            store.add_block_data(make_block(i, now - 50 + i * 10, miner=f"BEANS{i % 2}"))
+
+        assert store.get_chain_stats()["windows"]["1m"]["blocks"] == 5
+        store.add_block_data(make_block(5, now, miner="BEANS9"))
+        snapshot = store.get_chain_stats()
+        assert snapshot["windows"]["1m"]["unique_miners"] == 3
+        assert snapshot["latest_block"]["index"] == 5
+        assert snapshot["block_time"]["avg_seconds"] == pytest.approx(10.0)
+
+    def test_catches_up_with_other_writers(self, tmp_path):
+        now = time.time()
+        reader = COINjectureStorage(data_dir=str(tmp_path))
+        writer = COINjectureStorage(data_dir=str(tmp_path))
+        writer.add_block_data(make_block(0, now - 20))
+        assert reader.get_chain_stats()["latest_block"]["index"] == 0
+
+        for i in (1, 2):
+            writer.add_block_data(make_block(i, now - 20 + i * 10))
+        snapshot = reader.get_chain_stats()
+        assert snapshot["latest_block"]["index"] == 2
+        assert snapshot["windows"]["1m"]["blocks"] == 3
@@ -0,0 +1,324 @@
+"""
+Unit Tests for ConsensusEngine fork choice
+Tests the ancestor index, common-ancestor queries, finality and reorgs
+"""
+
+import pytest
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import consensus
+from consensus import ConsensusEngine, ConsensusConfig, BlockNode, CompactNode
+from storage import StorageManager, StorageConfig, NodeRole, PruningMode
+from pow import ProblemRegistry
+from core.blockchain import Block, ProblemTier
+
+# Stand-in complexity: every test block carries one unit of work
+UNIT_WORK = object()
+
+
+def make_child(parent: Block, salt: str = "") -> Block:
+    """Build a block on top of parent; salt distinguishes fork siblings."""
+    block = Block(
+        index=parent.index + 1,
+        timestamp=parent.timestamp + 1,
+        previous_hash=parent.block_hash,
+        transactions=[],
+        merkle_root=("1" * 63) + (salt[:1] or "1"),
+        problem={"type": "subset_sum", "numbers": [1, 2, 3], "target": 3, "size": 3},
+        solution=[1, 2],
+        complexity=UNIT_WORK,
+        mining_capacity=ProblemTier.TIER_1_MOBILE,
+        cumulative_work_score=0.0,
+        block_hash=""
+    )
+    block.block_hash = block.calculate_hash()
+    return block
+
+
+def make_genesis() -> Block:
+    genesis = Block(
+        index=0,
+        timestamp=1609459200.0,
+        previous_hash="0" * 64,
+        transactions=[],
+        merkle_root="0" * 64,
+        problem={},
+        solution=[],
+        complexity=None,
+        mining_capacity=ProblemTier.TIER_1_MOBILE,
+        cumulative_work_score=0.0,
+        block_hash=""
+    )
+    genesis.block_hash = genesis.calculate_hash()
+    return genesis
+
+
+@pytest.fixture
+def make_engine(tmp_path, monkeypatch):
+    """Factory for ConsensusEngines sharing one data dir, with a local genesis."""
+    import requests
+
+    def offline(*args, **kwargs):
+        raise requests.ConnectionError("offline")
+
+    monkeypatch.setattr(requests, "get", offline)
+    monkeypatch.setattr(ConsensusEngine, "_build_genesis", lambda self: make_genesis())
+    monkeypatch.setattr(consensus, "calculate_work_score", lambda complexity: 1.0)
+    storages = []
+
+    def factory(**config):
+        storage = StorageManager(StorageConfig(
+            data_dir=str(tmp_path), role=NodeRole.FULL, pruning_mode=PruningMode.FULL
+        ))
+        storages.append(storage)
+        config.setdefault("confirmation_depth", 3)
+        return ConsensusEngine(ConsensusConfig(**config), storage, ProblemRegistry())
+
+    yield factory
+    for storage in storages:
+        storage.close()
+
+
+@pytest.fixture
+def engine(make_engine):
+    """ConsensusEngine with a local genesis (no network or IPFS)."""
+    return make_engine()
+
+
+def extend(engine, parent: Block, length: int, salt: str = "") -> list:
+    """Add length blocks on top of parent and return them."""
+    blocks = []
+    for i in range(length):
+        parent = make_child(parent, salt)
+        engine._add_block_to_tree(parent, receipt_time=float(len(engine.block_tree) + i))
+        blocks.append(parent)
+    return blocks
+
+
+class TestAncestorIndex:
+    """Test binary-lifting ancestor lookups."""
+
+    def test_skip_list_points_at_power_of_two_ancestors(self, engine):
+        chain = [engine.genesis_block] + extend(engine, engine.genesis_block, 20)
+        node = engine.block_tree[chain[20].block_hash]
+        assert node.skip == [chain[19].block_hash, chain[18].block_hash,
+                             chain[16].block_hash, chain[12].block_hash, chain[4].block_hash]
+
+    def test_get_ancestor(self, engine):
+        chain = [engine.genesis_block] + extend(engine, engine.genesis_block, 50)
+        tip = chain[-1].block_hash
+        for height in (0, 1, 17, 32, 49, 50):
+            assert engine.get_ancestor(tip, height).block is chain[height]
+        assert engine.get_ancestor(tip, 51) is None
+
+    def test_common_ancestor_of_forks(self, engine):
+        trunk = extend(engine, engine.genesis_block, 30)
+        fork_a = extend(engine, trunk[20], 7, salt="a")
+        fork_b = extend(engine, trunk[20], 12, salt="b")
+
+        ancestor = engine.find_common_ancestor(fork_a[-1].block_hash, fork_b[-1].block_hash)
+        assert ancestor.block is trunk[20]
+        assert engine.find_common_ancestor(trunk[-1].block_hash, trunk[5].block_hash).block is trunk[5]
+
+    def test_is_ancestor(self, engine):
+        trunk = extend(engine, engine.genesis_block, 10)
+        fork = extend(engine, trunk[3], 4, salt="f")
+        assert engine.is_ancestor(trunk[3].block_hash, fork[-1].block_hash)
+        assert engine.is_ancestor(engine.genesis_block.block_hash, trunk[-1].block_hash)
+        assert not engine.is_ancestor(trunk[5].block_hash, fork[-1].block_hash)
+        assert not engine.is_ancestor(fork[0].block_hash, trunk[-1].block_hash)
+
+
+class TestFinalityAndReorg:
+    """Test finality and reorg handling on top of the ancestor index."""
+
+    def test_fork_block_is_not_finalized(self, engine):
+        trunk = extend(engine, engine.genesis_block, 10)
+        fork = extend(engine, trunk[2], 1, salt="f")
+        engine.best_tip = engine.block_tree[trunk[-1].block_hash]
+
+        assert engine.is_finalized(trunk[3].block_hash)
+        assert not engine.is_finalized(fork[0].block_hash)
+        assert not engine.is_finalized(trunk[-2].block_hash)
+
+    def test_reorg_returns_diverging_segments(self, engine):
+        trunk = extend(engine, engine.genesis_block, 10)
+        old_branch = extend(engine, trunk[-1], 3, salt="o")
+        new_branch = extend(engine, trunk[-1], 5, salt="n")
+        engine.best_tip = engine.block_tree[old_branch[-1].block_hash]
+
+        removed, added = engine.handle_reorg(new_branch[-1].block_hash)
+        assert removed == old_branch
+        assert added == new_branch
+        assert engine.best_tip.block is new_branch[-1]
+
+    def test_reorg_depth_limit(self, engine):
+        engine.config.max_reorg_depth = 2
+        trunk = extend(engine, engine.genesis_block, 3)
+        old_branch = extend(engine, trunk[-1], 3, salt="o")
+        new_branch = extend(engine, trunk[-1], 4, salt="n")
+        engine.best_tip = engine.block_tree[old_branch[-1].block_hash]
+
+        assert engine.handle_reorg(new_branch[-1].block_hash) == ([], [])
+        assert engine.best_tip.block is old_branch[-1]
+
+    def test_work_index_follows_best_chain(self, engine):
+        def canonical(start, count):
+            return [header.block_hash for header in engine.storage.get_headers_range(start, count)]
+
+        trunk = extend(engine, engine.genesis_block, 5)
+        fork = extend(engine, trunk[1], 2, salt="f")
+        engine.storage.batch_write([("header", block) for block in trunk + fork])
+        assert canonical(1, 5) == [block.block_hash for block in trunk]
+
+        # The fork overtakes the trunk: heights from the fork point switch over
+        fork += extend(engine, fork[-1], 2, salt="f")
+        engine.storage.batch_write([("header", block) for block in fork[2:]])
+        assert engine.best_tip.block is fork[-1]
+        assert canonical(1, 6) == [block.block_hash for block in trunk[:2] + fork]
+
+        # Back to a lower tip: rows above it are dropped
+        engine.handle_reorg(trunk[-1].block_hash)
+        assert canonical(1, 5) == [block.block_hash for block in trunk]
+        assert engine.storage.get_work_at_height(6) is None
+
+    def test_tip_handlers_follow_best_tip(self, engine):
+        tips = []
+        engine.add_tip_handler(lambda block_hash, height: tips.append((block_hash, height)))
+        trunk = extend(engine, engine.genesis_block, 3)
+        extend(engine, trunk[0], 1, salt="f")
+        assert tips == [(block.block_hash, block.index) for block in trunk]
+
+        # A failing handler does not stop block processing
+        engine.add_tip_handler(lambda block_hash, height: 1 / 0)
+        longer = extend(engine, trunk[-1], 1)
+        assert engine.best_tip.block is longer[0]
+        assert tips[-1] == (longer[0].block_hash, longer[0].index)
+
+    def test_finality_of_block_outside_tree(self, engine):
+        """Blocks dropped from the tree fall back to stored headers."""
+        trunk = extend(engine, engine.genesis_block, 10)
+        engine.storage.batch_write([("header", block) for block in trunk])
+        engine.best_tip = engine.block_tree[trunk[-1].block_hash]
+
+        del engine.block_tree[trunk[1].block_hash]
+        assert engine.is_finalized(trunk[1].block_hash)
+        assert not engine.is_finalized("e" * 64)
+
+
+class TestPrunedTree:
+    """Test demotion of finalized nodes to compact records."""
+
+    def test_tree_keeps_full_nodes_only_near_tip(self, engine):
+        engine.config.max_reorg_depth = 10
+        chain = extend(engine, engine.genesis_block, 100)
+        engine.storage.batch_write([("block", block) for block in chain])
+
+        full = [node for node in engine.block_tree.values() if isinstance(node, BlockNode)]
+        assert len(full) <= engine.config.max_reorg_depth + 1
+        assert isinstance(engine.block_tree[chain[10].block_hash], CompactNode)
+        assert isinstance(engine.block_tree[chain[-1].block_hash], BlockNode)
+
+    def test_demoted_bodies_load_from_storage(self, engine):
+        engine.config.max_reorg_depth = 5
+        chain = extend(engine, engine.genesis_block, 30)
+        engine.storage.batch_write([("block", block) for block in chain])
+
+        assert engine.get_block(chain[3].block_hash).solution == chain[3].solution
+        assert [b.block_hash for b in engine.get_chain_from_genesis()[1:]] == [b.block_hash for b in chain]
+
+    def test_ancestor_queries_span_compact_nodes(self, engine):
+        engine.config.max_reorg_depth = 5
+        chain = extend(engine, engine.genesis_block, 40)
+        assert engine.get_ancestor(chain[-1].block_hash, 2).block_hash == chain[1].block_hash
+        assert engine.is_ancestor(chain[4].block_hash, chain[-1].block_hash)
+        assert engine.is_finalized(chain[4].block_hash)
+
+    def test_stale_forks_dropped(self, engine):
+        engine.config.max_reorg_depth = 5
+        trunk = extend(engine, engine.genesis_block, 5)
+        fork = extend(engine, trunk[1], 2, salt="f")
+        extend(engine, trunk[-1], 20)
+
+        assert all(block.block_hash not in engine.block_tree for block in fork)
+
+    def test_live_forks_kept_in_full(self, engine):
+        engine.config.max_reorg_depth = 5
+        trunk = extend(engine, engine.genesis_block, 20)
+        fork = extend(engine, trunk[-3], 1, salt="f")
+        assert isinstance(engine.block_tree[fork[0].block_hash], BlockNode)
+
+
+class TestSnapshot:
+    """Test the fast-start consensus snapshot."""
+
+    def test_restore_from_snapshot(self, make_engine, tmp_path):
+        first = make_engine(max_reorg_depth=10)
+        chain = extend(first, first.genesis_block, 60)
+        first.storage.batch_write([("header", block) for block in chain])
+        path = str(tmp_path / "snapshot.bin")
+        assert first.save_snapshot(path)
+
+        second = make_engine(max_reorg_depth=10)
+        assert second.load_snapshot(path) == 60
+        assert second.best_tip.block_hash == chain[-1].block_hash
+        assert second.best_tip.cumulative_work == first.best_tip.cumulative_work
+        assert len(second.block_tree) < 20
+
+        # Queries inside the window work; older history comes from storage
+        assert second.is_ancestor(chain[50].block_hash, chain[-1].block_hash)
+        assert second.is_finalized(chain[10].block_hash)
+        assert len(second.get_chain_from_genesis()) == 61
+
+    def test_blocks_after_snapshot_extend_restored_tip(self, make_engine, tmp_path):
+        first = make_engine(max_reorg_depth=10)
+        chain = extend(first, first.genesis_block, 30)
+        path = str(tmp_path / "snapshot.bin")
+        first.save_snapshot(path)
+
+        second = make_engine(max_reorg_depth=10)
+        second.load_snapshot(path)
+        newer = extend(second, chain[-1], 3)
+        assert second.best_tip.block_hash == newer[-1].block_hash
+        assert second.best_tip.cumulative_work == first.best_tip.cumulative_work + 3
+
+        old_tip = second.best_tip
+        fork = extend(second, chain[-5], 10, salt="f")
+        second.best_tip = old_tip
+        removed, added = second.handle_reorg(fork[-1].block_hash)
+        assert added == fork
+        assert [b.block_hash for b in removed] == [b.block_hash for b in chain[-4:] + newer]
+
+    def test_fork_tips_relinked_from_nodes(self, make_engine, tmp_path):
+        first = make_engine(max_reorg_depth=10)
+        trunk = extend(first, first.genesis_block, 20)
+        fork = extend(first, trunk[-4], 2, salt="f")
+        path = str(tmp_path / "snapshot.bin")
+        first.save_snapshot(path)
+
+        second = make_engine(max_reorg_depth=10)
+        second.load_snapshot(path)
+        tips = {block_hash for block_hash, node in second.block_tree.items()
+                if isinstance(node, BlockNode) and not node.children}
+        assert tips == {trunk[-1].block_hash, fork[-1].block_hash}
+        assert second.block_tree[trunk[-4].block_hash].children == [trunk[-3].block_hash, fork[0].block_hash]
+
+    def test_snapshot_for_other_network_ignored(self, make_engine, tmp_path):
+        first = make_engine()
+        extend(first, first.genesis_block, 5)
+        path = str(tmp_path / "snapshot.bin")
+        first.save_snapshot(path)
+
+        other = make_engine(network_id="another-network")
+        assert other.load_snapshot(path) is None
+        assert other.best_tip.block_hash == other.genesis_block.block_hash
+
+    def test_missing_or_corrupt_snapshot(self, engine, tmp_path):
+        assert engine.load_snapshot(str(tmp_path / "missing.bin")) is None
+        corrupt = tmp_path / "corrupt.bin"
+        corrupt.write_bytes(b"not a snapshot at all")
+        assert engine.load_snapshot(str(corrupt)) is None
@@ -0,0 +1,63 @@
+"""
+Unit Tests for ConsensusService
+Tests turning block events into blocks on top of the best tip
+"""
+
+import sys
+import os
+from types import SimpleNamespace
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from consensus_service import ConsensusService
+
+
+class StubEngine:
+    """Consensus engine exposing only the best tip."""
+
+    def __init__(self, tip=None):
+        self.tip = tip
+
+    def get_best_tip(self):
+        return self.tip
+
+
+def make_service(tip=None):
+    # Skip __init__: it starts P2P discovery
+    service = ConsensusService.__new__(ConsensusService)
+    service.consensus_engine = StubEngine(tip)
+    return service
+
+
+EVENT = {
+    'event_id': 'evt-1',
+    'block_hash': 'ab' * 32,
+    'cid': 'QmTestCid',
+    'miner_address': 'miner-1',
+    'capacity': 'DESKTOP',
+    'work_score': 42.0,
+    'ts': 1609459200.0
+}
+
+
+class TestConvertEventToBlock:
+    """Test _convert_event_to_block."""
+
+    def test_builds_on_best_tip(self):
+        tip = SimpleNamespace(index=9, block_hash='cd' * 32)
+        block = make_service(tip)._convert_event_to_block(EVENT)
+
+        assert block is not None
+        assert block.index == 10
+        assert block.previous_hash == tip.block_hash
+        assert block.block_hash == EVENT['block_hash']
+        assert block.offchain_cid == EVENT['cid']
+        assert block.cumulative_work_score == EVENT['work_score']
+
+    def test_first_block_links_to_zero_hash(self):
+        block = make_service()._convert_event_to_block(EVENT)
+
+        assert block is not None
+        assert block.index == 0
+        assert block.previous_hash == "0" * 64
@@ -0,0 +1,187 @@
+"""
+Unit Tests for the asyncio gossip engine
+Tests per-peer fan-out, backpressure, periodic ticks and loopback delivery
+"""
+
+import pytest
+import asyncio
+import threading
+import time
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from gossip_engine import GossipEngine, LoopbackNetwork
+from network import NetworkProtocol, RevealMsg, MessageType
+
+
+class RecordingTransport:
+    """Transport that records sends and can be held to simulate a slow peer."""
+
+    def __init__(self):
+        self.sent = []
+        self.release = threading.Event()
+        self.release.set()
+
+    async def send_message(self, peer_id, protocol, message):
+        while not self.release.is_set():
+            await asyncio.sleep(0.01)
+        self.sent.append((peer_id, protocol, message))
+        return not peer_id.startswith("down")
+
+
+@pytest.fixture
+def engine():
+    transport = RecordingTransport()
+    engine = GossipEngine(transport, queue_size=4)
+    engine.start()
+    yield engine
+    engine.stop()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestGossipEngine:
+    """Test the engine on its own."""
+
+    def test_fan_out_to_many_peers(self, engine):
+        engine.publish_many((f"peer{i}", "/t", b"x") for i in range(2000))
+        assert engine.wait_idle()
+        assert engine.stats["sent"] == 2000
+        assert len({peer for peer, _, _ in engine.transport.sent}) == 2000
+        # One loop thread no matter how many peers
+        assert sum(t.name == "gossip-engine" for t in threading.enumerate()) == 1
+
+    def test_per_peer_order(self, engine):
+        for i in range(4):
+            engine.publish("peer", "/t", bytes([i]))
+        assert engine.wait_idle()
+        assert [m for _, _, m in engine.transport.sent] == [bytes([i]) for i in range(4)]
+
+    def test_full_queue_drops_oldest(self, engine):
+        engine.transport.release.clear()
+        for i in range(10):
+            engine.publish("slow", "/t", bytes([i]))
+        engine.transport.release.set()
+        assert engine.wait_idle()
+
+        received = [m[0] for _, _, m in engine.transport.sent]
+        # The sender holds one message while four more fit in the queue
+        assert received[-4:] == [6, 7, 8, 9]
+        assert engine.stats["dropped"] == 10 - len(received)
+
+    def test_send_waits_for_queue_space(self, engine):
+        engine.transport.release.clear()
+
+        async def fill():
+            for i in range(8):
+                await engine.send("slow", "/t", bytes([i]))
+
+        future = asyncio.run_coroutine_threadsafe(fill(), engine.loop)
+        time.sleep(0.1)
+        assert not future.done()
+        engine.transport.release.set()
+        future.result(5)
+        assert engine.wait_idle()
+        assert engine.stats["sent"] == 8
+        assert engine.stats["dropped"] == 0
+
+    def test_failed_sends_counted(self, engine):
+        engine.publish("down-peer", "/t", b"x")
+        assert engine.wait_idle()
+        assert engine.stats["failed"] == 1
+
+    def test_periodic_ticks(self):
+        engine = GossipEngine()
+        ticks = []
+        engine.schedule_periodic(0.02, lambda: ticks.append(time.time()))
+        engine.start()
+        try:
+            assert wait_for(lambda: len(ticks) >= 5)
+        finally:
+            engine.stop()
+        count = len(ticks)
+        time.sleep(0.05)
+        assert len(ticks) == count
+
+
+class TestLoopbackNetwork:
+    """Test NetworkProtocol gossip over the in-process transport."""
+
+    class Storage:
+        def __init__(self):
+            self.commitments = {}
+
+        def store_commitment_cid(self, commitment, cid):
+            self.commitments[commitment] = cid
+
+    def make_nodes(self, count):
+        hub = LoopbackNetwork()
+        nodes = []
+        for i in range(count):
+            node = NetworkProtocol(None, self.Storage(), None, peer_id=f"node{i}")
+            node.gossip.transport = hub.endpoint(node.peer_id, node.handle_message)
+            nodes.append(node)
+        for node in nodes:
+            for other in nodes:
+                if other is not node:
+                    node.update_peer(other.peer_id)
+        return nodes
+
+    def test_announce_proof_flushes_without_polling(self):
+        sender, receiver = self.make_nodes(2)
+        received = []
+
+        def record(peer_id, message):
+            received.append(message)
+            return receiver._handle_reveal_msg(peer_id, message)
+
+        receiver.message_handlers[MessageType.REVEAL] = record
+        sender.start_equilibrium_loops()
+        try:
+            start = time.time()
+            sender.announce_proof("QmLoopback")
+            assert wait_for(lambda: received)
+            assert time.time() - start < 0.5
+        finally:
+            sender.stop_equilibrium_loops()
+
+        assert isinstance(received[0], RevealMsg)
+        assert received[0].cid == "QmLoopback"
+        assert receiver.storage.commitments == {}
+        assert sender.pending_broadcasts == set()
+
+    def test_broadcasts_rate_limited_to_interval(self):
+        sender, receiver = self.make_nodes(2)
+        sender.start_equilibrium_loops()
+        try:
+            sender.announce_proof("QmFirst")
+            assert wait_for(lambda: not sender.pending_broadcasts)
+            sender.announce_proof("QmSecond")
+            time.sleep(0.1)
+            # Next λ interval has not passed yet
+            assert sender.pending_broadcasts == {"QmSecond"}
+            assert sender._flush_handle is not None
+        finally:
+            sender.stop_equilibrium_loops()
+
+    def test_reveal_reaches_every_peer(self):
+        nodes = self.make_nodes(5)
+        sender = nodes[0]
+        sender.start_equilibrium_loops()
+        try:
+            sender.announce_reveal("QmReveal", b"\x01" * 32, None, None)
+            assert sender.gossip.wait_idle()
+        finally:
+            sender.stop_equilibrium_loops()
+        for node in nodes[1:]:
+            assert node.storage.commitments == {b"\x01" * 32: "QmReveal"}
@@ -0,0 +1,181 @@
+"""
+Unit Tests for IPFSClient
+Tests the pooled keep-alive session, shared clients, batch add/get and
+mined bundle uploads against a local IPFS HTTP API stub
+"""
+
+import pytest
+import json
+import requests
+import threading
+import sys
+import os
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from storage import IPFSClient, get_ipfs_client, StorageManager, StorageConfig, NodeRole, PruningMode
+from bundle_cache import compute_cid_v0 as cid_v0
+from core.blockchain import Block, ProblemTier, mine_block
+
+
+def multipart_field(body: bytes, content_type: str) -> bytes:
+    """Content of the first part of a multipart/form-data body."""
+    boundary = content_type.split("boundary=")[1].encode()
+    part = body.split(b"--" + boundary)[1]
+    return part.split(b"\r\n\r\n", 1)[1][:-2]
+
+
+class IPFSStub:
+    """Minimal IPFS HTTP API: add, cat, pin/add and version."""
+
+    def __init__(self):
+        self.objects = {}
+        self.pins = set()
+        self.connections = set()
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                stub.requests += 1
+                stub.connections.add(self.client_address)
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                path = urlparse(self.path).path
+                if path == "/api/v0/add":
+                    data = multipart_field(body, self.headers["Content-Type"])
+                    cid = cid_v0(data)
+                    stub.objects[cid] = data
+                    self.reply(200, json.dumps({"Hash": cid}).encode())
+                elif path == "/api/v0/cat":
+                    cid = multipart_field(body, self.headers["Content-Type"]).decode()
+                    if cid in stub.objects:
+                        self.reply(200, stub.objects[cid])
+                    else:
+                        self.reply(500, b'{"Message": "not found"}')
+                elif path == "/api/v0/pin/add":
+                    cid = parse_qs(urlparse(self.path).query)["arg"][0]
+                    stub.pins.add(cid)
+                    self.reply(200, json.dumps({"Pins": [cid]}).encode())
+                elif path == "/api/v0/version":
+                    self.reply(200, b'{"Version": "stub"}')
+                else:
+                    self.reply(404, b"{}")
+
+            def reply(self, status, data):
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    stub = IPFSStub()
+    yield stub
+    stub.close()
+
+
+@pytest.fixture
+def client(stub):
+    client = IPFSClient(stub.url, max_retries=1, pool_size=4)
+    yield client
+    client.close()
+
+
+class TestIPFSClient:
+    """Test single and batch requests."""
+
+    def test_add_get_round_trip(self, client):
+        cid = client.add(b"proof bundle")
+        assert cid == cid_v0(b"proof bundle")
+        assert client.get(cid) == b"proof bundle"
+        assert client.health_check()
+
+    def test_connections_are_reused(self, client, stub):
+        for i in range(20):
+            client.get(client.add(f"bundle {i}".encode()))
+        assert stub.requests == 40
+        assert len(stub.connections) == 1
+
+    def test_add_many_and_get_many(self, client, stub):
+        bundles = [f"bundle {i}".encode() for i in range(32)]
+        cids = client.add_many(bundles)
+        assert cids == [cid_v0(b) for b in bundles]
+
+        missing = cid_v0(b"never added")
+        assert client.get_many(cids + [missing]) == bundles + [None]
+        # Concurrent batches stay within the pool
+        assert len(stub.connections) <= client.pool_size
+
+    def test_timeouts_configurable(self):
+        client = IPFSClient("http://127.0.0.1:9", timeout=7, connect_timeout=0.5)
+        assert client._timeouts == (0.5, 7)
+        with pytest.raises(Exception, match="Failed to get object from IPFS") as excinfo:
+            client.get(cid_v0(b"x"))
+        assert isinstance(excinfo.value.__context__, requests.exceptions.ConnectionError)
+
+    def test_shared_client_per_url(self, stub):
+        shared = get_ipfs_client(stub.url)
+        assert get_ipfs_client(stub.url) is shared
+        assert get_ipfs_client(stub.url + "/") is not shared
+
+    def test_shared_client_warns_on_conflicting_settings(self, stub, capsys):
+        shared = get_ipfs_client(stub.url, timeout=11)
+        assert get_ipfs_client(stub.url, timeout=11) is shared
+        assert "Warning" not in capsys.readouterr().out
+
+        assert get_ipfs_client(stub.url, timeout=12, pool_size=shared.pool_size) is shared
+        assert shared.timeout == 11
+        assert "ignoring timeout" in capsys.readouterr().out
+
+
+def make_genesis() -> Block:
+    genesis = Block(
+        index=0,
+        timestamp=1609459200.0,
+        previous_hash="0" * 64,
+        transactions=[],
+        merkle_root="0" * 64,
+        problem={},
+        solution=[],
+        complexity=None,
+        mining_capacity=ProblemTier.TIER_1_MOBILE,
+        cumulative_work_score=0.0,
+        block_hash=""
+    )
+    genesis.block_hash = genesis.calculate_hash()
+    return genesis
+
+
+class TestMinedBundles:
+    """Test the proof bundle upload at the end of mine_block."""
+
+    @pytest.mark.parametrize("pruning_mode", [PruningMode.ARCHIVE, PruningMode.FULL])
+    def test_bundle_cached_and_pinned_in_archive_mode(self, stub, tmp_path, pruning_mode):
+        storage = StorageManager(StorageConfig(
+            data_dir=str(tmp_path), role=NodeRole.FULL, pruning_mode=pruning_mode, ipfs_api_url=stub.url
+        ))
+        try:
+            block = mine_block([], make_genesis(), ProblemTier.TIER_1_MOBILE, storage_manager=storage)
+            cid = block.offchain_cid
+            assert cid in stub.objects
+            assert storage.bundle_cache.get(cid) == stub.objects[cid]
+            assert (cid in stub.pins) == (pruning_mode == PruningMode.ARCHIVE)
+        finally:
+            storage.close()
@@ -0,0 +1,139 @@
+"""
+Unit Tests for the indexed transaction pool
+Tests priority ordering, eviction, per-sender limits and BlockchainState use
+"""
+
+import time
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tokenomics.mempool import Mempool
+from tokenomics.blockchain_state import BlockchainState, Transaction
+
+ADDRESSES = [f"BEANS{i:040d}" for i in range(10)]
+
+
+def make_tx(i, sender=None, timestamp=None):
+    return Transaction(
+        sender=sender or ADDRESSES[i % 10],
+        recipient=ADDRESSES[(i + 1) % 10],
+        amount=1.0 + i,
+        timestamp=1700000000.0 + i if timestamp is None else timestamp
+    )
+
+
+class TestMempool:
+    """Test the pool on its own."""
+
+    def test_best_is_oldest_first(self):
+        pool = Mempool()
+        transactions = [make_tx(i, timestamp=1700000000.0 + (i * 7919) % 1000) for i in range(1000)]
+        for tx in transactions:
+            assert pool.add(tx)
+        assert not pool.add(transactions[0])
+
+        expected = sorted(transactions, key=lambda tx: tx.timestamp)[:100]
+        assert pool.best(100) == expected
+        assert len(pool.best(5000)) == 1000
+
+    def test_removed_transactions_leave_template(self):
+        pool = Mempool()
+        transactions = [make_tx(i) for i in range(500)]
+        for tx in transactions:
+            pool.add(tx)
+        assert pool.remove_many(tx.transaction_id for tx in transactions[:300:2]) == 150
+        assert pool.remove("missing") is None
+
+        live = [tx for i, tx in enumerate(transactions) if not (i < 300 and i % 2 == 0)]
+        assert len(pool) == 350
+        assert pool.best(20) == live[:20]
+        # Stale heap entries are compacted once they outnumber live ones
+        pool.remove_many(tx.transaction_id for tx in live[:300])
+        assert len(pool._best) <= 2 * len(pool) + 64
+        assert pool.best(100) == live[300:]
+
+    def test_full_pool_evicts_lowest_priority(self):
+        pool = Mempool(max_size=10)
+        for i in range(10):
+            pool.add(make_tx(i))
+
+        # Newer than everything pending: rejected
+        assert not pool.add(make_tx(50))
+        # Older than the newest pending: admitted, newest evicted
+        older = make_tx(3, timestamp=1699999999.0, sender=ADDRESSES[5])
+        assert pool.add(older)
+        assert len(pool) == 10
+        assert pool.evicted == 1
+        assert make_tx(9).transaction_id not in pool
+        assert pool.best(1) == [older]
+
+    def test_fee_ranks_before_age(self):
+        pool = Mempool()
+        old, paying = make_tx(0), make_tx(1)
+        paying.fee = 0.5
+        pool.add(old)
+        pool.add(paying)
+        assert pool.best(2) == [paying, old]
+
+    def test_per_sender_queue(self):
+        pool = Mempool(max_per_sender=3)
+        sender = ADDRESSES[0]
+        transactions = [make_tx(i, sender=sender) for i in range(4)]
+        assert [pool.add(tx) for tx in transactions] == [True, True, True, False]
+        assert pool.by_sender(sender) == transactions[:3]
+        pool.remove(transactions[1].transaction_id)
+        assert pool.by_sender(sender) == [transactions[0], transactions[2]]
+        assert pool.by_sender(ADDRESSES[1]) == []
+
+    def test_template_cost_independent_of_pool_size(self):
+        def template_time(size):
+            pool = Mempool(max_size=size)
+            for i in range(size):
+                pool.add(make_tx(i, sender=f"s{i}"))
+            start = time.perf_counter()
+            for _ in range(50):
+                pool.best(100)
+            return time.perf_counter() - start
+
+        small, large = template_time(200), template_time(100_000)
+        assert large < small * 5
+
+
+class TestBlockchainStatePool:
+    """Test BlockchainState on top of the pool."""
+
+    def test_add_template_and_clear(self):
+        state = BlockchainState()
+        transactions = [state.create_coinbase_transaction(ADDRESSES[i % 10], 1.0 + i, 1700000000.0 + 100 - i)
+                        for i in range(100)]
+        for tx in transactions:
+            assert state.add_transaction(tx)
+        assert not state.add_transaction(transactions[0])
+
+        template = state.get_pending_transactions(10)
+        assert template == sorted(transactions, key=lambda tx: tx.timestamp)[:10]
+        assert state.get_transaction_by_id(template[0].transaction_id) is template[0]
+
+        state.process_transactions(template)
+        state.clear_pending_transactions(template)
+        assert len(state.pending_transactions) == 90
+        assert state.get_network_stats()["pending_transactions"] == 90
+
+    def test_pool_size_cap(self):
+        state = BlockchainState(max_pending=5)
+        for i in range(8):
+            state.add_transaction(state.create_coinbase_transaction(ADDRESSES[0], 1.0, 1700000000.0 - i))
+        assert len(state.mempool) == 5
+        assert [tx.timestamp for tx in state.get_pending_transactions()] == [1700000000.0 - i for i in range(7, 2, -1)]
+
+    def test_state_round_trip_keeps_pool(self):
+        state = BlockchainState()
+        for i in range(5):
+            state.add_transaction(state.create_coinbase_transaction(ADDRESSES[i], 2.0, 1700000000.0 + i))
+        restored = BlockchainState()
+        restored.from_dict(state.to_dict())
+        assert [tx.transaction_id for tx in restored.get_pending_transactions()] == \
+            [tx.transaction_id for tx in state.get_pending_transactions()]
@@ -259,8 +259,8 @@ class TestEquilibriumLoops:
         net.stop_equilibrium_loops()
         assert not net._running, "Should not be running after stop"
     
-    def test_threads_created(self):
-        """Verify threads are created when loops start."""
+    def test_gossip_loop_created(self):
+        """Verify one gossip event loop runs all ticks when loops start."""
         class MockConsensus:
             pass
         class MockStorage:
@@ -273,13 +273,13 @@ class TestEquilibriumLoops:
         # Start loops
         net.start_equilibrium_loops()
         
-        # Check threads exist
-        assert net._broadcast_thread is not None, "Broadcast thread should be created"
-        assert net._listen_thread is not None, "Listen thread should be created"
-        assert net._cleanup_thread is not None, "Cleanup thread should be created"
+        # Listen and cleanup ticks share the engine's loop
+        assert net.gossip.is_running, "Gossip loop should be running"
+        assert len(net.gossip._timers) == 2, "Listen and cleanup ticks should be scheduled"
         
         # Clean up
         net.stop_equilibrium_loops()
+        assert not net.gossip.is_running, "Gossip loop should stop"
 
 
 if __name__ == "__main__":
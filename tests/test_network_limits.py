@@ -0,0 +1,129 @@
+"""
+Unit Tests for gossip dedup and rate limiting
+Tests SeenCache bounds and the token-bucket RateLimiter
+"""
+
+import pytest
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from network import NetworkProtocol, MessageType, HeaderMsg, SeenCache, RateLimiter, WIRE_FORMAT_VERSION
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestSeenCache:
+    """Test bounded dedup."""
+    
+    def test_add_reports_new_keys(self, clock):
+        seen = SeenCache(max_size=10, ttl=60, clock=clock)
+        assert seen.add("a")
+        assert not seen.add("a")
+        assert "a" in seen
+        assert "b" not in seen
+    
+    def test_size_bound_evicts_least_recently_seen(self, clock):
+        seen = SeenCache(max_size=3, ttl=60, clock=clock)
+        for key in ("a", "b", "c"):
+            seen.add(key)
+        seen.add("a")  # refresh
+        seen.add("d")
+        assert len(seen) == 3
+        assert "b" not in seen
+        assert "a" in seen
+    
+    def test_ttl_expiry(self, clock):
+        seen = SeenCache(max_size=100, ttl=10, clock=clock)
+        seen.add("a")
+        clock.now += 5
+        seen.add("b")
+        clock.now += 6
+        assert "a" not in seen
+        assert "b" in seen
+        assert seen.add("a")
+    
+    def test_memory_stays_bounded(self, clock):
+        seen = SeenCache(max_size=1000, ttl=1, clock=clock)
+        for i in range(50000):
+            clock.now += 0.001
+            seen.add(f"header-{i}")
+        assert len(seen._entries) <= 1000
+
+
+class TestRateLimiter:
+    """Test token-bucket limiting."""
+    
+    def test_burst_then_refill(self, clock):
+        limiter = RateLimiter(max_per_second=10, clock=clock)
+        assert all(limiter.is_allowed("p") for _ in range(10))
+        assert not limiter.is_allowed("p")
+        clock.now += 0.25
+        assert limiter.is_allowed("p")
+        assert limiter.is_allowed("p")
+        assert not limiter.is_allowed("p")
+    
+    def test_peers_are_independent(self, clock):
+        limiter = RateLimiter(max_per_second=2, clock=clock)
+        assert limiter.is_allowed("a") and limiter.is_allowed("a")
+        assert not limiter.is_allowed("a")
+        assert limiter.is_allowed("b")
+    
+    def test_idle_peers_evicted(self, clock):
+        limiter = RateLimiter(max_per_second=10, idle_timeout=30, clock=clock)
+        for i in range(100):
+            limiter.is_allowed(f"peer-{i}")
+        clock.now += 31
+        limiter.is_allowed("active")
+        assert list(limiter.buckets) == ["active"]
+    
+    def test_peer_table_bounded(self, clock):
+        limiter = RateLimiter(max_per_second=10, max_peers=50, clock=clock)
+        for i in range(1000):
+            limiter.is_allowed(f"peer-{i}")
+        assert len(limiter.buckets) == 50
+
+
+class TestPeerCleanup:
+    """Test per-peer state pruning."""
+    
+    def test_stale_peers_drop_negotiated_state(self):
+        net = NetworkProtocol(None, None, None, peer_id="local")
+        for peer_id in ("stale", "active"):
+            net.update_peer(peer_id)
+            net.negotiate_wire_version(peer_id, WIRE_FORMAT_VERSION, [1])
+        net.peers["stale"] -= 301
+        
+        net._cleanup_tick()
+        
+        assert list(net.peers) == ["active"]
+        assert list(net.peer_wire_versions) == ["active"]
+        assert list(net.peer_dictionaries) == ["active"]
+    
+    def test_unknown_senders_are_pruned(self, monkeypatch):
+        net = NetworkProtocol(None, None, None, peer_id="local")
+        monkeypatch.setitem(net.message_handlers, MessageType.HEADER, lambda peer_id, message: True)
+        sender = NetworkProtocol(None, None, None, peer_id="stranger")
+        message = HeaderMsg(header_bytes=bytes(80), tip_work=1, peer_id="stranger", timestamp=1.0)
+        
+        assert net.handle_message("stranger", "headers", sender.encode_message(message))
+        assert "stranger" in net.peer_wire_versions
+        net.peers["stranger"] -= 301
+        net._cleanup_tick()
+        
+        assert "stranger" not in net.peers
+        assert "stranger" not in net.peer_wire_versions
+        assert "stranger" not in net.peer_dictionaries
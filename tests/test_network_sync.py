@@ -0,0 +1,207 @@
+"""
+Unit Tests for headers-first parallel block sync
+Tests header link checks, parallel body fetch, retries and in-order commit
+against local HTTP peers
+"""
+
+import pytest
+import json
+import threading
+import hashlib
+import sys
+import os
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from network_sync_service import NetworkSyncService
+
+
+def make_chain(length):
+    blocks = []
+    previous_hash = "0" * 64
+    for index in range(length):
+        block_hash = hashlib.sha256(f"block-{index}".encode()).hexdigest()
+        blocks.append({
+            "index": index,
+            "block_hash": block_hash,
+            "previous_hash": previous_hash,
+            "timestamp": 1700000000.0 + index,
+            "miner_address": "miner"
+        })
+        previous_hash = block_hash
+    return blocks
+
+
+class Peer:
+    """Local HTTP peer serving the sync endpoints from a block list."""
+
+    def __init__(self, blocks, serve_headers=True, corrupt_bodies=False, corrupt_headers=False, missing=()):
+        self.blocks = blocks
+        self.serve_headers = serve_headers
+        self.corrupt_bodies = corrupt_bodies
+        self.corrupt_headers = corrupt_headers
+        self.missing = set(missing)
+        self.body_requests = 0
+        peer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                status, body = peer.route(url.path, parse_qs(url.query))
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.address = f"127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def route(self, path, query):
+        if path == "/v1/network/peers":
+            return 200, {"peers": []}
+        if path == "/v1/data/block/latest":
+            return 200, {"data": self.blocks[-1]}
+        if path == "/v1/data/headers" and self.serve_headers:
+            start, count = int(query["start"][0]), int(query["count"][0])
+            headers = [{k: b[k] for k in ("index", "block_hash", "previous_hash", "timestamp")}
+                       for b in self.blocks[start:start + count]]
+            if self.corrupt_headers and len(headers) > 1:
+                headers[1]["previous_hash"] = "f" * 64
+            return 200, {"data": headers, "tip_height": len(self.blocks) - 1}
+        if path.startswith("/v1/data/block/"):
+            index = int(path.rsplit("/", 1)[1])
+            self.body_requests += 1
+            if index in self.missing or index >= len(self.blocks):
+                return 404, {"status": "error"}
+            block = dict(self.blocks[index])
+            if self.corrupt_bodies:
+                block["block_hash"] = "e" * 64
+            return 200, {"data": block}
+        return 404, {"status": "error"}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class RecordingConsensus:
+    def __init__(self, reject=()):
+        self.processed = []
+        self.reject = set(reject)
+
+    def process_block(self, block_data):
+        if block_data["index"] in self.reject:
+            return {"valid": False, "error": "rejected"}
+        self.processed.append(block_data["index"])
+        return {"valid": True, "block": block_data}
+
+
+@pytest.fixture
+def chain():
+    return make_chain(300)
+
+
+@pytest.fixture
+def peers():
+    started = []
+
+    def start(*args, **kwargs):
+        peer = Peer(*args, **kwargs)
+        started.append(peer)
+        return peer
+
+    yield start
+    for peer in started:
+        peer.close()
+
+
+def make_service(peer_list, consensus=None, **kwargs):
+    return NetworkSyncService(
+        consensus_service=consensus or RecordingConsensus(),
+        bootstrap_peers=[peer.address for peer in peer_list],
+        **kwargs
+    )
+
+
+class TestHeadersFirstSync:
+    """Test the full pipeline."""
+
+    def test_parallel_sync_commits_in_order(self, chain, peers):
+        peer_list = [peers(chain), peers(chain)]
+        service = make_service(peer_list, window_size=32, max_workers=8)
+
+        result = service.sync_blocks_from_network(start_height=0, max_blocks=1000)
+
+        assert result == {"synced": 300, "failed": 0}
+        assert service.consensus_service.processed == list(range(300))
+        assert all(peer.body_requests > 0 for peer in peer_list)
+        assert service.next_height == 300
+        assert service.last_committed_hash == chain[-1]["block_hash"]
+
+    def test_bad_bodies_retried_on_another_peer(self, chain, peers):
+        good, bad = peers(chain), peers(chain, corrupt_bodies=True)
+        service = make_service([good, bad], max_workers=4)
+
+        result = service.sync_blocks_from_network(start_height=0, max_blocks=100)
+
+        assert result == {"synced": 100, "failed": 0}
+        assert service.consensus_service.processed == list(range(100))
+        assert service.peer_scores[bad.address].failures > 0
+        assert service.peer_scores[good.address].score() > service.peer_scores[bad.address].score()
+
+    def test_broken_header_links_rejected(self, chain, peers):
+        good, bad = peers(chain), peers(chain, corrupt_headers=True)
+        service = make_service([bad, good])
+        service.discover_peers()
+        service.get_latest_block_height()
+        # Make the good peer look worse so the bad one is asked first
+        service.peer_scores[good.address].failures = 1
+
+        headers = service.fetch_headers(0, 99)
+
+        assert [h["block_hash"] for h in headers] == [b["block_hash"] for b in chain[:100]]
+        assert service.peer_scores[bad.address].failures == 1
+        assert service.peer_scores[good.address].failures == 1
+
+    def test_falls_back_without_header_endpoint(self, chain, peers):
+        service = make_service([peers(chain, serve_headers=False)])
+
+        result = service.sync_blocks_from_network(start_height=0, max_blocks=50)
+
+        assert result == {"synced": 50, "failed": 0}
+        assert service.consensus_service.processed == list(range(50))
+
+    def test_stops_at_missing_block(self, chain, peers):
+        service = make_service([peers(chain, missing={40}), peers(chain, missing={40})], window_size=16)
+
+        result = service.sync_blocks_from_network(start_height=0, max_blocks=100)
+
+        assert result == {"synced": 40, "failed": 1}
+        assert service.consensus_service.processed == list(range(40))
+        assert service.next_height == 40
+
+    def test_consensus_rejection_stops_commit(self, chain, peers):
+        consensus = RecordingConsensus(reject={25})
+        service = make_service([peers(chain)], consensus=consensus)
+
+        result = service.sync_blocks_from_network(start_height=0, max_blocks=100)
+
+        assert result == {"synced": 25, "failed": 1}
+        assert consensus.processed == list(range(25))
+
+    def test_continues_from_last_commit(self, chain, peers):
+        service = make_service([peers(chain)])
+        service.sync_blocks_from_network(start_height=0, max_blocks=100)
+        result = service.sync_blocks_from_network(start_height=service.next_height, max_blocks=100)
+
+        assert result == {"synced": 100, "failed": 0}
+        assert service.consensus_service.processed == list(range(200))
@@ -0,0 +1,251 @@
+"""
+Unit Tests for the NetworkProtocol wire format
+Tests binary frames, legacy JSON envelopes and version negotiation
+"""
+
+import pytest
+import json
+import random
+import threading
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from network import (
+    NetworkProtocol, MessageType, HeaderMsg, RevealMsg, RequestMsg, ResponseMsg, RequestKind,
+    WIRE_FRAME_HEADER, WIRE_FORMAT_VERSION, LEGACY_WIRE_VERSION, HAS_MSGSPEC, HAS_ZSTD,
+    CompressionCodec, MessageCompressor, train_compression_dictionary
+)
+
+pytestmark = pytest.mark.skipif(not HAS_MSGSPEC, reason="msgspec not installed")
+
+
+@pytest.fixture
+def net():
+    return NetworkProtocol(None, None, None, peer_id="local")
+
+
+def header_msg(tip_work: int = 12345) -> HeaderMsg:
+    return HeaderMsg(header_bytes=bytes(range(200)), tip_work=tip_work, peer_id="peer-a", timestamp=1.5)
+
+
+def legacy_encode(message) -> bytes:
+    """Envelope as produced by peers that predate binary frames."""
+    return json.dumps({"codec": "none", "data": json.dumps(message.to_dict()).encode().hex()}).encode()
+
+
+class TestBinaryFrames:
+    """Test frame encoding."""
+    
+    @pytest.mark.parametrize("message", [
+        header_msg(),
+        RevealMsg(cid="QmTest", commitment=b"\x01" * 32, problem_type=1, capacity=2, timestamp=2.0),
+        RequestMsg(kind=RequestKind.GET_HEADERS, params={"start_height": 5, "count": 10}, request_id="r1", timestamp=3.0),
+        ResponseMsg(status="success", payload=b"\x00\xff", request_id="r1", timestamp=4.0)
+    ])
+    def test_roundtrip(self, net, message):
+        encoded = net.encode_message(message)
+        assert encoded[0] == WIRE_FORMAT_VERSION
+        assert net.decode_message(encoded) == message
+    
+    def test_frame_smaller_than_envelope(self, net):
+        message = header_msg()
+        frame = net.encode_message(message)
+        assert len(frame) < len(legacy_encode(message)) // 2
+        version, _, _, length = WIRE_FRAME_HEADER.unpack_from(frame)
+        assert length == len(frame) - WIRE_FRAME_HEADER.size
+    
+    def test_length_mismatch_rejected(self, net):
+        frame = net.encode_message(header_msg())
+        with pytest.raises(ValueError):
+            net.decode_message(frame[:-1])
+    
+    def test_oversized_int_falls_back_to_json(self, net):
+        message = header_msg(tip_work=2 ** 80)
+        encoded = net.encode_message(message)
+        assert encoded[:1] == b"{"
+        assert net.decode_message(encoded).tip_work == 2 ** 80
+
+
+class TestNegotiation:
+    """Test rollout alongside JSON-only peers."""
+    
+    def test_unknown_peer_gets_json_advertising_version(self, net):
+        net.update_peer("old-peer")
+        encoded = net.encode_message(header_msg())
+        envelope = json.loads(encoded)
+        assert envelope["wire"] == WIRE_FORMAT_VERSION
+        assert net.decode_message(encoded) == header_msg()
+    
+    def test_legacy_sender_stays_on_json(self, net, monkeypatch):
+        monkeypatch.setitem(net.message_handlers, MessageType.HEADER, lambda peer_id, message: True)
+        assert net.handle_message("old-peer", "headers", legacy_encode(header_msg()))
+        assert net.peer_wire_versions["old-peer"] == LEGACY_WIRE_VERSION
+        assert net.encode_message(header_msg(), peer_id="old-peer")[:1] == b"{"
+    
+    def test_advertisement_enables_frames(self, net, monkeypatch):
+        monkeypatch.setitem(net.message_handlers, MessageType.HEADER, lambda peer_id, message: True)
+        sender = NetworkProtocol(None, None, None, peer_id="new-peer")
+        sender.update_peer("local")
+        
+        assert net.handle_message("new-peer", "headers", sender.encode_message(header_msg()))
+        assert net.encode_message(header_msg(), peer_id="new-peer")[0] == WIRE_FORMAT_VERSION
+    
+    def test_gossip_waits_for_every_peer(self, net):
+        net.update_peer("new-peer")
+        net.update_peer("old-peer")
+        net.negotiate_wire_version("new-peer", WIRE_FORMAT_VERSION)
+        assert net.wire_version_for() == LEGACY_WIRE_VERSION
+        net.negotiate_wire_version("old-peer", WIRE_FORMAT_VERSION)
+        assert net.wire_version_for() == WIRE_FORMAT_VERSION
+
+
+@pytest.fixture(scope="module")
+def dictionary():
+    if not HAS_ZSTD:
+        pytest.skip("zstandard not installed")
+    rng = random.Random(5)
+    net = NetworkProtocol(None, None, None)
+    samples = []
+    for i in range(500):
+        message = HeaderMsg(
+            header_bytes=b"\x01" + rng.randbytes(32) + bytes(48) + i.to_bytes(8, "big"),
+            tip_work=i * 1000,
+            peer_id=f"node-miner-{i % 7}",
+            timestamp=1700000000.0 + i
+        )
+        samples.append(net.training_sample(net.encode_message(message)))
+    return train_compression_dictionary(samples, 4096)
+
+
+def dictionary_pair(dictionary):
+    sender = NetworkProtocol(None, None, None, peer_id="a", compression_dictionary=dictionary)
+    receiver = NetworkProtocol(None, None, None, peer_id="b", compression_dictionary=dictionary)
+    return sender, receiver
+
+
+class TestCompression:
+    """Test MessageCompressor contexts, dictionaries and counters."""
+    
+    def test_contexts_cached_per_thread(self):
+        if not HAS_ZSTD:
+            pytest.skip("zstandard not installed")
+        compressor = MessageCompressor()
+        first = compressor._compressor()
+        assert compressor._compressor() is first
+        
+        other = []
+        thread = threading.Thread(target=lambda: other.append(compressor._compressor()))
+        thread.start()
+        thread.join()
+        assert other[0] is not first
+    
+    def test_dictionary_frames_roundtrip(self, dictionary):
+        sender, receiver = dictionary_pair(dictionary)
+        message = header_msg()
+        frame = sender.encode_message(message)
+        assert frame[2] == 3  # zstd_dict codec id
+        assert receiver.decode_message(frame) == message
+        assert len(frame) < len(NetworkProtocol(None, None, None).encode_message(message))
+    
+    def test_unknown_dictionary_rejected(self, dictionary):
+        sender, _ = dictionary_pair(dictionary)
+        with pytest.raises(ValueError):
+            NetworkProtocol(None, None, None).decode_message(sender.encode_message(header_msg()))
+    
+    def test_dictionary_only_for_peers_that_advertised_it(self, dictionary, monkeypatch):
+        sender, receiver = dictionary_pair(dictionary)
+        plain = NetworkProtocol(None, None, None, peer_id="c")
+        for net in (sender, receiver, plain):
+            monkeypatch.setitem(net.message_handlers, MessageType.HEADER, lambda peer_id, message: True)
+        sender.update_peer("b")
+        sender.update_peer("c")
+        
+        # Envelopes carry the handshake: wire version and dictionary IDs
+        assert receiver.handle_message("a", "headers", sender.encode_message(header_msg(), peer_id="b"))
+        assert receiver.peer_dictionaries["a"] == {sender.compressor.dict_id}
+        assert sender.handle_message("b", "headers", receiver.encode_message(header_msg(), peer_id="a"))
+        assert sender.handle_message("c", "headers", plain.encode_message(header_msg(), peer_id="a"))
+        assert sender.peer_dictionaries["c"] == set()
+        
+        assert sender.encode_message(header_msg(), peer_id="b")[2] == 3
+        frame = sender.encode_message(header_msg(), peer_id="c")
+        assert frame[0] == WIRE_FORMAT_VERSION and frame[2] != 3
+        assert plain.decode_message(frame) == header_msg()
+        # Gossip only uses the dictionary if every peer holds it
+        assert sender.encode_message(header_msg())[2] != 3
+
+    def test_publish_encodes_per_dictionary_use(self, dictionary, monkeypatch):
+        sender, receiver = dictionary_pair(dictionary)
+        plain = NetworkProtocol(None, None, None, peer_id="c")
+        for net in (sender, receiver, plain):
+            monkeypatch.setitem(net.message_handlers, MessageType.HEADER, lambda peer_id, message: True)
+        sender.update_peer("b")
+        sender.update_peer("c")
+        assert sender.handle_message("b", "headers", receiver.encode_message(header_msg(), peer_id="a"))
+        assert sender.handle_message("c", "headers", plain.encode_message(header_msg(), peer_id="a"))
+        sent = []
+        monkeypatch.setattr(sender.gossip, "publish_many", sent.extend)
+
+        sender._publish("headers", header_msg())
+
+        frames = {peer_id: frame for peer_id, _, frame in sent}
+        assert frames["b"][2] == 3
+        assert frames["c"][0] == WIRE_FORMAT_VERSION and frames["c"][2] != 3
+        assert receiver.decode_message(frames["b"]) == header_msg()
+        assert plain.decode_message(frames["c"]) == header_msg()
+
+    def test_legacy_envelope_never_uses_dictionary(self, dictionary):
+        sender, _ = dictionary_pair(dictionary)
+        sender.update_peer("old-peer")
+        encoded = sender.encode_message(header_msg())
+        assert json.loads(encoded)["codec"] != CompressionCodec.ZSTD_DICT.value
+    
+    def test_stats(self, dictionary):
+        sender, receiver = dictionary_pair(dictionary)
+        for _ in range(5):
+            receiver.decode_message(sender.encode_message(header_msg()))
+        sent = sender.compressor.get_stats()["zstd_dict"]
+        assert sent["messages"] == 5
+        assert sent["ratio"] > 1.0
+        assert sent["avg_compress_us"] > 0
+        assert receiver.compressor.get_stats()["zstd_dict"]["decompressed"] == 5
+    
+    def test_incompressible_sent_plain(self):
+        compressor = MessageCompressor(threshold=0)
+        data = random.Random(1).randbytes(2048)
+        assert compressor.compress(data) == (data, CompressionCodec.NONE)
+    
+    def test_capture(self, net, tmp_path, monkeypatch):
+        monkeypatch.setitem(net.message_handlers, MessageType.HEADER, lambda peer_id, message: True)
+        path = str(tmp_path / "capture.ndjson")
+        net.start_capture(path, limit=2)
+        for _ in range(3):
+            net.handle_message("peer", "headers", net.encode_message(header_msg()))
+        with open(path) as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 2
+        assert net.decode_message(bytes.fromhex(json.loads(lines[0]))) == header_msg()
+    
+    def test_capture_from_concurrent_handlers(self, net, tmp_path, monkeypatch):
+        monkeypatch.setitem(net.message_handlers, MessageType.HEADER, lambda peer_id, message: True)
+        monkeypatch.setattr(net.rate_limiter, "is_allowed", lambda peer_id: True)
+        path = str(tmp_path / "capture.ndjson")
+        net.start_capture(path, limit=150)
+        encoded = net.encode_message(header_msg())
+        
+        def receive(peer):
+            for _ in range(50):
+                net.handle_message(peer, "headers", encoded)
+        
+        threads = [threading.Thread(target=receive, args=(f"peer-{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with open(path) as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 150
+        assert all(net.decode_message(bytes.fromhex(json.loads(line))) == header_msg() for line in lines)
@@ -0,0 +1,136 @@
+"""
+Unit Tests for Node service composition
+Tests that a started node gossips through its LibP2PHost and follows
+new best tips
+"""
+
+import pytest
+import time
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import consensus
+from consensus import ConsensusEngine
+from core.blockchain import Block, ProblemTier
+from node import Node, NodeConfig, NodeRole
+
+
+def make_child(parent: Block) -> Block:
+    block = Block(
+        index=parent.index + 1,
+        timestamp=parent.timestamp + 1,
+        previous_hash=parent.block_hash,
+        transactions=[],
+        merkle_root="1" * 64,
+        problem={"type": "subset_sum", "numbers": [1, 2, 3], "target": 3, "size": 3},
+        solution=[1, 2],
+        complexity=object(),
+        mining_capacity=ProblemTier.TIER_1_MOBILE,
+        cumulative_work_score=0.0,
+        block_hash=""
+    )
+    block.block_hash = block.calculate_hash()
+    return block
+
+
+def make_genesis() -> Block:
+    genesis = Block(
+        index=0,
+        timestamp=1609459200.0,
+        previous_hash="0" * 64,
+        transactions=[],
+        merkle_root="0" * 64,
+        problem={},
+        solution=[],
+        complexity=None,
+        mining_capacity=ProblemTier.TIER_1_MOBILE,
+        cumulative_work_score=0.0,
+        block_hash=""
+    )
+    genesis.block_hash = genesis.calculate_hash()
+    return genesis
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def make_node(tmp_path, monkeypatch):
+    """Factory for started nodes with a local genesis (no network or IPFS)."""
+    import requests
+
+    def offline(*args, **kwargs):
+        raise requests.ConnectionError("offline")
+
+    monkeypatch.setattr(requests, "get", offline)
+    monkeypatch.setattr(ConsensusEngine, "_build_genesis", lambda self: make_genesis())
+    monkeypatch.setattr(consensus, "calculate_work_score", lambda complexity: 1.0)
+    nodes = []
+
+    def factory(role=NodeRole.FULL, **config):
+        node = Node(NodeConfig(role=role, data_dir=str(tmp_path / f"node{len(nodes)}"), **config))
+        assert node.init()
+        assert node.start()
+        nodes.append(node)
+        return node
+
+    yield factory
+    for node in nodes:
+        node.stop()
+
+
+class TestNodeNetwork:
+    """Test the node's network wiring."""
+
+    def test_gossips_through_libp2p_host(self, make_node):
+        node = make_node()
+        host = node.p2p_host
+        assert node.network.gossip.transport is host
+        assert node.network.peers
+        assert set(node.network.peers) == set(host.get_connected_peers())
+
+        sent = []
+        send_message = host.send_message
+
+        async def record(peer_id, protocol, message):
+            sent.append((peer_id, protocol))
+            return await send_message(peer_id, protocol, message)
+
+        host.send_message = record
+        node.network.announce_proof("QmFromNode")
+        assert wait_for(lambda: len(sent) == len(node.network.peers))
+        assert node.network.gossip.wait_idle()
+        assert {protocol for _, protocol in sent} == {node.network.topics["commit_reveal"]}
+        assert node.network.gossip.stats["failed"] == 0
+
+        node.stop()
+        assert node.p2p_host is None and node.network is None
+
+
+class TestNodeMining:
+    """Test how the node reacts to new tips."""
+
+    def test_new_best_tip_cancels_mining(self, make_node):
+        node = make_node()
+        assert node.best_tip_hash == node.consensus.genesis_block.block_hash
+        assert not node._mining_cancel.is_set()
+
+        block = make_child(node.consensus.genesis_block)
+        node.consensus._add_block_to_tree(block, receipt_time=time.time())
+        assert node._mining_cancel.is_set()
+        assert node.best_tip_hash == block.block_hash
+        assert node.current_block_height == 1
+
+        # Re-announcing the current tip leaves the next solve alone
+        node._mining_cancel.clear()
+        node.on_new_tip(block.block_hash, 1)
+        assert not node._mining_cancel.is_set()
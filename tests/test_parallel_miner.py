@@ -0,0 +1,71 @@
+"""
+Unit Tests for the process-pool mining engine
+Tests partitioned search, inline small problems and cancellation
+"""
+
+import pytest
+import random
+import threading
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.blockchain import verify_subset_sum, generate_subset_sum_problem, ProblemTier
+from core.parallel_miner import ParallelMiner, MiningCancelledError, _solve_partition
+
+
+@pytest.fixture
+def miner():
+    miner = ParallelMiner(workers=2, tasks_per_worker=2)
+    yield miner
+    miner.close()
+
+
+def large_target_problem(seed: int, size: int = 22) -> dict:
+    """Problem whose target is too large for the bitset DP."""
+    rng = random.Random(seed)
+    numbers = [rng.randint(1, 10 ** 12) for _ in range(size)]
+    return {'numbers': numbers, 'target': sum(numbers[1::3])}
+
+
+class TestParallelMiner:
+    """Test the parallel mining engine."""
+
+    def test_partitions_cover_search(self):
+        numbers = [5, 9, 14, 20, 3]
+        prefix_len = 2
+        found = [_solve_partition(numbers, 23, prefix_len, mask) for mask in range(1 << prefix_len)]
+        for indices in filter(None, found):
+            assert sum(numbers[i] for i in indices) == 23
+        assert any(found)
+
+    def test_parallel_solution_verifies(self, miner):
+        for seed in range(3):
+            problem = large_target_problem(seed)
+            solution = miner.solve(problem)
+            assert solution
+            assert verify_subset_sum(problem, solution)
+        assert miner._executor is not None
+
+    def test_small_problem_solved_inline(self, miner):
+        problem = {'numbers': [3, 34, 4, 12, 5, 2], 'target': 9}
+        assert verify_subset_sum(problem, miner.solve(problem))
+        assert miner._executor is None
+
+    def test_every_tier_solved_inline(self, miner):
+        for seed, tier in enumerate(ProblemTier):
+            problem = generate_subset_sum_problem(seed=seed, tier=tier)
+            assert verify_subset_sum(problem, miner.solve(problem))
+        assert miner._executor is None
+
+    def test_unsolvable(self, miner):
+        numbers = [2 * 10 ** 12 + 2 * i for i in range(12)]
+        assert miner.find(numbers, 10 ** 12 + 1) is None
+
+    def test_cancel_aborts_search(self, miner):
+        cancel = threading.Event()
+        cancel.set()
+        with pytest.raises(MiningCancelledError):
+            miner.solve(large_target_problem(0), cancel=cancel)
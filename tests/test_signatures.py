@@ -0,0 +1,193 @@
+"""
+Unit Tests for batched Ed25519 signature verification
+Tests batch results, key and result caches, the process pool fallback and
+the transaction and block signature callers
+"""
+
+import pytest
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from cryptography.hazmat.primitives import serialization
+
+from core.signatures import SignatureVerifier, verify_transactions
+from core.blockchain import Transaction as CoreTransaction
+from tokenomics.blockchain_state import BlockchainState, Transaction
+from tokenomics.wallet import Wallet
+
+
+def make_keys(count):
+    keys = []
+    for _ in range(count):
+        private_key = ed25519.Ed25519PrivateKey.generate()
+        keys.append((private_key, private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.Raw, format=serialization.PublicFormat.Raw)))
+    return keys
+
+
+def signed_items(count, signers=5):
+    keys = make_keys(signers)
+    items = []
+    for i in range(count):
+        private_key, public_key = keys[i % signers]
+        message = f"message-{i}".encode()
+        items.append((public_key.hex(), message, private_key.sign(message).hex()))
+    return items
+
+
+def corrupt(item):
+    public_key, message, signature = item
+    return (public_key, message + b"!", signature)
+
+
+@pytest.fixture
+def pooled():
+    verifier = SignatureVerifier(workers=2, pool_threshold=16)
+    yield verifier
+    verifier.close()
+
+
+class TestSignatureVerifier:
+    """Test the verifier on its own."""
+
+    def test_batch_matches_single_verification(self):
+        verifier = SignatureVerifier(workers=1)
+        items = signed_items(40)
+        items[3] = corrupt(items[3])
+        items[17] = (items[17][0], items[17][1], "zz")
+        items[25] = (items[25][0][:10], items[25][1], items[25][2])
+        items[30] = (items[30][0], items[30][1], bytes.fromhex(items[30][2]))
+
+        expected = [i not in (3, 17, 25) for i in range(40)]
+        assert verifier.verify_batch(items) == expected
+        assert [SignatureVerifier(workers=1).verify(*item) for item in items] == expected
+        assert not verifier.all_valid(items)
+        assert verifier.all_valid(items[:3])
+
+    def test_keys_parsed_once_and_results_cached(self):
+        verifier = SignatureVerifier(workers=1)
+        items = signed_items(50, signers=4)
+        assert all(verifier.verify_batch(items))
+        assert len(verifier._keys) == 4
+        assert verifier.verifications == 50
+
+        # Already verified, and duplicates inside a batch, cost no verify
+        assert all(verifier.verify_batch(items + items[:10]))
+        assert verifier.verifications == 50
+        assert verifier.cache_hits == 60
+
+    def test_rejected_signatures_are_not_cached(self):
+        verifier = SignatureVerifier(workers=1)
+        bad = corrupt(signed_items(1)[0])
+        assert verifier.verify_batch([bad, bad]) == [False, False]
+        assert not verifier.verify(*bad)
+        assert verifier.cache_hits == 0
+
+    def test_caches_are_bounded(self):
+        verifier = SignatureVerifier(workers=1, key_cache_size=3, verified_cache_size=10)
+        assert all(verifier.verify_batch(signed_items(30, signers=6)))
+        assert len(verifier._keys) == 3
+        assert len(verifier._verified) == 10
+
+    def test_pool_finds_bad_signature(self, pooled):
+        items = signed_items(200, signers=7)
+        items[123] = corrupt(items[123])
+        results = pooled.verify_batch(items)
+        assert pooled._executor is not None
+        assert pooled._executor._mp_context.get_start_method() in ("forkserver", "spawn")
+        assert [i for i, ok in enumerate(results) if not ok] == [123]
+        # Small batches stay in process
+        assert pooled.verify_batch(signed_items(3)) == [True, True, True]
+
+    def test_broken_pool_falls_back_in_process(self, pooled):
+        assert all(pooled.verify_batch(signed_items(64)))
+        for process in list(pooled._executor._processes.values()):
+            process.kill()
+            process.join()
+
+        items = signed_items(64)
+        items[40] = corrupt(items[40])
+        results = pooled.verify_batch(items)
+        assert [i for i, ok in enumerate(results) if not ok] == [40]
+        assert pooled._executor is None
+
+        # The next large batch gets a fresh pool
+        assert all(pooled.verify_batch(signed_items(64)))
+        assert pooled._executor is not None
+
+
+class TestCallers:
+    """Test the transaction and block signature paths."""
+
+    @pytest.mark.parametrize("transaction_class", [Transaction, CoreTransaction])
+    def test_transaction_signatures(self, transaction_class):
+        (private_key, _), = make_keys(1)
+        raw_key = private_key.private_bytes(encoding=serialization.Encoding.Raw,
+                                            format=serialization.PrivateFormat.Raw,
+                                            encryption_algorithm=serialization.NoEncryption())
+        transactions = [transaction_class("BEANS" + "0" * 40, "BEANS" + "1" * 40, 1.0 + i, 1700000000.0 + i)
+                        for i in range(5)]
+        for tx in transactions:
+            tx.sign(raw_key)
+        transactions[2].amount = 99.0
+        transactions[4].signature = ""
+
+        assert [tx.verify_signature() for tx in transactions] == [True, True, False, True, False]
+        assert verify_transactions(transactions, SignatureVerifier(workers=1)) == [True, True, False, True, False]
+
+    def test_state_validates_block_in_one_batch(self):
+        wallet = Wallet.generate_new()
+        raw_key = wallet.get_private_key_bytes()
+        state = BlockchainState()
+        state.update_balance(wallet.address, 1000.0)
+        transactions = [Transaction(wallet.address, "BEANS" + "1" * 40, 1.0, 1700000000.0 + i) for i in range(20)]
+        for tx in transactions:
+            tx.sign(raw_key)
+        transactions[7].amount = 500.0
+        coinbase = state.create_coinbase_transaction("BEANS" + "2" * 40, 50.0, 1700000000.0)
+
+        results = state.validate_transactions(transactions + [coinbase])
+        assert results == [i != 7 for i in range(20)] + [True]
+
+    def test_block_transactions_verified_in_one_batch(self, monkeypatch):
+        wallet = Wallet.generate_new()
+        raw_key = wallet.get_private_key_bytes()
+        state = BlockchainState()
+        transactions = [Transaction(wallet.address, "BEANS" + "1" * 40, 1.0, 1700000000.0 + i) for i in range(20)]
+        for tx in transactions:
+            tx.sign(raw_key)
+        coinbase = state.create_coinbase_transaction(wallet.address, 50.0, 1700000000.0)
+
+        batches = []
+        verify_batch = SignatureVerifier.verify_batch
+
+        def record(self, items):
+            batches.append(len(items))
+            return verify_batch(self, items)
+
+        monkeypatch.setattr(SignatureVerifier, "verify_batch", record)
+        tampered = Transaction.from_dict(dict(transactions[5].to_dict(), amount=2.0))
+        assert not state.process_transactions([coinbase] + transactions[:5] + [tampered])
+        assert state.get_balance(wallet.address) == 0.0
+        assert not state.is_processed(coinbase.transaction_id)
+
+        batches.clear()
+        assert state.process_transactions([coinbase] + transactions)
+        assert batches == [20]
+        assert state.get_balance(wallet.address) == 30.0
+
+    def test_block_signatures(self):
+        wallet = Wallet.generate_new()
+        public_key = wallet.get_public_key_bytes().hex()
+        blocks = [{"index": i, "previous_hash": f"{i:064x}"} for i in range(4)]
+        signatures = [wallet.sign_block(block) for block in blocks]
+
+        assert Wallet.verify_block_signature(public_key, blocks[0], signatures[0])
+        entries = [(public_key, block, signature) for block, signature in zip(blocks, signatures)]
+        entries[1] = (public_key, blocks[2], signatures[1])
+        entries[3] = (public_key, blocks[3], "not-hex")
+        assert Wallet.verify_block_signatures(entries) == [True, False, True, False]
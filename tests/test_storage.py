@@ -0,0 +1,454 @@
+"""
+Unit Tests for StorageManager
+Tests the SQLite connection layer, grouped commits and round-trips
+"""
+
+import pytest
+import asyncio
+import sqlite3
+import threading
+import sys
+import os
+import json
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from storage import (
+    StorageManager, StorageConfig, NodeRole, PruningMode, SQLiteConnectionManager, DurabilityTicket,
+    STORAGE_FORMAT_MSGPACK_V1
+)
+from core.blockchain import Block, ProblemTier
+
+
+def make_block(index: int, previous_hash: str = "0" * 64) -> Block:
+    """Build a minimal block suitable for header/block storage."""
+    block = Block(
+        index=index,
+        timestamp=1609459200.0 + index,
+        previous_hash=previous_hash,
+        transactions=[],
+        merkle_root="1" * 64,
+        problem={"type": "subset_sum", "numbers": [1, 2, 3], "target": 3, "size": 3},
+        solution=[1, 2],
+        complexity=None,
+        mining_capacity=ProblemTier.TIER_1_MOBILE,
+        cumulative_work_score=float(index),
+        block_hash=""
+    )
+    block.block_hash = block.calculate_hash()
+    return block
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """Create a StorageManager backed by a temporary directory."""
+    config = StorageConfig(
+        data_dir=str(tmp_path),
+        role=NodeRole.FULL,
+        pruning_mode=PruningMode.FULL
+    )
+    manager = StorageManager(config)
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def pipelined_storage(tmp_path):
+    """Create a StorageManager with the group-commit pipeline running."""
+    config = StorageConfig(
+        data_dir=str(tmp_path),
+        role=NodeRole.FULL,
+        pruning_mode=PruningMode.FULL,
+        write_pipeline=True,
+        batch_size=50,
+        flush_interval=0.2
+    )
+    manager = StorageManager(config)
+    yield manager
+    manager.close()
+
+
+class TestConnectionManager:
+    """Test the long-lived writer and per-thread reader pool."""
+
+    def test_wal_mode_enabled(self, storage):
+        """The writer switches the database into WAL mode."""
+        mode = storage._db.reader().execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+
+    def test_synchronous_level_applied(self, tmp_path):
+        """The configured synchronous level is applied to connections."""
+        db = SQLiteConnectionManager(str(tmp_path / "sync.db"), synchronous="full")
+        try:
+            # PRAGMA synchronous reports FULL as 2
+            assert db.reader().execute("PRAGMA synchronous").fetchone()[0] == 2
+        finally:
+            db.close()
+
+    def test_invalid_synchronous_level(self, tmp_path):
+        """Unknown synchronous levels are rejected."""
+        with pytest.raises(ValueError):
+            SQLiteConnectionManager(str(tmp_path / "bad.db"), synchronous="SOMETIMES")
+
+    def test_reader_reused_per_thread(self, storage):
+        """Each thread keeps one reader connection."""
+        assert storage._db.reader() is storage._db.reader()
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(storage._db.reader()))
+        thread.start()
+        thread.join()
+
+        assert other[0] is not storage._db.reader()
+
+    def test_readers_are_query_only(self, storage):
+        """Reader connections refuse writes."""
+        with pytest.raises(sqlite3.OperationalError):
+            storage._db.reader().execute("DELETE FROM headers")
+
+    def test_closed_manager_rejects_use(self, tmp_path):
+        """Operations after close raise instead of reopening."""
+        db = SQLiteConnectionManager(str(tmp_path / "closed.db"))
+        db.close()
+        with pytest.raises(sqlite3.ProgrammingError):
+            db.reader()
+
+
+class TestGroupedCommits:
+    """Test grouping writes into a single transaction."""
+
+    def test_transaction_groups_writes(self, storage):
+        """Writes inside transaction() become visible together on commit."""
+        block = make_block(1)
+        seen_from_other_thread = []
+
+        with storage.transaction():
+            assert storage.store_header(block)
+            assert storage.store_work_index(1, 10, block.block_hash)
+
+            # Not yet committed: another thread must not see the header
+            thread = threading.Thread(
+                target=lambda: seen_from_other_thread.append(storage.get_header(block.block_hash))
+            )
+            thread.start()
+            thread.join()
+
+        assert seen_from_other_thread == [None]
+        assert storage.get_header(block.block_hash) is not None
+        assert storage.get_work_at_height(1) == 10
+
+    def test_read_your_writes_inside_transaction(self, storage):
+        """The owning thread reads its own uncommitted writes."""
+        block = make_block(1)
+        with storage.transaction():
+            storage.store_header(block)
+            assert storage.get_header(block.block_hash).index == 1
+
+    def test_transaction_rolls_back_on_error(self, storage):
+        """An exception discards every write in the group."""
+        block = make_block(1)
+        with pytest.raises(RuntimeError):
+            with storage.transaction():
+                storage.store_header(block)
+                raise RuntimeError("abort")
+
+        assert storage.get_header(block.block_hash) is None
+
+
+class TestRoundTrip:
+    """Test basic store/get round-trips."""
+
+    def test_header_round_trip(self, storage):
+        block = make_block(3)
+        assert storage.store_header(block)
+        header = storage.get_header(block.block_hash)
+        assert header.index == 3
+        assert header.previous_hash == block.previous_hash
+        assert header.mining_capacity == ProblemTier.TIER_1_MOBILE
+
+    def test_block_round_trip(self, storage):
+        block = make_block(2)
+        assert storage.store_block(block)
+        stored = storage.get_block(block.calculate_hash())
+        assert stored.problem == block.problem
+        assert stored.solution == block.solution
+
+    def test_tips_and_commitments(self, storage):
+        assert storage.store_tip("a" * 64, 5)
+        assert storage.store_tip("b" * 64, 9)
+        assert storage.get_tips()[0] == ("b" * 64, 9)
+
+        assert storage.store_commitment(b"c" * 32, "QmTest", 1, 2)
+        assert storage.get_commitment_cid(b"c" * 32) == "QmTest"
+
+    def test_batch_write(self, storage):
+        block = make_block(4)
+        storage.batch_write([
+            ("header", (block, storage._serialize_header(block))),
+            ("work_index", (4, 40, block.block_hash)),
+        ])
+        assert storage.get_header(block.calculate_hash()) is not None
+        assert storage.get_work_at_height(4) == 40
+
+
+class TestWritePipeline:
+    """Test the group-commit write pipeline."""
+
+    def test_direct_batch_write_returns_committed_ticket(self, storage):
+        """Without the pipeline, batch_write commits before returning."""
+        ticket = storage.batch_write([("tip", ("a" * 64, 1))])
+        assert ticket.done
+        assert ticket.wait(0)
+
+    def test_all_write_types_accepted(self, pipelined_storage):
+        block = make_block(1)
+        ticket = pipelined_storage.batch_write([
+            ("block", block),
+            ("header", block),
+            ("tip", (block.block_hash, 1)),
+            ("work_index", (1, 1, block.block_hash)),
+            ("commit_index", (b"c" * 32, "QmTest", 1, 2)),
+        ])
+        assert ticket.wait(5)
+
+        assert pipelined_storage.get_block(block.calculate_hash()) is not None
+        assert pipelined_storage.get_header(block.block_hash) is not None
+        assert pipelined_storage.get_tips() == [(block.block_hash, 1)]
+        assert pipelined_storage.get_work_at_height(1) == 1
+        assert pipelined_storage.get_commitment_cid(b"c" * 32) == "QmTest"
+
+    def test_unknown_operation_rejected(self, pipelined_storage):
+        assert pipelined_storage.batch_write([("bogus", None)]) is None
+
+    def test_writes_grouped_into_few_commits(self, pipelined_storage):
+        """A burst of writes is committed in far fewer transactions."""
+        pipeline = pipelined_storage._pipeline
+        tickets = [
+            pipelined_storage.batch_write([("work_index", (h, h, "h" * 64))])
+            for h in range(200)
+        ]
+        assert all(ticket.wait(5) for ticket in tickets)
+        assert pipeline.statements_committed == 200
+        assert pipeline.batches_committed < 20
+
+    def test_reads_see_queued_writes(self, pipelined_storage):
+        """Reads of a key with queued writes drain the queue first."""
+        block = make_block(3)
+        assert pipelined_storage.store_work_index(7, 70, "h" * 64)
+        assert pipelined_storage.get_work_at_height(7) == 70
+        assert pipelined_storage.store_header(block)
+        assert pipelined_storage.get_headers_range(3, 1) != []
+        assert pipelined_storage.store_tip("t" * 64, 5)
+        assert pipelined_storage.get_tips() == [("t" * 64, 5)]
+
+    def test_batches_coalesce_under_interleaved_reads(self, pipelined_storage):
+        """Reads of committed keys do not flush the queued writes."""
+        pipeline = pipelined_storage._pipeline
+        block = make_block(1)
+        assert pipelined_storage.batch_write([("header", block), ("work_index", (1, 1, block.block_hash))]).wait(5)
+        committed = pipeline.batches_committed
+
+        tickets = []
+        for h in range(100, 300):
+            tickets.append(pipelined_storage.batch_write([("work_index", (h, h, "h" * 64))]))
+            assert pipelined_storage.get_header(block.block_hash) is not None
+            assert pipelined_storage.get_work_at_height(1) == 1
+            assert len(pipelined_storage.get_headers_range(0, 10)) == 1
+        assert all(ticket.wait(5) for ticket in tickets)
+        assert pipeline.batches_committed - committed < 20
+        assert pipelined_storage._pending_keys == {}
+
+    def test_failed_unit_only_fails_its_ticket(self, pipelined_storage):
+        """One bad write does not take the rest of the batch down with it."""
+        good = pipelined_storage._pipeline.submit([(
+            "INSERT OR REPLACE INTO tips (tip_hash, cumulative_work) VALUES (?, ?)", (b"g" * 64, 1)
+        )])
+        bad = pipelined_storage._pipeline.submit([("INSERT INTO missing_table VALUES (?)", (1,))])
+
+        assert good.wait(5) is True
+        assert bad.wait(5) is False
+        assert bad.error is not None
+
+    def test_transaction_queues_one_unit(self, pipelined_storage):
+        """Writes grouped by transaction() are committed together."""
+        block = make_block(2)
+        with pipelined_storage.transaction():
+            pipelined_storage.store_header(block)
+            pipelined_storage.store_tip(block.block_hash, 2)
+            assert pipelined_storage._pipeline.pending == 0
+
+        assert pipelined_storage.flush(5)
+        assert pipelined_storage.get_header(block.block_hash) is not None
+
+    def test_ticket_is_awaitable(self, pipelined_storage):
+        async def write():
+            return await pipelined_storage.batch_write([("tip", ("z" * 64, 3))])
+
+        assert asyncio.run(write()) is True
+
+    def test_close_commits_queued_writes(self, tmp_path):
+        config = StorageConfig(
+            data_dir=str(tmp_path),
+            role=NodeRole.FULL,
+            pruning_mode=PruningMode.FULL,
+            write_pipeline=True,
+            flush_interval=10.0
+        )
+        manager = StorageManager(config)
+        ticket = manager.batch_write([("work_index", (3, 30, "h" * 64))])
+        manager.close()
+        assert ticket.done and ticket.wait(0)
+
+        reopened = StorageManager(StorageConfig(
+            data_dir=str(tmp_path), role=NodeRole.FULL, pruning_mode=PruningMode.FULL
+        ))
+        assert reopened.get_work_at_height(3) == 30
+        reopened.close()
+
+    def test_committed_ticket(self):
+        ticket = DurabilityTicket.committed()
+        assert ticket.done and ticket.error is None
+
+
+def legacy_header_json(block: Block) -> bytes:
+    """Header row exactly as the JSON-only storage wrote it."""
+    return json.dumps({
+        'index': block.index,
+        'timestamp': block.timestamp,
+        'previous_hash': block.previous_hash,
+        'merkle_root': block.merkle_root,
+        'mining_capacity': block.mining_capacity.value,
+        'cumulative_work_score': block.cumulative_work_score,
+        'block_hash': block.block_hash,
+        'offchain_cid': None
+    }).encode()
+
+
+class TestStorageFormat:
+    """Test the binary row format and the legacy JSON migration."""
+
+    def test_rows_written_as_msgpack(self, storage):
+        block = make_block(1)
+        header_bytes = storage._serialize_header(block)
+        block_bytes = storage._serialize_block(block)
+        assert header_bytes[0] == STORAGE_FORMAT_MSGPACK_V1
+        assert block_bytes[0] == STORAGE_FORMAT_MSGPACK_V1
+        assert len(header_bytes) < len(legacy_header_json(block)) // 2
+
+    def test_block_round_trip_keeps_all_fields(self, storage):
+        block = make_block(5)
+        block.offchain_cid = "QmTestCid"
+        block.proof_commitment = "ab" * 32
+        stored = storage._deserialize_block(storage._serialize_block(block))
+        assert stored.block_hash == block.block_hash
+        assert stored.merkle_root == block.merkle_root
+        assert stored.previous_hash == block.previous_hash
+        assert stored.offchain_cid == "QmTestCid"
+        assert stored.proof_commitment == block.proof_commitment
+        assert stored.calculate_hash() == block.calculate_hash()
+
+    def test_non_hex_hashes_preserved(self, storage):
+        """Values that are not canonical hex hashes are stored verbatim."""
+        block = make_block(1, previous_hash="genesis")
+        block.merkle_root = "A" * 64
+        header = storage._deserialize_header(storage._serialize_header(block))
+        assert header.previous_hash == "genesis"
+        assert header.merkle_root == "A" * 64
+
+    def test_legacy_json_rows_still_decode(self, storage):
+        block = make_block(2)
+        storage.batch_write([("header", (block, legacy_header_json(block)))])
+        header = storage.get_header(block.block_hash)
+        assert header.index == 2
+        assert header.block_hash == block.block_hash
+
+    def test_json_format_option(self, tmp_path):
+        manager = StorageManager(StorageConfig(
+            data_dir=str(tmp_path), role=NodeRole.FULL, pruning_mode=PruningMode.FULL,
+            storage_format="json"
+        ))
+        try:
+            block = make_block(1)
+            assert manager._serialize_block(block).startswith(b"{")
+            assert manager.store_block(block)
+            assert manager.get_block(block.calculate_hash()).index == 1
+        finally:
+            manager.close()
+
+    def test_migration_rewrites_legacy_rows(self, tmp_path):
+        config = dict(data_dir=str(tmp_path), role=NodeRole.FULL, pruning_mode=PruningMode.FULL)
+        blocks = [make_block(i) for i in range(5)]
+
+        legacy = StorageManager(StorageConfig(storage_format="json", **config))
+        for block in blocks:
+            legacy.batch_write([("header", block), ("block", block)])
+        legacy.close()
+
+        manager = StorageManager(StorageConfig(**config))
+        try:
+            stats = manager.migrate_storage_format(batch_size=2)
+            assert stats == {'headers': 5, 'blocks': 5, 'failed': 0}
+            assert manager.migrate_storage_format() == {'headers': 0, 'blocks': 0, 'failed': 0}
+
+            rows = manager._db.reader().execute("SELECT header_bytes FROM headers").fetchall()
+            assert all(row[0][0] == STORAGE_FORMAT_MSGPACK_V1 for row in rows)
+            for block in blocks:
+                assert manager.get_header(block.block_hash).index == block.index
+                assert manager.get_block(block.calculate_hash()).solution == block.solution
+        finally:
+            manager.close()
+
+
+class TestHeaderRanges:
+    """Test height-indexed header range scans."""
+
+    @pytest.fixture
+    def chain(self, storage):
+        blocks = []
+        previous_hash = "0" * 64
+        for height in range(10):
+            block = make_block(height, previous_hash)
+            blocks.append(block)
+            previous_hash = block.block_hash
+        storage.batch_write([("header", block) for block in blocks])
+        return blocks
+
+    def test_range_in_height_order(self, storage, chain):
+        headers = storage.get_headers_range(3, 4)
+        assert [header.index for header in headers] == [3, 4, 5, 6]
+        assert headers[0].block_hash == chain[3].block_hash
+
+    def test_range_past_tip_is_truncated(self, storage, chain):
+        assert [h.index for h in storage.get_headers_range(8, 100)] == [8, 9]
+        assert storage.get_headers_range(50, 10) == []
+        assert storage.get_headers_range(0, 0) == []
+
+    def test_raw_range_returns_stored_bytes(self, storage, chain):
+        raw = storage.get_headers_range(2, 2, raw=True)
+        assert raw == [storage._serialize_header(chain[2]), storage._serialize_header(chain[3])]
+
+    def test_work_index_selects_header_at_fork_height(self, storage, chain):
+        sibling = make_block(5, "f" * 64)
+        storage.store_header(sibling)
+        assert len(storage.get_headers_range(5, 1)) == 2
+
+        storage.store_work_index(5, 5, chain[5].block_hash)
+        headers = storage.get_headers_range(5, 1)
+        assert [header.block_hash for header in headers] == [chain[5].block_hash]
+
+    def test_iter_headers(self, storage, chain):
+        assert [h.index for h in storage.iter_headers(chunk_size=3)] == list(range(10))
+        assert [h.index for h in storage.iter_headers(4, 7, chunk_size=2)] == [4, 5, 6]
+        assert len(list(storage.iter_headers(raw=True))) == 10
+
+    def test_iter_headers_empty_store(self, storage):
+        assert list(storage.iter_headers()) == []
+
+    def test_get_headers_rpc_serves_range(self, storage, chain):
+        from network import NetworkProtocol
+
+        net = NetworkProtocol(None, storage, None)
+        payload = json.loads(net._handle_get_headers({"start_height": 1, "count": 3}))
+        headers = [storage._deserialize_header(bytes.fromhex(item)) for item in payload]
+        assert [header.index for header in headers] == [1, 2, 3]
@@ -0,0 +1,86 @@
+"""
+Unit Tests for the Subset Sum solver engine
+Tests the bitset, meet-in-the-middle and sparse backends against verify_subset_sum
+"""
+
+import pytest
+import random
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.blockchain import (
+    PROBLEM_REGISTRY, ProblemTier, generate_subset_sum_problem, solve_subset_sum, verify_subset_sum
+)
+from core import subset_sum_solver
+from core.subset_sum_solver import find_subset_sum, solve_subset_sum_fast
+
+
+def check_indices(numbers, target, indices):
+    assert indices is not None
+    assert len(set(indices)) == len(indices)
+    assert sum(numbers[i] for i in indices) == target
+
+
+class TestSubsetSumSolver:
+    """Test the solver backends."""
+
+    @pytest.mark.parametrize("tier", list(ProblemTier))
+    def test_registry_solutions_verify(self, tier):
+        for seed in range(20):
+            problem = generate_subset_sum_problem(seed=f"seed-{seed}", tier=tier)
+            solution = PROBLEM_REGISTRY.solve(problem)
+            assert solution
+            assert verify_subset_sum(problem, solution)
+
+    def test_matches_reference_solvability(self):
+        rng = random.Random(7)
+        for _ in range(50):
+            numbers = [rng.randint(1, 30) for _ in range(10)]
+            target = rng.randint(1, 200)
+            problem = {'numbers': numbers, 'target': target}
+            assert bool(solve_subset_sum_fast(problem)) == bool(solve_subset_sum(problem))
+
+    def test_large_target_uses_meet_in_middle(self, monkeypatch):
+        monkeypatch.setattr(subset_sum_solver, "_solve_bitset", None)
+        rng = random.Random(11)
+        numbers = [rng.randint(1, 10 ** 12) for _ in range(30)]
+        target = sum(numbers[::4])
+        check_indices(numbers, target, find_subset_sum(numbers, target))
+
+    def test_sparse_fallback(self, monkeypatch):
+        monkeypatch.setattr(subset_sum_solver, "MITM_MAX_ITEMS", 0)
+        monkeypatch.setattr(subset_sum_solver, "BITSET_MAX_BITS", 0)
+        numbers = [3, 34, 4, 12, 5, 2]
+        check_indices(numbers, 9, find_subset_sum(numbers, 9))
+        assert find_subset_sum(numbers, 100) is None
+
+    def test_non_positive_numbers(self):
+        numbers = [-7, 3, 10, -2, 5, 8]
+        for target in (-9, 1, 6, 16):
+            check_indices(numbers, target, find_subset_sum(numbers, target))
+
+    def test_unsolvable(self):
+        assert find_subset_sum([2, 4, 6], 5) is None
+        assert solve_subset_sum_fast({'numbers': [2, 4, 6], 'target': 5}) == []
+
+    def test_subset_sum_blocks_match_full_enumeration(self, monkeypatch):
+        monkeypatch.setattr(subset_sum_solver, "SUBSET_SUM_BLOCK_BITS", 3)
+        rng = random.Random(5)
+        numbers = [rng.randint(-100, 100) for _ in range(8)]
+        streamed = []
+        for base, sums in subset_sum_solver._subset_sum_blocks(numbers):
+            assert base == len(streamed)
+            streamed += sums
+        assert streamed == subset_sum_solver._subset_sums(numbers)
+
+    def test_meet_in_middle_caps_left_half(self, monkeypatch):
+        monkeypatch.setattr(subset_sum_solver, "_solve_bitset", None)
+        monkeypatch.setattr(subset_sum_solver, "MITM_MAX_LEFT_ITEMS", 4)
+        monkeypatch.setattr(subset_sum_solver, "SUBSET_SUM_BLOCK_BITS", 3)
+        rng = random.Random(13)
+        numbers = [rng.randint(1, 10 ** 12) for _ in range(16)]
+        target = sum(numbers[1::3])
+        check_indices(numbers, target, find_subset_sum(numbers, target))